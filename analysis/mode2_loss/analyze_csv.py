@@ -5,6 +5,7 @@ import argparse
 import json
 import math
 import os
+import re
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Set
 
@@ -15,12 +16,23 @@ ensure_deps()
 import pandas as pd
 import numpy as np
 
+from confidence import interval
+from geo import haversine_m
+from schema import parquet_available, write_parquet, write_table
+
 
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser()
     p.add_argument("--input", required=True, help="Input file or directory")
     p.add_argument("--out", required=True, help="Output directory")
+    p.add_argument("--config", default="analysis/mode2_loss/sweep_config.yaml", help="Sweep config (run_sweep.py --config) whose sweep_points are kept when --input is a sweep directory")
     p.add_argument("--emergency-tx-id", type=int, default=2, help="Emergency vehicle stationId (default: 2)")
+    p.add_argument("--streaming", action="store_true", help="Compute msg_log metrics chunk by chunk instead of loading every -MSG.csv into memory (AoI/latency quantiles become histogram estimates)")
+    p.add_argument("--chunk-rows", type=int, default=200000, help="Rows per chunk in --streaming mode (default: 200000)")
+    p.add_argument("--parquet", action="store_true", help="Also write typed Parquet datasets (<name>.parquet/, partitioned by run_id) next to the CSVs; needs pyarrow")
+    p.add_argument("--ci-level", type=float, default=0.95, help="Confidence level for intervals over RngRun replicates (default: 0.95)")
+    p.add_argument("--ci-method", choices=["t", "bootstrap"], default="t", help="Replicate CI method (default: t)")
+    p.add_argument("--bootstrap-samples", type=int, default=2000, help="Resamples for --ci-method bootstrap (default: 2000)")
     return p.parse_args()
 
 
@@ -33,12 +45,25 @@ def extract_sweep_point_id(path: Path) -> Optional[str]:
     return None
 
 
+def extract_sweep_seed(path: Path) -> Optional[str]:
+    # replicate runs live in sweep/<point_id>/seed_<n>/
+    parts = path.parts
+    if "sweep" in parts:
+        idx = parts.index("sweep")
+        if idx + 2 < len(parts):
+            m = re.fullmatch(r"seed_(\d+)", parts[idx + 2])
+            if m:
+                return m.group(1)
+    return None
+
+
 def parse_run_id(path: Path) -> str:
     point_id = extract_sweep_point_id(path)
     if point_id:
-        return point_id
+        seed = extract_sweep_seed(path)
+        return f"{point_id}_seed{seed}" if seed is not None else point_id
     name = path.stem
-    for token in ["-veh", "-server", "-sinr_ni", "-phy_with", "-prr_with", "-MSG", "-CAM"]:
+    for token in ["-veh", "-server", "-sinr_ni", "-phy_with", "-prr_with", "-metsup", "-MSG", "-CAM"]:
         if token in name:
             return name.split(token)[0]
     return name
@@ -57,12 +82,11 @@ def infer_tech(run_id: str) -> str:
     return "unknown"
 
 
-def load_sweep_ids(in_path: Path) -> Optional[Set[str]]:
+def load_sweep_ids(in_path: Path, cfg_path: Path) -> Optional[Set[str]]:
     if not in_path.is_dir():
         return None
     if "sweep" not in in_path.parts:
         return None
-    cfg_path = Path("analysis/mode2_loss/sweep_config.yaml")
     if not cfg_path.exists():
         return None
     try:
@@ -93,6 +117,12 @@ def detect_type(df: pd.DataFrame, fname: str) -> str:
         return "msg_log"
     if {"tx_id", "rx_id", "distance", "rssi", "snr"}.issubset(cols):
         return "sionna_phy"
+    if {"msg_type", "station_type", "bucket", "count"}.issubset(cols):
+        return "metsup_latency"
+    if {"msg_type", "station_type", "samples", "sum_s", "min_s", "max_s"}.issubset(cols):
+        return "metsup_latency_summary"
+    if {"msg_type", "distance_low_m", "distance_high_m", "expected", "received"}.issubset(cols):
+        return "metsup_prr_distance"
     if {"node_id", "prr"}.issubset(cols):
         return "sionna_prr"
     if {"time", "rx", "tx", "rx_lat", "rx_lon", "tx_lat", "tx_lon", "technology", "distance", "los", "sinr"}.issubset(cols):
@@ -100,17 +130,6 @@ def detect_type(df: pd.DataFrame, fname: str) -> str:
     return "unknown"
 
 
-def haversine_m(lat1, lon1, lat2, lon2):
-    r = 6371000.0
-    phi1 = np.radians(lat1)
-    phi2 = np.radians(lat2)
-    dphi = np.radians(lat2 - lat1)
-    dlambda = np.radians(lon2 - lon1)
-    a = np.sin(dphi / 2.0) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2.0) ** 2
-    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
-    return r * c
-
-
 def compute_behavior_metrics(df_vs: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
     metrics = []
     for (run_id, tech, vehicle_id), g in df_vs.groupby(["run_id", "tech", "vehicle_id"], dropna=False):
@@ -223,25 +242,14 @@ def compute_behavior_metrics(df_vs: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Data
     return metrics_df, agg_df
 
 
-def compute_comm_metrics(df_msg: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-    if df_msg.empty:
-        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
-
-    df = df_msg.copy()
-    df["rx_ok"] = pd.to_numeric(df["rx_ok"], errors="coerce").fillna(0).astype(int)
-    df["tx_t_s"] = pd.to_numeric(df["tx_t_s"], errors="coerce")
-    df["rx_t_s"] = pd.to_numeric(df["rx_t_s"], errors="coerce")
-
-    tx = df[df["rx_ok"] == 0].copy()
-    rx = df[df["rx_ok"] == 1].copy()
-
-    # PRR per receiver: received / expected (all tx excluding self)
-    tx_total = tx.groupby(["run_id", "tech"], dropna=False).size().rename("sent_total")
-    tx_by_sender = tx.groupby(["run_id", "tech", "tx_id"], dropna=False).size().rename("sent_by_sender")
-    rx_by_receiver = rx.groupby(["run_id", "tech", "rx_id"], dropna=False).size().rename("received")
+def build_prr_frames(tx_total, tx_by_sender, rx_by_receiver) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Per-vehicle and run-level PRR from sent/received counts.
 
+    The three arguments are mappings (Series or dict) keyed by ``(run_id, tech)``,
+    ``(run_id, tech, tx_id)`` and ``(run_id, tech, rx_id)`` respectively.
+    """
     prr_rows = []
-    idx_vehicle = set(tx_by_sender.index) | set(rx_by_receiver.index)
+    idx_vehicle = set(tx_by_sender.keys()) | set(rx_by_receiver.keys())
     for run_id, tech, veh_id in idx_vehicle:
         sent_total = tx_total.get((run_id, tech), 0)
         sent_self = tx_by_sender.get((run_id, tech, veh_id), 0)
@@ -257,10 +265,33 @@ def compute_comm_metrics(df_msg: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFra
             "msg_type": "CAM",
         })
     prr = pd.DataFrame(prr_rows)
+    if prr.empty:
+        return prr, pd.DataFrame()
 
     # Run-level PRR
     run_prr = prr.groupby(["run_id", "tech"], dropna=False).agg({"sent": "sum", "received": "sum"}).reset_index()
     run_prr["prr"] = run_prr.apply(lambda r: r["received"] / r["sent"] if r["sent"] > 0 else np.nan, axis=1)
+    return prr, run_prr
+
+
+def compute_comm_metrics(df_msg: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    if df_msg.empty:
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+    df = df_msg.copy()
+    df["rx_ok"] = pd.to_numeric(df["rx_ok"], errors="coerce").fillna(0).astype(int)
+    df["tx_t_s"] = pd.to_numeric(df["tx_t_s"], errors="coerce")
+    df["rx_t_s"] = pd.to_numeric(df["rx_t_s"], errors="coerce")
+
+    tx = df[df["rx_ok"] == 0].copy()
+    rx = df[df["rx_ok"] == 1].copy()
+
+    # PRR per receiver: received / expected (all tx excluding self)
+    tx_total = tx.groupby(["run_id", "tech"], dropna=False).size().rename("sent_total")
+    tx_by_sender = tx.groupby(["run_id", "tech", "tx_id"], dropna=False).size().rename("sent_by_sender")
+    rx_by_receiver = rx.groupby(["run_id", "tech", "rx_id"], dropna=False).size().rename("received")
+
+    prr, run_prr = build_prr_frames(tx_total, tx_by_sender, rx_by_receiver)
 
     # AoI per receiver
     aoi_rows = []
@@ -288,7 +319,7 @@ def compute_comm_metrics(df_msg: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFra
         rx_key = rx[key_cols + ["rx_t_s"]].dropna(subset=["rx_t_s"]).copy()
         merged = rx_key.merge(tx_key, on=key_cols, how="left")
         merged["latency_s"] = merged["rx_t_s"] - merged["tx_t_s"]
-        merged = merged[(merged["latency_s"] >= 0) & (merged["latency_s"] < 10)]
+        merged = merged[(merged["latency_s"] >= 0) & (merged["latency_s"] < LATENCY_MAX_S)]
         for (run_id, tech), g in merged.groupby(["run_id", "tech"], dropna=False):
             lat_rows.append({
                 "run_id": run_id,
@@ -336,7 +367,10 @@ def compute_reaction_metrics(df_msg: pd.DataFrame, emergency_tx_id: int) -> Tupl
             })
 
     reaction_vehicle_df = pd.DataFrame(rows)
+    return reaction_vehicle_df, aggregate_reaction_run(reaction_vehicle_df)
 
+
+def aggregate_reaction_run(reaction_vehicle_df: pd.DataFrame) -> pd.DataFrame:
     agg = []
     if not reaction_vehicle_df.empty:
         for (run_id, tech), g in reaction_vehicle_df.groupby(["run_id", "tech"], dropna=False):
@@ -351,8 +385,432 @@ def compute_reaction_metrics(df_msg: pd.DataFrame, emergency_tx_id: int) -> Tupl
                     "reaction_delay_p90": float(np.nanpercentile(vals, 90)),
                     "reaction_received_frac": received_frac,
                 })
-    reaction_run_df = pd.DataFrame(agg)
-    return reaction_vehicle_df, reaction_run_df
+    return pd.DataFrame(agg)
+
+
+CI_METRICS = ["prr", "latency_p95_s", "aoi_mean_s", "aoi_p95_s", "reaction_delay_median", "reaction_delay_p90"]
+
+
+def compute_replicate_metrics(comm_run_df: pd.DataFrame, latency_run_df: pd.DataFrame, aoi_vehicle_df: pd.DataFrame, reaction_run_df: pd.DataFrame) -> pd.DataFrame:
+    """One row per run with the run-level values that replicate CIs are taken over."""
+    key = ["run_id", "tech"]
+    frames = []
+    if not comm_run_df.empty:
+        frames.append(comm_run_df[key + ["prr"]])
+    if not latency_run_df.empty:
+        frames.append(latency_run_df[key + ["latency_p95_s"]])
+    if not aoi_vehicle_df.empty:
+        frames.append(aoi_vehicle_df.groupby(key, dropna=False).agg(
+            aoi_mean_s=("aoi_mean_s", "mean"),
+            aoi_p95_s=("aoi_p95_s", "mean"),
+        ).reset_index())
+    if not reaction_run_df.empty:
+        frames.append(reaction_run_df[key + ["reaction_delay_median", "reaction_delay_p90"]])
+    if not frames:
+        return pd.DataFrame()
+    out = frames[0]
+    for f in frames[1:]:
+        out = out.merge(f, on=key, how="outer")
+    return out
+
+
+def compute_seed_ci(replicate_df: pd.DataFrame, run_to_point: Dict[str, str], level: float, method: str, samples: int) -> pd.DataFrame:
+    """Mean and CI of each CI_METRICS column over the replicate runs of every sweep point."""
+    if replicate_df.empty:
+        return pd.DataFrame()
+    rep = replicate_df.copy()
+    rep["point_id"] = rep["run_id"].map(lambda r: run_to_point.get(r, r))
+    rows = []
+    for (point_id, tech), g in rep.groupby(["point_id", "tech"], dropna=False):
+        if g["run_id"].nunique() < 2:
+            continue
+        for metric in CI_METRICS:
+            if metric not in g.columns:
+                continue
+            vals = pd.to_numeric(g[metric], errors="coerce").dropna().to_numpy()
+            ci = interval(vals, level, method, samples)
+            if ci is None:
+                continue
+            mean, low, high = ci
+            rows.append({
+                "point_id": point_id,
+                "tech": tech,
+                "metric": metric,
+                "n_seeds": int(vals.size),
+                "mean": mean,
+                "ci_low": low,
+                "ci_high": high,
+                "ci_width": high - low,
+                "ci_level": level,
+                "ci_method": method,
+            })
+    return pd.DataFrame(rows)
+
+
+MSG_LOG_COLUMNS = ["vehicle_id", "msg_seq", "tx_t_s", "rx_t_s", "rx_ok", "msg_type", "tx_id", "rx_id", "cam_gdt_ms"]
+LATENCY_KEY_COLS = ["tx_id", "msg_seq"]
+# receptions later than this after the matching transmission are not counted as latency samples
+LATENCY_MAX_S = 10.0
+
+
+def _id_key(value):
+    # groupby(dropna=False) puts every missing id in one group; NaN != NaN in a dict, so map it to None.
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+
+class LogHistogram:
+    """Fixed-memory histogram with log-spaced buckets for non-negative samples.
+
+    Count, mean, min and max are exact; quantiles are interpolated inside a bucket,
+    so their relative error is bounded by the bucket width (~1.2% with the defaults).
+    Two histograms with the same layout can be merged by adding their buckets.
+    """
+
+    LOW = 1e-6
+    HIGH = 1e4
+    BUCKETS_PER_DECADE = 200
+
+    def __init__(self) -> None:
+        decades = int(round(math.log10(self.HIGH / self.LOW)))
+        # edges[0] == 0 catches zero/sub-LOW samples, the last bucket is open-ended
+        self.edges = np.concatenate(([0.0], np.logspace(math.log10(self.LOW), math.log10(self.HIGH), decades * self.BUCKETS_PER_DECADE + 1)))
+        self.counts = np.zeros(self.edges.size, dtype=np.int64)
+        self.n = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values) & (values >= 0)]
+        if values.size == 0:
+            return
+        idx = np.searchsorted(self.edges, values, side="right") - 1
+        self.counts += np.bincount(idx, minlength=self.counts.size)
+        self.n += int(values.size)
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other: "LogHistogram") -> None:
+        self.counts += other.counts
+        self.n += other.n
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def mean(self) -> float:
+        return self.total / self.n if self.n else np.nan
+
+    def quantile(self, pct: float) -> float:
+        """Approximates np.percentile(samples, pct) with linear interpolation."""
+        if self.n == 0:
+            return np.nan
+        rank = pct / 100.0 * (self.n - 1)
+        cum = np.cumsum(self.counts)
+        b = int(np.searchsorted(cum, rank, side="right"))
+        b = min(b, self.counts.size - 1)
+        before = cum[b] - self.counts[b]
+        lo = max(self.edges[b], self.min)
+        hi = min(self.edges[b + 1] if b + 1 < self.edges.size else self.max, self.max)
+        frac = (rank - before + 0.5) / self.counts[b]
+        return float(lo + min(max(frac, 0.0), 1.0) * max(hi - lo, 0.0))
+
+
+class StreamingCommMetrics:
+    """Chunked equivalent of compute_comm_metrics + compute_reaction_metrics.
+
+    Feed one run at a time: ``begin_run`` once, ``add_chunk`` for every chunk of
+    the run's msg_log rows in time order (see ``iter_time_ordered``), then
+    ``end_run``. Only counters, per-receiver last-seen times, histograms and the
+    (tx_id, msg_seq) -> tx_t_s rows of the last LATENCY_MAX_S seconds are kept, so
+    memory does not grow with the number of rows or with the simulated time.
+    Accumulators of disjoint runs can be combined with ``merge``.
+    """
+
+    def __init__(self, emergency_tx_id: int) -> None:
+        self.emergency_tx_id = emergency_tx_id
+        self.sent_total: Dict[Tuple, int] = {}
+        self.sent_by_sender: Dict[Tuple, int] = {}
+        self.received_by_receiver: Dict[Tuple, int] = {}
+        self.aoi: Dict[Tuple, LogHistogram] = {}
+        self.latency: Dict[Tuple, LogHistogram] = {}
+        self.vehicle_ids: Dict[Tuple, Set[float]] = {}
+        self.first_emergency_rx: Dict[Tuple, float] = {}
+        self._run: Optional[Tuple[str, str]] = None
+        self._aoi_last: Dict = {}
+        self._tx_times: Optional[pd.DataFrame] = None
+
+    def begin_run(self, run_id: str, tech: str) -> None:
+        self._run = (run_id, tech)
+        self._aoi_last = {}
+        self._tx_times = None
+
+    def end_run(self) -> None:
+        self._run = None
+        self._aoi_last = {}
+        self._tx_times = None
+
+    @staticmethod
+    def _coerce(chunk: pd.DataFrame) -> pd.DataFrame:
+        chunk = chunk.copy()
+        chunk["rx_ok"] = pd.to_numeric(chunk["rx_ok"], errors="coerce").fillna(0).astype(int)
+        for c in ["tx_t_s", "rx_t_s"]:
+            if c in chunk.columns:
+                chunk[c] = pd.to_numeric(chunk[c], errors="coerce")
+        return chunk
+
+    def _count(self, target: Dict[Tuple, int], ids: pd.Series) -> None:
+        for key, n in ids.value_counts(dropna=False).items():
+            k = self._run + (_id_key(key),)
+            target[k] = target.get(k, 0) + int(n)
+
+    def add_chunk(self, chunk: pd.DataFrame) -> None:
+        if self._run is None:
+            raise RuntimeError("add_chunk() called outside begin_run()/end_run()")
+        chunk = self._coerce(chunk)
+        tx = chunk[chunk["rx_ok"] == 0]
+        rx = chunk[chunk["rx_ok"] == 1]
+
+        self.sent_total[self._run] = self.sent_total.get(self._run, 0) + len(tx)
+        self._count(self.sent_by_sender, tx["tx_id"])
+        self._count(self.received_by_receiver, rx["rx_id"])
+
+        # AoI: gaps between consecutive receptions, carrying the last timestamp across chunks
+        rx_times = rx[["rx_id", "rx_t_s"]].dropna(subset=["rx_t_s"]).sort_values("rx_t_s", kind="stable")
+        for rx_id, g in rx_times.groupby("rx_id", dropna=False, sort=False):
+            key = self._run + (_id_key(rx_id),)
+            t = g["rx_t_s"].to_numpy(dtype=float)
+            last = self._aoi_last.get(key)
+            if last is not None:
+                t = np.concatenate(([last], t))
+            if t.size >= 2:
+                self.aoi.setdefault(key, LogHistogram()).add(np.diff(t))
+            self._aoi_last[key] = float(t[-1])
+
+        # Latency: hash join of this chunk's receptions against the recent transmissions. A
+        # transmission can only match receptions less than LATENCY_MAX_S later, and the
+        # following chunks start after this one ends, so older rows are evicted.
+        if "msg_seq" in chunk.columns:
+            tx_key = tx[LATENCY_KEY_COLS + ["tx_t_s"]].dropna(subset=["tx_t_s"])
+            if not tx_key.empty:
+                self._tx_times = tx_key if self._tx_times is None else pd.concat([self._tx_times, tx_key], ignore_index=True)
+            if self._tx_times is not None and not rx.empty:
+                rx_key = rx[LATENCY_KEY_COLS + ["rx_t_s"]].dropna(subset=["rx_t_s"])
+                merged = rx_key.merge(self._tx_times, on=LATENCY_KEY_COLS, how="left")
+                lat = (merged["rx_t_s"] - merged["tx_t_s"]).to_numpy(dtype=float)
+                lat = lat[(lat >= 0) & (lat < LATENCY_MAX_S)]
+                if lat.size:
+                    self.latency.setdefault(self._run, LogHistogram()).add(lat)
+            if self._tx_times is not None:
+                chunk_end = np.nanmax(np.concatenate((chunk["tx_t_s"].to_numpy(dtype=float), chunk["rx_t_s"].to_numpy(dtype=float), [-np.inf])))
+                self._tx_times = self._tx_times[self._tx_times["tx_t_s"] > chunk_end - LATENCY_MAX_S]
+
+        # Reaction delay: first reception of an emergency-vehicle message per receiver
+        tx_num = pd.to_numeric(chunk["tx_id"], errors="coerce")
+        rx_num = pd.to_numeric(chunk["rx_id"], errors="coerce")
+        ids = self.vehicle_ids.setdefault(self._run, set())
+        ids.update(pd.unique(pd.concat([tx_num, rx_num], ignore_index=True).dropna()).tolist())
+        em = chunk.assign(rx_num=rx_num)[(chunk["rx_ok"] == 1) & (tx_num == self.emergency_tx_id)]
+        if not em.empty:
+            for rx_id, t in em.groupby("rx_num", dropna=False)["rx_t_s"].min().items():
+                key = self._run + (_id_key(rx_id),)
+                prev = self.first_emergency_rx.get(key)
+                if prev is None or (not pd.isna(t) and (pd.isna(prev) or t < prev)):
+                    self.first_emergency_rx[key] = t
+
+    def merge(self, other: "StreamingCommMetrics") -> None:
+        for name in ["sent_total", "sent_by_sender", "received_by_receiver"]:
+            mine = getattr(self, name)
+            for k, v in getattr(other, name).items():
+                mine[k] = mine.get(k, 0) + v
+        for name in ["aoi", "latency"]:
+            mine = getattr(self, name)
+            for k, h in getattr(other, name).items():
+                if k in mine:
+                    mine[k].merge(h)
+                else:
+                    mine[k] = h
+        for k, ids in other.vehicle_ids.items():
+            self.vehicle_ids.setdefault(k, set()).update(ids)
+        for k, t in other.first_emergency_rx.items():
+            prev = self.first_emergency_rx.get(k)
+            if prev is None or (not pd.isna(t) and (pd.isna(prev) or t < prev)):
+                self.first_emergency_rx[k] = t
+
+    def results(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """Frames with the same layout as compute_comm_metrics + compute_reaction_metrics."""
+        prr, run_prr = build_prr_frames(self.sent_total, self.sent_by_sender, self.received_by_receiver)
+
+        aoi_rows = []
+        for (run_id, tech, rx_id), h in self.aoi.items():
+            aoi_rows.append({
+                "run_id": run_id,
+                "tech": tech,
+                "vehicle_id": rx_id,
+                "aoi_mean_s": float(h.mean()),
+                "aoi_p95_s": h.quantile(95),
+                "aoi_max_s": float(h.max),
+            })
+
+        lat_rows = []
+        for (run_id, tech), h in self.latency.items():
+            lat_rows.append({
+                "run_id": run_id,
+                "tech": tech,
+                "latency_mean_s": float(h.mean()),
+                "latency_p95_s": h.quantile(95),
+                "latency_max_s": float(h.max),
+                "latency_samples": int(h.n),
+            })
+
+        reaction_rows = []
+        if self.first_emergency_rx:
+            for (run_id, tech), ids in self.vehicle_ids.items():
+                for vid in ids:
+                    if int(vid) == int(self.emergency_tx_id):
+                        continue
+                    delay = self.first_emergency_rx.get((run_id, tech, vid))
+                    reaction_rows.append({
+                        "run_id": run_id,
+                        "tech": tech,
+                        "vehicle_id": vid,
+                        "reaction_delay_s": float(delay) if delay is not None and not pd.isna(delay) else np.nan,
+                    })
+        reaction_vehicle_df = pd.DataFrame(reaction_rows)
+
+        return (
+            prr,
+            run_prr,
+            pd.DataFrame(aoi_rows),
+            pd.DataFrame(lat_rows),
+            reaction_vehicle_df,
+            aggregate_reaction_run(reaction_vehicle_df),
+        )
+
+
+def _event_time(chunk: pd.DataFrame) -> np.ndarray:
+    # receptions are logged at rx_t_s, transmissions (rx_t_s empty) at tx_t_s
+    t = pd.to_numeric(chunk["rx_t_s"], errors="coerce").fillna(pd.to_numeric(chunk["tx_t_s"], errors="coerce"))
+    return t.ffill().fillna(-np.inf).cummax().to_numpy(dtype=float)
+
+
+def iter_time_ordered(paths: List[Path], chunk_rows: int):
+    """Yield the rows of several msg_log CSVs merged in time order, about ``chunk_rows`` at a time.
+
+    Every file is assumed to be in time order already (the per-vehicle -MSG.csv files
+    are written as the simulation advances); each one is read ``chunk_rows / len(paths)``
+    rows at a time, and the rows of all files up to the earliest end of the buffered
+    pieces are merged, keeping each file's own order.
+    """
+    per_file = max(1, chunk_rows // max(1, len(paths)))
+    readers = [pd.read_csv(path, chunksize=per_file) for path in paths]
+    pending: Dict[int, Tuple[pd.DataFrame, np.ndarray]] = {}
+
+    def refill(i: int) -> None:
+        for chunk in readers[i]:
+            if not chunk.empty:
+                pending[i] = (chunk, _event_time(chunk))
+                return
+        pending.pop(i, None)
+
+    for i in range(len(readers)):
+        refill(i)
+    while pending:
+        bound = min(t[-1] for _, t in pending.values())
+        parts = []
+        times = []
+        for i in list(pending):
+            chunk, t = pending[i]
+            n = int(np.searchsorted(t, bound, side="right"))
+            if n:
+                parts.append(chunk.iloc[:n])
+                times.append(t[:n])
+            if n == len(chunk):
+                refill(i)
+            else:
+                pending[i] = (chunk.iloc[n:], t[n:])
+        order = np.argsort(np.concatenate(times), kind="stable")
+        yield pd.concat(parts, ignore_index=True).iloc[order].reset_index(drop=True)
+
+
+def stream_msg_logs(msg_files: List[Tuple[str, str, Path]], emergency_tx_id: int, chunk_rows: int, msg_log_out: Optional[Path], parquet: bool = False) -> StreamingCommMetrics:
+    """Run StreamingCommMetrics over msg_log CSVs without loading them at once.
+
+    ``msg_files`` holds ``(run_id, tech, path)``; the files of the same run are read
+    together, merged in time order. When ``msg_log_out`` is given the rows are
+    appended there in the same layout as the in-memory msg_log.csv (sorted by time
+    within a run instead of by file), and with ``parquet`` also to the
+    msg_log.parquet dataset next to it.
+    """
+    acc = StreamingCommMetrics(emergency_tx_id)
+    by_run: Dict[Tuple[str, str], List[Path]] = {}
+    for run_id, tech, path in msg_files:
+        by_run.setdefault((run_id, tech), []).append(path)
+
+    wrote_header = False
+    part = 0
+    if msg_log_out is not None and msg_log_out.exists():
+        msg_log_out.unlink()
+
+    for (run_id, tech), paths in by_run.items():
+        acc.begin_run(run_id, tech)
+        for chunk in iter_time_ordered(paths, chunk_rows):
+            acc.add_chunk(chunk)
+            if msg_log_out is not None:
+                out = chunk.reindex(columns=MSG_LOG_COLUMNS)
+                out.insert(0, "tech", tech)
+                out.insert(0, "run_id", run_id)
+                out.to_csv(msg_log_out, mode="a", header=not wrote_header, index=False)
+                wrote_header = True
+                if parquet:
+                    write_parquet(out, msg_log_out.parent, "msg_log", part=part)
+                    part += 1
+        acc.end_run()
+    return acc
+
+
+def compute_metsup_metrics(latency_frames: List[pd.DataFrame], summary_frames: List[pd.DataFrame], prr_frames: List[pd.DataFrame]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Run-level latency percentiles and PRR vs distance from the MetricSupervisor streaming CSVs.
+
+    The simulator writes the non-empty buckets of its latency histograms (same layout
+    as LogHistogram) and exact count/sum/min/max per message type and sender station
+    type; the station types are merged here, so no per-packet log is needed.
+    """
+    latency_rows = []
+    if latency_frames and summary_frames:
+        buckets = pd.concat(latency_frames, ignore_index=True)
+        summary = pd.concat(summary_frames, ignore_index=True)
+        keys = ["run_id", "tech", "msg_type"]
+        for key, g in summary.groupby(keys, dropna=False, observed=True):
+            hist = LogHistogram()
+            hist.n = int(g["samples"].sum())
+            hist.total = float(g["sum_s"].sum())
+            hist.min = float(g["min_s"].min())
+            hist.max = float(g["max_s"].max())
+            b = buckets[(buckets["run_id"] == key[0]) & (buckets["tech"] == key[1]) & (buckets["msg_type"] == key[2])]
+            idx = b["bucket"].to_numpy(dtype=np.int64)
+            hist.counts += np.bincount(idx, weights=b["count"].to_numpy(dtype=float), minlength=hist.counts.size).astype(np.int64)
+            latency_rows.append({
+                "run_id": key[0],
+                "tech": key[1],
+                "msg_type": key[2],
+                "latency_samples": hist.n,
+                "latency_mean_s": hist.mean(),
+                "latency_p50_s": hist.quantile(50),
+                "latency_p95_s": hist.quantile(95),
+                "latency_p99_s": hist.quantile(99),
+                "latency_max_s": hist.max if hist.n else np.nan,
+            })
+
+    prr_df = pd.DataFrame()
+    if prr_frames:
+        prr = pd.concat(prr_frames, ignore_index=True)
+        prr_df = prr.groupby(["run_id", "tech", "msg_type", "distance_low_m", "distance_high_m"], dropna=False, as_index=False)[["expected", "received"]].sum()
+        prr_df["prr"] = prr_df["received"] / prr_df["expected"].where(prr_df["expected"] > 0)
+    return pd.DataFrame(latency_rows), prr_df
 
 
 def main() -> None:
@@ -360,19 +818,25 @@ def main() -> None:
     in_path = Path(args.input)
     out_dir = Path(args.out)
     out_dir.mkdir(parents=True, exist_ok=True)
+    if args.parquet and not parquet_available():
+        raise SystemExit("--parquet needs pyarrow, which is optional (pip install pyarrow==17.0.0); the CSV outputs do not")
 
     files = []
     if in_path.is_file():
         files = [in_path]
     else:
         files = sorted([p for p in in_path.rglob("*.csv")])
-    sweep_ids = load_sweep_ids(in_path)
+    sweep_ids = load_sweep_ids(in_path, Path(args.config))
 
     vehicle_state_rows: List[Dict] = []
     comm_stats_rows: List[Dict] = []
     sionna_phy_rows: List[Dict] = []
     coexistence_phy_rows: List[Dict] = []
     msg_log_rows: List[Dict] = []
+    msg_log_files: List[Tuple[str, str, Path]] = []
+    metsup_latency_frames: List[pd.DataFrame] = []
+    metsup_summary_frames: List[pd.DataFrame] = []
+    metsup_prr_frames: List[pd.DataFrame] = []
 
     # Metadata JSON in sweep runs
     metadata_rows: List[Dict] = []
@@ -385,25 +849,36 @@ def main() -> None:
         except Exception:
             continue
     run_id_to_tech: Dict[str, str] = {}
+    run_id_to_point: Dict[str, str] = {}
     for data in metadata_rows:
         run_id = data.get("run_id")
         scenario = str(data.get("scenario", ""))
         tech = infer_tech(scenario)
         if run_id and tech != "unknown":
             run_id_to_tech[run_id] = tech
+        if run_id and data.get("sweep_point_id"):
+            run_id_to_point[run_id] = data["sweep_point_id"]
 
     for f in files:
         point_id = extract_sweep_point_id(f)
         if sweep_ids is not None and point_id and point_id not in sweep_ids:
             continue
-        try:
-            df = pd.read_csv(f)
-        except Exception:
-            continue
         run_id = parse_run_id(f)
         tech = infer_tech(run_id)
         if run_id in run_id_to_tech:
             tech = run_id_to_tech[run_id]
+        if args.streaming:
+            try:
+                header = pd.read_csv(f, nrows=0)
+            except Exception:
+                continue
+            if detect_type(header, f.name) == "msg_log":
+                msg_log_files.append((run_id, tech, f))
+                continue
+        try:
+            df = pd.read_csv(f)
+        except Exception:
+            continue
         ftype = detect_type(df, f.name)
 
         if ftype == "cam_state":
@@ -492,6 +967,16 @@ def main() -> None:
                     "prr": row.get("prr"),
                 })
 
+        elif ftype in ("metsup_latency", "metsup_latency_summary", "metsup_prr_distance"):
+            df.insert(0, "tech", tech)
+            df.insert(0, "run_id", run_id)
+            df["msg_type"] = df["msg_type"].astype(str)
+            {
+                "metsup_latency": metsup_latency_frames,
+                "metsup_latency_summary": metsup_summary_frames,
+                "metsup_prr_distance": metsup_prr_frames,
+            }[ftype].append(df)
+
         elif ftype == "coexistence_phy":
             t_raw = df["time"].astype(float)
             # heuristic: if time is large, assume microseconds
@@ -524,8 +1009,17 @@ def main() -> None:
 
     behavior_vehicle_df, behavior_run_df = compute_behavior_metrics(df_vs) if not df_vs.empty else (pd.DataFrame(), pd.DataFrame())
 
-    comm_vehicle_df, comm_run_df, aoi_vehicle_df, latency_run_df = compute_comm_metrics(df_msg) if not df_msg.empty else (pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
-    reaction_vehicle_df, reaction_run_df = compute_reaction_metrics(df_msg, args.emergency_tx_id) if not df_msg.empty else (pd.DataFrame(), pd.DataFrame())
+    if msg_log_files:
+        stream = stream_msg_logs(msg_log_files, args.emergency_tx_id, args.chunk_rows, out_dir / "msg_log.csv", args.parquet)
+        comm_vehicle_df, comm_run_df, aoi_vehicle_df, latency_run_df, reaction_vehicle_df, reaction_run_df = stream.results()
+    else:
+        comm_vehicle_df, comm_run_df, aoi_vehicle_df, latency_run_df = compute_comm_metrics(df_msg) if not df_msg.empty else (pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
+        reaction_vehicle_df, reaction_run_df = compute_reaction_metrics(df_msg, args.emergency_tx_id) if not df_msg.empty else (pd.DataFrame(), pd.DataFrame())
+
+    metsup_latency_df, metsup_prr_df = compute_metsup_metrics(metsup_latency_frames, metsup_summary_frames, metsup_prr_frames)
+
+    replicate_df = compute_replicate_metrics(comm_run_df, latency_run_df, aoi_vehicle_df, reaction_run_df)
+    seed_ci_df = compute_seed_ci(replicate_df, run_id_to_point, args.ci_level, args.ci_method, args.bootstrap_samples)
 
     df_comm_stats = pd.DataFrame(comm_stats_rows)
     df_sionna_phy = pd.DataFrame(sionna_phy_rows)
@@ -534,31 +1028,39 @@ def main() -> None:
 
     # Write outputs
     if not df_vs.empty:
-        df_vs.to_csv(out_dir / "vehicle_state.csv", index=False)
+        write_table(df_vs, out_dir, "vehicle_state", args.parquet)
     if not df_comm_stats.empty:
-        df_comm_stats.to_csv(out_dir / "comm_stats.csv", index=False)
+        write_table(df_comm_stats, out_dir, "comm_stats", args.parquet)
     if not df_sionna_phy.empty:
-        df_sionna_phy.to_csv(out_dir / "sionna_phy.csv", index=False)
+        write_table(df_sionna_phy, out_dir, "sionna_phy", args.parquet)
     if not df_coexistence_phy.empty:
-        df_coexistence_phy.to_csv(out_dir / "coexistence_phy.csv", index=False)
+        write_table(df_coexistence_phy, out_dir, "coexistence_phy", args.parquet)
     if not df_msg.empty:
-        df_msg.to_csv(out_dir / "msg_log.csv", index=False)
+        write_table(df_msg, out_dir, "msg_log", args.parquet)
     if not behavior_vehicle_df.empty:
-        behavior_vehicle_df.to_csv(out_dir / "behavior_metrics_vehicle.csv", index=False)
+        write_table(behavior_vehicle_df, out_dir, "behavior_metrics_vehicle", args.parquet)
     if not behavior_run_df.empty:
-        behavior_run_df.to_csv(out_dir / "behavior_metrics_run.csv", index=False)
+        write_table(behavior_run_df, out_dir, "behavior_metrics_run", args.parquet)
     if not comm_vehicle_df.empty:
-        comm_vehicle_df.to_csv(out_dir / "comm_metrics_vehicle.csv", index=False)
+        write_table(comm_vehicle_df, out_dir, "comm_metrics_vehicle", args.parquet)
     if not comm_run_df.empty:
-        comm_run_df.to_csv(out_dir / "comm_metrics_run.csv", index=False)
+        write_table(comm_run_df, out_dir, "comm_metrics_run", args.parquet)
     if not aoi_vehicle_df.empty:
-        aoi_vehicle_df.to_csv(out_dir / "aoi_metrics_vehicle.csv", index=False)
+        write_table(aoi_vehicle_df, out_dir, "aoi_metrics_vehicle", args.parquet)
     if not latency_run_df.empty:
-        latency_run_df.to_csv(out_dir / "latency_metrics_run.csv", index=False)
+        write_table(latency_run_df, out_dir, "latency_metrics_run", args.parquet)
     if not reaction_vehicle_df.empty:
-        reaction_vehicle_df.to_csv(out_dir / "reaction_metrics_vehicle.csv", index=False)
+        write_table(reaction_vehicle_df, out_dir, "reaction_metrics_vehicle", args.parquet)
     if not reaction_run_df.empty:
-        reaction_run_df.to_csv(out_dir / "reaction_metrics_run.csv", index=False)
+        write_table(reaction_run_df, out_dir, "reaction_metrics_run", args.parquet)
+    if not metsup_latency_df.empty:
+        write_table(metsup_latency_df, out_dir, "metsup_latency_run", args.parquet)
+    if not metsup_prr_df.empty:
+        write_table(metsup_prr_df, out_dir, "metsup_prr_distance", args.parquet)
+    if not replicate_df.empty:
+        write_table(replicate_df, out_dir, "replicate_metrics_run", args.parquet)
+    if not seed_ci_df.empty:
+        write_table(seed_ci_df, out_dir, "ci_metrics_point", args.parquet)
     if not df_meta.empty:
         df_meta.to_csv(out_dir / "run_metadata.csv", index=False)
 
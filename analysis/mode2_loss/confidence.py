@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Confidence intervals for the mean of a metric over replicate (RngRun) runs.
+
+The t interval only needs the standard library so run_sweep.py can use it for
+early stopping without pulling in numpy; the bootstrap variant resamples all
+replicates at once with a (samples x n) index matrix.
+"""
+from __future__ import annotations
+
+import math
+from typing import Iterable, List, Optional, Tuple
+
+Interval = Tuple[float, float, float]  # mean, low, high
+
+
+def _finite(values: Iterable) -> List[float]:
+    out = []
+    for v in values:
+        try:
+            f = float(v)
+        except (TypeError, ValueError):
+            continue
+        if math.isfinite(f):
+            out.append(f)
+    return out
+
+
+def _t_two_sided_mass(t: float, dof: int) -> float:
+    """P(|T| < t) for Student's t with integer degrees of freedom (A&S 26.7.3/26.7.4)."""
+    theta = math.atan(t / math.sqrt(dof))
+    c2 = math.cos(theta) ** 2
+    if dof % 2 == 1:
+        series, term = 0.0, 1.0
+        if dof > 1:
+            series = 1.0
+            for k in range(1, (dof - 3) // 2 + 1):
+                term *= c2 * (2 * k) / (2 * k + 1)
+                series += term
+        return 2.0 / math.pi * (theta + math.sin(theta) * math.cos(theta) * series)
+    series, term = 1.0, 1.0
+    for k in range(1, (dof - 2) // 2 + 1):
+        term *= c2 * (2 * k - 1) / (2 * k)
+        series += term
+    return math.sin(theta) * series
+
+
+def t_critical(level: float, dof: int) -> float:
+    """Two-sided critical value t such that P(|T| < t) == level."""
+    lo, hi = 0.0, 1.0
+    while _t_two_sided_mass(hi, dof) < level:
+        hi *= 2.0
+    for _ in range(100):
+        mid = 0.5 * (lo + hi)
+        if _t_two_sided_mass(mid, dof) < level:
+            lo = mid
+        else:
+            hi = mid
+    return 0.5 * (lo + hi)
+
+
+def t_interval(values: Iterable, level: float = 0.95) -> Optional[Interval]:
+    vals = _finite(values)
+    n = len(vals)
+    if n < 2:
+        return None
+    mean = sum(vals) / n
+    sd = math.sqrt(sum((v - mean) ** 2 for v in vals) / (n - 1))
+    half = t_critical(level, n - 1) * sd / math.sqrt(n)
+    return mean, mean - half, mean + half
+
+
+def bootstrap_interval(values: Iterable, level: float = 0.95, samples: int = 2000, seed: int = 0) -> Optional[Interval]:
+    """Percentile bootstrap of the mean, all resamples drawn in one vectorized step."""
+    import numpy as np
+
+    vals = np.asarray(_finite(values), dtype=float)
+    n = vals.size
+    if n < 2:
+        return None
+    rng = np.random.default_rng(seed)
+    means = vals[rng.integers(0, n, size=(samples, n))].mean(axis=1)
+    alpha = (1.0 - level) / 2.0
+    low, high = np.quantile(means, [alpha, 1.0 - alpha])
+    return float(vals.mean()), float(low), float(high)
+
+
+def interval(values: Iterable, level: float = 0.95, method: str = "t", samples: int = 2000) -> Optional[Interval]:
+    if method == "bootstrap":
+        return bootstrap_interval(values, level, samples)
+    if method == "t":
+        return t_interval(values, level)
+    raise ValueError(f"Unknown CI method: {method}")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Content fingerprint of a simulator run.
+
+A run is identified by the normalized ns-3 command line (minus its output
+location), the bytes of the simulator binary and the ns-3 libraries it loads,
+the SUMO configuration with every input file it references, and the git
+revision. Two runs with the same fingerprint produce the same results, so
+run_sweep.py can skip or reuse them exactly, also across different sweeps.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+# Options that only say where the outputs go
+OUTPUT_OPTIONS = ("--csv-log",)
+
+_digest_cache: Dict[Tuple[str, int, int], str] = {}
+
+
+def norm(val):
+    if isinstance(val, bool):
+        return "true" if val else "false"
+    if isinstance(val, (int, float)):
+        return float(val)
+    if isinstance(val, str):
+        low = val.lower()
+        if low in ("true", "false"):
+            return low
+        try:
+            return float(val)
+        except Exception:
+            return val
+    return str(val)
+
+
+def normalize_cmd(cmd: List[str]) -> List[str]:
+    """Drop output options and canonicalize ``--key=value`` values ("23" == "23.0", "True" == "true")."""
+    out = []
+    for arg in cmd[1:]:
+        key, sep, value = arg.partition("=")
+        if key in OUTPUT_OPTIONS:
+            continue
+        out.append(f"{key}={norm(value)!r}" if sep else arg)
+    return out
+
+
+def file_digest(path: Path) -> str:
+    """sha256 of a file, memoized on (path, size, mtime) so a sweep hashes each input once."""
+    st = path.stat()
+    key = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+    digest = _digest_cache.get(key)
+    if digest is None:
+        h = hashlib.sha256()
+        with path.open("rb") as fp:
+            for block in iter(lambda: fp.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        _digest_cache[key] = digest
+    return digest
+
+
+def simulator_files(binary: Path, build_dir: Path = Path("build")) -> List[Path]:
+    """The example binary plus the ns-3 shared libraries it is linked against."""
+    files = [binary]
+    lib_dir = build_dir / "lib"
+    if lib_dir.is_dir():
+        files.extend(sorted(p for p in lib_dir.glob("libns3*.so*") if p.is_file()))
+    return files
+
+
+def sumo_files(sumo_config: Path, sumo_folder: Path, mob_trace: str) -> List[Path]:
+    """SUMO config, the net/route/additional files it lists and the mobility trace."""
+    files = [sumo_config]
+    try:
+        root = ET.parse(sumo_config).getroot()
+        for tag in ("net-file", "route-files", "additional-files"):
+            for node in root.iter(tag):
+                for name in node.get("value", "").replace(",", " ").split():
+                    files.append(sumo_config.parent / name)
+    except (OSError, ET.ParseError):
+        pass
+    files.append(sumo_folder / mob_trace)
+    seen = set()
+    unique = []
+    for p in files:
+        key = str(p.resolve())
+        if key not in seen:
+            seen.add(key)
+            unique.append(p)
+    return unique
+
+
+def run_fingerprint(sim_cmd: List[str], inputs: Iterable[Path], git_hash: str) -> str:
+    payload = {
+        "cmd": normalize_cmd(sim_cmd),
+        "files": {str(p): (file_digest(p) if p.is_file() else None) for p in inputs},
+        "git_hash": git_hash,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""Geodesic helpers shared by analyze_csv.py and make_plots.py."""
+from __future__ import annotations
+
+import numpy as np
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    r = 6371000.0
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    dphi = np.radians(lat2 - lat1)
+    dlambda = np.radians(lon2 - lon1)
+    a = np.sin(dphi / 2.0) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2.0) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return r * c
@@ -14,6 +14,13 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.collections import LineCollection
 
+from geo import haversine_m
+from schema import read_table
+
+# Only these columns of the two large tables are used by the plots below.
+MSG_LOG_PLOT_COLUMNS = ["run_id", "tx_t_s", "rx_t_s", "rx_ok", "tx_id", "rx_id"]
+VEHICLE_STATE_PLOT_COLUMNS = ["run_id", "tech", "vehicle_id", "t_s", "lat", "lon", "speed_mps", "accel_mps2"]
+
 
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser()
@@ -22,12 +29,6 @@ def parse_args() -> argparse.Namespace:
     return p.parse_args()
 
 
-def load_csv(path: Path) -> pd.DataFrame:
-    if path.exists():
-        return pd.read_csv(path)
-    return pd.DataFrame()
-
-
 def save_fig(fig, out_path: Path) -> None:
     out_path.parent.mkdir(parents=True, exist_ok=True)
     fig.tight_layout()
@@ -61,25 +62,25 @@ def sort_vehicle_ids(ids: list[str]) -> list[str]:
     return sorted(ids, key=key_fn)
 
 
-def interpolate_position(track_t: np.ndarray, track_x: np.ndarray, track_y: np.ndarray, t: float) -> tuple[float, float] | None:
-    if track_t.size == 0 or np.isnan(t):
-        return None
-
-    if t <= track_t[0]:
-        return float(track_x[0]), float(track_y[0])
-    if t >= track_t[-1]:
-        return float(track_x[-1]), float(track_y[-1])
+def interpolate_tracks(tracks: dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]], vehicle_ids: np.ndarray, t: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Positions of ``vehicle_ids[i]`` at ``t[i]``, one np.interp per vehicle track.
 
-    idx = int(np.searchsorted(track_t, t))
-    t0 = track_t[idx - 1]
-    t1 = track_t[idx]
-    if t1 <= t0:
-        return float(track_x[idx - 1]), float(track_y[idx - 1])
-
-    w = (t - t0) / (t1 - t0)
-    x = track_x[idx - 1] + w * (track_x[idx] - track_x[idx - 1])
-    y = track_y[idx - 1] + w * (track_y[idx] - track_y[idx - 1])
-    return float(x), float(y)
+    Times outside a track are clamped to its ends; vehicles without a track give NaN.
+    """
+    x = np.full(t.shape, np.nan)
+    y = np.full(t.shape, np.nan)
+    codes, uniques = pd.factorize(vehicle_ids)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    for i, vid in enumerate(uniques):
+        track = tracks.get(str(vid))
+        if track is None or track[0].size == 0:
+            continue
+        idx = order[bounds[i]:bounds[i + 1]]
+        track_t, track_x, track_y = track
+        x[idx] = np.interp(t[idx], track_t, track_x)
+        y[idx] = np.interp(t[idx], track_t, track_y)
+    return x, y
 
 
 def plot_packet_visuals(df_msg: pd.DataFrame, df_vs: pd.DataFrame, out_dir: Path) -> dict:
@@ -88,9 +89,6 @@ def plot_packet_visuals(df_msg: pd.DataFrame, df_vs: pd.DataFrame, out_dir: Path
         return artifacts
 
     msg = df_msg.copy()
-    msg["tx_t_s"] = pd.to_numeric(msg["tx_t_s"], errors="coerce")
-    msg["rx_t_s"] = pd.to_numeric(msg["rx_t_s"], errors="coerce")
-    msg["rx_ok"] = pd.to_numeric(msg["rx_ok"], errors="coerce")
     msg["tx_id_norm"] = msg["tx_id"].map(normalize_vehicle_id)
     msg["rx_id_norm"] = msg["rx_id"].map(normalize_vehicle_id)
 
@@ -99,7 +97,7 @@ def plot_packet_visuals(df_msg: pd.DataFrame, df_vs: pd.DataFrame, out_dir: Path
     if tx_all.empty or rx_all.empty:
         return artifacts
 
-    run_id = rx_all.groupby("run_id", dropna=False).size().sort_values(ascending=False).index[0]
+    run_id = rx_all.groupby("run_id", dropna=False, observed=True).size().sort_values(ascending=False).index[0]
     run_tx = tx_all[tx_all["run_id"] == run_id].copy()
     run_rx = rx_all[rx_all["run_id"] == run_id].copy()
     if run_tx.empty or run_rx.empty:
@@ -176,57 +174,61 @@ def plot_packet_visuals(df_msg: pd.DataFrame, df_vs: pd.DataFrame, out_dir: Path
         return artifacts
 
     run_vs["vehicle_id_norm"] = run_vs["vehicle_id"].map(normalize_vehicle_id)
-    run_vs["t_s"] = pd.to_numeric(run_vs["t_s"], errors="coerce")
-    run_vs["lon"] = pd.to_numeric(run_vs["lon"], errors="coerce")
-    run_vs["lat"] = pd.to_numeric(run_vs["lat"], errors="coerce")
     run_vs = run_vs.dropna(subset=["vehicle_id_norm", "t_s", "lon", "lat"]).sort_values(["vehicle_id_norm", "t_s"])
     if run_vs.empty:
         return artifacts
 
     tracks: dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
     for vid, g in run_vs.groupby("vehicle_id_norm"):
+        t = g["t_s"].to_numpy(dtype=float)
+        # np.interp needs strictly increasing sample times; keep the first fix per timestamp
+        t, first = np.unique(t, return_index=True)
         tracks[str(vid)] = (
-            g["t_s"].to_numpy(dtype=float),
-            g["lon"].to_numpy(dtype=float),
-            g["lat"].to_numpy(dtype=float),
+            t,
+            g["lon"].to_numpy(dtype=float)[first],
+            g["lat"].to_numpy(dtype=float)[first],
         )
 
+    # Every received packet, positions of both ends at the rx timestamp
     events = run_rx[["tx_id_norm", "rx_id_norm", "rx_t_s"]].dropna().sort_values("rx_t_s")
-    max_events = 3000
-    if len(events) > max_events:
-        step = int(np.ceil(len(events) / max_events))
-        events = events.iloc[::step]
-
-    segments = []
-    seg_t = []
-    for row in events.itertuples(index=False):
-        tx_id = str(row.tx_id_norm)
-        rx_id = str(row.rx_id_norm)
-        t = float(row.rx_t_s)
-        tx_track = tracks.get(tx_id)
-        rx_track = tracks.get(rx_id)
-        if tx_track is None or rx_track is None:
-            continue
-        tx_pos = interpolate_position(tx_track[0], tx_track[1], tx_track[2], t)
-        rx_pos = interpolate_position(rx_track[0], rx_track[1], rx_track[2], t)
-        if tx_pos is None or rx_pos is None:
-            continue
-        segments.append([tx_pos, rx_pos])
-        seg_t.append(t)
+    ev_t = events["rx_t_s"].to_numpy(dtype=float)
+    tx_lon, tx_lat = interpolate_tracks(tracks, events["tx_id_norm"].astype(str).to_numpy(), ev_t)
+    rx_lon, rx_lat = interpolate_tracks(tracks, events["rx_id_norm"].astype(str).to_numpy(), ev_t)
+    valid = ~(np.isnan(tx_lon) | np.isnan(rx_lon))
+
+    flights = pd.DataFrame({
+        "tx_id": events["tx_id_norm"].to_numpy()[valid],
+        "rx_id": events["rx_id_norm"].to_numpy()[valid],
+        "rx_t_s": ev_t[valid],
+        "tx_lon": tx_lon[valid],
+        "tx_lat": tx_lat[valid],
+        "rx_lon": rx_lon[valid],
+        "rx_lat": rx_lat[valid],
+    })
+    flights["distance_m"] = haversine_m(flights["tx_lat"], flights["tx_lon"], flights["rx_lat"], flights["rx_lon"])
+    distances_name = f"packet_distances_{run_id_str}.csv"
+    flights.to_csv(out_dir / distances_name, index=False)
+    artifacts["packet_distances"] = distances_name
+
+    segments = np.stack([
+        np.column_stack([flights["tx_lon"], flights["tx_lat"]]),
+        np.column_stack([flights["rx_lon"], flights["rx_lat"]]),
+    ], axis=1)
+    seg_t = flights["rx_t_s"].to_numpy()
 
     fig, ax = plt.subplots(figsize=(8, 8))
     for vid, g in run_vs.groupby("vehicle_id_norm"):
         ax.plot(g["lon"], g["lat"], color="#bfbfbf", linewidth=0.7, alpha=0.45)
 
-    if segments:
+    if len(segments):
         lc = LineCollection(
             segments,
             cmap="plasma",
             norm=plt.Normalize(vmin=float(np.min(seg_t)), vmax=float(np.max(seg_t))),
-            linewidths=0.8,
-            alpha=0.35,
+            linewidths=0.8 if len(segments) <= 3000 else 0.4,
+            alpha=0.35 if len(segments) <= 3000 else 0.1,
         )
-        lc.set_array(np.asarray(seg_t))
+        lc.set_array(seg_t)
         ax.add_collection(lc)
         fig.colorbar(lc, ax=ax, label="packet rx time (s)")
 
@@ -251,7 +253,7 @@ def plot_packet_visuals(df_msg: pd.DataFrame, df_vs: pd.DataFrame, out_dir: Path
 def plot_speed_accel(df_vs: pd.DataFrame, out_dir: Path) -> None:
     if df_vs.empty:
         return
-    for (run_id, tech), g in df_vs.groupby(["run_id", "tech"], dropna=False):
+    for (run_id, tech), g in df_vs.groupby(["run_id", "tech"], dropna=False, observed=True):
         g = g.sort_values("t_s")
         counts = g.groupby("vehicle_id").size().sort_values(ascending=False)
         top_ids = counts.head(5).index.tolist()
@@ -289,7 +291,7 @@ def plot_behavior_hist(df_metrics: pd.DataFrame, out_dir: Path) -> None:
     if df_metrics.empty:
         return
     fig, ax = plt.subplots(figsize=(8, 4))
-    for tech, g in df_metrics.groupby("tech", dropna=False):
+    for tech, g in df_metrics.groupby("tech", dropna=False, observed=True):
         ax.hist(g["max_decel"].dropna(), bins=20, alpha=0.5, label=str(tech))
     ax.set_title("Histogram of max decel by tech")
     ax.set_xlabel("max decel (m/s^2)")
@@ -298,7 +300,7 @@ def plot_behavior_hist(df_metrics: pd.DataFrame, out_dir: Path) -> None:
     save_fig(fig, out_dir / "hist_max_decel_by_tech.png")
 
     fig, ax = plt.subplots(figsize=(8, 4))
-    for tech, g in df_metrics.groupby("tech", dropna=False):
+    for tech, g in df_metrics.groupby("tech", dropna=False, observed=True):
         ax.hist(g["time_to_first_brake"].dropna(), bins=20, alpha=0.5, label=str(tech))
     ax.set_title("Histogram of time to first brake by tech")
     ax.set_xlabel("time_to_first_brake (s)")
@@ -309,7 +311,7 @@ def plot_behavior_hist(df_metrics: pd.DataFrame, out_dir: Path) -> None:
 
 def plot_comm(df_comm_vehicle: pd.DataFrame, df_comm_run: pd.DataFrame, out_dir: Path) -> None:
     if not df_comm_vehicle.empty:
-        for (run_id, tech), g in df_comm_vehicle.groupby(["run_id", "tech"], dropna=False):
+        for (run_id, tech), g in df_comm_vehicle.groupby(["run_id", "tech"], dropna=False, observed=True):
             fig, ax = plt.subplots(figsize=(10, 4))
             ax.bar(g["vehicle_id"].astype(str), g["prr"].astype(float))
             ax.set_title(f"PRR per vehicle | run={run_id} tech={tech}")
@@ -330,7 +332,7 @@ def plot_comm(df_comm_vehicle: pd.DataFrame, df_comm_run: pd.DataFrame, out_dir:
 def plot_aoi_latency(df_aoi: pd.DataFrame, df_latency: pd.DataFrame, out_dir: Path) -> None:
     if not df_aoi.empty:
         fig, ax = plt.subplots(figsize=(6, 4))
-        for tech, g in df_aoi.groupby("tech", dropna=False):
+        for tech, g in df_aoi.groupby("tech", dropna=False, observed=True):
             ax.hist(g["aoi_p95_s"].dropna(), bins=20, alpha=0.5, label=str(tech))
         ax.set_title("AoI p95 by tech")
         ax.set_xlabel("AoI p95 (s)")
@@ -340,7 +342,7 @@ def plot_aoi_latency(df_aoi: pd.DataFrame, df_latency: pd.DataFrame, out_dir: Pa
 
     if not df_latency.empty:
         fig, ax = plt.subplots(figsize=(6, 4))
-        for tech, g in df_latency.groupby("tech", dropna=False):
+        for tech, g in df_latency.groupby("tech", dropna=False, observed=True):
             vals = g["latency_p95_s"].dropna()
             if len(vals) == 0:
                 continue
@@ -470,6 +472,28 @@ def plot_sweep_curves(df_comm_run: pd.DataFrame, df_behavior_run: pd.DataFrame,
             save_fig(fig, out_dir / "reaction_delay_p90_vs_prr.png")
 
 
+def plot_seed_ci(df_ci: pd.DataFrame, df_meta: pd.DataFrame, out_dir: Path) -> None:
+    if df_ci.empty or df_meta.empty or "sweep_point_id" not in df_meta.columns:
+        return
+    points = df_meta.drop_duplicates("sweep_point_id").set_index("sweep_point_id")
+    for param in detect_sweep_params(points.reset_index()):
+        x_of = pd.to_numeric(points[param], errors="coerce")
+        for metric, g in df_ci.groupby("metric", observed=True):
+            g = g.assign(x=g["point_id"].astype(str).map(x_of)).dropna(subset=["x"]).sort_values("x")
+            if g.empty:
+                continue
+            fig, ax = plt.subplots(figsize=(6, 4))
+            for tech, tg in g.groupby("tech", dropna=False, observed=True):
+                yerr = [tg["mean"] - tg["ci_low"], tg["ci_high"] - tg["mean"]]
+                ax.errorbar(tg["x"], tg["mean"], yerr=yerr, marker="o", capsize=3, label=str(tech))
+            level = float(g["ci_level"].iloc[0])
+            ax.set_title(f"{metric} vs {param} ({level:.0%} CI over seeds)")
+            ax.set_xlabel(param)
+            ax.set_ylabel(metric)
+            ax.legend(fontsize=8)
+            save_fig(fig, out_dir / f"ci_{metric}_vs_{param}.png")
+
+
 def generate_report(report_path: Path, df_comm_run: pd.DataFrame, df_behavior_run: pd.DataFrame, df_reaction_run: pd.DataFrame, df_meta: pd.DataFrame, fig_dir: Path, packet_artifacts: dict | None = None) -> None:
     lines = []
     lines.append("# NR-V2X Mode 2 Loss Sweep Evidence Report")
@@ -512,6 +536,8 @@ def generate_report(report_path: Path, df_comm_run: pd.DataFrame, df_behavior_ru
             lines.append(f"- TX->RX heatmap: {fig_dir / packet_artifacts['packet_link_heatmap']}")
         if packet_artifacts.get("packet_flights_map"):
             lines.append(f"- Packet flights over map: {fig_dir / packet_artifacts['packet_flights_map']}")
+        if packet_artifacts.get("packet_distances"):
+            lines.append(f"- Per-packet TX-RX distance table: {fig_dir / packet_artifacts['packet_distances']}")
         lines.append(f"- Visualization run selected automatically: {run_id}")
     else:
         lines.append("- Packet visuals were not generated (msg_log/vehicle_state data missing).")
@@ -584,17 +610,18 @@ def main() -> None:
     out_dir = Path(args.out)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    df_vs = load_csv(in_dir / "vehicle_state.csv")
-    df_msg = load_csv(in_dir / "msg_log.csv")
-    df_behavior_vehicle = load_csv(in_dir / "behavior_metrics_vehicle.csv")
-    df_behavior_run = load_csv(in_dir / "behavior_metrics_run.csv")
-    df_comm_vehicle = load_csv(in_dir / "comm_metrics_vehicle.csv")
-    df_comm_run = load_csv(in_dir / "comm_metrics_run.csv")
-    df_aoi = load_csv(in_dir / "aoi_metrics_vehicle.csv")
-    df_reaction_vehicle = load_csv(in_dir / "reaction_metrics_vehicle.csv")
-    df_reaction_run = load_csv(in_dir / "reaction_metrics_run.csv")
-    df_latency = load_csv(in_dir / "latency_metrics_run.csv")
-    df_meta = load_csv(in_dir / "run_metadata.csv")
+    df_vs = read_table(in_dir, "vehicle_state", VEHICLE_STATE_PLOT_COLUMNS)
+    df_msg = read_table(in_dir, "msg_log", MSG_LOG_PLOT_COLUMNS)
+    df_behavior_vehicle = read_table(in_dir, "behavior_metrics_vehicle")
+    df_behavior_run = read_table(in_dir, "behavior_metrics_run")
+    df_comm_vehicle = read_table(in_dir, "comm_metrics_vehicle")
+    df_comm_run = read_table(in_dir, "comm_metrics_run")
+    df_aoi = read_table(in_dir, "aoi_metrics_vehicle")
+    df_reaction_vehicle = read_table(in_dir, "reaction_metrics_vehicle")
+    df_reaction_run = read_table(in_dir, "reaction_metrics_run")
+    df_latency = read_table(in_dir, "latency_metrics_run")
+    df_meta = read_table(in_dir, "run_metadata")
+    df_ci = read_table(in_dir, "ci_metrics_point")
 
     plot_speed_accel(df_vs, out_dir)
     plot_behavior_hist(df_behavior_vehicle, out_dir)
@@ -602,6 +629,7 @@ def main() -> None:
     plot_aoi_latency(df_aoi, df_latency, out_dir)
     plot_cross_link(df_behavior_vehicle, df_comm_vehicle, df_aoi, df_reaction_vehicle, out_dir)
     plot_sweep_curves(df_comm_run, df_behavior_run, df_reaction_run, df_meta, out_dir)
+    plot_seed_ci(df_ci, df_meta, out_dir)
     packet_artifacts = plot_packet_visuals(df_msg, df_vs, out_dir)
 
     report_path = Path("analysis/mode2_loss/REPORT_mode2_loss.md")
@@ -4,14 +4,21 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import resource
 import subprocess
 import time
 from pathlib import Path
 
+from fingerprint import run_fingerprint, simulator_files, sumo_files
 
-def parse_args() -> argparse.Namespace:
+BINARY = Path("build/src/automotive/examples/ns3-dev-v2v-emergencyVehicleAlert-nrv2x-optimized")
+SWEEP_OPTIONS = ["txPower", "mcs", "enableSensing", "slThresPsschRsrp", "enableChannelRandomness", "channelUpdatePeriod"]
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     p = argparse.ArgumentParser()
     p.add_argument("--point-id", required=True)
+    p.add_argument("--sweep-point-id", default=None, help="Sweep point this run replicates (defaults to --point-id)")
     p.add_argument("--out-dir", required=True)
     p.add_argument("--scenario", default="v2v-emergencyVehicleAlert-nrv2x")
     p.add_argument("--sim-time", type=float, default=30.0)
@@ -31,7 +38,8 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--sumo-config", type=str, default="src/automotive/examples/sumo_files_v2v_map/map.sumo.cfg")
     p.add_argument("--netstate-dump-file", type=str, default=None)
     p.add_argument("--extra-arg", action="append", default=[])
-    return p.parse_args()
+    p.add_argument("--fingerprint", default=None, help="Precomputed run fingerprint (run_sweep.py passes it to avoid rehashing)")
+    return p.parse_args(argv)
 
 
 def git_hash() -> str:
@@ -51,20 +59,9 @@ def git_hash() -> str:
         return "unknown"
 
 
-def main() -> None:
-    args = parse_args()
-    out_dir = Path(args.out_dir).resolve()
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-    run_prefix = out_dir / "eva_nrv2x"
-    log_path = out_dir / "run.log"
-
-    binary = Path("build/src/automotive/examples/ns3-dev-v2v-emergencyVehicleAlert-nrv2x-optimized")
-    if not binary.exists():
-        raise SystemExit(f"Missing binary: {binary}")
-
+def build_sim_cmd(args: argparse.Namespace, run_prefix: Path) -> list[str]:
     cmd = [
-        str(binary),
+        str(BINARY),
         f"--sumo-gui={args.sumo_gui}",
         f"--vehicle-visualizer={args.vehicle_visualizer}",
         f"--sim-time={args.sim_time}",
@@ -80,13 +77,36 @@ def main() -> None:
     if args.netstate_dump_file is not None and str(args.netstate_dump_file).strip() != "":
         cmd.append(f"--netstate-dump-file={args.netstate_dump_file}")
 
-    for name in ["txPower", "mcs", "enableSensing", "slThresPsschRsrp", "enableChannelRandomness", "channelUpdatePeriod"]:
+    for name in SWEEP_OPTIONS:
         val = getattr(args, name)
         if val is not None:
             cmd.append(f"--{name}={val}")
 
     for extra in args.extra_arg:
         cmd.append(extra)
+    return cmd
+
+
+def fingerprint_of(args: argparse.Namespace, git: str | None = None) -> str:
+    run_prefix = Path(args.out_dir).resolve() / "eva_nrv2x"
+    inputs = simulator_files(BINARY) + sumo_files(Path(args.sumo_config), Path(args.sumo_folder), args.mob_trace)
+    return run_fingerprint(build_sim_cmd(args, run_prefix), inputs, git if git is not None else git_hash())
+
+
+def main() -> None:
+    args = parse_args()
+    out_dir = Path(args.out_dir).resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    run_prefix = out_dir / "eva_nrv2x"
+    log_path = out_dir / "run.log"
+
+    if not BINARY.exists():
+        raise SystemExit(f"Missing binary: {BINARY}")
+
+    cmd = build_sim_cmd(args, run_prefix)
+    git = git_hash()
+    fingerprint = args.fingerprint or fingerprint_of(args, git)
 
     start_time = time.time()
     with log_path.open("w") as log:
@@ -95,13 +115,18 @@ def main() -> None:
 
     meta = {
         "run_id": args.point_id,
+        "sweep_point_id": args.sweep_point_id or args.point_id,
         "scenario": args.scenario,
         "out_dir": str(out_dir),
         "command": cmd,
-        "git_hash": git_hash(),
+        "git_hash": git,
+        "fingerprint": fingerprint,
         "start_time_epoch": start_time,
         "end_time_epoch": end_time,
         "exit_code": proc.returncode,
+        "wall_time_s": end_time - start_time,
+        # ru_maxrss is in KiB on Linux; the simulator is the only child of this process
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024.0,
         "sim_time": args.sim_time,
         "rng_run": args.rng_run,
         "sumo_gui": args.sumo_gui,
@@ -117,8 +142,11 @@ def main() -> None:
         "netstate_dump_file": args.netstate_dump_file,
     }
 
-    with (out_dir / "metadata.json").open("w") as fp:
+    # write-then-rename so an interrupted run never leaves a truncated metadata.json behind
+    tmp_path = out_dir / "metadata.json.tmp"
+    with tmp_path.open("w") as fp:
         json.dump(meta, fp, indent=2)
+    os.replace(tmp_path, out_dir / "metadata.json")
 
     if proc.returncode != 0:
         raise SystemExit(f"Run failed with exit code {proc.returncode}. See {log_path}")
@@ -1,11 +1,18 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import argparse
+import csv
 import itertools
 import json
+import math
 import os
 import re
+import shutil
+import signal
 import subprocess
+import time
+from collections import deque
 from pathlib import Path
 
 from bootstrap import ensure_deps
@@ -14,6 +21,10 @@ ensure_deps(["yaml"])
 
 import yaml
 
+from confidence import t_interval
+from run_one import SWEEP_OPTIONS, fingerprint_of, git_hash
+from run_one import parse_args as parse_run_args
+
 
 def slugify(s: str) -> str:
     s = s.replace(" ", "_")
@@ -41,17 +52,205 @@ def build_points(cfg: dict) -> list[dict]:
     return points
 
 
+def point_id_of(point: dict) -> str:
+    point_id = point.get("id")
+    if not point_id:
+        parts = [f"{k}-{point[k]}" for k in sorted(point.keys())]
+        point_id = slugify("_".join(parts))
+    return point_id
+
+
+def build_cmd(run_id: str, point_id: str, run_dir: Path, point: dict, settings: dict, rng_run) -> list[str]:
+    cmd = [
+        "python3",
+        "analysis/mode2_loss/run_one.py",
+        "--point-id",
+        run_id,
+        "--sweep-point-id",
+        point_id,
+        "--out-dir",
+        str(run_dir),
+        "--scenario",
+        settings["scenario"],
+        "--sim-time",
+        str(settings["sim_time"]),
+        "--rng-run",
+        str(rng_run),
+        "--sumo-gui",
+        str(settings["sumo_gui"]),
+        "--sumo-updates",
+        str(settings["sumo_updates"]),
+        "--penetrationRate",
+        str(settings["penetrationRate"]),
+    ]
+
+    for k in SWEEP_OPTIONS:
+        if k in point:
+            cmd.extend([f"--{k}", str(point[k])])
+
+    for extra in settings["base_args"]:
+        cmd.extend(["--extra-arg", extra])
+    return cmd
+
+
+def completed_run(meta: dict, fingerprint: str) -> bool:
+    return meta.get("exit_code") == 0 and meta.get("fingerprint") == fingerprint
+
+
+def cache_entry(cache_root: Path, fingerprint: str) -> Path:
+    return cache_root / f"{fingerprint}.json"
+
+
+def reuse_cached_run(cache_root: Path, fingerprint: str, run_dir: Path, run_id: str, point_id: str) -> Path | None:
+    """Populate ``run_dir`` from an earlier run with the same fingerprint (any sweep).
+
+    Files are hard-linked when possible; the copied metadata gets this run's ids.
+    Returns the source directory, or None if there is no valid cached run.
+    """
+    src_dir = Path(read_metadata(cache_entry(cache_root, fingerprint)).get("run_dir", ""))
+    if not src_dir.is_dir() or src_dir.resolve() == run_dir.resolve():
+        return None
+    meta = read_metadata(src_dir / "metadata.json")
+    if not completed_run(meta, fingerprint):
+        return None
+    for src in src_dir.iterdir():
+        if not src.is_file() or src.name.startswith("metadata.json"):
+            continue
+        dst = run_dir / src.name
+        if dst.exists():
+            dst.unlink()
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+    meta.update({
+        "run_id": run_id,
+        "sweep_point_id": point_id,
+        "out_dir": str(run_dir.resolve()),
+        "reused_from": str(src_dir.resolve()),
+    })
+    write_metadata(run_dir / "metadata.json", meta)
+    return src_dir
+
+
+def unshare_outputs(run_dir: Path) -> None:
+    # the simulator truncates its CSVs in place, which would also clobber a hard-linked source run
+    for path in run_dir.iterdir():
+        if path.is_file() and path.stat().st_nlink > 1:
+            path.unlink()
+
+
+def register_run(cache_root: Path, fingerprint: str, run_dir: Path) -> None:
+    cache_root.mkdir(parents=True, exist_ok=True)
+    write_metadata(cache_entry(cache_root, fingerprint), {"run_dir": str(run_dir.resolve())})
+
+
+def analysis_needed(run_dir: Path, results_dir: Path) -> bool:
+    """True if the replicate has no analysis (cached next to the sweep tree) newer than its run."""
+    out_csv = results_dir / "replicate_metrics_run.csv"
+    meta_path = run_dir / "metadata.json"
+    return not out_csv.exists() or (meta_path.exists() and out_csv.stat().st_mtime < meta_path.stat().st_mtime)
+
+
+def analysis_cmd(run_dir: Path, results_dir: Path, config: Path) -> list[str]:
+    return [
+        "python3",
+        "analysis/mode2_loss/analyze_csv.py",
+        "--input",
+        str(run_dir),
+        "--out",
+        str(results_dir),
+        "--config",
+        str(config),
+    ]
+
+
+def replicate_metric(results_dir: Path, metric: str) -> float | None:
+    """Run-level metric of an analyzed replicate."""
+    out_csv = results_dir / "replicate_metrics_run.csv"
+    if not out_csv.exists():
+        return None
+    with out_csv.open() as fp:
+        for row in csv.DictReader(fp):
+            try:
+                value = float(row.get(metric, ""))
+            except ValueError:
+                continue
+            if math.isfinite(value):
+                return value
+    return None
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser()
+    p.add_argument("--config", default="analysis/mode2_loss/sweep_config.yaml")
+    p.add_argument("--jobs", type=int, default=1, help="Runs executed concurrently; 0 = one per CPU (default: 1)")
+    p.add_argument("--mem-budget-gb", type=float, default=None, help="Do not start a run if the estimated peak RSS of all running ones would exceed this")
+    p.add_argument("--mem-per-job-gb", type=float, default=2.0, help="Peak RSS assumed for runs never measured before (default: 2.0)")
+    p.add_argument("--retries", type=int, default=1, help="Extra attempts for a failed run (default: 1)")
+    p.add_argument("--no-reuse", action="store_true", help="Do not reuse identical runs from other sweeps")
+    return p.parse_args()
+
+
+def read_metadata(meta_path: Path) -> dict:
+    try:
+        with meta_path.open() as fp:
+            return json.load(fp)
+    except Exception:
+        return {}
+
+
+def write_metadata(meta_path: Path, meta: dict) -> None:
+    tmp = meta_path.with_suffix(".json.tmp")
+    with tmp.open("w") as fp:
+        json.dump(meta, fp, indent=2)
+    os.replace(tmp, meta_path)
+
+
+def stop_process(proc: subprocess.Popen) -> None:
+    # run_one.py runs in its own session; signal the whole group so the ns-3 binary stops too
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+        proc.wait()
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
 def main() -> None:
-    cfg_path = Path("analysis/mode2_loss/sweep_config.yaml")
+    args = parse_args()
+    cfg_path = Path(args.config)
     cfg = load_config(cfg_path)
 
-    base_args = cfg.get("base_args", [])
-    sim_time = cfg.get("sim_time_s", 30)
     rng_run = cfg.get("rng_run", 1)
-    sumo_gui = cfg.get("sumo_gui", 0)
-    sumo_updates = cfg.get("sumo_updates", 0.01)
-    penetrationRate = cfg.get("penetrationRate", 0.7)
-    scenario = cfg.get("scenario", "v2v-emergencyVehicleAlert-nrv2x")
+    settings = {
+        "base_args": cfg.get("base_args", []),
+        "sim_time": cfg.get("sim_time_s", 30),
+        "sumo_gui": cfg.get("sumo_gui", 0),
+        "sumo_updates": cfg.get("sumo_updates", 0.01),
+        "penetrationRate": cfg.get("penetrationRate", 0.7),
+        "scenario": cfg.get("scenario", "v2v-emergencyVehicleAlert-nrv2x"),
+    }
+
+    # seeds: [..] turns every point into replicate runs under <point>/seed_<n>
+    seeds = cfg.get("seeds") or []
+    replicated = bool(seeds)
+    if not replicated:
+        seeds = [rng_run]
+
+    ci_cfg = cfg.get("ci") or {}
+    ci_metric = ci_cfg.get("metric", "prr")
+    ci_level = float(ci_cfg.get("level", 0.95))
+    ci_target = ci_cfg.get("target_width")
+    ci_min_seeds = max(2, int(ci_cfg.get("min_seeds", 3)))
+    early_stop = replicated and ci_target is not None
 
     points = build_points(cfg)
     if not points:
@@ -59,87 +258,181 @@ def main() -> None:
 
     out_root = Path("analysis/mode2_loss/data/sweep")
     out_root.mkdir(parents=True, exist_ok=True)
+    replicate_root = out_root.parent / "sweep_replicates"
+    # fingerprint -> run directory, shared by every sweep writing under data/
+    cache_root = out_root.parent / "run_cache"
+    git = git_hash()
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    mem_budget_mb = args.mem_budget_gb * 1024.0 if args.mem_budget_gb else None
+    default_mem_mb = args.mem_per_job_gb * 1024.0
 
+    states = []
     for idx, point in enumerate(points):
-        point_id = point.get("id")
-        if not point_id:
-            parts = [f"{k}-{point[k]}" for k in sorted(point.keys())]
-            point_id = slugify("_".join(parts))
-        point_dir = out_root / point_id
-        point_dir.mkdir(parents=True, exist_ok=True)
-        meta_path = point_dir / "metadata.json"
-
-        cmd = [
-            "python3",
-            "analysis/mode2_loss/run_one.py",
-            "--point-id",
-            point_id,
-            "--out-dir",
-            str(point_dir),
-            "--scenario",
-            scenario,
-            "--sim-time",
-            str(sim_time),
-            "--rng-run",
-            str(rng_run),
-            "--sumo-gui",
-            str(sumo_gui),
-            "--sumo-updates",
-            str(sumo_updates),
-            "--penetrationRate",
-            str(penetrationRate),
-        ]
-
-        for k in ["txPower", "mcs", "enableSensing", "slThresPsschRsrp", "enableChannelRandomness", "channelUpdatePeriod"]:
-            if k in point:
-                cmd.extend([f"--{k}", str(point[k])])
-
-        for extra in base_args:
-            cmd.extend(["--extra-arg", extra])
-
-        def norm(val):
-            if isinstance(val, bool):
-                return "true" if val else "false"
-            if isinstance(val, (int, float)):
-                return float(val)
-            if isinstance(val, str):
-                low = val.lower()
-                if low in ("true", "false"):
-                    return low
-                try:
-                    return float(val)
-                except Exception:
-                    return val
-            return str(val)
-
-        if meta_path.exists():
-            try:
-                with meta_path.open() as fp:
-                    meta = json.load(fp)
-                if meta.get("exit_code") == 0:
-                    matches = True
-                    for k in ["txPower", "mcs", "enableSensing", "slThresPsschRsrp", "enableChannelRandomness", "channelUpdatePeriod"]:
-                        if norm(meta.get(k)) != norm(point.get(k)):
-                            matches = False
-                            break
-                    if norm(meta.get("sim_time")) != norm(sim_time):
-                        matches = False
-                    if norm(meta.get("rng_run")) != norm(rng_run):
-                        matches = False
-                    if norm(meta.get("sumo_gui")) != norm(sumo_gui):
-                        matches = False
-                    if norm(meta.get("sumo_updates")) != norm(sumo_updates):
-                        matches = False
-                    if norm(meta.get("penetrationRate")) != norm(penetrationRate):
-                        matches = False
-                    if matches:
-                        print(f"[SKIP] {idx+1}/{len(points)} -> {point_id} (metadata up-to-date)")
+        states.append({
+            "idx": idx,
+            "point": point,
+            "point_id": point_id_of(point),
+            "pending": list(seeds),
+            "values": [],
+            "converged": False,
+        })
+
+    queue: deque = deque()
+
+    def enqueue_next(st: dict) -> None:
+        if st["converged"] or not st["pending"]:
+            return
+        seed = st["pending"].pop(0)
+        if replicated:
+            run_id = f"{st['point_id']}_seed{seed}"
+            run_dir = out_root / st["point_id"] / f"seed_{seed}"
+        else:
+            run_id = st["point_id"]
+            run_dir = out_root / st["point_id"]
+        cmd = build_cmd(run_id, st["point_id"], run_dir, st["point"], settings, seed)
+        fingerprint = fingerprint_of(parse_run_args(cmd[2:]), git)
+        cmd.extend(["--fingerprint", fingerprint])
+        queue.append({"state": st, "seed": seed, "run_id": run_id, "run_dir": run_dir, "cmd": cmd, "fingerprint": fingerprint, "attempt": 1})
+
+    # with early stopping a point only gets more seeds while its CI is still too wide
+    initial = min(ci_min_seeds, len(seeds)) if early_stop else len(seeds)
+    for st in states:
+        for _ in range(initial):
+            enqueue_next(st)
+
+    def label(task: dict) -> str:
+        return f"{task['state']['idx']+1}/{len(points)} -> {task['run_id']}"
+
+    # replicate analyses run as jobs of their own, so the scheduler keeps polling meanwhile
+    analyzing: list[tuple[dict, Path, subprocess.Popen]] = []
+
+    def on_success(task: dict) -> None:
+        st = task["state"]
+        if not early_stop or st["converged"]:
+            return
+        results_dir = replicate_root / st["point_id"] / f"seed_{task['seed']}"
+        if not analysis_needed(task["run_dir"], results_dir):
+            on_analyzed(task, results_dir)
+            return
+        results_dir.mkdir(parents=True, exist_ok=True)
+        print(f"[ANALYZE] {label(task)}")
+        analyzing.append((task, results_dir, subprocess.Popen(analysis_cmd(task["run_dir"], results_dir, cfg_path), start_new_session=True)))
+
+    def on_analyzed(task: dict, results_dir: Path) -> None:
+        st = task["state"]
+        if st["converged"]:
+            return
+        value = replicate_metric(results_dir, ci_metric)
+        if value is None:
+            enqueue_next(st)
+            return
+        st["values"].append(value)
+        if len(st["values"]) < ci_min_seeds:
+            return
+        ci = t_interval(st["values"], ci_level)
+        if ci is not None and ci[2] - ci[1] <= float(ci_target):
+            st["converged"] = True
+            print(
+                f"[CONVERGED] {st['point_id']}: {ci_metric}={ci[0]:.4f} "
+                f"{int(ci_level * 100)}% CI width {ci[2] - ci[1]:.4f} <= {ci_target} after {len(st['values'])} seeds"
+            )
+        else:
+            enqueue_next(st)
+
+    running: list[tuple[dict, subprocess.Popen, float]] = []
+    observed_mem_mb: list[float] = []
+    failed: list[str] = []
+
+    def estimate_mb(task: dict) -> float:
+        peak = read_metadata(task["run_dir"] / "metadata.json").get("peak_rss_mb")
+        if isinstance(peak, (int, float)) and peak > 0:
+            return float(peak)
+        return max(observed_mem_mb) if observed_mem_mb else default_mem_mb
+
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        while queue or running or analyzing:
+            for item in list(analyzing):
+                task, results_dir, proc = item
+                rc = proc.poll()
+                if rc is None:
+                    continue
+                analyzing.remove(item)
+                if rc != 0:
+                    print(f"[WARN] analysis of {task['run_id']} exit code {rc}")
+                on_analyzed(task, results_dir)
+
+            for item in list(running):
+                task, proc, _ = item
+                rc = proc.poll()
+                if rc is None:
+                    continue
+                running.remove(item)
+                meta_path = task["run_dir"] / "metadata.json"
+                meta = read_metadata(meta_path)
+                if meta:
+                    meta["attempts"] = task["attempt"]
+                    write_metadata(meta_path, meta)
+                    if isinstance(meta.get("peak_rss_mb"), (int, float)):
+                        observed_mem_mb.append(float(meta["peak_rss_mb"]))
+                if rc == 0:
+                    register_run(cache_root, task["fingerprint"], task["run_dir"])
+                    print(f"[DONE] {label(task)} ({meta.get('wall_time_s', float('nan')):.1f}s, peak RSS {meta.get('peak_rss_mb', float('nan')):.0f} MB)")
+                    on_success(task)
+                elif task["attempt"] <= args.retries:
+                    print(f"[RETRY] {label(task)} exit code {rc}, attempt {task['attempt'] + 1}/{args.retries + 1}")
+                    task["attempt"] += 1
+                    queue.append(task)
+                else:
+                    print(f"[FAIL] {label(task)} exit code {rc} after {task['attempt']} attempt(s), see {task['run_dir'] / 'run.log'}")
+                    failed.append(task["run_id"])
+                    if early_stop:
+                        enqueue_next(task["state"])
+
+            while queue and len(running) + len(analyzing) < jobs:
+                task = queue[0]
+                st = task["state"]
+                run_dir = task["run_dir"]
+                run_dir.mkdir(parents=True, exist_ok=True)
+                meta_path = run_dir / "metadata.json"
+                if completed_run(read_metadata(meta_path), task["fingerprint"]):
+                    queue.popleft()
+                    register_run(cache_root, task["fingerprint"], run_dir)
+                    print(f"[SKIP] {label(task)} (fingerprint {task['fingerprint'][:12]} up-to-date)")
+                    on_success(task)
+                    continue
+                if not args.no_reuse:
+                    src = reuse_cached_run(cache_root, task["fingerprint"], run_dir, task["run_id"], st["point_id"])
+                    if src is not None:
+                        queue.popleft()
+                        print(f"[REUSE] {label(task)} from {src}")
+                        on_success(task)
                         continue
-            except Exception:
-                pass
+                est = estimate_mb(task)
+                used = sum(m for _, _, m in running)
+                if mem_budget_mb is not None and running and used + est > mem_budget_mb:
+                    break
+                queue.popleft()
+                # Drop stale metadata first: an interrupted run then never looks up-to-date on resume
+                if meta_path.exists():
+                    meta_path.unlink()
+                unshare_outputs(run_dir)
+                print(f"[SWEEP] {label(task)}")
+                running.append((task, subprocess.Popen(task["cmd"], start_new_session=True), est))
+
+            if running or analyzing:
+                time.sleep(0.2)
+    except KeyboardInterrupt:
+        print(f"[INTERRUPT] stopping {len(running) + len(analyzing)} running job(s); rerun to resume")
+        for _, proc, _ in running:
+            stop_process(proc)
+        for _, _, proc in analyzing:
+            stop_process(proc)
+        raise SystemExit(130)
 
-        print(f"[SWEEP] {idx+1}/{len(points)} -> {point_id}")
-        subprocess.check_call(cmd)
+    if failed:
+        raise SystemExit(f"{len(failed)} run(s) failed: {', '.join(failed)}")
 
 
 if __name__ == "__main__":
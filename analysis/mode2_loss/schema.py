@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""Column types of the analyze_csv.py outputs and a shared CSV/Parquet reader/writer.
+
+CSV is always written for compatibility. With Parquet enabled every typed table is
+also stored as a dataset directory ``<name>.parquet/`` partitioned by ``run_id``;
+``read_table`` prefers it and loads only the requested columns.
+"""
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+CATEGORY = "category"
+FLOAT = "float64"
+# Integer columns (mostly station ids and counts) are always nullable Int64, so a
+# column keeps the same type in every chunk/partition; values that are not integers
+# (e.g. "veh3" or 1.5) become NA. Columns holding such values must be declared STRING.
+INT = "Int64"
+STRING = "string"
+
+_KEYS = {"run_id": CATEGORY, "tech": CATEGORY}
+
+SCHEMAS: Dict[str, Dict[str, str]] = {
+    "vehicle_state": {
+        **_KEYS,
+        "vehicle_id": INT,
+        "timestamp_ms": FLOAT,
+        "lat": FLOAT,
+        "lon": FLOAT,
+        "heading_deg": FLOAT,
+        "speed_mps": FLOAT,
+        "accel_mps2": FLOAT,
+        "source_camId": INT,
+        "message_id": INT,
+        "t_s": FLOAT,
+    },
+    "msg_log": {
+        **_KEYS,
+        "vehicle_id": STRING,
+        "msg_seq": INT,
+        "tx_t_s": FLOAT,
+        "rx_t_s": FLOAT,
+        "rx_ok": INT,
+        "msg_type": CATEGORY,
+        "tx_id": INT,
+        "rx_id": INT,
+        "cam_gdt_ms": FLOAT,
+    },
+    "comm_stats": {
+        **_KEYS,
+        "vehicle_id": INT,
+        "t_s": FLOAT,
+        "msg_type": CATEGORY,
+        "sent": FLOAT,
+        "received": FLOAT,
+        "prr": FLOAT,
+    },
+    "sionna_phy": {
+        **_KEYS,
+        "tx_id": INT,
+        "rx_id": INT,
+        "distance": FLOAT,
+        "rssi": FLOAT,
+        "snr": FLOAT,
+    },
+    "coexistence_phy": {
+        **_KEYS,
+        "t_s": FLOAT,
+        "rx": INT,
+        "tx": INT,
+        "rx_lat": FLOAT,
+        "rx_lon": FLOAT,
+        "tx_lat": FLOAT,
+        "tx_lon": FLOAT,
+        "technology": CATEGORY,
+        "distance": FLOAT,
+        "los": INT,
+        "sinr": FLOAT,
+    },
+    "behavior_metrics_vehicle": {
+        **_KEYS,
+        "vehicle_id": INT,
+        "min_speed": FLOAT,
+        "max_decel": FLOAT,
+        "time_to_first_brake": FLOAT,
+        "max_abs_jerk": FLOAT,
+        "mean_abs_jerk": FLOAT,
+        "path_length_m": FLOAT,
+        "stop_count": INT,
+    },
+    "behavior_metrics_run": {
+        **_KEYS,
+        "vehicles": INT,
+        "min_speed_median": FLOAT,
+        "min_speed_p10": FLOAT,
+        "min_speed_p90": FLOAT,
+        "max_decel_median": FLOAT,
+        "max_decel_p10": FLOAT,
+        "max_decel_p90": FLOAT,
+        "time_to_first_brake_median": FLOAT,
+        "time_to_first_brake_p10": FLOAT,
+        "time_to_first_brake_p90": FLOAT,
+        "stop_count_mean": FLOAT,
+    },
+    "comm_metrics_vehicle": {
+        **_KEYS,
+        "vehicle_id": INT,
+        "sent": INT,
+        "received": INT,
+        "prr": FLOAT,
+        "msg_type": CATEGORY,
+    },
+    "comm_metrics_run": {
+        **_KEYS,
+        "sent": INT,
+        "received": INT,
+        "prr": FLOAT,
+    },
+    "aoi_metrics_vehicle": {
+        **_KEYS,
+        "vehicle_id": INT,
+        "aoi_mean_s": FLOAT,
+        "aoi_p95_s": FLOAT,
+        "aoi_max_s": FLOAT,
+    },
+    "latency_metrics_run": {
+        **_KEYS,
+        "latency_mean_s": FLOAT,
+        "latency_p95_s": FLOAT,
+        "latency_max_s": FLOAT,
+        "latency_samples": INT,
+    },
+    "metsup_latency_run": {
+        **_KEYS,
+        "msg_type": CATEGORY,
+        "latency_samples": INT,
+        "latency_mean_s": FLOAT,
+        "latency_p50_s": FLOAT,
+        "latency_p95_s": FLOAT,
+        "latency_p99_s": FLOAT,
+        "latency_max_s": FLOAT,
+    },
+    "metsup_prr_distance": {
+        **_KEYS,
+        "msg_type": CATEGORY,
+        "distance_low_m": FLOAT,
+        "distance_high_m": FLOAT,
+        "expected": INT,
+        "received": INT,
+        "prr": FLOAT,
+    },
+    "reaction_metrics_vehicle": {
+        **_KEYS,
+        "vehicle_id": INT,
+        "reaction_delay_s": FLOAT,
+    },
+    "reaction_metrics_run": {
+        **_KEYS,
+        "reaction_delay_median": FLOAT,
+        "reaction_delay_p10": FLOAT,
+        "reaction_delay_p90": FLOAT,
+        "reaction_received_frac": FLOAT,
+    },
+    "replicate_metrics_run": {
+        **_KEYS,
+        "prr": FLOAT,
+        "latency_p95_s": FLOAT,
+        "aoi_mean_s": FLOAT,
+        "aoi_p95_s": FLOAT,
+        "reaction_delay_median": FLOAT,
+        "reaction_delay_p90": FLOAT,
+    },
+    "ci_metrics_point": {
+        "point_id": CATEGORY,
+        "tech": CATEGORY,
+        "metric": CATEGORY,
+        "n_seeds": INT,
+        "mean": FLOAT,
+        "ci_low": FLOAT,
+        "ci_high": FLOAT,
+        "ci_width": FLOAT,
+        "ci_level": FLOAT,
+        "ci_method": CATEGORY,
+    },
+}
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+def _coerce(series: pd.Series, dtype: str) -> pd.Series:
+    if dtype == FLOAT:
+        return pd.to_numeric(series, errors="coerce").astype(FLOAT)
+    if dtype == INT:
+        num = pd.to_numeric(series, errors="coerce").astype(FLOAT)
+        return num.where(np.isfinite(num) & (num == num.round())).astype(INT)
+    if dtype == STRING:
+        return series.astype(STRING)
+    if dtype == CATEGORY:
+        return series.astype(STRING).astype(CATEGORY)
+    return series
+
+
+def apply_schema(df: pd.DataFrame, name: str) -> pd.DataFrame:
+    schema = SCHEMAS.get(name, {})
+    out = df.copy()
+    for column, dtype in schema.items():
+        if column in out.columns:
+            out[column] = _coerce(out[column], dtype)
+    return out
+
+
+def write_parquet(df: pd.DataFrame, out_dir: Path, name: str, part: Optional[int] = None) -> None:
+    """Write ``df`` into the ``<name>.parquet`` dataset, partitioned by run_id.
+
+    ``part=None`` replaces the dataset; an integer appends one more file per
+    partition, which lets chunked writers build the dataset incrementally.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    root = out_dir / f"{name}.parquet"
+    if part is None or part == 0:
+        if root.exists():
+            shutil.rmtree(root)
+    table = pa.Table.from_pandas(apply_schema(df, name), preserve_index=False)
+    partition_cols = ["run_id"] if "run_id" in df.columns else None
+    pq.write_to_dataset(
+        table,
+        root_path=str(root),
+        partition_cols=partition_cols,
+        basename_template=f"part-{part or 0}-{{i}}.parquet",
+    )
+
+
+def write_table(df: pd.DataFrame, out_dir: Path, name: str, parquet: bool = False) -> None:
+    df.to_csv(out_dir / f"{name}.csv", index=False)
+    if parquet and name in SCHEMAS:
+        write_parquet(df, out_dir, name)
+
+
+def read_table(in_dir: Path, name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Load an analyze_csv.py output with its declared dtypes.
+
+    Reads ``<name>.parquet`` when present (only ``columns`` are materialized),
+    otherwise ``<name>.csv``. Missing tables give an empty frame.
+    """
+    pq_path = in_dir / f"{name}.parquet"
+    csv_path = in_dir / f"{name}.csv"
+    if pq_path.exists() and parquet_available():
+        df = pd.read_parquet(pq_path, columns=columns)
+        # partition keys come back as dictionary columns; keep the declared order of columns
+        if columns is None:
+            ordered = [c for c in SCHEMAS.get(name, {}) if c in df.columns]
+            df = df[ordered + [c for c in df.columns if c not in ordered]]
+        return apply_schema(df, name)
+    if csv_path.exists():
+        usecols = (lambda c: c in columns) if columns is not None else None
+        return apply_schema(pd.read_csv(csv_path, usecols=usecols), name)
+    return pd.DataFrame()
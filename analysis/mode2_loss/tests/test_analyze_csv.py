@@ -0,0 +1,92 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analyze_csv
+from analyze_csv import MSG_LOG_COLUMNS, StreamingCommMetrics, compute_comm_metrics, compute_reaction_metrics, iter_time_ordered, stream_msg_logs
+
+EMERGENCY_TX_ID = 2
+
+
+def write_msg_logs(tmp_path: Path, n_vehicles: int = 5, sim_time_s: float = 40.0, seed: int = 1) -> list:
+    """Per-vehicle -MSG.csv files like the simulator writes them: own CAMs and receptions, in time order."""
+    rng = np.random.default_rng(seed)
+    rows = {v: [] for v in range(1, n_vehicles + 1)}
+    for tx in range(1, n_vehicles + 1):
+        for seq, t in enumerate(np.arange(0.1 * tx, sim_time_s, 0.1)):
+            rows[tx].append({"vehicle_id": f"veh{tx}", "msg_seq": seq, "tx_t_s": t, "rx_t_s": np.nan, "rx_ok": 0, "msg_type": "CAM", "tx_id": tx, "rx_id": np.nan, "cam_gdt_ms": seq})
+            for rx in range(1, n_vehicles + 1):
+                if rx == tx or rng.random() < 0.2:
+                    continue
+                rows[rx].append({"vehicle_id": f"veh{rx}", "msg_seq": seq, "tx_t_s": t, "rx_t_s": t + rng.uniform(0.001, 0.05), "rx_ok": 1, "msg_type": "CAM", "tx_id": tx, "rx_id": rx, "cam_gdt_ms": seq})
+    paths = []
+    for v, r in rows.items():
+        df = pd.DataFrame(r, columns=MSG_LOG_COLUMNS)
+        df["t"] = df["rx_t_s"].fillna(df["tx_t_s"])
+        path = tmp_path / f"run-veh{v}-MSG.csv"
+        df.sort_values("t", kind="stable").drop(columns="t").to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def in_memory(paths: list) -> pd.DataFrame:
+    frames = []
+    for path in paths:
+        df = pd.read_csv(path)
+        df.insert(0, "tech", "nrv2x")
+        df.insert(0, "run_id", "run")
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_iter_time_ordered_merges_files_in_time_order(tmp_path):
+    paths = write_msg_logs(tmp_path, sim_time_s=5.0)
+    merged = pd.concat(list(iter_time_ordered(paths, chunk_rows=37)), ignore_index=True)
+    assert len(merged) == sum(len(pd.read_csv(p)) for p in paths)
+    t = merged["rx_t_s"].fillna(merged["tx_t_s"]).to_numpy()
+    assert np.all(np.diff(t) >= 0)
+
+
+@pytest.mark.parametrize("chunk_rows", [50, 1000, 200000])
+def test_streaming_matches_in_memory(tmp_path, chunk_rows):
+    paths = write_msg_logs(tmp_path)
+    df = in_memory(paths)
+    prr, run_prr, aoi, latency = compute_comm_metrics(df)
+    reaction_vehicle, _ = compute_reaction_metrics(df, EMERGENCY_TX_ID)
+
+    acc = stream_msg_logs([("run", "nrv2x", p) for p in paths], EMERGENCY_TX_ID, chunk_rows, None)
+    s_prr, s_run_prr, s_aoi, s_latency, s_reaction_vehicle, _ = acc.results()
+
+    key = ["run_id", "tech", "vehicle_id"]
+    pd.testing.assert_frame_equal(run_prr.reset_index(drop=True), s_run_prr.reset_index(drop=True), check_like=True)
+    pd.testing.assert_frame_equal(prr.sort_values(key).reset_index(drop=True), s_prr.sort_values(key).reset_index(drop=True), check_like=True, check_dtype=False)
+
+    m = aoi.merge(s_aoi, on=key, suffixes=("", "_s"))
+    assert len(m) == len(aoi) == len(s_aoi)
+    np.testing.assert_allclose(m["aoi_mean_s"], m["aoi_mean_s_s"])
+    np.testing.assert_allclose(m["aoi_max_s"], m["aoi_max_s_s"])
+    np.testing.assert_allclose(m["aoi_p95_s"], m["aoi_p95_s_s"], rtol=0.02)
+
+    assert int(s_latency["latency_samples"].iloc[0]) == int(latency["latency_samples"].iloc[0])
+    np.testing.assert_allclose(s_latency["latency_mean_s"], latency["latency_mean_s"])
+    np.testing.assert_allclose(s_latency["latency_max_s"], latency["latency_max_s"])
+    np.testing.assert_allclose(s_latency["latency_p95_s"], latency["latency_p95_s"], rtol=0.02)
+
+    m = reaction_vehicle.merge(s_reaction_vehicle, on=key, suffixes=("", "_s"))
+    assert len(m) == len(reaction_vehicle) == len(s_reaction_vehicle)
+    np.testing.assert_allclose(m["reaction_delay_s"], m["reaction_delay_s_s"])
+
+
+def test_streaming_evicts_old_transmissions(tmp_path):
+    paths = write_msg_logs(tmp_path, sim_time_s=60.0)
+    acc = StreamingCommMetrics(EMERGENCY_TX_ID)
+    acc.begin_run("run", "nrv2x")
+    largest = 0
+    for chunk in iter_time_ordered(paths, chunk_rows=200):
+        acc.add_chunk(chunk)
+        largest = max(largest, len(acc._tx_times))
+    acc.end_run()
+    # 5 senders at 10 Hz: the table never holds much more than LATENCY_MAX_S seconds of transmissions
+    assert largest < 5 * 10 * (analyze_csv.LATENCY_MAX_S + 2)
@@ -0,0 +1,52 @@
+import math
+
+import numpy as np
+import pytest
+
+from confidence import bootstrap_interval, interval, t_critical, t_interval
+
+
+@pytest.mark.parametrize("level, dof, expected", [
+    (0.95, 1, 12.7062),
+    (0.95, 2, 4.3027),
+    (0.95, 4, 2.7764),
+    (0.95, 9, 2.2622),
+    (0.90, 5, 2.0150),
+    (0.99, 30, 2.7500),
+])
+def test_t_critical_matches_tables(level, dof, expected):
+    assert t_critical(level, dof) == pytest.approx(expected, abs=1e-3)
+
+
+def test_t_interval():
+    vals = [0.90, 0.92, 0.88, 0.91, 0.89]
+    mean, low, high = t_interval(vals, 0.95)
+    sd = float(np.std(vals, ddof=1))
+    assert mean == pytest.approx(0.90)
+    assert high - mean == pytest.approx(2.7764 * sd / math.sqrt(5), rel=1e-4)
+    assert mean - low == pytest.approx(high - mean)
+
+
+def test_t_interval_skips_non_finite_and_needs_two_values():
+    assert t_interval([1.0, float("nan"), None, "x"]) is None
+    assert t_interval([1.0, 3.0, float("inf")])[0] == pytest.approx(2.0)
+
+
+def test_bootstrap_interval_is_reproducible_and_contains_mean():
+    vals = np.random.default_rng(3).normal(10.0, 1.0, size=20)
+    first = bootstrap_interval(vals, 0.95, samples=4000)
+    assert first == bootstrap_interval(vals, 0.95, samples=4000)
+    mean, low, high = first
+    assert low < mean < high
+    # close to the normal-theory interval for a sample this size
+    t_mean, t_low, t_high = t_interval(vals, 0.95)
+    assert high - low == pytest.approx(t_high - t_low, rel=0.25)
+    assert bootstrap_interval([1.0]) is None
+
+
+def test_interval_dispatch():
+    vals = [1.0, 2.0, 3.0]
+    assert interval(vals, 0.95, "t") == t_interval(vals, 0.95)
+    assert interval(vals, 0.95, "bootstrap", 500) == bootstrap_interval(vals, 0.95, 500)
+    with pytest.raises(ValueError):
+        interval(vals, 0.95, "jackknife")
@@ -0,0 +1,47 @@
+import os
+
+import fingerprint
+from fingerprint import file_digest, normalize_cmd, run_fingerprint, sumo_files
+
+
+def test_normalize_cmd_drops_outputs_and_canonicalizes_values():
+    a = ["./ns3-example", "--txPower=23", "--enableSensing=True", "--csv-log=/tmp/a/run", "--name=x"]
+    b = ["./other-path", "--txPower=23.0", "--enableSensing=true", "--csv-log=/tmp/b/run", "--name=x"]
+    assert normalize_cmd(a) == normalize_cmd(b)
+    assert normalize_cmd(["bin", "--txPower=23"]) != normalize_cmd(["bin", "--txPower=24"])
+
+
+def test_file_digest_follows_content(tmp_path):
+    path = tmp_path / "lib.so"
+    path.write_bytes(b"one")
+    first = file_digest(path)
+    assert file_digest(path) == first
+    path.write_bytes(b"two!")
+    os.utime(path, ns=(1, 1))
+    assert file_digest(path) != first
+
+
+def test_sumo_files_lists_referenced_inputs_once(tmp_path):
+    cfg = tmp_path / "map.sumo.cfg"
+    cfg.write_text(
+        '<configuration><input>'
+        '<net-file value="map.net.xml"/>'
+        '<route-files value="cars.rou.xml, extra.rou.xml"/>'
+        '<additional-files value="poly.add.xml"/>'
+        '</input></configuration>'
+    )
+    names = [p.name for p in sumo_files(cfg, tmp_path, "cars.rou.xml")]
+    assert names == ["map.sumo.cfg", "map.net.xml", "cars.rou.xml", "extra.rou.xml", "poly.add.xml"]
+
+
+def test_run_fingerprint(tmp_path):
+    binary = tmp_path / "example"
+    binary.write_bytes(b"v1")
+    missing = tmp_path / "missing.xml"
+    cmd = [str(binary), "--txPower=23", f"--csv-log={tmp_path}/out"]
+    base = run_fingerprint(cmd, [binary, missing], "abc")
+    assert run_fingerprint([str(binary), "--txPower=23.0", "--csv-log=/elsewhere"], [binary, missing], "abc") == base
+    assert run_fingerprint(cmd, [binary, missing], "def") != base
+    binary.write_bytes(b"v2 rebuilt")
+    fingerprint._digest_cache.clear()
+    assert run_fingerprint(cmd, [binary, missing], "abc") != base
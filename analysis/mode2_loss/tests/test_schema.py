@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from schema import CATEGORY, FLOAT, INT, STRING, _coerce, apply_schema
+
+
+def test_int_is_always_nullable_int64():
+    out = _coerce(pd.Series(["3", "4", None, "veh5", "1.5", "7.0", "inf"]), INT)
+    assert str(out.dtype) == INT
+    assert out.tolist()[:2] == [3, 4]
+    assert out.iloc[5] == 7
+    assert out.isna().tolist() == [False, False, True, True, True, False, True]
+
+
+def test_int_dtype_does_not_depend_on_the_chunk():
+    chunks = [pd.Series([1, 2]), pd.Series([1.0, np.nan]), pd.Series(["veh3", "4"]), pd.Series([], dtype=object)]
+    assert {str(_coerce(c, INT).dtype) for c in chunks} == {INT}
+
+
+def test_float_string_category():
+    assert _coerce(pd.Series(["1.5", "x"]), FLOAT).tolist()[0] == 1.5
+    assert np.isnan(_coerce(pd.Series(["1.5", "x"]), FLOAT).iloc[1])
+    assert str(_coerce(pd.Series([1, None]), STRING).dtype) == STRING
+    assert str(_coerce(pd.Series(["a", "b", "a"]), CATEGORY).dtype) == CATEGORY
+
+
+def test_apply_schema_leaves_undeclared_columns():
+    df = pd.DataFrame({"run_id": ["r"], "tech": ["nrv2x"], "tx_id": ["2"], "extra": ["x"]})
+    out = apply_schema(df, "sionna_phy")
+    assert str(out["tx_id"].dtype) == INT
+    assert out["extra"].tolist() == ["x"]
+    assert df["tx_id"].tolist() == ["2"]
@@ -4,19 +4,32 @@
 The script scans run directories, extracts key metrics, and writes:
   - CSV summary with per-run metrics
   - Markdown report with aggregated findings
+
+Run directories are audited in parallel. Each per-run row is cached in
+``<out-dir>/.log_audit_cache.json`` under a fingerprint of the directory content
+(relative path, size and mtime of every file; nested run directories contribute
+only the names of their CSV/PNG files), so repeated audits only process new or
+changed runs.
 """
 
 from __future__ import annotations
 
 import argparse
+import hashlib
+import json
 import math
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
+from build_drop_decision_timeline import drop_decision_counts
+from run_artifacts import load_run_logs, run_log_files
+
 
 def _max_valid(a: float, b: float) -> float:
     if math.isnan(a):
@@ -26,38 +39,103 @@ def _max_valid(a: float, b: float) -> float:
     return max(a, b)
 
 
-def _parse_float(pattern: str, text: str) -> float:
-    m = re.search(pattern, text)
-    if not m:
+PRR_RE = re.compile(r"Average PRR:\s*([0-9.]+)")
+LATENCY_RE = re.compile(r"Average latency \(ms\):\s*([0-9.]+)")
+CACHE_NAME = ".log_audit_cache.json"
+# Bump when the per-run row changes so old cache entries are recomputed
+AUDIT_VERSION = 1
+SKIP_DIRS = {".run_artifacts_cache", "__pycache__"}
+
+
+def _parse_float(match: re.Match | None) -> float:
+    if not match:
         return math.nan
     try:
-        return float(m.group(1))
+        return float(match.group(1))
     except ValueError:
         return math.nan
 
 
+def _scan_log(path: Path) -> tuple[float, float, int, bool]:
+    """First PRR/latency value, INCIDENT-APPLIED count and sionna mention of one log, read line by line."""
+    prr = math.nan
+    latency = math.nan
+    incidents = 0
+    sionna = False
+    with path.open(errors="ignore") as fp:
+        for line in fp:
+            if math.isnan(prr) and "Average PRR" in line:
+                prr = _parse_float(PRR_RE.search(line))
+            if math.isnan(latency) and "Average latency" in line:
+                latency = _parse_float(LATENCY_RE.search(line))
+            incidents += line.count("INCIDENT-APPLIED")
+            if not sionna and "sionna" in line.lower():
+                sionna = True
+    return prr, latency, incidents, sionna
+
+
+def _is_run_dir(d: Path, dirnames: list[str], filenames: list[str]) -> bool:
+    if any(f.endswith(".log") for f in filenames):
+        return True
+    return "artifacts" in dirnames and any(
+        f.endswith(("-MSG.csv", "-MSG.cols")) for f in os.listdir(d / "artifacts")
+    )
+
+
 def _collect_run_dirs(root: Path) -> list[Path]:
+    # one walk over the tree instead of globbing every directory again
     out: list[Path] = []
-    for d in sorted(p for p in root.rglob("*") if p.is_dir()):
-        has_log = any(d.glob("*.log"))
-        has_artifacts_logs = (d / "artifacts").exists() and any((d / "artifacts").glob("*-MSG.csv"))
-        if has_log or has_artifacts_logs:
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        d = Path(dirpath)
+        if d == root:
+            continue
+        if _is_run_dir(d, dirnames, filenames):
             out.append(d)
-    return out
+    return sorted(out)
+
+
+def _run_fingerprint(run_dir: Path) -> str:
+    # Nested run dirs are audited (and fingerprinted) on their own. Only the names of
+    # their CSV/PNG files reach this run's row (recursive counts), so those are not stat'ed
+    # and a rewrite of a child's logs does not invalidate the parent.
+    h = hashlib.sha256(f"{AUDIT_VERSION}\n".encode())
+    nested: Path | None = None  # nested run dir being walked (os.walk is top-down)
+    for dirpath, dirnames, filenames in os.walk(run_dir):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        d = Path(dirpath)
+        if nested is None or not d.is_relative_to(nested):
+            nested = d if d != run_dir and _is_run_dir(d, dirnames, filenames) else None
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            rel = os.path.relpath(path, run_dir)
+            if nested is not None:
+                if name.endswith((".csv", ".png")):
+                    h.update(f"{rel}\n".encode())
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            h.update(f"{rel}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def _load_cache(path: Path) -> dict[str, dict]:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
 
 
-def _safe_read_csv(path: Path, usecols: list[str] | None = None) -> pd.DataFrame:
-    try:
-        return pd.read_csv(path, usecols=usecols)
-    except Exception:
-        return pd.DataFrame()
+def _write_cache(path: Path, cache: dict[str, dict]) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(cache))
+    os.replace(tmp, path)
 
 
 def _eva_metrics(run_dir: Path) -> dict[str, float]:
-    artifacts = run_dir / "artifacts"
-    msg_files = sorted(artifacts.glob("*-MSG.csv"))
-    ctrl_files = sorted(artifacts.glob("*-CTRL.csv"))
-    if not msg_files and not ctrl_files:
+    if not run_log_files(run_dir, "MSG") and not run_log_files(run_dir, "CTRL"):
         return {
             "eva_drop_phy_total": math.nan,
             "eva_cam_drop_phy": math.nan,
@@ -66,35 +144,13 @@ def _eva_metrics(run_dir: Path) -> dict[str, float]:
             "eva_drop_decision_match_ratio": math.nan,
         }
 
-    ctrl_total = 0
-    ctrl_uids_by_vehicle: dict[str, set[str]] = {}
-    for f in ctrl_files:
-        veh = f.stem.split("-")[-2] if len(f.stem.split("-")) >= 2 else "unknown"
-        df = _safe_read_csv(f, usecols=["pkt_uid"])
-        if df.empty:
-            continue
-        ctrl_total += int(len(df))
-        ctrl_uids_by_vehicle[veh] = set(df["pkt_uid"].astype(str).tolist())
-
-    drop_phy_total = 0
-    cam_drop_phy = 0
-    cpm_drop_phy = 0
-    matched = 0
-    for f in msg_files:
-        veh = f.stem.split("-")[-2] if len(f.stem.split("-")) >= 2 else "unknown"
-        df = _safe_read_csv(f, usecols=["msg_type", "pkt_uid"])
-        if df.empty:
-            continue
-        df["msg_type"] = df["msg_type"].astype(str)
-        df["pkt_uid"] = df["pkt_uid"].astype(str)
-        drops = df[df["msg_type"].isin(["CAM_DROP_PHY", "CPM_DROP_PHY", "OTHER_DROP_PHY"])]
-        if drops.empty:
-            continue
-        cam_drop_phy += int((drops["msg_type"] == "CAM_DROP_PHY").sum())
-        cpm_drop_phy += int((drops["msg_type"] == "CPM_DROP_PHY").sum())
-        drop_phy_total += int(len(drops))
-        ctrl_uids = ctrl_uids_by_vehicle.get(veh, set())
-        matched += int(drops["pkt_uid"].isin(ctrl_uids).sum())
+    # Old logs without pkt_uid give no totals, like before
+    stats = drop_decision_counts(load_run_logs(run_dir, "MSG"), load_run_logs(run_dir, "CTRL"))
+    drop_phy_total = stats["drop_events"]
+    cam_drop_phy = stats["cam_drop_events"]
+    cpm_drop_phy = stats["cpm_drop_events"]
+    ctrl_total = stats["ctrl_events"]
+    matched = stats["matched_decision_events"]
 
     ratio = float(matched / drop_phy_total) if drop_phy_total > 0 else math.nan
     return {
@@ -117,12 +173,11 @@ def _summarize_run(run_dir: Path) -> dict[str, object]:
     sionna_enabled = False
 
     for log in logs:
-        txt = log.read_text(errors="ignore")
-        avg_prr = _max_valid(avg_prr, _parse_float(r"Average PRR:\s*([0-9.]+)", txt))
-        avg_latency = _max_valid(avg_latency, _parse_float(r"Average latency \(ms\):\s*([0-9.]+)", txt))
-        incident_applied += len(re.findall(r"INCIDENT-APPLIED", txt))
-        if "sionna" in txt.lower():
-            sionna_enabled = True
+        prr, latency, incidents, sionna = _scan_log(log)
+        avg_prr = _max_valid(avg_prr, prr)
+        avg_latency = _max_valid(avg_latency, latency)
+        incident_applied += incidents
+        sionna_enabled = sionna_enabled or sionna
 
     scenario_guess = ",".join(sorted({p.stem for p in logs})) if logs else "no-top-level-log"
     in_export = "chatgpt_exports" in str(run_dir)
@@ -226,6 +281,8 @@ def main() -> int:
         default="analysis/scenario_runs",
         help="Output directory for audit CSV/MD",
     )
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Run directories audited in parallel")
+    parser.add_argument("--no-cache", action="store_true", help=f"Re-audit every run, ignoring <out-dir>/{CACHE_NAME}")
     parser.add_argument(
         "--tag",
         default=datetime.now().strftime("%Y-%m-%d"),
@@ -241,7 +298,23 @@ def main() -> int:
         return 1
 
     run_dirs = _collect_run_dirs(root)
-    rows = [_summarize_run(d) for d in run_dirs]
+    cache_path = out_dir / CACHE_NAME
+    cache = {} if args.no_cache else _load_cache(cache_path)
+    fingerprints = {str(d): _run_fingerprint(d) for d in run_dirs}
+    stale = [d for d in run_dirs if cache.get(str(d), {}).get("fingerprint") != fingerprints[str(d)]]
+    if stale:
+        if args.jobs > 1 and len(stale) > 1:
+            with ProcessPoolExecutor(max_workers=min(args.jobs, len(stale))) as pool:
+                fresh = list(pool.map(_summarize_run, stale, chunksize=4))
+        else:
+            fresh = [_summarize_run(d) for d in stale]
+        for d, row in zip(stale, fresh):
+            cache[str(d)] = {"fingerprint": fingerprints[str(d)], "row": row}
+    print(f"Audited {len(stale)} of {len(run_dirs)} run directories ({len(run_dirs) - len(stale)} unchanged)")
+    # drop entries of runs that no longer exist under this root
+    cache = {k: v for k, v in cache.items() if k in fingerprints or not k.startswith(str(root) + os.sep)}
+    _write_cache(cache_path, cache)
+    rows = [cache[str(d)]["row"] for d in run_dirs]
     if not rows:
         print(f"No run directories found under {root}")
         return 1
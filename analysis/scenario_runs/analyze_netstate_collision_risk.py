@@ -6,11 +6,12 @@ from __future__ import annotations
 import argparse
 import csv
 import math
-import xml.etree.ElementTree as ET
-from collections import defaultdict
 from pathlib import Path
 
 import matplotlib.pyplot as plt
+import numpy as np
+
+from netstate_store import NetstateTable, load_netstate
 
 
 def parse_args() -> argparse.Namespace:
@@ -22,100 +23,106 @@ def parse_args() -> argparse.Namespace:
     return p.parse_args()
 
 
-def _lane_sort_key(vehicle: dict) -> float:
-    # Prefer lane-relative coordinate from SUMO netstate; it is always aligned with the lane direction.
-    return vehicle["lane_pos"]
+def _nullable(values: np.ndarray) -> list[float | None]:
+    return [None if math.isinf(v) else v for v in values.tolist()]
 
 
-def analyze(netstate_path: Path, gap_threshold: float, ttc_threshold: float):
-    min_gap_global = math.inf
-    min_ttc_global = math.inf
-    risky_gap_events = 0
-    risky_ttc_events = 0
-    timesteps = 0
-    vehicle_counts = []
-    series = []
-
-    for _, elem in ET.iterparse(netstate_path, events=("end",)):
-        if elem.tag != "timestep":
-            continue
-
-        t_s = float(elem.attrib.get("time", "0"))
-        lane_vehicles = defaultdict(list)
-        total_vehicles = 0
-
-        for edge in elem.findall("edge"):
-            for lane in edge.findall("lane"):
-                lane_id = lane.attrib.get("id", "")
-                for veh in lane.findall("vehicle"):
-                    lane_pos = float(veh.attrib.get("pos", "nan"))
-                    x = float(veh.attrib.get("x", "nan"))
-                    if math.isnan(x):
-                        x = lane_pos
-                    v = {
-                        "id": veh.attrib.get("id", ""),
-                        "x": x,
-                        "y": float(veh.attrib.get("y", "nan")),
-                        "lane_pos": lane_pos,
-                        "speed": float(veh.attrib.get("speed", "0")),
-                    }
-                    if not math.isnan(v["lane_pos"]):
-                        lane_vehicles[lane_id].append(v)
-                        total_vehicles += 1
-
-        min_gap_t = math.inf
-        min_ttc_t = math.inf
-
-        for lane_id, vehs in lane_vehicles.items():
-            if len(vehs) < 2:
-                continue
-            vehs.sort(key=_lane_sort_key)
-
-            # Adjacent pairs on the same lane are the relevant candidates for rear-end risk.
-            for i in range(1, len(vehs)):
-                rear = vehs[i - 1]
-                front = vehs[i]
-                gap = front["lane_pos"] - rear["lane_pos"]
-                if gap <= 0:
-                    continue
-                min_gap_t = min(min_gap_t, gap)
-                min_gap_global = min(min_gap_global, gap)
-                if gap < gap_threshold:
-                    risky_gap_events += 1
-
-                closing_speed = rear["speed"] - front["speed"]
-                if closing_speed > 0:
-                    ttc = gap / closing_speed
-                    min_ttc_t = min(min_ttc_t, ttc)
-                    min_ttc_global = min(min_ttc_global, ttc)
-                    if ttc < ttc_threshold:
-                        risky_ttc_events += 1
-
-        timesteps += 1
-        vehicle_counts.append(total_vehicles)
-        series.append(
-            {
-                "time_s": t_s,
-                "min_gap_m": None if math.isinf(min_gap_t) else min_gap_t,
-                "min_ttc_s": None if math.isinf(min_ttc_t) else min_ttc_t,
-                "vehicles": total_vehicles,
-            }
-        )
-        elem.clear()
+def lane_pairs(table: NetstateTable, min_closing: float = 0.0) -> dict[str, np.ndarray]:
+    """Adjacent (follower, leader) pairs on the same lane at the same timestep.
+
+    One sort by (step, lane, lane_pos) puts every lane's vehicles in driving order;
+    shifting by one row pairs each vehicle with the next one ahead. The lane-relative
+    position is used since it is always aligned with the lane direction. TTC is
+    infinite unless the follower closes in faster than ``min_closing`` m/s.
+    """
+    rows = np.flatnonzero(~np.isnan(table.pos))
+    rows = rows[np.lexsort((table.pos[rows], table.lane[rows], table.step[rows]))]
+    rear, front = rows[:-1], rows[1:]
+    same = (table.step[rear] == table.step[front]) & (table.lane[rear] == table.lane[front])
+    rear, front = rear[same], front[same]
+
+    gap = table.pos[front] - table.pos[rear]
+    keep = gap > 0
+    rear, front, gap = rear[keep], front[keep], gap[keep]
+
+    # missing speed attributes count as standing still
+    speed = np.nan_to_num(table.speed, nan=0.0)
+    closing = speed[rear] - speed[front]
+    ttc = np.full(gap.shape, np.inf)
+    np.divide(gap, closing, out=ttc, where=closing > min_closing)
+    return {
+        "step": table.step[rear],
+        "follower": table.vehicle[rear],
+        "leader": table.vehicle[front],
+        "lane": table.lane[rear],
+        "gap": gap,
+        "ttc": ttc,
+    }
 
-    if math.isinf(min_gap_global):
-        min_gap_global = None
-    if math.isinf(min_ttc_global):
-        min_ttc_global = None
+
+def risk_intervals(table: NetstateTable, pairs: dict[str, np.ndarray], risky: np.ndarray) -> list[dict]:
+    """Merge consecutive risky timesteps of the same follower/leader pair into intervals."""
+    idx = np.flatnonzero(risky)
+    if idx.size == 0:
+        return []
+    idx = idx[np.lexsort((pairs["step"][idx], pairs["leader"][idx], pairs["follower"][idx]))]
+    follower, leader, step = pairs["follower"][idx], pairs["leader"][idx], pairs["step"][idx]
+    starts = np.flatnonzero(
+        np.r_[True, (follower[1:] != follower[:-1]) | (leader[1:] != leader[:-1]) | (step[1:] != step[:-1] + 1)]
+    )
+    ends = np.r_[starts[1:], idx.size] - 1
+    min_gap = np.minimum.reduceat(pairs["gap"][idx], starts)
+    min_ttc = np.minimum.reduceat(pairs["ttc"][idx], starts)
+
+    intervals = [
+        {
+            "follower_id": str(table.vehicles[follower[s]]),
+            "leader_id": str(table.vehicles[leader[s]]),
+            "lane_id": str(table.lanes[pairs["lane"][idx[s]]]),
+            "start_s": float(table.step_time_s[step[s]]),
+            "end_s": float(table.step_time_s[step[e]]),
+            "timesteps": int(e - s + 1),
+            "min_gap_m": float(g),
+            "min_ttc_s": None if math.isinf(t) else float(t),
+        }
+        for s, e, g, t in zip(starts.tolist(), ends.tolist(), min_gap.tolist(), min_ttc.tolist())
+    ]
+    intervals.sort(key=lambda r: (r["start_s"], r["follower_id"], r["leader_id"]))
+    return intervals
+
+
+def analyze(netstate_path: Path, gap_threshold: float, ttc_threshold: float):
+    table = load_netstate(netstate_path)
+    timesteps = table.timesteps
+    pairs = lane_pairs(table)
+    gap, ttc, step = pairs["gap"], pairs["ttc"], pairs["step"]
+
+    min_gap_t = np.full(timesteps, np.inf)
+    min_ttc_t = np.full(timesteps, np.inf)
+    np.minimum.at(min_gap_t, step, gap)
+    np.minimum.at(min_ttc_t, step, ttc)
+    vehicle_counts = np.bincount(table.step[~np.isnan(table.pos)], minlength=timesteps)
+
+    risky_gap = gap < gap_threshold
+    risky_ttc = ttc < ttc_threshold
+    step_times = np.nan_to_num(table.step_time_s, nan=0.0)
+    series = [
+        {"time_s": t, "min_gap_m": g, "min_ttc_s": c, "vehicles": n}
+        for t, g, c, n in zip(step_times.tolist(), _nullable(min_gap_t), _nullable(min_ttc_t), vehicle_counts.tolist())
+    ]
+
+    min_gap_global = float(gap.min()) if gap.size else None
+    min_ttc_global = float(ttc.min()) if ttc.size and not math.isinf(ttc.min()) else None
 
     return {
         "timesteps": timesteps,
-        "mean_vehicles": (sum(vehicle_counts) / len(vehicle_counts)) if vehicle_counts else 0.0,
+        "mean_vehicles": float(vehicle_counts.mean()) if timesteps else 0.0,
         "min_gap_m": min_gap_global,
         "min_ttc_s": min_ttc_global,
-        "risky_gap_events": risky_gap_events,
-        "risky_ttc_events": risky_ttc_events,
+        "risky_gap_events": int(risky_gap.sum()),
+        "risky_ttc_events": int(risky_ttc.sum()),
         "series": series,
+        "intervals": risk_intervals(table, pairs, risky_gap | risky_ttc),
     }
 
 
@@ -154,6 +161,16 @@ def save_outputs(out_dir: Path, result: dict) -> None:
         for row in result["series"]:
             writer.writerow(row)
 
+    intervals_csv = out_dir / "collision_risk_intervals.csv"
+    with intervals_csv.open("w", newline="") as f:
+        writer = csv.DictWriter(
+            f,
+            fieldnames=["follower_id", "leader_id", "lane_id", "start_s", "end_s", "timesteps", "min_gap_m", "min_ttc_s"],
+        )
+        writer.writeheader()
+        for row in result["intervals"]:
+            writer.writerow(row)
+
     times = [r["time_s"] for r in result["series"] if r["min_gap_m"] is not None]
     gaps = [r["min_gap_m"] for r in result["series"] if r["min_gap_m"] is not None]
     ttc_times = [r["time_s"] for r in result["series"] if r["min_ttc_s"] is not None]
@@ -179,6 +196,7 @@ def save_outputs(out_dir: Path, result: dict) -> None:
 
     print(summary_csv)
     print(ts_csv)
+    print(intervals_csv)
     print(out_dir / "collision_risk_timeseries.png")
 
 
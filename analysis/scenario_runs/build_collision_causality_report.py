@@ -7,18 +7,30 @@ Inputs per run:
 
 Outputs:
   - artifacts/collision_causality/collision_causality.csv
+  - artifacts/collision_causality/collision_causality_stats.csv
   - artifacts/collision_causality/collision_causality.md
+
+Events are indexed once per vehicle (sorted by drop time, with prefix counts per
+decision class), so each collision window is two binary searches. Several runs
+(e.g. a multi-incident sweep via --sweep-root) are audited in one call and also
+summarized into combined CSVs.
 """
 
 from __future__ import annotations
 
 import argparse
 import math
+import os
 import xml.etree.ElementTree as ET
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
+NO_ACTION_TYPE = "drop_decision_no_action"
+REACTION_TYPES = ("cam_drop_reaction", "cpm_drop_reaction")
+MISSING_TYPE = "missing_decision"
+
 
 def _read_timeline(path: Path) -> pd.DataFrame:
     try:
@@ -81,10 +93,46 @@ def _read_collisions(path: Path) -> list[dict[str, object]]:
     return rows
 
 
-def _last_row(df: pd.DataFrame) -> pd.Series | None:
-    if df.empty:
-        return None
-    return df.sort_values("drop_time_s", ascending=True).iloc[-1]
+class VehicleEvents:
+    """DROP events of one vehicle sorted by drop time, with prefix counts per decision class."""
+
+    def __init__(self, events: pd.DataFrame):
+        self.events = events.reset_index(drop=True)
+        self.times = self.events["drop_time_s"].to_numpy(dtype=float)
+        decision = self.events["decision_event_type"]
+        zero = np.zeros(1, dtype=np.int64)
+        self.no_action = np.concatenate([zero, np.cumsum(decision == NO_ACTION_TYPE)])
+        self.reactions = np.concatenate([zero, np.cumsum(decision.isin(REACTION_TYPES))])
+        self.missing = np.concatenate([zero, np.cumsum(decision == MISSING_TYPE)])
+
+    def window(self, start_s, end_s) -> tuple[np.ndarray, np.ndarray]:
+        """Row bounds of events with start_s <= drop_time_s <= end_s (scalars or arrays)."""
+        return (
+            np.searchsorted(self.times, start_s, side="left"),
+            np.searchsorted(self.times, end_s, side="right"),
+        )
+
+
+def index_timeline(timeline: pd.DataFrame) -> dict[str, VehicleEvents]:
+    if timeline.empty:
+        return {}
+    # stable, so equal drop times keep timeline order and the last one wins as "last drop"
+    ordered = timeline.sort_values("drop_time_s", kind="stable")
+    return {str(veh): VehicleEvents(grp) for veh, grp in ordered.groupby("vehicle_id", sort=False)}
+
+
+def _evidence(drops: int, no_action: int, reactions: int) -> str:
+    if no_action >= 1 and reactions == 0:
+        return "strong_no_action_only"
+    if no_action >= 1 and reactions >= 1:
+        return "mixed"
+    if drops == 0:
+        return "no_drop_events"
+    return "weak"
+
+
+def _focus_set(focus_vehicle: str) -> set[str]:
+    return {v.strip() for v in focus_vehicle.split(",") if v.strip()}
 
 
 def build_report(
@@ -92,7 +140,15 @@ def build_report(
     collisions: list[dict[str, object]],
     window_s: float,
     focus_vehicle: str,
+    index: dict[str, VehicleEvents] | None = None,
 ) -> pd.DataFrame:
+    """One row per collision with the DROP events of the collider in [t - window_s, t].
+
+    ``focus_vehicle`` is an optional comma-separated list of colliders.
+    """
+    if index is None:
+        index = index_timeline(timeline)
+    focus = _focus_set(focus_vehicle)
     rows: list[dict[str, object]] = []
 
     for c in collisions:
@@ -100,32 +156,22 @@ def build_report(
         collider = str(c.get("collider", ""))
         if not collider:
             continue
-        if focus_vehicle and collider != focus_vehicle:
+        if focus and collider not in focus:
             continue
         if not isinstance(t, float) or math.isnan(t):
             continue
 
-        before = timeline[
-            (timeline["vehicle_id"] == collider)
-            & (timeline["drop_time_s"] <= t)
-            & (timeline["drop_time_s"] >= (t - window_s))
-        ].copy()
-
-        no_action = before[before["decision_event_type"] == "drop_decision_no_action"]
-        reactions = before[
-            before["decision_event_type"].isin(["cam_drop_reaction", "cpm_drop_reaction"])
-        ]
-        missing = before[before["decision_event_type"] == "missing_decision"]
-
-        last_ev = _last_row(before)
-
-        evidence = "weak"
-        if len(no_action) >= 1 and len(reactions) == 0:
-            evidence = "strong_no_action_only"
-        elif len(no_action) >= 1 and len(reactions) >= 1:
-            evidence = "mixed"
-        elif len(before) == 0:
-            evidence = "no_drop_events"
+        drops = no_action = reactions = missing = 0
+        last_ev = None
+        events = index.get(collider)
+        if events is not None:
+            lo, hi = events.window(t - window_s, t)
+            drops = int(hi - lo)
+            no_action = int(events.no_action[hi] - events.no_action[lo])
+            reactions = int(events.reactions[hi] - events.reactions[lo])
+            missing = int(events.missing[hi] - events.missing[lo])
+            if drops:
+                last_ev = events.events.iloc[hi - 1]
 
         rows.append(
             {
@@ -137,23 +183,100 @@ def build_report(
                 "pos_m": c.get("pos_m", ""),
                 "type": c.get("type", ""),
                 "window_s": window_s,
-                "drop_events_window": int(len(before)),
-                "no_action_events_window": int(len(no_action)),
-                "drop_reaction_events_window": int(len(reactions)),
-                "missing_decision_events_window": int(len(missing)),
+                "drop_events_window": drops,
+                "no_action_events_window": no_action,
+                "drop_reaction_events_window": reactions,
+                "missing_decision_events_window": missing,
                 "last_drop_time_s": float(last_ev["drop_time_s"]) if last_ev is not None else math.nan,
                 "last_drop_pkt_uid": str(last_ev["pkt_uid"]) if last_ev is not None else "",
                 "last_drop_msg_seq": float(last_ev["msg_seq"]) if last_ev is not None else math.nan,
                 "last_drop_tx_id": float(last_ev["tx_id"]) if last_ev is not None else math.nan,
                 "last_decision_event_type": str(last_ev["decision_event_type"]) if last_ev is not None else "",
-                "causal_evidence": evidence,
+                "causal_evidence": _evidence(drops, no_action, reactions),
             }
         )
 
     return pd.DataFrame(rows)
 
 
-def write_md(path: Path, df: pd.DataFrame, collision_xml: Path, timeline_csv: Path) -> None:
+def window_stats(
+    index: dict[str, VehicleEvents],
+    report: pd.DataFrame,
+    window_s: float,
+    horizon_s: float,
+) -> pd.DataFrame:
+    """Drops per collision window vs. per baseline window, per collider and overall.
+
+    Baseline windows tile [0, horizon_s) in steps of ``window_s``; tiles that
+    overlap a collision window of the same collider are left out.
+    """
+    columns = [
+        "collider",
+        "collision_windows",
+        "drops_per_collision_window",
+        "no_action_per_collision_window",
+        "baseline_windows",
+        "drops_per_baseline_window",
+        "no_action_per_baseline_window",
+        "drop_rate_ratio",
+    ]
+    if report.empty:
+        return pd.DataFrame(columns=columns)
+
+    tiles = np.arange(0.0, max(horizon_s, 0.0), window_s)
+    totals = np.zeros(6)
+    rows: list[dict[str, object]] = []
+    for collider, grp in report.groupby("collider", sort=True):
+        n_coll = len(grp)
+        coll_drops = int(grp["drop_events_window"].sum())
+        coll_no_action = int(grp["no_action_events_window"].sum())
+        t = grp["collision_time_s"].to_numpy(dtype=float)
+        # tile [a, a + w) overlaps collision window [t - w, t] when a <= t and a + w > t - w
+        overlaps = ((tiles[:, None] <= t[None, :]) & (tiles[:, None] + window_s > t[None, :] - window_s)).any(axis=1)
+        base = tiles[~overlaps]
+        base_drops = base_no_action = 0
+        events = index.get(str(collider))
+        if events is not None and base.size:
+            # half-open tiles: count events in [a, a + w)
+            lo = np.searchsorted(events.times, base, side="left")
+            hi = np.searchsorted(events.times, base + window_s, side="left")
+            base_drops = int((hi - lo).sum())
+            base_no_action = int((events.no_action[hi] - events.no_action[lo]).sum())
+        totals += (n_coll, coll_drops, coll_no_action, base.size, base_drops, base_no_action)
+        rows.append(_stats_row(str(collider), n_coll, coll_drops, coll_no_action, base.size, base_drops, base_no_action))
+    rows.append(_stats_row("all", *totals))
+    return pd.DataFrame(rows, columns=columns)
+
+
+def _stats_row(collider: str, n_coll, coll_drops, coll_no_action, n_base, base_drops, base_no_action) -> dict[str, object]:
+    coll_rate = coll_drops / n_coll if n_coll else math.nan
+    base_rate = base_drops / n_base if n_base else math.nan
+    return {
+        "collider": collider,
+        "collision_windows": int(n_coll),
+        "drops_per_collision_window": coll_rate,
+        "no_action_per_collision_window": coll_no_action / n_coll if n_coll else math.nan,
+        "baseline_windows": int(n_base),
+        "drops_per_baseline_window": base_rate,
+        "no_action_per_baseline_window": base_no_action / n_base if n_base else math.nan,
+        "drop_rate_ratio": coll_rate / base_rate if base_rate and not math.isnan(base_rate) else math.nan,
+    }
+
+
+def _horizon_s(timeline: pd.DataFrame, collisions: list[dict[str, object]]) -> float:
+    times = [float(c["collision_time_s"]) for c in collisions if not math.isnan(float(c["collision_time_s"]))]
+    if not timeline.empty:
+        times.append(float(timeline["drop_time_s"].max()))
+    return max(times) if times else 0.0
+
+
+def write_md(
+    path: Path,
+    df: pd.DataFrame,
+    collision_xml: Path,
+    timeline_csv: Path,
+    stats: pd.DataFrame | None = None,
+) -> None:
     lines: list[str] = []
     lines.append("# Collision Causality Report")
     lines.append("")
@@ -173,6 +296,14 @@ def write_md(path: Path, df: pd.DataFrame, collision_xml: Path, timeline_csv: Pa
     lines.append(f"- mixed: {(df['causal_evidence'] == 'mixed').sum()}")
     lines.append(f"- weak/no_drop_events: {(~df['causal_evidence'].isin(['strong_no_action_only', 'mixed'])).sum()}")
     lines.append("")
+    if stats is not None and not stats.empty:
+        overall = stats[stats["collider"] == "all"].iloc[0]
+        lines.append("## Collision vs. baseline windows")
+        lines.append("")
+        lines.append(f"- drops per collision window: {overall['drops_per_collision_window']:.3f} ({int(overall['collision_windows'])} windows)")
+        lines.append(f"- drops per baseline window: {overall['drops_per_baseline_window']:.3f} ({int(overall['baseline_windows'])} windows)")
+        lines.append(f"- drop rate ratio: {overall['drop_rate_ratio']:.3f}")
+        lines.append("")
     lines.append("## Rows")
     lines.append("")
 
@@ -188,51 +319,99 @@ def write_md(path: Path, df: pd.DataFrame, collision_xml: Path, timeline_csv: Pa
     path.write_text("\n".join(lines) + "\n", encoding="utf-8")
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Build collision causality report from run artifacts")
-    parser.add_argument("--run-dir", required=True, help="Scenario run directory")
-    parser.add_argument("--collision-xml", default="", help="Path to collision XML")
-    parser.add_argument("--timeline-csv", default="", help="Path to drop_decision event timeline CSV")
-    parser.add_argument("--out-dir", default="", help="Output dir (default: <run>/artifacts/collision_causality)")
-    parser.add_argument("--window-s", type=float, default=8.0, help="Lookback window in seconds before collision")
-    parser.add_argument("--focus-vehicle", default="", help="Optional collider vehicle filter")
-    args = parser.parse_args()
+def _collect_runs(sweep_root: Path) -> list[Path]:
+    """Run directories under ``sweep_root`` that have a collision XML."""
+    return sorted(p.parent.parent for p in sweep_root.rglob("artifacts/eva-collision.xml"))
 
-    run_dir = Path(args.run_dir).resolve()
-    if not run_dir.exists():
-        print(f"Run dir not found: {run_dir}")
-        return 1
 
-    collision_xml = (
-        Path(args.collision_xml).resolve()
-        if args.collision_xml
-        else (run_dir / "artifacts" / "eva-collision.xml")
-    )
-    timeline_csv = (
-        Path(args.timeline_csv).resolve()
-        if args.timeline_csv
-        else (run_dir / "artifacts" / "drop_decision_timeline" / "event_timeline.csv")
-    )
-    out_dir = Path(args.out_dir).resolve() if args.out_dir else (run_dir / "artifacts" / "collision_causality")
+def audit_run(
+    run_dir: Path,
+    window_s: float,
+    focus_vehicle: str,
+    collision_xml: Path | None = None,
+    timeline_csv: Path | None = None,
+    out_dir: Path | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Write the report files of one run and return (report, stats)."""
+    collision_xml = collision_xml or (run_dir / "artifacts" / "eva-collision.xml")
+    timeline_csv = timeline_csv or (run_dir / "artifacts" / "drop_decision_timeline" / "event_timeline.csv")
+    out_dir = out_dir or (run_dir / "artifacts" / "collision_causality")
     out_dir.mkdir(parents=True, exist_ok=True)
 
     timeline = _read_timeline(timeline_csv)
     collisions = _read_collisions(collision_xml)
-
-    report = build_report(
-        timeline=timeline,
-        collisions=collisions,
-        window_s=max(0.1, float(args.window_s)),
-        focus_vehicle=args.focus_vehicle.strip(),
-    )
+    index = index_timeline(timeline)
+    report = build_report(timeline, collisions, window_s, focus_vehicle, index=index)
+    stats = window_stats(index, report, window_s, _horizon_s(timeline, collisions))
 
     out_csv = out_dir / "collision_causality.csv"
+    out_stats = out_dir / "collision_causality_stats.csv"
     out_md = out_dir / "collision_causality.md"
     report.to_csv(out_csv, index=False)
-    write_md(out_md, report, collision_xml=collision_xml, timeline_csv=timeline_csv)
-
+    stats.to_csv(out_stats, index=False)
+    write_md(out_md, report, collision_xml=collision_xml, timeline_csv=timeline_csv, stats=stats)
     print(out_csv)
+    print(out_stats)
     print(out_md)
+    return report, stats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build collision causality report from run artifacts")
+    parser.add_argument("--run-dir", nargs="*", default=[], help="Scenario run directory (several allowed)")
+    parser.add_argument("--sweep-root", default="", help="Audit every run with artifacts/eva-collision.xml below this dir")
+    parser.add_argument("--collision-xml", default="", help="Path to collision XML (single run only)")
+    parser.add_argument("--timeline-csv", default="", help="Path to drop_decision event timeline CSV (single run only)")
+    parser.add_argument("--out-dir", default="", help="Output dir (default: <run>/artifacts/collision_causality)")
+    parser.add_argument(
+        "--summary-dir",
+        default="",
+        help="Combined CSVs for several runs (default: --sweep-root or the common parent of the runs)",
+    )
+    parser.add_argument("--window-s", type=float, default=8.0, help="Lookback window in seconds before collision")
+    parser.add_argument("--focus-vehicle", default="", help="Optional collider filter, comma-separated (veh1,veh3)")
+    args = parser.parse_args()
+
+    run_dirs = [Path(d).resolve() for d in args.run_dir]
+    if args.sweep_root:
+        run_dirs += _collect_runs(Path(args.sweep_root).resolve())
+    run_dirs = sorted(set(run_dirs))
+    if not run_dirs:
+        print("No run directories given (use --run-dir or --sweep-root)")
+        return 1
+    missing = [d for d in run_dirs if not d.exists()]
+    if missing:
+        print(f"Run dir not found: {missing[0]}")
+        return 1
+    single = len(run_dirs) == 1
+    if not single and (args.collision_xml or args.timeline_csv or args.out_dir):
+        print("--collision-xml/--timeline-csv/--out-dir apply to a single run only")
+        return 1
+
+    window_s = max(0.1, float(args.window_s))
+    reports: list[pd.DataFrame] = []
+    stats_all: list[pd.DataFrame] = []
+    for run_dir in run_dirs:
+        report, stats = audit_run(
+            run_dir,
+            window_s,
+            args.focus_vehicle.strip(),
+            collision_xml=Path(args.collision_xml).resolve() if args.collision_xml else None,
+            timeline_csv=Path(args.timeline_csv).resolve() if args.timeline_csv else None,
+            out_dir=Path(args.out_dir).resolve() if args.out_dir else None,
+        )
+        reports.append(report.assign(run_dir=str(run_dir)))
+        stats_all.append(stats.assign(run_dir=str(run_dir)))
+
+    if not single:
+        summary_dir = Path(
+            args.summary_dir or args.sweep_root or os.path.commonpath([str(d) for d in run_dirs])
+        ).resolve()
+        summary_dir.mkdir(parents=True, exist_ok=True)
+        pd.concat(reports, ignore_index=True).to_csv(summary_dir / "collision_causality_all.csv", index=False)
+        pd.concat(stats_all, ignore_index=True).to_csv(summary_dir / "collision_causality_stats_all.csv", index=False)
+        print(summary_dir / "collision_causality_all.csv")
+        print(summary_dir / "collision_causality_stats_all.csv")
     return 0
 
 
@@ -7,121 +7,134 @@ This script correlates PHY-drop events from *-MSG.csv with control decisions fro
   - summary.csv: aggregate quality/coverage metrics
   - decision_delay_scatter.png: delay from drop to decision over time
   - decision_type_counts.png: distribution of decision event types
+
+All vehicles are matched at once: one left merge of the run's drops onto the
+first decision per (vehicle log, pkt_uid). analyze_all_logs.py takes its drop
+counts and match ratio from drop_decision_counts, which only needs msg_type and
+pkt_uid and counts a drop as matched if any CTRL row of the vehicle has its pkt_uid.
 """
 
 from __future__ import annotations
 
 import argparse
 from pathlib import Path
-from typing import Iterable
 
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+from run_artifacts import load_run_logs, log_pair_key, run_log_files, vehicle_from_path
+
 
 DROP_TYPES = {"CAM_DROP_PHY", "CPM_DROP_PHY", "OTHER_DROP_PHY"}
 REACTION_TYPES = {"cam_drop_reaction", "cpm_drop_reaction"}
 
 
-def _read_csv(path: Path) -> pd.DataFrame:
-    try:
-        return pd.read_csv(path)
-    except Exception:
-        return pd.DataFrame()
-
-
 def _to_num(series: pd.Series) -> pd.Series:
     return pd.to_numeric(series, errors="coerce")
 
 
-def _vehicle_from_path(path: Path) -> str:
-    # Example: eva-veh8-MSG.csv -> veh8
-    parts = path.stem.split("-")
-    if len(parts) >= 2:
-        return parts[-2]
-    return "unknown"
-
-
-def _iter_msg_ctrl_pairs(artifacts: Path, only_vehicle: str | None) -> Iterable[tuple[str, Path, Path]]:
-    for msg_path in sorted(artifacts.glob("*-MSG.csv")):
-        veh = _vehicle_from_path(msg_path)
-        if only_vehicle is not None and veh != only_vehicle:
-            continue
-        ctrl_path = msg_path.with_name(msg_path.name.replace("-MSG.csv", "-CTRL.csv"))
-        if ctrl_path.exists():
-            yield veh, msg_path, ctrl_path
-
-
-def _build_vehicle_timeline(vehicle_id: str, msg_path: Path, ctrl_path: Path) -> pd.DataFrame:
-    msg = _read_csv(msg_path)
-    ctrl = _read_csv(ctrl_path)
-    if msg.empty:
-        return pd.DataFrame()
-
+TIMELINE_COLUMNS = [
+    "pkt_uid",
+    "drop_time_s",
+    "drop_type",
+    "msg_seq",
+    "tx_id",
+    "rx_id",
+    "decision_time_s",
+    "decision_event_type",
+    "lane_before",
+    "lane_after",
+    "target_speed_mps",
+    "vehicle_id",
+    "decision_delay_s",
+    "lane_change",
+]
+DECISION_COLUMNS = ["decision_time_s", "decision_event_type", "lane_before", "lane_after", "target_speed_mps"]
+
+
+def _pair_key(source_file: pd.Series, kind: str) -> pd.Series:
+    keys = {name: log_pair_key(name, kind) for name in source_file.unique()}
+    return source_file.map(keys)
+
+
+def _first_decisions(ctrl: pd.DataFrame) -> pd.DataFrame:
+    """Earliest decision per (log pair, pkt_uid); reactions win ties over other events."""
+    if ctrl.empty or "pkt_uid" not in ctrl.columns or "time_s" not in ctrl.columns:
+        return pd.DataFrame(columns=["pair", "pkt_uid"] + DECISION_COLUMNS)
+    dec = pd.DataFrame(
+        {
+            "pair": _pair_key(ctrl["source_file"], "CTRL"),
+            "pkt_uid": ctrl["pkt_uid"].astype(str),
+            "decision_time_s": _to_num(ctrl["time_s"]),
+            "decision_event_type": ctrl["event_type"].astype(str) if "event_type" in ctrl.columns else "unknown",
+            "lane_before": _to_num(ctrl.get("lane_before", pd.Series(np.nan, index=ctrl.index))),
+            "lane_after": _to_num(ctrl.get("lane_after", pd.Series(np.nan, index=ctrl.index))),
+            "target_speed_mps": _to_num(ctrl.get("target_speed_mps", pd.Series(np.nan, index=ctrl.index))),
+        }
+    )
+    dec["priority"] = np.where(dec["decision_event_type"].isin(REACTION_TYPES), 0, 1)
+    dec = dec.dropna(subset=["decision_time_s"])
+    # stable sort keeps log order among equal (time, priority), as the per-vehicle loop did
+    dec = dec.sort_values(["decision_time_s", "priority"], kind="stable")
+    first = dec.groupby(["pair", "pkt_uid"], sort=False).first().reset_index()
+    return first[["pair", "pkt_uid"] + DECISION_COLUMNS]
+
+
+def drop_decision_counts(msg: pd.DataFrame, ctrl: pd.DataFrame) -> dict[str, int]:
+    """Drop/decision counters of a run for the audit.
+
+    Every logged DROP_PHY is counted, with or without a time; a drop is matched
+    when any CTRL row of the same vehicle carries its pkt_uid.
+    """
+    stats = {
+        "drop_events": 0,
+        "cam_drop_events": 0,
+        "cpm_drop_events": 0,
+        "ctrl_events": int(len(ctrl)) if "pkt_uid" in ctrl.columns else 0,
+        "matched_decision_events": 0,
+    }
+    if msg.empty or not {"msg_type", "pkt_uid"}.issubset(msg.columns):
+        return stats
+
+    drops = msg.loc[msg["msg_type"].astype(str).isin(DROP_TYPES)]
+    stats["drop_events"] = int(len(drops))
+    stats["cam_drop_events"] = int((drops["msg_type"] == "CAM_DROP_PHY").sum())
+    stats["cpm_drop_events"] = int((drops["msg_type"] == "CPM_DROP_PHY").sum())
+    if stats["ctrl_events"] and not drops.empty:
+        ctrl_keys = pd.MultiIndex.from_arrays([ctrl["file_vehicle"], ctrl["pkt_uid"].astype(str)])
+        drop_keys = pd.MultiIndex.from_arrays([drops["file_vehicle"], drops["pkt_uid"].astype(str)])
+        stats["matched_decision_events"] = int(drop_keys.isin(ctrl_keys).sum())
+    return stats
+
+
+def match_drop_decisions(msg: pd.DataFrame, ctrl: pd.DataFrame) -> pd.DataFrame:
+    """Join every timed DROP_PHY of a run to its first decision in one keyed merge.
+
+    ``msg``/``ctrl`` are run_artifacts frames; drops are matched to decisions of
+    the same log pair (vehicle) by pkt_uid. Returns the event timeline in log order.
+    """
     required_msg_cols = {"msg_type", "pkt_uid", "rx_t_s", "msg_seq", "tx_id", "rx_id"}
-    if not required_msg_cols.issubset(set(msg.columns)):
-        return pd.DataFrame()
-
-    drops = msg[msg["msg_type"].astype(str).isin(DROP_TYPES)].copy()
-    if drops.empty:
-        return pd.DataFrame()
-
-    drops["pkt_uid"] = drops["pkt_uid"].astype(str)
-    drops["drop_time_s"] = _to_num(drops["rx_t_s"])
-    drops["msg_seq"] = _to_num(drops["msg_seq"])
-    drops["tx_id"] = _to_num(drops["tx_id"])
-    drops["rx_id"] = _to_num(drops["rx_id"])
-    drops = drops.dropna(subset=["drop_time_s", "pkt_uid"])
-    if drops.empty:
-        return pd.DataFrame()
-
-    drops = drops.rename(columns={"msg_type": "drop_type"})
-    drops = drops[
-        ["pkt_uid", "drop_time_s", "drop_type", "msg_seq", "tx_id", "rx_id"]
-    ].copy()
-
-    if ctrl.empty or "pkt_uid" not in ctrl.columns:
-        out = drops.copy()
-        out["vehicle_id"] = vehicle_id
-        out["decision_time_s"] = np.nan
-        out["decision_event_type"] = "missing_decision"
-        out["decision_delay_s"] = np.nan
-        out["lane_before"] = np.nan
-        out["lane_after"] = np.nan
-        out["target_speed_mps"] = np.nan
-        out["lane_change"] = False
-        return out
-
-    ctrl["pkt_uid"] = ctrl["pkt_uid"].astype(str)
-    ctrl["decision_time_s"] = _to_num(ctrl.get("time_s"))
-    ctrl["lane_before"] = _to_num(ctrl.get("lane_before"))
-    ctrl["lane_after"] = _to_num(ctrl.get("lane_after"))
-    ctrl["target_speed_mps"] = _to_num(ctrl.get("target_speed_mps"))
-    ctrl["decision_event_type"] = ctrl.get("event_type", "unknown").astype(str)
-    ctrl["priority"] = np.where(ctrl["decision_event_type"].isin(REACTION_TYPES), 0, 1)
-
-    ctrl = ctrl.dropna(subset=["decision_time_s", "pkt_uid"])
-    if ctrl.empty:
-        out = drops.copy()
-        out["vehicle_id"] = vehicle_id
-        out["decision_time_s"] = np.nan
-        out["decision_event_type"] = "missing_decision"
-        out["decision_delay_s"] = np.nan
-        out["lane_before"] = np.nan
-        out["lane_after"] = np.nan
-        out["target_speed_mps"] = np.nan
-        out["lane_change"] = False
-        return out
-
-    ctrl = ctrl.sort_values(["decision_time_s", "priority"], ascending=[True, True])
-    first_decision = ctrl.groupby("pkt_uid", as_index=False).first()
-    first_decision = first_decision[
-        ["pkt_uid", "decision_time_s", "decision_event_type", "lane_before", "lane_after", "target_speed_mps"]
-    ].copy()
-
-    out = drops.merge(first_decision, on="pkt_uid", how="left")
-    out["vehicle_id"] = vehicle_id
+    if msg.empty or not required_msg_cols.issubset(msg.columns):
+        return pd.DataFrame(columns=TIMELINE_COLUMNS)
+
+    drops = msg.loc[msg["msg_type"].isin(DROP_TYPES)]
+    drops = pd.DataFrame(
+        {
+            "pair": _pair_key(drops["source_file"], "MSG"),
+            "vehicle_id": drops["file_vehicle"],
+            "pkt_uid": drops["pkt_uid"].astype(str),
+            "drop_time_s": _to_num(drops["rx_t_s"]),
+            "drop_type": drops["msg_type"],
+            "msg_seq": _to_num(drops["msg_seq"]),
+            "tx_id": _to_num(drops["tx_id"]),
+            "rx_id": _to_num(drops["rx_id"]),
+        }
+    )
+    out = drops.dropna(subset=["drop_time_s"]).merge(_first_decisions(ctrl), on=["pair", "pkt_uid"], how="left")
+    if out.empty:
+        return pd.DataFrame(columns=TIMELINE_COLUMNS)
+
     out["decision_event_type"] = out["decision_event_type"].fillna("missing_decision")
     out["decision_delay_s"] = out["decision_time_s"] - out["drop_time_s"]
     out["lane_change"] = (
@@ -131,7 +144,7 @@ def _build_vehicle_timeline(vehicle_id: str, msg_path: Path, ctrl_path: Path) ->
         & (out["lane_after"] >= 0)
         & (out["lane_before"] != out["lane_after"])
     )
-    return out
+    return out[TIMELINE_COLUMNS]
 
 
 def _write_scatter(df: pd.DataFrame, out_png: Path) -> None:
@@ -168,36 +181,25 @@ def _write_counts(df: pd.DataFrame, out_png: Path) -> None:
     plt.close(fig)
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Build pkt_uid-aware drop->decision timelines")
-    parser.add_argument("--run-dir", required=True, help="Scenario run directory (contains artifacts/)")
-    parser.add_argument(
-        "--out-dir",
-        default="",
-        help="Output directory (default: <run-dir>/artifacts/drop_decision_timeline)",
-    )
-    parser.add_argument("--vehicle-id", default="", help="Optional vehicle filter, e.g., veh8")
-    args = parser.parse_args()
-
-    run_dir = Path(args.run_dir).resolve()
-    artifacts = run_dir / "artifacts"
-    if not artifacts.exists():
-        print(f"No artifacts dir: {artifacts}")
-        return 1
-
-    out_dir = Path(args.out_dir).resolve() if args.out_dir else (artifacts / "drop_decision_timeline")
+def build_timeline(run_dir: Path, out_dir: Path, only_vehicle: str | None = None) -> list[Path]:
+    """Write the timeline outputs for ``run_dir`` into ``out_dir`` and return their paths."""
     out_dir.mkdir(parents=True, exist_ok=True)
+    msg = load_run_logs(run_dir, "MSG")
+    ctrl = load_run_logs(run_dir, "CTRL")
+    # only vehicles that also wrote a CTRL log are part of the timeline
+    ctrl_keys = {log_pair_key(p.name, "CTRL") for p in run_log_files(run_dir, "CTRL")}
+    paired = {
+        p.name
+        for p in run_log_files(run_dir, "MSG")
+        if log_pair_key(p.name, "MSG") in ctrl_keys
+        and (only_vehicle is None or vehicle_from_path(p) == only_vehicle)
+    }
+    vehicles_seen = {vehicle_from_path(Path(name)) for name in paired}
+    if not msg.empty:
+        msg = msg[msg["source_file"].isin(paired)]
+    all_events = match_drop_decisions(msg, ctrl)
 
-    only_vehicle = args.vehicle_id.strip() or None
-    timelines: list[pd.DataFrame] = []
-    vehicles_seen = set()
-    for veh, msg_path, ctrl_path in _iter_msg_ctrl_pairs(artifacts, only_vehicle):
-        vehicles_seen.add(veh)
-        t = _build_vehicle_timeline(veh, msg_path, ctrl_path)
-        if not t.empty:
-            timelines.append(t)
-
-    if not timelines:
+    if all_events.empty:
         empty = pd.DataFrame(
             columns=[
                 "vehicle_id",
@@ -233,11 +235,8 @@ def main() -> int:
                 }
             ]
         ).to_csv(out_dir / "summary.csv", index=False)
-        print(out_dir / "event_timeline.csv")
-        print(out_dir / "summary.csv")
-        return 0
+        return [out_dir / "event_timeline.csv", out_dir / "summary.csv"]
 
-    all_events = pd.concat(timelines, ignore_index=True)
     all_events = all_events.sort_values(["drop_time_s", "vehicle_id", "pkt_uid"], ascending=[True, True, True])
     all_events.to_csv(out_dir / "event_timeline.csv", index=False)
 
@@ -261,10 +260,34 @@ def main() -> int:
     _write_scatter(all_events, out_dir / "decision_delay_scatter.png")
     _write_counts(all_events, out_dir / "decision_type_counts.png")
 
-    print(out_dir / "event_timeline.csv")
-    print(out_dir / "summary.csv")
-    print(out_dir / "decision_delay_scatter.png")
-    print(out_dir / "decision_type_counts.png")
+    return [
+        out_dir / "event_timeline.csv",
+        out_dir / "summary.csv",
+        out_dir / "decision_delay_scatter.png",
+        out_dir / "decision_type_counts.png",
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build pkt_uid-aware drop->decision timelines")
+    parser.add_argument("--run-dir", required=True, help="Scenario run directory (contains artifacts/)")
+    parser.add_argument(
+        "--out-dir",
+        default="",
+        help="Output directory (default: <run-dir>/artifacts/drop_decision_timeline)",
+    )
+    parser.add_argument("--vehicle-id", default="", help="Optional vehicle filter, e.g., veh8")
+    args = parser.parse_args()
+
+    run_dir = Path(args.run_dir).resolve()
+    artifacts = run_dir / "artifacts"
+    if not artifacts.exists():
+        print(f"No artifacts dir: {artifacts}")
+        return 1
+
+    out_dir = Path(args.out_dir).resolve() if args.out_dir else (artifacts / "drop_decision_timeline")
+    for path in build_timeline(run_dir, out_dir, args.vehicle_id.strip() or None):
+        print(path)
     return 0
 
 
@@ -14,6 +14,9 @@ from pathlib import Path
 import matplotlib.pyplot as plt
 import numpy as np
 
+from analyze_netstate_collision_risk import lane_pairs
+from netstate_store import NetstateTable, load_netstate
+
 
 def _to_float(value: str | None) -> float:
     try:
@@ -48,39 +51,45 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--collision-xml", default="", help="Override collision XML path")
     p.add_argument("--timeline-csv", default="", help="Override drop_decision timeline CSV path")
     p.add_argument("--out-dir", default="", help="Output directory (default: artifacts/valid_scenario_story)")
+    p.add_argument(
+        "--pairs",
+        default="",
+        help="Comma-separated follower:leader pairs for the gap/TTC plot, e.g. veh4:veh2,veh5:veh4 (default: riskiest pairs)",
+    )
+    p.add_argument("--top-pairs", type=int, default=2, help="Riskiest follower/leader pairs plotted when --pairs is empty")
     return p.parse_args()
 
 
-def parse_netstate(netstate: Path, focus: set[str]) -> dict[str, list[dict[str, float | str | int]]]:
-    records: dict[str, list[dict[str, float | str | int]]] = defaultdict(list)
-
-    for _, elem in ET.iterparse(netstate, events=("end",)):
-        if elem.tag != "timestep":
-            continue
+def parse_netstate(table: NetstateTable, focus: set[str]) -> dict[str, list[dict[str, float | str | int]]]:
+    rows = np.flatnonzero(table.rows_for(focus))
+    # rows are in document order, i.e. already sorted by time for every vehicle
+    lane_codes = table.lane[rows]
+    lane_idx_of = {code: _lane_index(str(lane)) for code, lane in enumerate(table.lanes)}
 
-        t_s = _to_float(elem.attrib.get("time"))
-        for edge in elem.findall("edge"):
-            edge_id = edge.attrib.get("id", "")
-            for lane in edge.findall("lane"):
-                lane_id = lane.attrib.get("id", "")
-                lane_idx = _lane_index(lane_id)
-                for veh in lane.findall("vehicle"):
-                    vid = veh.attrib.get("id", "")
-                    if vid not in focus:
-                        continue
-                    records[vid].append(
-                        {
-                            "time_s": t_s,
-                            "edge_id": edge_id,
-                            "lane_id": lane_id,
-                            "lane_idx": lane_idx,
-                            "lane_pos": _to_float(veh.attrib.get("pos")),
-                            "speed": _to_float(veh.attrib.get("speed")),
-                            "x": _to_float(veh.attrib.get("x")),
-                            "y": _to_float(veh.attrib.get("y")),
-                        }
-                    )
-        elem.clear()
+    records: dict[str, list[dict[str, float | str | int]]] = defaultdict(list)
+    for vid, t_s, edge_id, lane_id, lane_code, pos, speed, x, y in zip(
+        table.vehicles[table.vehicle[rows]].tolist(),
+        table.time_s[rows].tolist(),
+        table.edges[table.edge[rows]].tolist(),
+        table.lanes[lane_codes].tolist(),
+        lane_codes.tolist(),
+        table.pos[rows].tolist(),
+        table.speed[rows].tolist(),
+        table.x[rows].tolist(),
+        table.y[rows].tolist(),
+    ):
+        records[vid].append(
+            {
+                "time_s": t_s,
+                "edge_id": edge_id,
+                "lane_id": lane_id,
+                "lane_idx": lane_idx_of[lane_code],
+                "lane_pos": pos,
+                "speed": speed,
+                "x": x,
+                "y": y,
+            }
+        )
 
     for vid in records:
         records[vid].sort(key=lambda r: float(r["time_s"]))
@@ -170,39 +179,64 @@ def read_timeline_events(timeline_csv: Path, vehicle_id: str) -> list[dict[str,
     return events
 
 
+def _risk_key(row: dict[str, float | str | int]) -> tuple[bool, float, float]:
+    ttc = float(row["min_ttc_s"])
+    return (math.isnan(ttc), 0.0 if math.isnan(ttc) else ttc, float(row["min_gap_m"]))
+
+
+def rank_pairs(table: NetstateTable, pairs: dict[str, np.ndarray]) -> list[dict[str, float | str | int]]:
+    """Per follower/leader pair: steps spent adjacent on one lane, min gap and min TTC, riskiest first."""
+    if pairs["gap"].size == 0:
+        return []
+    order = np.lexsort((pairs["leader"], pairs["follower"]))
+    follower, leader = pairs["follower"][order], pairs["leader"][order]
+    starts = np.flatnonzero(np.r_[True, (follower[1:] != follower[:-1]) | (leader[1:] != leader[:-1])])
+    steps = np.diff(np.r_[starts, order.size])
+    min_gap = np.minimum.reduceat(pairs["gap"][order], starts)
+    min_ttc = np.minimum.reduceat(pairs["ttc"][order], starts)
+
+    ranked = [
+        {
+            "follower_id": str(table.vehicles[follower[s]]),
+            "leader_id": str(table.vehicles[leader[s]]),
+            "steps": int(n),
+            "min_gap_m": float(g),
+            "min_ttc_s": float(t) if math.isfinite(t) else math.nan,
+        }
+        for s, n, g, t in zip(starts.tolist(), steps.tolist(), min_gap.tolist(), min_ttc.tolist())
+    ]
+    # lowest TTC first; pairs that never close in are ordered by their smallest gap
+    ranked.sort(key=_risk_key)
+    for i, row in enumerate(ranked, start=1):
+        row["rank"] = i
+    return ranked
+
+
 def _pair_series(
-    records: dict[str, list[dict[str, float | str | int]]],
+    table: NetstateTable,
     rear_id: str,
     front_id: str,
-) -> tuple[list[float], list[float], list[float]]:
-    rear = records.get(rear_id, [])
-    front = records.get(front_id, [])
-    if not rear or not front:
-        return [], [], []
-
-    by_t_rear = {round(float(r["time_s"]), 2): r for r in rear}
-    by_t_front = {round(float(r["time_s"]), 2): r for r in front}
-    common = sorted(set(by_t_rear).intersection(by_t_front))
-
-    times: list[float] = []
-    gaps: list[float] = []
-    ttcs: list[float] = []
-
-    for t in common:
-        rr = by_t_rear[t]
-        ff = by_t_front[t]
-        if rr["lane_id"] != ff["lane_id"]:
-            continue
-        gap = float(ff["lane_pos"]) - float(rr["lane_pos"])
-        if not math.isfinite(gap) or gap <= 0:
-            continue
-        closing = float(rr["speed"]) - float(ff["speed"])
-        ttc = gap / closing if closing > 0.1 else math.nan
-        times.append(float(t))
-        gaps.append(gap)
-        ttcs.append(ttc)
-
-    return times, gaps, ttcs
+    min_closing: float = 0.1,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Gap/TTC of ``rear_id`` behind ``front_id`` at every step both are on the same lane."""
+    empty = np.zeros(0)
+    codes = {str(v): i for i, v in enumerate(table.vehicles)}
+    if rear_id not in codes or front_id not in codes:
+        return empty, empty, empty
+
+    rear = np.flatnonzero(table.vehicle == codes[rear_id])
+    front = np.flatnonzero(table.vehicle == codes[front_id])
+    _, ri, fi = np.intersect1d(table.step[rear], table.step[front], assume_unique=True, return_indices=True)
+    rear, front = rear[ri], front[fi]
+    rear_pos, front_pos = table.pos[rear], table.pos[front]
+    gap = front_pos - rear_pos
+    keep = (table.lane[rear] == table.lane[front]) & np.isfinite(gap) & (gap > 0)
+    rear, front, gap = rear[keep], front[keep], gap[keep]
+
+    closing = table.speed[rear] - table.speed[front]
+    ttc = np.full(gap.shape, np.nan)
+    np.divide(gap, closing, out=ttc, where=closing > min_closing)
+    return table.time_s[rear], gap, ttc
 
 
 def _bin_counts(times: list[float], max_time: int) -> np.ndarray:
@@ -267,7 +301,8 @@ def main() -> int:
     if not netstate.exists():
         raise FileNotFoundError(f"Missing netstate: {netstate}")
 
-    records = parse_netstate(netstate, focus_set)
+    table = load_netstate(netstate)
+    records = parse_netstate(table, focus_set)
 
     vehicle_state_csv = out_dir / "vehicle_state_timeseries.csv"
     write_vehicle_state_csv(records, vehicle_state_csv)
@@ -310,14 +345,27 @@ def main() -> int:
     collisions = parse_collisions(collision_xml)
     collision_times = [float(c["time_s"]) for c in collisions if math.isfinite(float(c["time_s"]))]
 
-    t42, gap42, ttc42 = _pair_series(records, "veh4", "veh2")
-    t54, gap54, ttc54 = _pair_series(records, "veh5", "veh4")
+    ranking = rank_pairs(table, lane_pairs(table, min_closing=0.1))
+    ranking_csv = out_dir / "pair_risk_ranking.csv"
+    with ranking_csv.open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["rank", "follower_id", "leader_id", "steps", "min_gap_m", "min_ttc_s"])
+        writer.writeheader()
+        for row in ranking:
+            writer.writerow(row)
+
+    if args.pairs:
+        plot_pairs = [tuple(p.split(":", 1)) for p in args.pairs.split(",") if ":" in p]
+    else:
+        plot_pairs = [(str(r["follower_id"]), str(r["leader_id"])) for r in ranking[: max(0, args.top_pairs)]]
 
     fig, ax = plt.subplots(2, 1, figsize=(12, 7), sharex=True)
-    if t42:
-        ax[0].plot(t42, gap42, label="gap veh4->veh2", color="#9467bd")
-    if t54:
-        ax[0].plot(t54, gap54, label="gap veh5->veh4", color="#1f77b4")
+    for rear_id, front_id in plot_pairs:
+        t_pair, gap_pair, ttc_pair = _pair_series(table, rear_id, front_id)
+        if t_pair.size == 0:
+            continue
+        color = colors.get(rear_id)
+        ax[0].plot(t_pair, gap_pair, label=f"gap {rear_id}->{front_id}", color=color)
+        ax[1].plot(t_pair, ttc_pair, label=f"TTC {rear_id}->{front_id}", color=color)
     ax[0].axhline(2.0, linestyle="--", color="gray", linewidth=1.0, label="2 m threshold")
     for ct in collision_times:
         ax[0].axvline(ct, linestyle=":", color="#d62728", alpha=0.8)
@@ -326,10 +374,6 @@ def main() -> int:
     ax[0].grid(alpha=0.3)
     ax[0].legend(fontsize=9)
 
-    if t42:
-        ax[1].plot(t42, ttc42, label="TTC veh4->veh2", color="#9467bd")
-    if t54:
-        ax[1].plot(t54, ttc54, label="TTC veh5->veh4", color="#1f77b4")
     ax[1].axhline(1.5, linestyle="--", color="gray", linewidth=1.0, label="1.5 s threshold")
     for ct in collision_times:
         ax[1].axvline(ct, linestyle=":", color="#d62728", alpha=0.8)
@@ -448,6 +492,7 @@ def main() -> int:
 
     print(vehicle_state_csv)
     print(speed_lane_png)
+    print(ranking_csv)
     print(gap_ttc_png)
     print(ns3_events_png)
     print(chain_csv)
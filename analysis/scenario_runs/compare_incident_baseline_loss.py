@@ -1,11 +1,20 @@
 #!/usr/bin/env python3
-"""Compare baseline vs lossy emergency-incident runs on a common timeline."""
+"""Compare baseline vs lossy emergency-incident runs on a common timeline.
+
+With --cases-csv (as written by run_loss_sweep.sh) every case of a sweep is loaded
+once, in parallel, aligned on one per-second index and compared N-way against the
+reference case (lowest configured drop probability). The same case builds also give
+the sweep overview (loss_sweep_summary.csv/png, loss_sweep_behavior_timing.png).
+"""
 
 from __future__ import annotations
 
 import argparse
+import csv
 import math
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 import xml.etree.ElementTree as ET
 from pathlib import Path
 
@@ -13,49 +22,47 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+from run_artifacts import CACHE_DIR, load_run_logs, run_log_files
+
 
 def _floor_seconds(series: pd.Series) -> pd.Series:
     vals = pd.to_numeric(series, errors="coerce")
     return np.floor(vals).astype("Int64")
 
 
-def _load_msg_timeline(run_dir: Path) -> tuple[pd.DataFrame, dict[str, float]]:
-    msg_files = sorted((run_dir / "artifacts").glob("*-MSG.csv"))
+def _msg_summary(drop_app: float, drop_phy: float, rx_ok: float) -> dict[str, float]:
+    total_drop = drop_app + drop_phy
+    return {
+        "total_cam_drop_events": total_drop,
+        "total_cam_drop_app_events": drop_app,
+        "total_cam_drop_phy_events": drop_phy,
+        "total_cam_rx_ok_events": rx_ok,
+        "overall_cam_drop_ratio": float(total_drop / (total_drop + rx_ok)) if (total_drop + rx_ok) > 0 else math.nan,
+    }
+
+
+def _load_msg_timeline(run_dir: Path, cache_dir: Path | None = None) -> tuple[pd.DataFrame, dict[str, float]]:
+    msg_files = run_log_files(run_dir, "MSG")
     if not msg_files:
         empty = pd.DataFrame(
             columns=["time_s", "cam_drop_events", "cam_rx_ok_events", "cam_drop_ratio"]
         )
-        return empty, {
-            "total_cam_drop_events": 0.0,
-            "total_cam_rx_ok_events": 0.0,
-            "overall_cam_drop_ratio": math.nan,
-        }
+        return empty, _msg_summary(0.0, 0.0, 0.0)
 
+    logs = load_run_logs(run_dir, "MSG", cache_dir)
     rows = []
-    for f in msg_files:
-        try:
-            df = pd.read_csv(f, usecols=["rx_t_s", "rx_ok", "msg_type"])
-        except Exception:
-            continue
-        if df.empty:
-            continue
-        df["rx_t_s"] = pd.to_numeric(df["rx_t_s"], errors="coerce")
-        df["rx_ok"] = pd.to_numeric(df["rx_ok"], errors="coerce")
+    if {"rx_t_s", "rx_ok", "msg_type"}.issubset(logs.columns):
+        df = logs[["rx_t_s", "rx_ok", "msg_type"]].copy()
         df["msg_type"] = df["msg_type"].astype(str)
         df = df.dropna(subset=["rx_t_s"])
-        if df.empty:
-            continue
-        rows.append(df)
+        if not df.empty:
+            rows.append(df)
 
     if not rows:
         empty = pd.DataFrame(
             columns=["time_s", "cam_drop_events", "cam_rx_ok_events", "cam_drop_ratio"]
         )
-        return empty, {
-            "total_cam_drop_events": 0.0,
-            "total_cam_rx_ok_events": 0.0,
-            "overall_cam_drop_ratio": math.nan,
-        }
+        return empty, _msg_summary(0.0, 0.0, 0.0)
 
     msg = pd.concat(rows, ignore_index=True)
     msg["time_s"] = _floor_seconds(msg["rx_t_s"])
@@ -78,54 +85,48 @@ def _load_msg_timeline(run_dir: Path) -> tuple[pd.DataFrame, dict[str, float]]:
         where=denom > 0,
     )
 
-    total_drop = float(grouped["cam_drop_events"].sum())
-    total_ok = float(grouped["cam_rx_ok_events"].sum())
-    overall_ratio = float(total_drop / (total_drop + total_ok)) if (total_drop + total_ok) > 0 else math.nan
-    summary = {
-        "total_cam_drop_events": total_drop,
-        "total_cam_rx_ok_events": total_ok,
-        "overall_cam_drop_ratio": overall_ratio,
-    }
+    summary = _msg_summary(
+        float((msg["msg_type"] == "CAM_DROP_APP").sum()),
+        float((msg["msg_type"] == "CAM_DROP_PHY").sum()),
+        float(grouped["cam_rx_ok_events"].sum()),
+    )
     return grouped, summary
 
 
-def _load_ctrl_timeline(run_dir: Path) -> tuple[pd.DataFrame, dict[str, float]]:
-    ctrl_files = sorted((run_dir / "artifacts").glob("*-CTRL.csv"))
-    if not ctrl_files:
-        return pd.DataFrame(columns=["time_s", "control_actions_per_s"]), {
+def _ctrl_summary(times) -> dict[str, float]:
+    t = np.asarray(times, dtype=float)
+    if not t.size:
+        return {
             "total_control_actions": 0.0,
             "first_control_action_s": math.nan,
+            "p50_control_action_s": math.nan,
             "p90_control_action_s": math.nan,
+            "last_control_action_s": math.nan,
         }
+    return {
+        "total_control_actions": float(t.size),
+        "first_control_action_s": float(np.min(t)),
+        "p50_control_action_s": float(np.quantile(t, 0.5)),
+        "p90_control_action_s": float(np.quantile(t, 0.9)),
+        "last_control_action_s": float(np.max(t)),
+    }
 
-    times = []
-    for f in ctrl_files:
-        try:
-            df = pd.read_csv(f, usecols=["time_s"])
-        except Exception:
-            continue
-        if df.empty:
-            continue
-        ts = pd.to_numeric(df["time_s"], errors="coerce").dropna()
-        if not ts.empty:
-            times.extend(ts.to_list())
+
+def _load_ctrl_timeline(run_dir: Path, cache_dir: Path | None = None) -> tuple[pd.DataFrame, dict[str, float]]:
+    ctrl_files = run_log_files(run_dir, "CTRL")
+    if not ctrl_files:
+        return pd.DataFrame(columns=["time_s", "control_actions_per_s"]), _ctrl_summary([])
+
+    logs = load_run_logs(run_dir, "CTRL", cache_dir)
+    times = logs["time_s"].dropna().to_list() if "time_s" in logs.columns else []
 
     if not times:
-        return pd.DataFrame(columns=["time_s", "control_actions_per_s"]), {
-            "total_control_actions": 0.0,
-            "first_control_action_s": math.nan,
-            "p90_control_action_s": math.nan,
-        }
+        return pd.DataFrame(columns=["time_s", "control_actions_per_s"]), _ctrl_summary([])
 
     t = pd.Series(times, dtype=float)
     sec = np.floor(t).astype(int)
     grouped = sec.value_counts().sort_index().rename_axis("time_s").reset_index(name="control_actions_per_s")
-    summary = {
-        "total_control_actions": float(len(t)),
-        "first_control_action_s": float(np.min(t)),
-        "p90_control_action_s": float(np.quantile(t, 0.9)),
-    }
-    return grouped, summary
+    return grouped, _ctrl_summary(t)
 
 
 def _load_risk_timeline(run_dir: Path) -> tuple[pd.DataFrame, dict[str, float]]:
@@ -228,6 +229,7 @@ def _parse_log_summary(run_dir: Path) -> dict[str, float]:
     out = {
         "avg_prr": math.nan,
         "avg_latency_ms": math.nan,
+        "incident_vehicle": "",
         "incident_time_s": math.nan,
         "incident_duration_s": math.nan,
     }
@@ -237,19 +239,22 @@ def _parse_log_summary(run_dir: Path) -> dict[str, float]:
     m_prr = re.search(r"Average PRR:\s*([0-9.]+)", txt)
     m_lat = re.search(r"Average latency \(ms\):\s*([0-9.]+)", txt)
     m_inc = re.search(r"INCIDENT-APPLIED,.*time_s=([0-9.]+).*duration_s=([0-9.]+)", txt)
+    m_inc_id = re.search(r"INCIDENT-APPLIED,id=([^,]+)", txt)
     if m_prr:
         out["avg_prr"] = float(m_prr.group(1))
     if m_lat:
         out["avg_latency_ms"] = float(m_lat.group(1))
+    if m_inc_id:
+        out["incident_vehicle"] = m_inc_id.group(1)
     if m_inc:
         out["incident_time_s"] = float(m_inc.group(1))
         out["incident_duration_s"] = float(m_inc.group(2))
     return out
 
 
-def _build_case(run_dir: Path, label: str) -> tuple[pd.DataFrame, dict[str, float]]:
-    msg_t, msg_s = _load_msg_timeline(run_dir)
-    ctrl_t, ctrl_s = _load_ctrl_timeline(run_dir)
+def _build_case(run_dir: Path, label: str, cache_dir: Path | None = None) -> tuple[pd.DataFrame, dict[str, float]]:
+    msg_t, msg_s = _load_msg_timeline(run_dir, cache_dir)
+    ctrl_t, ctrl_s = _load_ctrl_timeline(run_dir, cache_dir)
     risk_t, risk_s = _load_risk_timeline(run_dir)
     coll_t, coll_s = _load_collision_timeline(run_dir)
     log_s = _parse_log_summary(run_dir)
@@ -353,24 +358,339 @@ def _plot(
     plt.close(fig)
 
 
+ALIGNED_METRICS = ("cam_drop_ratio", "control_actions_per_s", "min_gap_m", "min_ttc_s", "collisions_cum")
+# cases.csv columns that order the sweep, first match wins
+SWEEP_KEYS = ("configured_drop_prob", "rx_drop_prob_cam", "rx_drop_prob_phy_cam", "tx_power_dbm")
+
+
+def _resolve_case_dir(raw: str, base: Path) -> Path:
+    """run_dir from cases.csv; sweeps copied from another machine are found below ``base``."""
+    path = Path(raw)
+    if path.exists():
+        return path.resolve()
+    parts = path.parts
+    for i in range(1, len(parts)):
+        candidate = base.joinpath(*parts[i:])
+        if candidate.exists():
+            return candidate.resolve()
+    return path
+
+
+def load_cases(cases_csv: Path) -> pd.DataFrame:
+    with cases_csv.open(newline="") as f:
+        cases = pd.DataFrame(list(csv.DictReader(f)))
+    if cases.empty or "run_dir" not in cases.columns:
+        return pd.DataFrame()
+    cases["run_dir"] = [str(_resolve_case_dir(r, cases_csv.parent)) for r in cases["run_dir"]]
+    if "case_id" in cases.columns:
+        labels = cases["case_id"].astype(str)
+    else:
+        others = [c for c in cases.columns if c != "run_dir"]
+        labels = cases[others].astype(str).agg("_".join, axis=1) if others else cases.index.astype(str)
+    # labels become column names of the aligned tables and must be unique
+    dup = labels.duplicated(keep=False)
+    cases["case"] = labels.where(~dup, labels + "#" + cases.index.astype(str))
+    for key in SWEEP_KEYS:
+        if key in cases.columns:
+            cases["sweep_value"] = pd.to_numeric(cases[key], errors="coerce")
+            return cases.sort_values("sweep_value", kind="stable").reset_index(drop=True)
+    cases["sweep_value"] = np.arange(len(cases), dtype=float)
+    return cases
+
+
+def _build_case_args(args: tuple[str, str, Path]) -> tuple[pd.DataFrame, dict[str, float]]:
+    return _build_case(Path(args[0]), args[1], args[2])
+
+
+def align_timelines(timelines: list[pd.DataFrame], labels: list[str]) -> dict[str, pd.DataFrame]:
+    """Per-metric (time_s x case) tables on one shared per-second index."""
+    long = pd.concat(timelines, ignore_index=True)
+    max_time = int(long["time_s"].max()) if not long.empty else 0
+    index = pd.RangeIndex(0, max_time + 1, name="time_s")
+    wide = long.set_index(["time_s", "case"])[list(ALIGNED_METRICS)].unstack("case")
+    aligned = {}
+    for metric in ALIGNED_METRICS:
+        table = wide[metric].reindex(index=index, columns=labels)
+        if metric == "control_actions_per_s":
+            table = table.fillna(0.0)
+        elif metric == "collisions_cum":
+            table = table.ffill().fillna(0.0)
+        aligned[metric] = table
+    return aligned
+
+
+def sweep_comparison(
+    cases: pd.DataFrame,
+    summaries: list[dict[str, float]],
+    aligned: dict[str, pd.DataFrame],
+    gap_threshold: float,
+    ttc_threshold: float,
+) -> pd.DataFrame:
+    """One row per case: its summary plus whole-timeline comparisons against the reference case."""
+    ref = cases["case"].iloc[0]
+    gap = aligned["min_gap_m"]
+    ttc = aligned["min_ttc_s"]
+    ctrl = aligned["control_actions_per_s"]
+    ratio = aligned["cam_drop_ratio"]
+    vs = pd.DataFrame(
+        {
+            "seconds_gap_below_threshold": (gap < gap_threshold).sum(),
+            "seconds_ttc_below_threshold": (ttc < ttc_threshold).sum(),
+            "mean_cam_drop_ratio": ratio.mean(),
+            "mean_gap_diff_vs_ref_m": gap.sub(gap[ref], axis=0).mean(),
+            "mean_ttc_diff_vs_ref_s": ttc.sub(ttc[ref], axis=0).mean(),
+            "control_actions_abs_diff_vs_ref": ctrl.sub(ctrl[ref], axis=0).abs().sum(),
+            "collisions_diff_vs_ref": aligned["collisions_cum"].iloc[-1] - aligned["collisions_cum"][ref].iloc[-1],
+        }
+    )
+    out = pd.DataFrame(summaries).drop(columns=["run_dir"]).set_index("case")
+    out = cases.drop(columns=["case_id"], errors="ignore").set_index("case").join(out).join(vs)
+    out.insert(0, "reference_case", ref)
+    return out.reset_index().rename(columns={"case": "case_id"})
+
+
+def _plot_small_multiples(
+    aligned: dict[str, pd.DataFrame],
+    summaries: list[dict[str, float]],
+    out_png: Path,
+    gap_threshold: float,
+    ttc_threshold: float,
+) -> None:
+    panels = [
+        ("cam_drop_ratio", "CAM drop ratio [-]", None),
+        ("control_actions_per_s", "Control actions / 1s", None),
+        ("min_gap_m", "Min gap [m]", gap_threshold),
+        ("min_ttc_s", "Min TTC [s]", ttc_threshold),
+    ]
+    labels = list(aligned["min_gap_m"].columns)
+    ref = labels[0]
+    fig, ax = plt.subplots(
+        len(panels), len(labels), figsize=(3.2 * len(labels) + 1, 9), sharex=True, sharey="row", squeeze=False
+    )
+    t = aligned["min_gap_m"].index.to_numpy()
+    for col, (label, stats) in enumerate(zip(labels, summaries)):
+        for row, (metric, ylabel, threshold) in enumerate(panels):
+            a = ax[row, col]
+            table = aligned[metric]
+            if col > 0:
+                a.plot(t, table[ref], color="0.7", linewidth=1, label=ref)
+            a.plot(t, table[label], color="tab:blue", linewidth=1.2, label=label)
+            if threshold is not None:
+                a.axhline(threshold, linestyle="--", color="tab:red", linewidth=1)
+            inc_t = stats.get("incident_time_s", math.nan)
+            if pd.notna(inc_t):
+                a.axvline(float(inc_t), color="gray", linestyle=":", linewidth=1)
+            a.grid(alpha=0.3)
+            if col == 0:
+                a.set_ylabel(ylabel)
+        ax[0, col].set_title(label, fontsize=9)
+        ax[-1, col].set_xlabel("Time [s]")
+        if col > 0:
+            ax[0, col].legend(fontsize=7)
+    fig.tight_layout()
+    fig.savefig(out_png, dpi=130)
+    plt.close(fig)
+
+
+# loss_sweep_summary.csv column -> _build_case summary key
+LOSS_SWEEP_COLUMNS = {
+    "avg_prr": "avg_prr",
+    "avg_latency_ms": "avg_latency_ms",
+    "min_gap_m": "min_gap_m",
+    "min_ttc_s": "min_ttc_s",
+    "risky_gap_events": "risky_gap_events",
+    "risky_ttc_events": "risky_ttc_events",
+    "control_actions": "total_control_actions",
+    "first_control_action_s": "first_control_action_s",
+    "p50_control_action_s": "p50_control_action_s",
+    "p90_control_action_s": "p90_control_action_s",
+    "last_control_action_s": "last_control_action_s",
+    "cam_drop_app_events": "total_cam_drop_app_events",
+    "cam_drop_phy_events": "total_cam_drop_phy_events",
+    "cam_drop_total_events": "total_cam_drop_events",
+    "cam_rx_ok_events": "total_cam_rx_ok_events",
+    "observed_cam_drop_ratio": "overall_cam_drop_ratio",
+    "incident_vehicle": "incident_vehicle",
+    "incident_time_s": "incident_time_s",
+    "run_dir": "run_dir",
+}
+
+
+def loss_sweep_summary(cases: pd.DataFrame, summaries: list[dict[str, float]]) -> pd.DataFrame:
+    """One row per case of a run_loss_sweep.sh sweep with its configured and observed loss, radio and safety totals."""
+    rows = []
+    for (_, case), stats in zip(cases.iterrows(), summaries):
+        prob_cam = pd.to_numeric(case.get("rx_drop_prob_cam", np.nan), errors="coerce")
+        row = {
+            "case_id": case.get("case_id", case["case"]),
+            "drop_layer": case.get("drop_layer", ""),
+            "configured_drop_prob": pd.to_numeric(case.get("configured_drop_prob", prob_cam), errors="coerce"),
+            "rx_drop_prob_cam": prob_cam,
+            "rx_drop_prob_phy_cam": pd.to_numeric(case.get("rx_drop_prob_phy_cam", np.nan), errors="coerce"),
+        }
+        row.update({column: stats.get(key, math.nan) for column, key in LOSS_SWEEP_COLUMNS.items()})
+        rows.append(row)
+    return pd.DataFrame(rows).sort_values("configured_drop_prob", kind="stable")
+
+
+def _loss_axis_label(summary: pd.DataFrame) -> str:
+    layers = summary["drop_layer"].astype(str).str.strip().str.lower()
+    layer = layers.iloc[0] if not layers.empty else "app"
+    if layer == "phy":
+        return "Injected CAM PHY drop probability [-]"
+    if layer == "both":
+        return "Injected CAM APP+PHY drop probability [-]"
+    return "Injected CAM APP drop probability [-]"
+
+
+def _plot_loss_sweep(summary: pd.DataFrame, out_png: Path) -> None:
+    x_label = _loss_axis_label(summary)
+    x = summary["configured_drop_prob"].to_numpy()
+    fig, ax = plt.subplots(2, 2, figsize=(10, 7))
+
+    ax[0, 0].plot(x, summary["avg_prr"], marker="o", label="Average PRR")
+    ax[0, 0].plot(x, summary["observed_cam_drop_ratio"], marker="s", label="Observed CAM drop ratio (APP+PHY)")
+    for column, marker, label in (
+        ("cam_drop_app_events", "^", "Observed CAM APP drop ratio"),
+        ("cam_drop_phy_events", "v", "Observed CAM PHY drop ratio"),
+    ):
+        drops = pd.to_numeric(summary[column], errors="coerce").fillna(0)
+        if float(drops.max()) > 0:
+            ratio = np.divide(drops, (drops + summary["cam_rx_ok_events"]).replace(0, np.nan))
+            ax[0, 0].plot(x, ratio, marker=marker, linestyle="--", label=label)
+    ax[0, 0].set_ylabel("Ratio [-]")
+    ax[0, 0].set_ylim(0, 1.05)
+    ax[0, 0].grid(alpha=0.3)
+    ax[0, 0].legend()
+    ax[0, 0].set_xlabel(x_label)
+
+    ax[0, 1].plot(x, summary["avg_latency_ms"], marker="o", color="#ff7f0e")
+    ax[0, 1].set_xlabel(x_label)
+    ax[0, 1].set_ylabel("Average latency [ms]")
+    ax[0, 1].grid(alpha=0.3)
+
+    ax[1, 0].plot(x, summary["risky_ttc_events"], marker="o", label="Risky TTC events")
+    ax[1, 0].plot(x, summary["risky_gap_events"], marker="s", label="Risky gap events")
+    ax[1, 0].set_xlabel(x_label)
+    ax[1, 0].set_ylabel("Events [count]")
+    ax[1, 0].grid(alpha=0.3)
+    ax[1, 0].legend()
+
+    ax[1, 1].plot(x, summary["control_actions"], marker="o", color="#1f77b4", label="Control actions")
+    ax[1, 1].set_xlabel(x_label)
+    ax[1, 1].set_ylabel("Control actions [count]", color="#1f77b4")
+    ax[1, 1].tick_params(axis="y", labelcolor="#1f77b4")
+    ax2 = ax[1, 1].twinx()
+    ax2.plot(x, summary["min_ttc_s"], marker="s", color="#d62728", label="Min TTC")
+    ax2.set_ylabel("Min TTC [s]", color="#d62728")
+    ax2.tick_params(axis="y", labelcolor="#d62728")
+    h1, l1 = ax[1, 1].get_legend_handles_labels()
+    h2, l2 = ax2.get_legend_handles_labels()
+    ax[1, 1].legend(h1 + h2, l1 + l2, loc="best")
+    ax[1, 1].grid(alpha=0.3)
+
+    fig.tight_layout()
+    fig.savefig(out_png, dpi=150)
+    plt.close(fig)
+
+
+def _plot_behavior_timing(summary: pd.DataFrame, out_png: Path) -> None:
+    x = summary["configured_drop_prob"].to_numpy()
+    fig, ax = plt.subplots(1, 1, figsize=(7, 4))
+    ax.plot(x, summary["first_control_action_s"], marker="o", label="First control action")
+    ax.plot(x, summary["p90_control_action_s"], marker="s", label="P90 control action")
+    ax.set_xlabel(_loss_axis_label(summary))
+    ax.set_ylabel("Control-action time [s]")
+    ax.grid(alpha=0.3)
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(out_png, dpi=150)
+    plt.close(fig)
+
+
+def run_batch(
+    cases_csv: Path,
+    out_dir: Path,
+    jobs: int,
+    gap_threshold: float,
+    ttc_threshold: float,
+    summary_dir: Path | None = None,
+) -> list[Path]:
+    cases = load_cases(cases_csv)
+    if cases.empty:
+        raise SystemExit(f"No cases with run_dir in {cases_csv}")
+    cache_dir = out_dir / CACHE_DIR
+    work = [(run_dir, case, cache_dir) for run_dir, case in zip(cases["run_dir"], cases["case"])]
+    if jobs > 1 and len(work) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(work))) as pool:
+            built = list(pool.map(_build_case_args, work))
+    else:
+        built = [_build_case_args(w) for w in work]
+    timelines = [b[0] for b in built]
+    summaries = [b[1] for b in built]
+    labels = list(cases["case"])
+
+    aligned = align_timelines(timelines, labels)
+    comparison = sweep_comparison(cases, summaries, aligned, gap_threshold, ttc_threshold)
+
+    timeline_csv = out_dir / "sweep_comparison_timeline.csv"
+    summary_csv = out_dir / "sweep_comparison.csv"
+    plot_png = out_dir / "sweep_small_multiples.png"
+    pd.concat(timelines, ignore_index=True).to_csv(timeline_csv, index=False)
+    comparison.to_csv(summary_csv, index=False)
+    _plot_small_multiples(aligned, summaries, plot_png, gap_threshold, ttc_threshold)
+    outputs = [summary_csv, timeline_csv, plot_png]
+
+    # the per-case sweep overview, from the same case builds
+    summary_dir = summary_dir or out_dir
+    summary_dir.mkdir(parents=True, exist_ok=True)
+    loss_summary = loss_sweep_summary(cases, summaries)
+    loss_csv = summary_dir / "loss_sweep_summary.csv"
+    loss_png = summary_dir / "loss_sweep_summary.png"
+    timing_png = summary_dir / "loss_sweep_behavior_timing.png"
+    loss_summary.to_csv(loss_csv, index=False)
+    _plot_loss_sweep(loss_summary, loss_png)
+    _plot_behavior_timing(loss_summary, timing_png)
+    return outputs + [loss_csv, loss_png, timing_png]
+
+
 def main() -> None:
     p = argparse.ArgumentParser(description="Compare baseline vs lossy emergency-incident runs.")
-    p.add_argument("--baseline-dir", required=True, help="Path to baseline run directory")
-    p.add_argument("--lossy-dir", required=True, help="Path to lossy run directory")
+    p.add_argument("--baseline-dir", default="", help="Path to baseline run directory")
+    p.add_argument("--lossy-dir", default="", help="Path to lossy run directory")
+    p.add_argument("--cases-csv", default="", help="Sweep cases.csv: compare every case instead of one pair")
+    p.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Cases loaded in parallel (--cases-csv)")
     p.add_argument("--out-dir", required=True, help="Output directory for comparison artifacts")
+    p.add_argument("--summary-dir", default="", help="Where --cases-csv writes loss_sweep_summary.csv/png (default: --out-dir)")
     p.add_argument("--baseline-label", default="baseline", help="Label for baseline case")
     p.add_argument("--lossy-label", default="lossy", help="Label for lossy case")
     p.add_argument("--gap-threshold-m", type=float, default=2.0, help="Gap threshold shown on plots")
     p.add_argument("--ttc-threshold-s", type=float, default=1.5, help="TTC threshold shown on plots")
     args = p.parse_args()
+    if not args.cases_csv and not (args.baseline_dir and args.lossy_dir):
+        p.error("either --cases-csv or both --baseline-dir and --lossy-dir are required")
+
+    if args.cases_csv:
+        out_dir = Path(args.out_dir).resolve()
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for path in run_batch(
+            Path(args.cases_csv).resolve(),
+            out_dir,
+            args.jobs,
+            args.gap_threshold_m,
+            args.ttc_threshold_s,
+            Path(args.summary_dir).resolve() if args.summary_dir else None,
+        ):
+            print(path)
+        return
 
     baseline_dir = Path(args.baseline_dir).resolve()
     lossy_dir = Path(args.lossy_dir).resolve()
     out_dir = Path(args.out_dir).resolve()
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    baseline_t, baseline_s = _build_case(baseline_dir, args.baseline_label)
-    lossy_t, lossy_s = _build_case(lossy_dir, args.lossy_label)
+    baseline_t, baseline_s = _build_case(baseline_dir, args.baseline_label, out_dir / CACHE_DIR)
+    lossy_t, lossy_s = _build_case(lossy_dir, args.lossy_label, out_dir / CACHE_DIR)
 
     timeline_long = pd.concat([baseline_t, lossy_t], ignore_index=True)
     timeline_csv = out_dir / "comparison_timeline.csv"
@@ -18,8 +18,6 @@ Outputs:
 from __future__ import annotations
 
 import argparse
-import subprocess
-import sys
 from pathlib import Path
 
 import matplotlib.pyplot as plt
@@ -27,6 +25,8 @@ import numpy as np
 import pandas as pd
 from matplotlib.lines import Line2D
 
+from build_drop_decision_timeline import build_timeline
+
 
 REACTION_TYPES = {"cam_drop_reaction", "cpm_drop_reaction"}
 NO_ACTION_TYPE = "drop_decision_no_action"
@@ -63,21 +63,11 @@ def _ensure_event_timeline(
     if not auto_build:
         return False
 
-    root = Path(__file__).resolve().parents[2]
-    build_script = root / "analysis/scenario_runs/build_drop_decision_timeline.py"
-    if not build_script.exists():
+    # built in-process; the MSG/CTRL logs come from the run_artifacts cache
+    if not (run_dir / "artifacts").exists():
         return False
-
-    cmd = [
-        sys.executable,
-        str(build_script),
-        "--run-dir",
-        str(run_dir),
-        "--out-dir",
-        str(timeline_dir),
-    ]
-    rc = subprocess.run(cmd, check=False).returncode
-    return rc == 0 and timeline_csv.exists()
+    build_timeline(run_dir, timeline_dir)
+    return timeline_csv.exists()
 
 
 def _classify_action(row: pd.Series) -> str:
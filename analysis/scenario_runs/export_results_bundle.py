@@ -1,13 +1,30 @@
 #!/usr/bin/env python3
-"""Export a compact bundle of run results for external review (e.g., ChatGPT upload)."""
+"""Export a compact bundle of run results for external review (e.g., ChatGPT upload).
+
+The export is incremental: files whose size/mtime (or, failing that, sha256)
+match the previous EXPORT_MANIFEST.csv are left in place, new or changed files
+are reflinked, hard-linked or copied (whatever the filesystem allows) in
+parallel, and files that are no longer selected are removed. The manifest
+records the content hash and how each file was placed.
+"""
 
 from __future__ import annotations
 
 import argparse
 import csv
+import hashlib
+import os
 import shutil
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+MANIFEST_NAME = "EXPORT_MANIFEST.csv"
+MANIFEST_COLUMNS = ["relative_path", "size_bytes", "mtime_ns", "sha256", "method"]
+# linux/fs.h: clone the extents of one file into another (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
 
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(description="Copy practical run outputs into a single export folder.")
@@ -27,6 +44,21 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Also copy all CSV files (may be large).",
     )
+    p.add_argument(
+        "--link-mode",
+        choices=("auto", "reflink", "hardlink", "copy"),
+        default="auto",
+        help="How files are placed; auto tries reflink, then hard link, then copy. "
+        "Hard-linked files follow later in-place rewrites of the source, use copy for a frozen snapshot.",
+    )
+    p.add_argument(
+        "--archive",
+        choices=("none", "tar.gz", "zip"),
+        default="none",
+        help="Also pack the bundle into <export-root>/<label>.<ext>",
+    )
+    p.add_argument("--jobs", type=int, default=8, help="Files exported in parallel")
+    p.add_argument("--full", action="store_true", help="Re-export every file, ignoring the previous manifest")
     return p.parse_args()
 
 
@@ -72,6 +104,94 @@ def _collect_paths(run_dir: Path, include_raw_csv: bool) -> list[Path]:
     return sorted(selected)
 
 
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as fp:
+        for block in iter(lambda: fp.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _read_manifest(path: Path) -> dict[str, dict[str, str]]:
+    if not path.exists():
+        return {}
+    with path.open(newline="") as f:
+        return {row["relative_path"]: row for row in csv.DictReader(f)}
+
+
+def _reflink(src: Path, dst: Path) -> None:
+    import fcntl
+
+    with src.open("rb") as s, dst.open("wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+    shutil.copystat(src, dst)
+
+
+def _place(src: Path, dst: Path, mode: str) -> str:
+    if dst.exists() or dst.is_symlink():
+        dst.unlink()
+    if mode in ("auto", "reflink"):
+        try:
+            _reflink(src, dst)
+            return "reflink"
+        except (OSError, ImportError):
+            if dst.exists():
+                dst.unlink()
+    if mode in ("auto", "hardlink"):
+        try:
+            os.link(src, dst)
+            return "hardlink"
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+def _export_one(src: Path, dst: Path, prev: dict[str, str] | None, mode: str) -> tuple[int, int, str, str, bool]:
+    """Place ``src`` at ``dst`` unless the previous export is still current.
+
+    Returns (size, mtime_ns, sha256, method, exported).
+    """
+    st = src.stat()
+    if prev is not None and dst.exists() and dst.stat().st_size == st.st_size and prev.get("size_bytes") == str(st.st_size):
+        if prev.get("mtime_ns") == str(st.st_mtime_ns) and prev.get("sha256"):
+            return st.st_size, st.st_mtime_ns, prev["sha256"], prev.get("method", ""), False
+        # touched but maybe not changed: compare content before re-exporting
+        if prev.get("sha256"):
+            digest = _sha256(src)
+            if digest == prev["sha256"]:
+                return st.st_size, st.st_mtime_ns, digest, prev.get("method", ""), False
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    method = _place(src, dst, mode)
+    return st.st_size, st.st_mtime_ns, _sha256(src), method, True
+
+
+def _remove_stale(dst_dir: Path, keep: set[Path]) -> int:
+    removed = 0
+    for p in sorted(dst_dir.rglob("*"), reverse=True):
+        if p.is_dir():
+            if not any(p.iterdir()):
+                p.rmdir()
+        elif p not in keep:
+            p.unlink()
+            removed += 1
+    return removed
+
+
+def _write_archive(dst_dir: Path, rel_paths: list[Path], archive: Path, kind: str) -> None:
+    tmp = archive.with_name(archive.name + ".tmp")
+    names = rel_paths + [Path(MANIFEST_NAME)]
+    if kind == "zip":
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for rel in names:
+                zf.write(dst_dir / rel, arcname=str(Path(dst_dir.name) / rel))
+    else:
+        with tarfile.open(tmp, "w:gz") as tf:
+            for rel in names:
+                tf.add(dst_dir / rel, arcname=str(Path(dst_dir.name) / rel))
+    os.replace(tmp, archive)
+
+
 def main() -> None:
     args = parse_args()
     run_dir = Path(args.run_dir).resolve()
@@ -81,28 +201,36 @@ def main() -> None:
     export_root = Path(args.export_root).resolve()
     run_label = _safe_run_label(run_dir, args.run_label)
     dst_dir = export_root / run_label
-    if dst_dir.exists():
-        shutil.rmtree(dst_dir)
     dst_dir.mkdir(parents=True, exist_ok=True)
+    manifest = dst_dir / MANIFEST_NAME
+    previous = {} if args.full else _read_manifest(manifest)
 
     files = _collect_paths(run_dir, args.include_raw_csv)
-    manifest_rows = []
-    for src in files:
-        rel = src.relative_to(run_dir)
-        dst = dst_dir / rel
-        dst.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(src, dst)
-        manifest_rows.append((str(rel), src.stat().st_size))
-
-    manifest = dst_dir / "EXPORT_MANIFEST.csv"
+    rels = [src.relative_to(run_dir) for src in files]
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        results = list(
+            pool.map(
+                lambda item: _export_one(item[0], dst_dir / item[1], previous.get(str(item[1])), args.link_mode),
+                zip(files, rels),
+            )
+        )
+    removed = _remove_stale(dst_dir, {dst_dir / rel for rel in rels} | {manifest})
+
     with manifest.open("w", newline="") as f:
         writer = csv.writer(f)
-        writer.writerow(["relative_path", "size_bytes"])
-        writer.writerows(manifest_rows)
+        writer.writerow(MANIFEST_COLUMNS)
+        for rel, (size, mtime_ns, digest, method, _) in zip(rels, results):
+            writer.writerow([str(rel), size, mtime_ns, digest, method])
 
+    exported = sum(1 for r in results if r[4])
     print(dst_dir)
     print(manifest)
-    print(f"exported_files={len(manifest_rows)}")
+    if args.archive != "none":
+        archive = export_root / f"{run_label}.{args.archive}"
+        archive.parent.mkdir(parents=True, exist_ok=True)
+        _write_archive(dst_dir, rels, archive, args.archive)
+        print(archive)
+    print(f"exported_files={len(rels)} updated={exported} unchanged={len(rels) - exported} removed={removed}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""Columnar, cached view of a SUMO netstate dump.
+
+The XML is parsed once with a plain expat event parser (no element tree is
+built, numbers are converted column-wise) into one row per vehicle per timestep:
+
+    step, time_s, vehicle, edge, lane, pos, x, y, speed
+
+String columns are stored as integer codes into ``vehicles``/``edges``/``lanes``.
+The arrays are cached in ``<netstate>.columns.npz`` next to the XML and reused
+while the XML size and mtime are unchanged, so every script after the first
+loads the trajectories in milliseconds.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import warnings
+from pathlib import Path
+from xml.parsers import expat
+
+import numpy as np
+
+CACHE_SUFFIX = ".columns.npz"
+CACHE_VERSION = 1
+
+
+class NetstateTable:
+    """Row-per-vehicle-per-timestep arrays, in document order (time ascending)."""
+
+    def __init__(self, columns: dict[str, np.ndarray]):
+        self.step = columns["step"]
+        self.time_s = columns["time_s"]
+        self.vehicle = columns["vehicle"]
+        self.edge = columns["edge"]
+        self.lane = columns["lane"]
+        self.pos = columns["pos"]
+        self.x = columns["x"]
+        self.y = columns["y"]
+        self.speed = columns["speed"]
+        self.vehicles = columns["vehicles"]
+        self.edges = columns["edges"]
+        self.lanes = columns["lanes"]
+        # One entry per <timestep>, including steps without vehicles
+        self.step_time_s = columns["step_time_s"]
+
+    def __len__(self) -> int:
+        return int(self.step.size)
+
+    @property
+    def timesteps(self) -> int:
+        return int(self.step_time_s.size)
+
+    def vehicle_ids(self) -> np.ndarray:
+        return self.vehicles[self.vehicle]
+
+    def lane_ids(self) -> np.ndarray:
+        return self.lanes[self.lane]
+
+    def edge_ids(self) -> np.ndarray:
+        return self.edges[self.edge]
+
+    def rows_for(self, vehicle_ids) -> np.ndarray:
+        """Boolean mask of the rows that belong to any of ``vehicle_ids``."""
+        wanted = np.flatnonzero(np.isin(self.vehicles, list(vehicle_ids)))
+        return np.isin(self.vehicle, wanted)
+
+    def step_bounds(self) -> np.ndarray:
+        """Row offsets so that rows of step ``k`` are ``bounds[k]:bounds[k + 1]``."""
+        return np.searchsorted(self.step, np.arange(self.timesteps + 1))
+
+    def columns(self) -> dict[str, np.ndarray]:
+        return {
+            "step": self.step,
+            "time_s": self.time_s,
+            "vehicle": self.vehicle,
+            "edge": self.edge,
+            "lane": self.lane,
+            "pos": self.pos,
+            "x": self.x,
+            "y": self.y,
+            "speed": self.speed,
+            "vehicles": self.vehicles,
+            "edges": self.edges,
+            "lanes": self.lanes,
+            "step_time_s": self.step_time_s,
+        }
+
+
+def _float_column(values: list[str]) -> np.ndarray:
+    try:
+        # one C-level parse of the joined text is much faster than converting strings one by one
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            out = np.fromstring(" ".join(values), dtype=np.float64, sep=" ") if values else np.zeros(0)
+        if out.size == len(values):
+            return out
+    except ValueError:
+        pass
+    out = np.empty(len(values), dtype=np.float64)
+    for i, v in enumerate(values):
+        try:
+            out[i] = float(v)
+        except ValueError:
+            out[i] = math.nan
+    return out
+
+
+def _codes(values: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    lookup: dict[str, int] = {}
+    codes = np.fromiter((lookup.setdefault(v, len(lookup)) for v in values), dtype=np.int32, count=len(values))
+    return np.asarray(list(lookup), dtype=str), codes
+
+
+def _segment_codes(starts: list[int], labels: list[str], rows: int) -> tuple[np.ndarray, np.ndarray]:
+    """Per-row codes from the (first row, label) segments recorded while parsing."""
+    uniques, seg_codes = _codes(labels)
+    lengths = np.diff(np.asarray(starts + [rows], dtype=np.int64))
+    return uniques, np.repeat(seg_codes, lengths)
+
+
+def parse_netstate_xml(netstate: Path) -> NetstateTable:
+    # The handler only keeps vehicle attributes and the row offsets where a timestep,
+    # edge or lane begins; everything else is converted column-wise afterwards.
+    vehicles: list[dict[str, str]] = []
+    step_starts: list[int] = []
+    step_times: list[str] = []
+    edge_starts: list[int] = []
+    edge_ids: list[str] = []
+    lane_starts: list[int] = []
+    lane_ids: list[str] = []
+    add_vehicle = vehicles.append
+
+    def start(tag: str, attrs: dict[str, str]) -> None:
+        if tag == "vehicle":
+            add_vehicle(attrs)
+        elif tag == "lane":
+            lane_starts.append(len(vehicles))
+            lane_ids.append(attrs.get("id", ""))
+        elif tag == "edge":
+            edge_starts.append(len(vehicles))
+            edge_ids.append(attrs.get("id", ""))
+        elif tag == "timestep":
+            step_starts.append(len(vehicles))
+            step_times.append(attrs.get("time", "nan"))
+
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    parser.StartElementHandler = start
+    with netstate.open("rb") as fp:
+        parser.ParseFile(fp)
+
+    # SUMO nests every vehicle in timestep/edge/lane, so the segments cover all rows
+    rows = len(vehicles)
+    step_time_s = _float_column(step_times)
+    step = np.repeat(np.arange(len(step_starts), dtype=np.int32), np.diff(np.asarray(step_starts + [rows], dtype=np.int64)))
+    columns: dict[str, np.ndarray] = {
+        "step": step,
+        "time_s": step_time_s[step],
+        "step_time_s": step_time_s,
+    }
+    for c in ("pos", "x", "y", "speed"):
+        columns[c] = _float_column([a.get(c, "nan") for a in vehicles])
+    columns["vehicles"], columns["vehicle"] = _codes([a.get("id", "") for a in vehicles])
+    columns["edges"], columns["edge"] = _segment_codes(edge_starts, edge_ids, rows)
+    columns["lanes"], columns["lane"] = _segment_codes(lane_starts, lane_ids, rows)
+    return NetstateTable(columns)
+
+
+def cache_path(netstate: Path) -> Path:
+    return netstate.with_name(netstate.name + CACHE_SUFFIX)
+
+
+def _source_stamp(netstate: Path) -> np.ndarray:
+    st = netstate.stat()
+    return np.asarray([CACHE_VERSION, st.st_size, st.st_mtime_ns], dtype=np.int64)
+
+
+def load_netstate(netstate: Path, use_cache: bool = True) -> NetstateTable:
+    """Load the columnar store for ``netstate``, parsing the XML only if the cache is stale."""
+    netstate = Path(netstate)
+    cache = cache_path(netstate)
+    stamp = _source_stamp(netstate)
+    if use_cache and cache.exists():
+        try:
+            with np.load(cache, allow_pickle=False) as data:
+                if np.array_equal(data["source_stamp"], stamp):
+                    return NetstateTable({k: data[k] for k in data.files if k != "source_stamp"})
+        except Exception:
+            pass
+
+    table = parse_netstate_xml(netstate)
+    if use_cache:
+        # write-then-rename so concurrent readers never see a partial cache
+        tmp = cache.with_name(cache.name + ".tmp.npz")
+        try:
+            np.savez(tmp, source_stamp=stamp, **table.columns())
+            os.replace(tmp, cache)
+        except OSError:
+            if tmp.exists():
+                tmp.unlink()
+    return table
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Build (or refresh) the columnar cache of SUMO netstate dumps.")
+    p.add_argument("netstate", nargs="+", help="Netstate XML file(s)")
+    args = p.parse_args()
+    for path in args.netstate:
+        table = load_netstate(Path(path))
+        print(f"{cache_path(Path(path))}: {len(table)} rows, {table.timesteps} timesteps, {table.vehicles.size} vehicles")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Shared reader for the per-vehicle *-MSG / *-CTRL / *-CAM logs of a scenario run.
+
+The logs are CSV files (``eva-veh8-MSG.csv``) or, when the run was made with the
+emergencyVehicleAlert ``CSVColumnar`` attribute, typed column files with the same
+columns (``eva-veh8-MSG.cols``, see read_columns_file). Every file of a kind is
+read once, with all of its columns, into one typed frame tagged with
+``source_file`` (file name) and ``file_vehicle`` (e.g. ``veh8`` from
+``eva-veh8-MSG.csv``). The frames of the last MEMO_RUNS run directories are
+memoized per process against the size/mtime of every source file, so the audit,
+comparison and timeline tools do not re-read the CSVs of the run they are on. Tools that want the frames to survive between invocations pass a
+``cache_dir`` (normally ``<out-dir>/.run_artifacts_cache``) where they are pickled;
+run directories themselves are never written to.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import pickle
+import struct
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+KINDS = ("MSG", "CTRL", "CAM")
+LOG_SUFFIXES = (".csv", ".cols")
+CACHE_DIR = ".run_artifacts_cache"
+CACHE_VERSION = 2
+# run directories whose frames stay in memory; batch tools visit many runs, so older ones are dropped
+MEMO_RUNS = 2
+
+# Columns kept as text; everything else known is numeric
+STRING_COLUMNS = {
+    "MSG": ("vehicle_id", "msg_type", "pkt_uid"),
+    "CTRL": ("vehicle_id", "event_type", "pkt_uid"),
+    "CAM": (),
+}
+NUMERIC_COLUMNS = {
+    "MSG": ("msg_seq", "tx_t_s", "rx_t_s", "rx_ok", "tx_id", "rx_id", "cam_gdt_ms"),
+    "CTRL": (
+        "time_s",
+        "source_id",
+        "msg_seq",
+        "distance_m",
+        "heading_diff_deg",
+        "lane_before",
+        "lane_after",
+        "target_speed_mps",
+    ),
+    "CAM": ("messageId", "camId", "timestamp", "latitude", "longitude", "heading", "speed", "acceleration"),
+}
+TAG_COLUMNS = ("source_file", "file_vehicle")
+
+# Typed column files written by CSVLogSink (src/automotive/model/utilities/csv-log-sink.h)
+COLUMNS_MAGIC = b"CSVCOLS1"
+COLUMN_DTYPES = {"i": np.dtype("<i8"), "u": np.dtype("<u8"), "d": np.dtype("<f8")}
+
+# run directory -> kind -> (stamp, frame), least recently used first
+_memo: OrderedDict[str, dict[str, tuple[list, pd.DataFrame]]] = OrderedDict()
+
+log = logging.getLogger(__name__)
+
+
+def vehicle_from_path(path: Path) -> str:
+    # Example: eva-veh8-MSG.csv -> veh8
+    parts = path.stem.split("-")
+    if len(parts) >= 2:
+        return parts[-2]
+    return "unknown"
+
+
+def log_pair_key(name: str, kind: str) -> str:
+    # eva-veh8-MSG.csv and eva-veh8-CTRL.cols share the key "eva-veh8"
+    return Path(name).stem.removesuffix(f"-{kind}")
+
+
+def run_log_files(run_dir: Path, kind: str) -> list[Path]:
+    artifacts = run_dir / "artifacts"
+    return sorted(p for suffix in LOG_SUFFIXES for p in artifacts.glob(f"*-{kind}{suffix}"))
+
+
+def read_columns_file(path: Path, text_columns: tuple[str, ...] = ()) -> pd.DataFrame:
+    """Read a typed column file into a frame with the dtypes pd.read_csv gives the same log.
+
+    Empty fields become NaN (numeric columns with empty fields are float64); numeric columns listed in ``text_columns`` are returned
+    as strings, like the CSV reader's ``dtype=str``. A block cut short by an
+    aborted run is ignored.
+    """
+    data = Path(path).read_bytes()
+    if data[: len(COLUMNS_MAGIC)] != COLUMNS_MAGIC:
+        raise ValueError(f"{path} is not a typed column file")
+    pos = len(COLUMNS_MAGIC)
+    (ncols,) = struct.unpack_from("<I", data, pos)
+    pos += 4
+    schema = []
+    for _ in range(ncols):
+        ctype = chr(data[pos])
+        (name_len,) = struct.unpack_from("<I", data, pos + 1)
+        pos += 5
+        schema.append((data[pos : pos + name_len].decode(), ctype))
+        pos += name_len
+
+    valid: dict[str, list[np.ndarray]] = {name: [] for name, _ in schema}
+    values: dict[str, list] = {name: [] for name, _ in schema}
+    while pos + 4 <= len(data):
+        (nrows,) = struct.unpack_from("<I", data, pos)
+        block_pos = pos + 4
+        block: list[tuple[np.ndarray, object]] = []
+        for name, ctype in schema:
+            if block_pos + nrows > len(data):
+                break
+            ok = np.frombuffer(data, np.uint8, nrows, block_pos).astype(bool)
+            block_pos += nrows
+            if ctype == "s":
+                if block_pos + 4 * nrows > len(data):
+                    break
+                ends = np.frombuffer(data, "<u4", nrows, block_pos)
+                block_pos += 4 * nrows
+                size = int(ends[-1]) if nrows else 0
+                if block_pos + size > len(data):
+                    break
+                text = data[block_pos : block_pos + size]
+                starts = np.concatenate(([0], ends[:-1]))
+                col = [text[a:b].decode() for a, b in zip(starts.tolist(), ends.tolist())]
+                block_pos += size
+            else:
+                dtype = COLUMN_DTYPES[ctype]
+                if block_pos + dtype.itemsize * nrows > len(data):
+                    break
+                col = np.frombuffer(data, dtype, nrows, block_pos)
+                block_pos += dtype.itemsize * nrows
+            block.append((ok, col))
+        if len(block) < len(schema):
+            log.warning("ignoring the truncated last block of %s", path)
+            break
+        for (name, _), (ok, col) in zip(schema, block):
+            valid[name].append(ok)
+            values[name].append(col)
+        pos = block_pos
+
+    out = {}
+    for name, ctype in schema:
+        ok = np.concatenate(valid[name]) if valid[name] else np.zeros(0, bool)
+        if ctype == "s":
+            col = np.array([v for chunk in values[name] for v in chunk], dtype=object)
+            col[~ok] = np.nan
+        else:
+            col = np.concatenate(values[name]) if values[name] else np.zeros(0, COLUMN_DTYPES[ctype])
+            if name in text_columns:
+                col = col.astype(str).astype(object)
+                col[~ok] = np.nan
+            elif not ok.all():
+                col = np.where(ok, col.astype(np.float64), np.nan)
+        out[name] = col
+    return pd.DataFrame(out, columns=[name for name, _ in schema])
+
+
+def _stamp(files: list[Path]) -> list:
+    out = []
+    for f in files:
+        st = f.stat()
+        out.append([f.name, st.st_size, st.st_mtime_ns])
+    return [CACHE_VERSION] + out
+
+
+def _read_one(path: Path, kind: str) -> pd.DataFrame:
+    try:
+        if path.suffix == ".cols":
+            df = read_columns_file(path, STRING_COLUMNS[kind])
+        else:
+            df = pd.read_csv(path, dtype={c: str for c in STRING_COLUMNS[kind]})
+    except Exception:
+        return pd.DataFrame()
+    for c in NUMERIC_COLUMNS[kind]:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+    df["source_file"] = path.name
+    df["file_vehicle"] = vehicle_from_path(path)
+    return df
+
+
+def _cache_path(cache_dir: Path, run_dir: Path, kind: str) -> Path:
+    # one subdirectory per run, named after the run and a hash of its full path
+    key = hashlib.sha1(str(run_dir).encode()).hexdigest()[:12]
+    return Path(cache_dir) / f"{run_dir.name}-{key}" / f"{kind}.pkl"
+
+
+def _read_cache(path: Path, stamp: list) -> pd.DataFrame | None:
+    try:
+        with path.open("rb") as fp:
+            cached_stamp, df = pickle.load(fp)
+    except FileNotFoundError:
+        return None
+    except Exception as exc:
+        log.warning("ignoring unreadable run log cache %s: %s", path, exc)
+        return None
+    return df if cached_stamp == stamp else None
+
+
+def _write_cache(path: Path, stamp: list, df: pd.DataFrame) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tmp.open("wb") as fp:
+            pickle.dump((stamp, df.reset_index(drop=True)), fp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except Exception as exc:
+        # the in-process memo still applies
+        log.warning("could not write run log cache %s: %s", path, exc)
+        tmp.unlink(missing_ok=True)
+
+
+def load_run_logs(run_dir: Path, kind: str, cache_dir: Path | None = None) -> pd.DataFrame:
+    """All ``*-<kind>.csv`` / ``*-<kind>.cols`` rows of ``run_dir/artifacts`` in one frame (empty if there are none).
+
+    Rows keep file order (files sorted by name). Columns absent from the logs are
+    absent from the frame; unreadable files are skipped. With ``cache_dir`` the
+    frame is also cached on disk there. Each call returns its own copy of the
+    memoized frame, so callers may modify it.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown run log kind: {kind}")
+    run_dir = Path(run_dir).resolve()
+    files = run_log_files(run_dir, kind)
+    stamp = _stamp(files)
+    run_memo = _memo.setdefault(str(run_dir), {})
+    _memo.move_to_end(str(run_dir))
+    while len(_memo) > MEMO_RUNS:
+        _memo.popitem(last=False)
+    memo = run_memo.get(kind)
+    if memo is not None and memo[0] == stamp:
+        return memo[1].copy()
+
+    cache = _cache_path(cache_dir, run_dir, kind) if cache_dir is not None and files else None
+    df = _read_cache(cache, stamp) if cache is not None else None
+    if df is None:
+        frames = [f for f in (_read_one(p, kind) for p in files) if not f.empty]
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        if cache is not None:
+            _write_cache(cache, stamp, df)
+    run_memo[kind] = (stamp, df)
+    return df.copy()
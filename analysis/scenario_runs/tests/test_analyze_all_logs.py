@@ -0,0 +1,42 @@
+import os
+
+from analyze_all_logs import _collect_run_dirs, _run_fingerprint
+
+
+def bump_mtime(path):
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_nested_run_changes_do_not_invalidate_the_parent(tmp_path):
+    parent = tmp_path / "sweep"
+    child = parent / "rep1"
+    (child / "artifacts").mkdir(parents=True)
+    (parent / "run.log").write_text("Average PRR: 0.9\n")
+    child_log = child / "run.log"
+    child_log.write_text("Average PRR: 0.8\n")
+    (child / "artifacts" / "eva-veh1-MSG.csv").write_text("msg_seq\n1\n")
+    assert _collect_run_dirs(tmp_path) == [parent, child]
+
+    parent_fp, child_fp = _run_fingerprint(parent), _run_fingerprint(child)
+    child_log.write_text("Average PRR: 0.7\n")
+    bump_mtime(child_log)
+    assert _run_fingerprint(child) != child_fp
+    assert _run_fingerprint(parent) == parent_fp
+
+    # the parent row counts CSVs recursively, so a new child CSV still changes it
+    (child / "artifacts" / "eva-veh2-MSG.csv").write_text("msg_seq\n1\n")
+    assert _run_fingerprint(parent) != parent_fp
+
+
+def test_own_files_change_the_fingerprint(tmp_path):
+    run_dir = tmp_path / "run"
+    (run_dir / "plots").mkdir(parents=True)
+    log = run_dir / "run.log"
+    log.write_text("Average PRR: 0.9\n")
+    fp = _run_fingerprint(run_dir)
+    bump_mtime(log)
+    assert _run_fingerprint(run_dir) != fp
+    fp = _run_fingerprint(run_dir)
+    (run_dir / "plots" / "prr.png").write_bytes(b"png")
+    assert _run_fingerprint(run_dir) != fp
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+from build_drop_decision_timeline import TIMELINE_COLUMNS, drop_decision_counts, match_drop_decisions
+
+
+def msg_frame(rows):
+    df = pd.DataFrame(rows, columns=["veh", "msg_type", "pkt_uid", "rx_t_s", "msg_seq", "tx_id", "rx_id"])
+    df["source_file"] = "eva-" + df["veh"] + "-MSG.csv"
+    df["file_vehicle"] = df.pop("veh")
+    return df
+
+
+def ctrl_frame(rows):
+    df = pd.DataFrame(rows, columns=["veh", "time_s", "event_type", "pkt_uid", "lane_before", "lane_after", "target_speed_mps"])
+    df["source_file"] = "eva-" + df["veh"] + "-CTRL.csv"
+    df["file_vehicle"] = df.pop("veh")
+    return df
+
+
+def test_drops_match_first_decision_of_the_same_vehicle():
+    msg = msg_frame([
+        ("veh1", "CAM_DROP_PHY", "u1", 1.0, 10, 2, 1),
+        ("veh1", "CAM_RX_OK", "u2", 1.1, 11, 2, 1),
+        ("veh3", "CPM_DROP_PHY", "u1", 2.0, 12, 2, 3),
+        ("veh3", "CAM_DROP_PHY", "u9", 2.5, 13, 2, 3),
+        ("veh3", "CAM_DROP_PHY", "u8", np.nan, 14, 2, 3),
+    ])
+    ctrl = ctrl_frame([
+        ("veh1", 1.4, "speed_adapt", "u1", 1, 1, 10.0),
+        ("veh1", 1.2, "lane_change", "u1", 0, 1, 12.0),
+        ("veh3", 2.3, "speed_adapt", "u1", 1, 1, 8.0),
+        ("veh3", 2.3, "cpm_drop_reaction", "u1", 1, 0, 7.0),
+        ("veh3", 3.0, "speed_adapt", "u8", 1, 1, 8.0),
+    ])
+    timeline = match_drop_decisions(msg, ctrl)
+
+    assert list(timeline.columns) == TIMELINE_COLUMNS
+    assert timeline["vehicle_id"].tolist() == ["veh1", "veh3", "veh3"]
+    # veh1 takes its own earliest decision, not veh3's
+    first = timeline.iloc[0]
+    assert first["decision_event_type"] == "lane_change"
+    assert first["decision_delay_s"] == np.float64(1.2) - 1.0
+    assert bool(first["lane_change"])
+    # a reaction wins a tie with another event at the same time
+    second = timeline.iloc[1]
+    assert second["decision_event_type"] == "cpm_drop_reaction"
+    assert second["target_speed_mps"] == 7.0
+    assert bool(second["lane_change"])
+    # no decision for u9
+    assert timeline.iloc[2]["decision_event_type"] == "missing_decision"
+    assert np.isnan(timeline.iloc[2]["decision_delay_s"])
+
+    # the drop without a time is counted (and matched) but not on the timeline
+    assert drop_decision_counts(msg, ctrl) == {
+        "drop_events": 4,
+        "cam_drop_events": 3,
+        "cpm_drop_events": 1,
+        "ctrl_events": 5,
+        "matched_decision_events": 3,
+    }
+
+
+def test_counts_need_only_msg_type_and_pkt_uid():
+    msg = msg_frame([
+        ("veh1", "CAM_DROP_PHY", "u1", 1.0, 10, 2, 1),
+        ("veh1", "CPM_DROP_PHY", "u2", 1.5, 11, 2, 1),
+        ("veh2", "CAM_DROP_PHY", "u1", 2.0, 12, 2, 2),
+    ])[["msg_type", "pkt_uid", "source_file", "file_vehicle"]]
+    # a CTRL row without a time still marks its pkt_uid as decided
+    ctrl = ctrl_frame([("veh1", np.nan, "speed_adapt", "u1", 1, 1, 8.0), ("veh1", 3.0, "speed_adapt", "u2", 1, 1, 8.0)])
+    ctrl = ctrl[["pkt_uid", "source_file", "file_vehicle"]]
+    assert drop_decision_counts(msg, ctrl) == {
+        "drop_events": 3,
+        "cam_drop_events": 2,
+        "cpm_drop_events": 1,
+        "ctrl_events": 2,
+        "matched_decision_events": 2,
+    }
+    assert match_drop_decisions(msg, ctrl).empty
+
+
+def test_logs_without_pkt_uid_give_no_matches():
+    msg = msg_frame([("veh1", "CAM_DROP_PHY", "u1", 1.0, 10, 2, 1)]).drop(columns="pkt_uid")
+    ctrl = ctrl_frame([("veh1", 1.2, "lane_change", "u1", 0, 1, 12.0)]).drop(columns="pkt_uid")
+    timeline = match_drop_decisions(msg, ctrl)
+    assert timeline.empty and list(timeline.columns) == TIMELINE_COLUMNS
+    stats = drop_decision_counts(msg, ctrl)
+    assert stats["drop_events"] == 0 and stats["ctrl_events"] == 0
+
+
+def test_no_ctrl_logs():
+    msg = msg_frame([("veh1", "OTHER_DROP_PHY", "u1", 1.0, 10, 2, 1)])
+    timeline = match_drop_decisions(msg, pd.DataFrame())
+    assert timeline["decision_event_type"].tolist() == ["missing_decision"]
+    stats = drop_decision_counts(msg, pd.DataFrame())
+    assert stats["drop_events"] == 1 and stats["matched_decision_events"] == 0
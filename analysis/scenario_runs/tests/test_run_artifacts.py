@@ -0,0 +1,179 @@
+import os
+import struct
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import run_artifacts
+from run_artifacts import load_run_logs
+
+
+@pytest.fixture(autouse=True)
+def clear_memo():
+    run_artifacts._memo.clear()
+    yield
+    run_artifacts._memo.clear()
+
+
+def write_log(run_dir, name, rows):
+    artifacts = run_dir / "artifacts"
+    artifacts.mkdir(parents=True, exist_ok=True)
+    path = artifacts / name
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return path
+
+
+def msg_row(seq, rx_ok=1):
+    return {"vehicle_id": "veh1", "msg_seq": seq, "tx_t_s": seq / 10, "rx_t_s": seq / 10 + 0.01, "rx_ok": rx_ok, "msg_type": "CAM", "tx_id": 2, "rx_id": 1, "cam_gdt_ms": seq}
+
+
+def write_columns(path, columns, blocks):
+    """Typed column file as written by CSVLogSink: columns are (name, type), blocks lists of rows (None = empty)."""
+    out = bytearray(b"CSVCOLS1" + struct.pack("<I", len(columns)))
+    for name, ctype in columns:
+        out += ctype.encode() + struct.pack("<I", len(name)) + name.encode()
+    for rows in blocks:
+        out += struct.pack("<I", len(rows))
+        for i, (_, ctype) in enumerate(columns):
+            fields = [row[i] for row in rows]
+            out += bytes(f is not None for f in fields)
+            if ctype == "s":
+                text = [(f or "").encode() for f in fields]
+                out += struct.pack(f"<{len(rows)}I", *np.cumsum([len(t) for t in text]).tolist()) + b"".join(text)
+            else:
+                fmt = {"i": "q", "u": "Q", "d": "d"}[ctype]
+                out += struct.pack(f"<{len(rows)}{fmt}", *[0 if f is None else f for f in fields])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(bytes(out))
+    return path
+
+
+MSG_COLUMNS = [
+    ("vehicle_id", "s"), ("msg_seq", "i"), ("tx_t_s", "d"), ("rx_t_s", "d"), ("rx_ok", "i"),
+    ("msg_type", "s"), ("tx_id", "i"), ("rx_id", "i"), ("cam_gdt_ms", "i"), ("pkt_uid", "i"),
+]
+
+
+def bump_mtime(path):
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_reads_and_tags_every_file(tmp_path):
+    write_log(tmp_path, "eva-veh1-MSG.csv", [msg_row(1), msg_row(2)])
+    write_log(tmp_path, "eva-veh2-MSG.csv", [msg_row(3)])
+    df = load_run_logs(tmp_path, "MSG")
+    assert df["msg_seq"].tolist() == [1, 2, 3]
+    assert df["file_vehicle"].tolist() == ["veh1", "veh1", "veh2"]
+    assert df["source_file"].iloc[-1] == "eva-veh2-MSG.csv"
+    assert load_run_logs(tmp_path, "CTRL").empty
+    with pytest.raises(ValueError):
+        load_run_logs(tmp_path, "DENM")
+
+
+def test_memo_is_invalidated_by_changed_logs(tmp_path):
+    path = write_log(tmp_path, "eva-veh1-MSG.csv", [msg_row(1)])
+    assert len(load_run_logs(tmp_path, "MSG")) == 1
+    write_log(tmp_path, "eva-veh1-MSG.csv", [msg_row(1), msg_row(2)])
+    bump_mtime(path)
+    assert len(load_run_logs(tmp_path, "MSG")) == 2
+    write_log(tmp_path, "eva-veh3-MSG.csv", [msg_row(5)])
+    assert len(load_run_logs(tmp_path, "MSG")) == 3
+
+
+def test_callers_get_independent_copies(tmp_path):
+    write_log(tmp_path, "eva-veh1-MSG.csv", [msg_row(1), msg_row(2)])
+    first = load_run_logs(tmp_path, "MSG")
+    first["msg_seq"] = -1
+    first.drop(index=0, inplace=True)
+    again = load_run_logs(tmp_path, "MSG")
+    assert again["msg_seq"].tolist() == [1, 2]
+
+
+def test_memo_keeps_only_the_last_runs(tmp_path, monkeypatch):
+    runs = [tmp_path / f"run{i}" for i in range(run_artifacts.MEMO_RUNS + 1)]
+    for run_dir in runs:
+        write_log(run_dir, "eva-veh1-MSG.csv", [msg_row(1)])
+        load_run_logs(run_dir, "MSG")
+        load_run_logs(run_dir, "CTRL")
+    assert list(run_artifacts._memo) == [str(r.resolve()) for r in runs[1:]]
+
+    # the most recent runs are still served from memory, the oldest is read again
+    monkeypatch.setattr(run_artifacts, "_read_one", lambda *a: pytest.fail("memo not used"))
+    load_run_logs(runs[-1], "MSG")
+    monkeypatch.undo()
+    monkeypatch.setattr(run_artifacts, "_read_one", lambda *a: pd.DataFrame({"msg_seq": [9]}))
+    assert load_run_logs(runs[0], "MSG")["msg_seq"].tolist() == [9]
+    assert len(run_artifacts._memo) == run_artifacts.MEMO_RUNS
+
+
+def test_disk_cache_is_opt_in_and_outside_the_run(tmp_path):
+    run_dir = tmp_path / "run"
+    cache_dir = tmp_path / "out" / run_artifacts.CACHE_DIR
+    write_log(run_dir, "eva-veh1-MSG.csv", [msg_row(1)])
+    load_run_logs(run_dir, "MSG")
+    assert not cache_dir.exists()
+    run_artifacts._memo.clear()
+    load_run_logs(run_dir, "MSG", cache_dir)
+    assert [p.name for p in cache_dir.rglob("*.pkl")] == ["MSG.pkl"]
+    assert not any(p.name == run_artifacts.CACHE_DIR for p in run_dir.rglob("*"))
+
+
+def test_disk_cache_hit_and_invalidation(tmp_path, monkeypatch):
+    run_dir = tmp_path / "run"
+    cache_dir = tmp_path / "cache"
+    path = write_log(run_dir, "eva-veh1-MSG.csv", [msg_row(1), msg_row(2)])
+    first = load_run_logs(run_dir, "MSG", cache_dir)
+
+    # a new process: no memo, the frame comes from the cache without parsing the CSVs
+    run_artifacts._memo.clear()
+    monkeypatch.setattr(run_artifacts, "_read_one", lambda *a: pytest.fail("cache not used"))
+    pd.testing.assert_frame_equal(load_run_logs(run_dir, "MSG", cache_dir), first)
+    monkeypatch.undo()
+
+    run_artifacts._memo.clear()
+    write_log(run_dir, "eva-veh1-MSG.csv", [msg_row(1), msg_row(2), msg_row(3)])
+    bump_mtime(path)
+    assert len(load_run_logs(run_dir, "MSG", cache_dir)) == 3
+
+
+def test_unreadable_cache_is_logged_and_rebuilt(tmp_path, caplog):
+    run_dir = tmp_path / "run"
+    cache_dir = tmp_path / "cache"
+    write_log(run_dir, "eva-veh1-MSG.csv", [msg_row(1)])
+    load_run_logs(run_dir, "MSG", cache_dir)
+    (cache_pkl,) = cache_dir.rglob("MSG.pkl")
+    cache_pkl.write_bytes(b"not a pickle")
+    run_artifacts._memo.clear()
+    with caplog.at_level("WARNING", logger="run_artifacts"):
+        assert len(load_run_logs(run_dir, "MSG", cache_dir)) == 1
+    assert "unreadable run log cache" in caplog.text
+
+
+def test_column_files_read_like_the_csv_logs(tmp_path):
+    rows = [
+        ["veh1", 1, 0.1, None, 0, "CAM", 2, None, 1, -1],
+        ["veh1", 2, None, 0.21, 0, "CAM_DROP_PHY", 2, 1, 2, 123456789012],
+        ["veh1", 3, None, 0.31, 1, "CAM", 2, 1, 3, -1],
+    ]
+    csv_run, cols_run = tmp_path / "csv", tmp_path / "cols"
+    write_log(csv_run, "eva-veh1-MSG.csv", [dict(zip([c for c, _ in MSG_COLUMNS], r)) for r in rows])
+    # the flushes split the rows into blocks
+    write_columns(cols_run / "artifacts" / "eva-veh1-MSG.cols", MSG_COLUMNS, [rows[:1], rows[1:]])
+
+    from_csv = load_run_logs(csv_run, "MSG")
+    from_cols = load_run_logs(cols_run, "MSG")
+    assert from_cols["source_file"].tolist() == ["eva-veh1-MSG.cols"] * 3
+    pd.testing.assert_frame_equal(from_cols.drop(columns="source_file"), from_csv.drop(columns="source_file"))
+    assert from_cols["pkt_uid"].tolist() == ["-1", "123456789012", "-1"]
+    assert np.isnan(from_cols["rx_id"].iloc[0])
+
+
+def test_truncated_column_file_keeps_the_complete_blocks(tmp_path, caplog):
+    rows = [["veh1", i, 0.1 * i, None, 0, "CAM", 2, None, i, -1] for i in range(4)]
+    path = write_columns(tmp_path / "artifacts" / "eva-veh1-MSG.cols", MSG_COLUMNS, [rows[:2], rows[2:]])
+    path.write_bytes(path.read_bytes()[:-5])
+    with caplog.at_level("WARNING", logger="run_artifacts"):
+        assert load_run_logs(tmp_path, "MSG")["msg_seq"].tolist() == [0, 1]
+    assert "truncated" in caplog.text
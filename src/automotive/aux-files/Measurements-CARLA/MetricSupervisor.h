@@ -4,6 +4,8 @@
 #include "ns3/OpenCDAClient.h"
 #include <list>
 #include <unordered_map>
+#include <map>
+#include <cfloat>
 #include <string>
 #include "ns3/traci-client.h"
 #include "ns3/event-id.h"
@@ -26,10 +28,16 @@ namespace ns3 {
  */
 class MetricSupervisor : public Object {
 
-  typedef struct baselineVehicleData {
-    std::list<uint64_t> nodeList;
-    int x;
-  } baselineVehicleData_t;
+  typedef struct baselineStation {
+    std::string sumoID;
+    uint64_t stationID;
+    StationType_t stationType;
+    double x; // SUMO (projected) coordinates
+    double y;
+    bool lonlat_valid; // lon/lat are converted lazily, at most once per SUMO step
+    double lon;
+    double lat;
+  } baselineStation_t;
 
 public:
 
@@ -76,6 +84,13 @@ public:
   virtual ~MetricSupervisor();
 
   static std::string bufToString(uint8_t *buf, uint32_t bufsize);
+  /**
+   * @brief Compute the compact key identifying a packet in the MetricSupervisor (a 64-bit hash of its content).
+   * @param buf  The buffer containing the packet.
+   * @param bufsize  The size of the buffer.
+   * @return  The packet key.
+   */
+  static uint64_t bufToKey(uint8_t *buf, uint32_t bufsize);
 
   /**
    * @brief Set the TraCI client pointer.
@@ -97,19 +112,19 @@ public:
 
   /**
    * @brief This function is called everytime a packet is sent in the simulation by the GeoNet object. It is not expected to be called by the user.
-   * @param buf  The buffer containing the packet.
+   * @param key  The packet key, as returned by bufToKey().
    * @param lat   The latitude of the sender.
    * @param lon   The longitude of the sender.
    * @param vehicleID  The ID of the sender.
    * @param messagetype  The ETSI type of the message.
    */
-  void signalSentPacket(std::string buf,double lat,double lon,uint64_t vehicleID, messageType_e messagetype);
+  void signalSentPacket(uint64_t key,double lat,double lon,uint64_t vehicleID, messageType_e messagetype);
   /**
    * @brief This function is called everytime a packet is received in the simulation by the GeoNet object. It is not expected to be called by the user.
-   * @param buf  The buffer containing the packet.
+   * @param key  The packet key, as returned by bufToKey().
    * @param vehicleID  The ID of the receiver.
    */
-  void signalReceivedPacket(std::string buf,uint64_t vehicleID);
+  void signalReceivedPacket(uint64_t key,uint64_t vehicleID);
 
   /**
    * @brief Get the average PRR for all the messages sent and received in the simulation.
@@ -398,6 +413,48 @@ public:
    */
   void modifyPRRComputationTimeout(double prr_comp_timeout_sec) {m_pprcomp_timeout=prr_comp_timeout_sec;}
 
+  /**
+   * @brief Set the width of the TX-RX distance bins used for the PRR vs distance statistics.
+   *
+   * Each road user within the baseline of a sent packet is assigned to the bin of its distance from the sender;
+   * the PRR of each bin is then the number of receptions over the number of road users of that bin.
+   * The default width is 10 m. It should be set before the first packet is sent.
+   *
+   * @param bin_width_m The bin width in meters.
+   */
+  void setPRRDistanceBinWidth(double bin_width_m)
+  {
+    if (bin_width_m <= 0)
+      {
+        NS_FATAL_ERROR("The PRR distance bin width must be greater than 0.");
+      }
+    m_prr_distance_bin_m = bin_width_m;
+  }
+
+  /**
+   * @brief Get a latency percentile for a specific message type, computed on the streaming latency histograms.
+   *
+   * The latency samples are not stored: they are accumulated in fixed-size histograms with logarithmically spaced
+   * buckets (200 per decade, between 1 us and 10^4 s), so the returned value has a relative error of about 1%.
+   *
+   * @param messagetype  The ETSI type of the message.
+   * @param pct  The percentile, in [0,100].
+   * @return  The latency percentile [ms], or NaN if no packet of that type was received.
+   */
+  double getLatencyPercentile_messagetype(messageType_e messagetype, double pct);
+
+  /**
+   * @brief Write the streaming latency and PRR vs distance statistics to CSV files.
+   *
+   * Three files are written:
+   * - <prefix>-metsup-latency.csv: the non-empty buckets of the latency histogram of each message type and sender station type
+   * - <prefix>-metsup-latency-summary.csv: samples, mean, min, max and p50/p90/p95/p99 latency for each message type and sender station type
+   * - <prefix>-metsup-prr-distance.csv: road users within the baseline, receptions and PRR for each message type and distance bin
+   *
+   * @param prefix The prefix (path and base name) of the files.
+   */
+  void writeStreamingMetrics(std::string prefix);
+
 
   void startCheckCBR(int num_nodes=-1);
   /**
@@ -485,7 +542,55 @@ public:
     void setNodeContainer(NodeContainer nc) {m_node_container = nc;}
 
 private:
-  void computePRR(std::string buf);
+  typedef struct packetRecord {
+    std::vector<uint64_t> nodeList; // IDs of the road users within the baseline when the packet was sent (sorted)
+    int x = 0; // how many of them received the packet
+    int64_t tx_time_ns = 0;
+    uint64_t senderID = 0;
+    messageType_e messagetype = messageType_unsupported;
+    StationType_t stationtype = StationType_unknown;
+    std::vector<uint16_t> nodeBins; // distance bin of each entry of nodeList
+    std::vector<uint16_t> rxBins; // distance bin of each reception counted in x
+  } packetRecord_t;
+
+  typedef struct latencyHistogram {
+    std::vector<uint64_t> counts; // one counter per bucket, see latencyBucket()
+    uint64_t n = 0;
+    double total_s = 0.0;
+    double min_s = DBL_MAX;
+    double max_s = 0.0;
+  } latencyHistogram_t;
+
+  typedef struct distanceBin {
+    uint64_t expected = 0; // road users within the baseline, in this distance bin
+    uint64_t received = 0; // receptions by these road users
+  } distanceBin_t;
+
+  /**
+   * @brief Get the bucket of a latency sample (in seconds) in the streaming latency histograms.
+   */
+  static size_t latencyBucket(double latency_s);
+  /**
+   * @brief Get the lower edge (in seconds) of a bucket of the streaming latency histograms.
+   */
+  static double latencyBucketLow(size_t bucket);
+  /**
+   * @brief Get an (interpolated) percentile, in seconds, of a streaming latency histogram.
+   */
+  static double latencyQuantile(const latencyHistogram_t &hist, double pct);
+  static std::string messageTypeName(messageType_e messagetype);
+  static std::string stationTypeName(StationType_t stationtype);
+
+  void computePRR(uint64_t key);
+
+  /**
+   * @brief Rebuild the grid of stations used for the baseline query, if SUMO moved to a new step since the last build.
+   */
+  void updateBaselineIndex();
+  /**
+   * @brief Get the indices (in m_bsln_stations) of all the stations within "radius" meters of (x,y), in SUMO coordinates.
+   */
+  void getBaselineCandidates(double x, double y, double radius, std::vector<size_t> &candidates);
 
   /**
    * @breif This function computes the CBR for each node..
@@ -496,11 +601,17 @@ private:
    */
   void logLastCBRs();
 
-  std::unordered_map<std::string,baselineVehicleData_t> m_packetbuff_map; //! key: packet, value: list of vehicle IDs
-  std::unordered_map<std::string,int64_t> m_latency_map; //! key: packet, value: latency
-  std::unordered_map<std::string,uint64_t> m_id_map; //! key: packet, value: ID
-  std::unordered_map<std::string,messageType_e> m_messagetype_map; //! key: packet, value: message type
-  std::unordered_map<std::string,StationType_t> m_stationtype_map; //! key: packet, value: station type
+  std::unordered_map<uint64_t,packetRecord_t> m_packet_map; //! key: packet key, value: packet record (freed when the PRR is computed)
+
+  std::vector<baselineStation_t> m_bsln_stations; //! all the SUMO stations of the current step, in node map order
+  std::unordered_map<int64_t,std::vector<size_t>> m_bsln_grid; //! key: grid cell, value: indices of the stations in m_bsln_stations
+  std::unordered_map<uint64_t,StationType_t> m_bsln_station_types; //! key: station ID, value: station type
+  std::unordered_map<std::string,libsumo::TraCIPosition> m_rsu_xy_cache; //! key: RSU ID, value: position of its POI (RSUs do not move)
+  double m_bsln_cell_m = 0.0;
+  uint64_t m_bsln_snapshot_id = 0;
+  size_t m_bsln_nodemap_size = 0;
+  std::unordered_map<int,std::pair<double,double>> m_carla_latlon_cache; //! key: CARLA actor ID, value: (lat,lon) at m_carla_cache_time
+  Time m_carla_cache_time = Time(-1.0);
 
   int m_count = 0;
   uint64_t m_count_latency = 0;
@@ -544,6 +655,10 @@ private:
   std::unordered_map<messageType_e,double> m_avg_nvehbsln_per_messagetype;  //! key: message type, value: average number of road users within the baseline used for the PRR computation for that message type
 
   std::unordered_map<uint64_t, std::vector<double>> m_sinr_per_veh; //! key: vehicle ID, value: SINR
+
+  std::map<std::pair<messageType_e,StationType_t>,latencyHistogram_t> m_latency_hist; //! key: (message type, sender station type), value: latency histogram
+  std::map<messageType_e,std::vector<distanceBin_t>> m_prr_distance; //! key: message type, value: PRR counters for each distance bin
+  double m_prr_distance_bin_m = 10.0;
   
   Ptr<TraciClient> m_traci_ptr = nullptr;
   Ptr<OpenCDAClient> m_carla_ptr = nullptr;
@@ -0,0 +1,181 @@
+/* -*-  Mode: C++; c-file-style: "gnu"; indent-tabs-mode:nil; -*- */
+/*
+ * This program is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License version 2 as
+ * published by the Free Software Foundation;
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program; if not, write to the Free Software
+ * Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+ *
+ * This example measures the cost of the LDM queries used by the facilities (rangeSelect(), getAllPOs() and getAllCVs())
+ * for databases of 1000 to 10000 entries. The entries are spread uniformly over a square area (--area-m) and
+ * rangeSelect() is called around random points with the given radius (--range-m). The grid-indexed rangeSelect() is
+ * compared against a full scan of the database (the previous implementation), and the two are checked to
+ * return the same set of station IDs for every query (outside of the timed loops).
+ * No mobility or network simulator is needed: the LDM is filled and queried directly.
+ */
+
+#include "ns3/core-module.h"
+#include "ns3/LDM.h"
+#include "ns3/asn_utils.h"
+#include <algorithm>
+#include <chrono>
+#include <random>
+#include <sstream>
+
+using namespace ns3;
+
+NS_LOG_COMPONENT_DEFINE ("ldm-rangeselect-benchmark");
+
+namespace {
+  // Context for the full scan performed through executeOnAllContents()
+  typedef struct {
+    double lat;
+    double lon;
+    double range_m;
+    uint64_t selected;
+    std::vector<uint64_t> *stationIDs; // Filled only when not NULL (check pass)
+  } fullScanArgs_t;
+
+  void fullScan (vehicleData_t data, void *args)
+  {
+    fullScanArgs_t *scan = static_cast<fullScanArgs_t *> (args);
+    if (haversineDist (scan->lat, scan->lon, data.lat, data.lon) <= scan->range_m)
+      {
+        scan->selected++;
+        if (scan->stationIDs != NULL)
+          {
+            scan->stationIDs->push_back (data.stationID);
+          }
+      }
+  }
+
+  double elapsedUs (std::chrono::steady_clock::time_point start)
+  {
+    return std::chrono::duration<double, std::micro> (std::chrono::steady_clock::now () - start).count ();
+  }
+}
+
+int
+main (int argc, char *argv[])
+{
+  double range_m = 200.0;
+  double area_m = 5000.0;
+  double po_fraction = 0.5;
+  int queries = 1000;
+  std::string sizes = "1000,2000,5000,10000";
+
+  CommandLine cmd;
+  cmd.AddValue ("range-m", "Radius of the rangeSelect() queries [m]", range_m);
+  cmd.AddValue ("area-m", "Side of the square area over which the entries are spread [m]", area_m);
+  cmd.AddValue ("po-fraction", "Fraction of the entries stored as Perceived Objects", po_fraction);
+  cmd.AddValue ("queries", "Number of rangeSelect() queries for each database size", queries);
+  cmd.AddValue ("sizes", "Comma-separated list of database sizes", sizes);
+  cmd.Parse (argc, argv);
+
+  const double lat0 = 45.0625;
+  const double lon0 = 7.6625;
+  const double deg_per_m_lat = 1.0 / 111195.0;
+  const double deg_per_m_lon = deg_per_m_lat / std::cos (lat0 * M_PI / 180.0);
+
+  std::mt19937_64 rng (1);
+  std::uniform_real_distribution<double> pos (0.0, area_m);
+  std::uniform_real_distribution<double> unif (0.0, 1.0);
+
+  std::cout << "entries,range_m,grid_us_per_query,fullscan_us_per_query,speedup,avg_selected,getAllPOs_us,getAllCVs_us" << std::endl;
+
+  std::stringstream sizes_ss (sizes);
+  std::string size_str;
+  while (std::getline (sizes_ss, size_str, ','))
+    {
+      int entries = std::stoi (size_str);
+      Ptr<LDM> ldm = CreateObject<LDM> ();
+      ldm->setStationID (1);
+
+      for (int i = 0; i < entries; i++)
+        {
+          vehicleData_t data = {};
+          data.stationID = 1000 + i;
+          data.detected = unif (rng) < po_fraction;
+          data.lat = lat0 + pos (rng) * deg_per_m_lat;
+          data.lon = lon0 + pos (rng) * deg_per_m_lon;
+          data.timestamp_us = Simulator::Now ().GetMicroSeconds ();
+          ldm->insert (data);
+        }
+
+      std::vector<std::pair<double, double>> centers;
+      for (int q = 0; q < queries; q++)
+        {
+          centers.emplace_back (lat0 + pos (rng) * deg_per_m_lat, lon0 + pos (rng) * deg_per_m_lon);
+        }
+
+      uint64_t grid_selected = 0;
+      auto start = std::chrono::steady_clock::now ();
+      for (const auto &center : centers)
+        {
+          std::vector<LDM::returnedVehicleData_t> selected;
+          ldm->rangeSelect (range_m, center.first, center.second, selected);
+          grid_selected += selected.size ();
+        }
+      double grid_us = elapsedUs (start);
+
+      uint64_t scan_selected = 0;
+      start = std::chrono::steady_clock::now ();
+      for (const auto &center : centers)
+        {
+          fullScanArgs_t args = {center.first, center.second, range_m, 0, NULL};
+          ldm->executeOnAllContents (&fullScan, &args);
+          scan_selected += args.selected;
+        }
+      double scan_us = elapsedUs (start);
+
+      if (grid_selected != scan_selected)
+        {
+          NS_FATAL_ERROR ("rangeSelect() returned " << grid_selected << " entries, the full scan " << scan_selected);
+        }
+      // Both queries must select exactly the same stations, not only the same number of them
+      for (size_t q = 0; q < centers.size (); q++)
+        {
+          std::vector<LDM::returnedVehicleData_t> selected;
+          ldm->rangeSelect (range_m, centers[q].first, centers[q].second, selected);
+          std::vector<uint64_t> grid_ids, scan_ids;
+          for (const auto &entry : selected)
+            {
+              grid_ids.push_back (entry.vehData.stationID);
+            }
+          fullScanArgs_t args = {centers[q].first, centers[q].second, range_m, 0, &scan_ids};
+          ldm->executeOnAllContents (&fullScan, &args);
+          std::sort (grid_ids.begin (), grid_ids.end ());
+          std::sort (scan_ids.begin (), scan_ids.end ());
+          if (grid_ids != scan_ids)
+            {
+              NS_FATAL_ERROR ("Query " << q << ": rangeSelect() returned " << grid_ids.size ()
+                              << " entries, the full scan " << scan_ids.size () << ", and the station IDs differ");
+            }
+        }
+
+      std::vector<LDM::returnedVehicleData_t> POs, CVs;
+      start = std::chrono::steady_clock::now ();
+      ldm->getAllPOs (POs);
+      double pos_us = elapsedUs (start);
+      start = std::chrono::steady_clock::now ();
+      ldm->getAllCVs (CVs);
+      double cvs_us = elapsedUs (start);
+
+      std::cout << entries << "," << range_m << "," << grid_us / queries << "," << scan_us / queries << ","
+                << scan_us / std::max (grid_us, 1e-9) << "," << (double) grid_selected / queries << ","
+                << pos_us << "," << cvs_us << std::endl;
+
+      ldm->clear ();
+    }
+
+  Simulator::Destroy ();
+
+  return 0;
+}
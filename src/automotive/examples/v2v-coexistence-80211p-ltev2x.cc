@@ -407,6 +407,7 @@ int main (int argc, char *argv[])
   bool verb = false;
 
   bool interference = false;
+  double interference_range = 0.0;
   bool dsrc_interference = false;
   bool lte_interference = false;
 
@@ -434,6 +435,7 @@ int main (int argc, char *argv[])
   cmd.AddValue ("sionna-server-ip", "SIONNA server IP address", server_ip);
   cmd.AddValue ("sionna-local-machine", "SIONNA will be executed on local machine", local_machine);
   cmd.AddValue ("sionna-verbose", "SIONNA server IP address", verb);
+  cmd.AddValue ("interference-range", "Distance beyond which no cross-technology interference is added [m] (0: no limit)", interference_range);
   cmd.Parse (argc, argv);
 
   std::cout << "Start running v2v-simple-cam-exchange-80211p-nrv2x simulation" << std::endl;
@@ -794,6 +796,7 @@ int main (int argc, char *argv[])
     auto& tracker = TxTracker::GetInstance();
     tracker.SetCentralFrequencies(centralFrequencyBandSl, centralFrequencyBandSl, centralFrequencyBandSl);
     tracker.SetBandwidths(bandwidth_11p * 1e6, slBandwidth * 1e6, 0.0);
+    tracker.SetInterferenceRange(interference_range);
     txTrackerSetup(wifiVehicles, wifiNodes, lteVehicles, ueLteDevs, dsrc_interference, lte_interference);
   }
 
@@ -324,6 +324,11 @@ main (int argc, char *argv[])
       }
       std::cout << "Average PRR: " << metSup->getAveragePRR_overall () << std::endl;
       std::cout << "Average latency (ms): " << metSup->getAverageLatency_overall () << std::endl;
+      std::cout << "Latency p95 CAM (ms): " << metSup->getLatencyPercentile_messagetype (MetricSupervisor::messageType_cam, 95) << std::endl;
+      if(csv_name!="")
+        {
+          metSup->writeStreamingMetrics (csv_name);
+        }
 
       for(int i=1;i<numberOfNodes+1;i++) {
           std::cout << "Average latency of vehicle " << i << " (ms): " << metSup->getAverageLatency_vehicle (i) << std::endl;
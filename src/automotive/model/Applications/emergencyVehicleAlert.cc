@@ -89,6 +89,11 @@ namespace ns3
             StringValue (),
             MakeStringAccessor (&emergencyVehicleAlert::m_csv_name),
             MakeStringChecker ())
+        .AddAttribute ("CSVColumnar",
+            "To write the CSV logs as typed column files (.cols, same columns) instead of text",
+            BooleanValue(false),
+            MakeBooleanAccessor (&emergencyVehicleAlert::m_csv_columnar),
+            MakeBooleanChecker ())
         .AddAttribute ("Model",
             "Physical and MAC layer communication model",
             StringValue (""),
@@ -516,12 +521,14 @@ namespace ns3
 
     if (!m_csv_name.empty ())
     {
-      m_csv_ofstream_cam.open (m_csv_name+"-"+m_id+"-CAM.csv",std::ofstream::trunc);
-      m_csv_ofstream_cam << "messageId,camId,timestamp,latitude,longitude,heading,speed,acceleration" << std::endl;
-      m_csv_ofstream_msg.open (m_csv_name+"-"+m_id+"-MSG.csv",std::ofstream::trunc);
-      m_csv_ofstream_msg << "vehicle_id,msg_seq,tx_t_s,rx_t_s,rx_ok,msg_type,tx_id,rx_id,cam_gdt_ms,pkt_uid" << std::endl;
-      m_csv_ofstream_ctrl.open (m_csv_name+"-"+m_id+"-CTRL.csv",std::ofstream::trunc);
-      m_csv_ofstream_ctrl << "time_s,vehicle_id,event_type,source_id,msg_seq,pkt_uid,distance_m,heading_diff_deg,lane_before,lane_after,target_speed_mps" << std::endl;
+      // Column types of the typed column files: 'i' int64, 'u' uint64, 'd' double, 's' text
+      std::string ext = m_csv_columnar ? ".cols" : ".csv";
+      m_csv_log_cam.Open (m_csv_name+"-"+m_id+"-CAM"+ext, "messageId,camId,timestamp,latitude,longitude,heading,speed,acceleration",
+                          m_csv_columnar ? "iiiddddd" : "");
+      m_csv_log_msg.Open (m_csv_name+"-"+m_id+"-MSG"+ext, "vehicle_id,msg_seq,tx_t_s,rx_t_s,rx_ok,msg_type,tx_id,rx_id,cam_gdt_ms,pkt_uid",
+                          m_csv_columnar ? "siddisiiii" : "");
+      m_csv_log_ctrl.Open (m_csv_name+"-"+m_id+"-CTRL"+ext, "time_s,vehicle_id,event_type,source_id,msg_seq,pkt_uid,distance_m,heading_diff_deg,lane_before,lane_after,target_speed_mps",
+                           m_csv_columnar ? "dssiiuddiid" : "");
     }
   }
 
@@ -538,15 +545,9 @@ namespace ns3
 
     if (!m_csv_name.empty ())
     {
-      m_csv_ofstream_cam.close ();
-      if (m_csv_ofstream_msg.is_open ())
-        {
-          m_csv_ofstream_msg.close ();
-        }
-      if (m_csv_ofstream_ctrl.is_open ())
-        {
-          m_csv_ofstream_ctrl.close ();
-        }
+      m_csv_log_cam.Close ();
+      m_csv_log_msg.Close ();
+      m_csv_log_ctrl.Close ();
     }
 
     cam_sent = m_caService.terminateDissemination ();
@@ -584,15 +585,15 @@ namespace ns3
   void
   emergencyVehicleAlert::logCamTx (asn1cpp::Seq<CAM> cam)
   {
-    if (m_csv_name.empty () || !m_csv_ofstream_msg.is_open ())
+    if (m_csv_name.empty () || !m_csv_log_msg.IsOpen ())
       {
         return;
       }
     long cam_gdt_ms = asn1cpp::getField(cam->cam.generationDeltaTime,long);
     long tx_id = asn1cpp::getField(cam->header.stationId,long);
     double now_s = Simulator::Now ().GetSeconds ();
-    m_csv_ofstream_msg << m_id << "," << cam_gdt_ms << "," << now_s
-                       << ",," << 0 << ",CAM," << tx_id << ",," << cam_gdt_ms << "," << -1 << std::endl;
+    m_csv_log_msg.Row () << m_id << "," << cam_gdt_ms << "," << now_s
+                         << ",," << 0 << ",CAM," << tx_id << ",," << cam_gdt_ms << "," << -1;
   }
 
   void
@@ -606,22 +607,21 @@ namespace ns3
                                           int laneAfter,
                                           double speedTarget)
   {
-    if (m_csv_name.empty () || !m_csv_ofstream_ctrl.is_open ())
+    if (m_csv_name.empty () || !m_csv_log_ctrl.IsOpen ())
       {
         return;
       }
-    m_csv_ofstream_ctrl << Simulator::Now ().GetSeconds ()
-                        << "," << m_id
-                        << "," << eventType
-                        << "," << txId
-                        << "," << msgSeq
-                        << "," << packetUid
-                        << "," << distanceMeters
-                        << "," << headingDiffDeg
-                        << "," << laneBefore
-                        << "," << laneAfter
-                        << "," << speedTarget
-                        << std::endl;
+    m_csv_log_ctrl.Row () << Simulator::Now ().GetSeconds ()
+                          << "," << m_id
+                          << "," << eventType
+                          << "," << txId
+                          << "," << msgSeq
+                          << "," << packetUid
+                          << "," << distanceMeters
+                          << "," << headingDiffDeg
+                          << "," << laneBefore
+                          << "," << laneAfter
+                          << "," << speedTarget;
   }
 
   void
@@ -652,13 +652,13 @@ namespace ns3
         dropType = "CPM_DROP_PHY";
       }
 
-    if (!m_csv_name.empty () && m_csv_ofstream_msg.is_open ())
+    if (!m_csv_name.empty () && m_csv_log_msg.IsOpen ())
       {
-        m_csv_ofstream_msg << m_id << "," << dropInfo.msgSeq << ",,"
-                           << Simulator::Now ().GetSeconds ()
-                           << "," << 0 << "," << dropType << ","
-                           << dropInfo.txStationId << "," << rx_id << "," << dropInfo.msgSeq
-                           << "," << dropInfo.packetUid << std::endl;
+        m_csv_log_msg.Row () << m_id << "," << dropInfo.msgSeq << ",,"
+                             << Simulator::Now ().GetSeconds ()
+                             << "," << 0 << "," << dropType << ","
+                             << dropInfo.txStationId << "," << rx_id << "," << dropInfo.msgSeq
+                             << "," << dropInfo.packetUid;
       }
 
     bool applyDropReaction = m_drop_triggered_reaction_enable &&
@@ -866,12 +866,12 @@ namespace ns3
    if (m_rx_drop_prob_cam > 0.0 && m_drop_rv != nullptr && m_drop_rv->GetValue () < m_rx_drop_prob_cam)
      {
        m_cam_dropped_app++;
-       if (!m_csv_name.empty () && m_csv_ofstream_msg.is_open ())
+       if (!m_csv_name.empty () && m_csv_log_msg.IsOpen ())
          {
-           m_csv_ofstream_msg << m_id << "," << cam_gdt_ms << ",,"
-                              << Simulator::Now ().GetSeconds ()
-                              << "," << 0 << ",CAM_DROP_APP,"
-                              << tx_id << "," << rx_id << "," << cam_gdt_ms << "," << -1 << std::endl;
+           m_csv_log_msg.Row () << m_id << "," << cam_gdt_ms << ",,"
+                                << Simulator::Now ().GetSeconds ()
+                                << "," << 0 << ",CAM_DROP_APP,"
+                                << tx_id << "," << rx_id << "," << cam_gdt_ms << "," << -1;
          }
        return;
      }
@@ -896,19 +896,19 @@ namespace ns3
      }
    }
 
-   if (!m_csv_name.empty ())
+   if (!m_csv_name.empty () && m_csv_log_cam.IsOpen ())
      {
        // messageId,camId,timestamp,latitude,longitude,heading,speed,acceleration
-       m_csv_ofstream_cam << cam->header.messageId << "," << cam->header.stationId << ",";
-       m_csv_ofstream_cam << cam->cam.generationDeltaTime << "," << asn1cpp::getField(cam->cam.camParameters.basicContainer.referencePosition.latitude,double)/DOT_ONE_MICRO << ",";
-       m_csv_ofstream_cam << asn1cpp::getField(cam->cam.camParameters.basicContainer.referencePosition.longitude,double)/DOT_ONE_MICRO << "," ;
-       m_csv_ofstream_cam << asn1cpp::getField(cam->cam.camParameters.highFrequencyContainer.choice.basicVehicleContainerHighFrequency.heading.headingValue,double)/DECI << "," << asn1cpp::getField(cam->cam.camParameters.highFrequencyContainer.choice.basicVehicleContainerHighFrequency.speed.speedValue,double)/CENTI << ",";
-       m_csv_ofstream_cam << asn1cpp::getField(cam->cam.camParameters.highFrequencyContainer.choice.basicVehicleContainerHighFrequency.longitudinalAcceleration.value,double)/DECI << std::endl;
+       m_csv_log_cam.Row () << cam->header.messageId << "," << cam->header.stationId << ","
+                            << cam->cam.generationDeltaTime << "," << asn1cpp::getField(cam->cam.camParameters.basicContainer.referencePosition.latitude,double)/DOT_ONE_MICRO << ","
+                            << asn1cpp::getField(cam->cam.camParameters.basicContainer.referencePosition.longitude,double)/DOT_ONE_MICRO << ","
+                            << asn1cpp::getField(cam->cam.camParameters.highFrequencyContainer.choice.basicVehicleContainerHighFrequency.heading.headingValue,double)/DECI << "," << asn1cpp::getField(cam->cam.camParameters.highFrequencyContainer.choice.basicVehicleContainerHighFrequency.speed.speedValue,double)/CENTI << ","
+                            << asn1cpp::getField(cam->cam.camParameters.highFrequencyContainer.choice.basicVehicleContainerHighFrequency.longitudinalAcceleration.value,double)/DECI;
      }
-   if (!m_csv_name.empty () && m_csv_ofstream_msg.is_open ())
+   if (!m_csv_name.empty () && m_csv_log_msg.IsOpen ())
      {
-       m_csv_ofstream_msg << m_id << "," << cam_gdt_ms << ",," << Simulator::Now ().GetSeconds ()
-                          << "," << 1 << ",CAM," << tx_id << "," << rx_id << "," << cam_gdt_ms << "," << -1 << std::endl;
+       m_csv_log_msg.Row () << m_id << "," << cam_gdt_ms << ",," << Simulator::Now ().GetSeconds ()
+                            << "," << 1 << ",CAM," << tx_id << "," << rx_id << "," << cam_gdt_ms << "," << -1;
      }
 
   }
@@ -926,12 +926,12 @@ namespace ns3
     if (m_rx_drop_prob_cpm > 0.0 && m_drop_rv != nullptr && m_drop_rv->GetValue () < m_rx_drop_prob_cpm)
       {
         m_cpm_dropped_app++;
-        if (!m_csv_name.empty () && m_csv_ofstream_msg.is_open ())
+        if (!m_csv_name.empty () && m_csv_log_msg.IsOpen ())
           {
-            m_csv_ofstream_msg << m_id << "," << msg_seq << ",,"
-                               << Simulator::Now ().GetSeconds ()
-                               << "," << 0 << ",CPM_DROP_APP,"
-                               << tx_id << "," << rx_id << "," << msg_seq << "," << -1 << std::endl;
+            m_csv_log_msg.Row () << m_id << "," << msg_seq << ",,"
+                                 << Simulator::Now ().GetSeconds ()
+                                 << "," << 0 << ",CPM_DROP_APP,"
+                                 << tx_id << "," << rx_id << "," << msg_seq << "," << -1;
           }
         return;
       }
@@ -1106,12 +1106,12 @@ namespace ns3
     if (m_rx_drop_prob_cpm > 0.0 && m_drop_rv != nullptr && m_drop_rv->GetValue () < m_rx_drop_prob_cpm)
       {
         m_cpm_dropped_app++;
-        if (!m_csv_name.empty () && m_csv_ofstream_msg.is_open ())
+        if (!m_csv_name.empty () && m_csv_log_msg.IsOpen ())
           {
-            m_csv_ofstream_msg << m_id << "," << msg_seq << ",,"
-                               << Simulator::Now ().GetSeconds ()
-                               << "," << 0 << ",CPM_DROP_APP,"
-                               << tx_id << "," << rx_id << "," << msg_seq << "," << -1 << std::endl;
+            m_csv_log_msg.Row () << m_id << "," << msg_seq << ",,"
+                                 << Simulator::Now ().GetSeconds ()
+                                 << "," << 0 << ",CPM_DROP_APP,"
+                                 << tx_id << "," << rx_id << "," << msg_seq << "," << -1;
           }
         return;
       }
@@ -19,6 +19,7 @@
 #include "ns3/sumo-sensor.h"
 #include "ns3/LDM.h"
 #include "ns3/traci-client.h"
+#include "ns3/csv-log-sink.h"
 #include <fstream>
 namespace ns3 {
 
@@ -164,9 +165,10 @@ class emergencyVehicleAlert : public Application
     bool m_already_print; //!< To avoid printing two summaries
     bool m_real_time; //!< To decide wheter to use realtime scheduler
     std::string m_csv_name; //!< CSV log file name
-    std::ofstream m_csv_ofstream_cam; //!< CSV log stream (CAM), created using m_csv_name
-    std::ofstream m_csv_ofstream_msg; //!< CSV log stream (TX/RX events), created using m_csv_name
-    std::ofstream m_csv_ofstream_ctrl; //!< CSV log stream (vehicle control events)
+    bool m_csv_columnar; //!< To write the logs as typed column files instead of CSV
+    CSVLog m_csv_log_cam; //!< CSV log (CAM), created using m_csv_name
+    CSVLog m_csv_log_msg; //!< CSV log (TX/RX events), created using m_csv_name
+    CSVLog m_csv_log_ctrl; //!< CSV log (vehicle control events)
 
     /* Counters */
     int m_cam_received;
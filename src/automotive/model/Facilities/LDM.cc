@@ -26,6 +26,10 @@
 #define VEHICLE_AREA 9
 #define LOG_FREQ 100
 
+// Meters per degree of latitude, with the same mean Earth radius (6371 km) used by haversineDist()
+#define LDM_METERS_PER_DEG (6371000.0*M_PI/180.0)
+#define LDM_GRID_CELL_DEG (LDM_GRID_CELL_M/LDM_METERS_PER_DEG)
+
 namespace ns3 {
 
   // Function to compute the distance between two objects, given their Lon/Lat
@@ -34,6 +38,22 @@ namespace ns3 {
       // 12742000 is the mean Earth radius (6371 km) * 2 * 1000 (to convert from km to m)
       return 12742000.0*asin(sqrt(sin(DEG_2_RAD(lat_b-lat_a)/2)*sin(DEG_2_RAD(lat_b-lat_a)/2)+cos(DEG_2_RAD(lat_a))*cos(DEG_2_RAD(lat_b))*sin(DEG_2_RAD(lon_b-lon_a)/2)*sin(DEG_2_RAD(lon_b-lon_a)/2)));
   }
+  // Grid coordinate of a latitude or longitude value
+  static int64_t LDM_gridCoord(double deg)
+  {
+    // Clamped, so that invalid coordinates (which are never selected anyway) still map to a valid cell
+    double coord = std::floor(deg/LDM_GRID_CELL_DEG);
+    if(!(coord > INT32_MIN)) coord = INT32_MIN;
+    if(coord > INT32_MAX) coord = INT32_MAX;
+    return static_cast<int64_t>(coord);
+  }
+
+  // Key of the grid cell (cy,cx)
+  static int64_t LDM_gridCell(int64_t cy, int64_t cx)
+  {
+    return static_cast<int64_t>((static_cast<uint64_t>(cy) << 32) ^ (static_cast<uint64_t>(cx) & 0xFFFFFFFFULL));
+  }
+
   const point_type frontLeftPoint(0.0, 0.5);
   const point_type frontRightPoint(0.0, -0.5);
   const point_type backRightPoint(-1.0, -0.5);
@@ -105,6 +125,12 @@ namespace ns3 {
         it->second.phData.insert (newVehicleData,m_stationID);
         retval = LDM_UPDATED;
     }
+    indexInsert(newVehicleData);
+    if(newVehicleData.timestamp_us > (uint64_t) Simulator::Now().GetMicroSeconds ()) {
+        m_expiry_future.push_back(newVehicleData.stationID);
+    } else {
+        m_expiry_queue.emplace(newVehicleData.timestamp_us,newVehicleData.stationID);
+    }
     return retval;
   }
 
@@ -118,12 +144,71 @@ namespace ns3 {
         return LDM_ITEM_NOT_FOUND;
       }
     else{
+        indexRemove(stationID);
         m_LDM.erase (it);
         m_card--;
       }
     return LDM_OK;
   }
 
+  void
+  LDM::indexInsert(const vehicleData_t &data)
+  {
+    int64_t cell = LDM_gridCell(LDM_gridCoord(data.lat),LDM_gridCoord(data.lon));
+    auto indexed = m_grid_cell.find(data.stationID);
+
+    if(indexed == m_grid_cell.end()) {
+        m_grid[cell].push_back(data.stationID);
+        m_grid_cell.emplace(data.stationID,cell);
+    } else if(indexed->second != cell) {
+        std::vector<uint64_t> &old_cell = m_grid[indexed->second];
+        auto pos = std::find(old_cell.begin(),old_cell.end(),data.stationID);
+        if(pos != old_cell.end()) {
+            *pos = old_cell.back();
+            old_cell.pop_back();
+        }
+        if(old_cell.empty()) {
+            m_grid.erase(indexed->second);
+        }
+        m_grid[cell].push_back(data.stationID);
+        indexed->second = cell;
+    }
+
+    // An entry may change from CV to PO (or vice versa) when it is updated
+    if(data.detected) {
+        m_CV_IDs.erase(data.stationID);
+        m_PO_IDs.insert(data.stationID);
+    } else {
+        m_PO_IDs.erase(data.stationID);
+        m_CV_IDs.insert(data.stationID);
+    }
+  }
+
+  void
+  LDM::indexRemove(uint64_t stationID)
+  {
+    auto indexed = m_grid_cell.find(stationID);
+
+    if(indexed != m_grid_cell.end()) {
+        auto cell_it = m_grid.find(indexed->second);
+        if(cell_it != m_grid.end()) {
+            std::vector<uint64_t> &cell = cell_it->second;
+            auto pos = std::find(cell.begin(),cell.end(),stationID);
+            if(pos != cell.end()) {
+                *pos = cell.back();
+                cell.pop_back();
+            }
+            if(cell.empty()) {
+                m_grid.erase(cell_it);
+            }
+        }
+        m_grid_cell.erase(indexed);
+    }
+
+    m_PO_IDs.erase(stationID);
+    m_CV_IDs.erase(stationID);
+  }
+
   LDM::LDM_error_t
   LDM::lookup(uint64_t stationID,returnedVehicleData_t &retVehicleData)
   {
@@ -157,10 +242,44 @@ namespace ns3 {
   LDM::LDM_error_t
   LDM::rangeSelect(double range_m, double lat, double lon, std::vector<returnedVehicleData_t> &selectedVehicles)
   {
-    for (auto it = m_LDM.begin(); it != m_LDM.end(); ++it) {
+    // Bounding box of the search area: no point within range_m (haversine) can be farther than dlat degrees in latitude,
+    // nor, at latitudes up to max_lat, farther than dlon degrees in longitude
+    double dlat = range_m/LDM_METERS_PER_DEG;
+    double max_lat = std::fabs(lat)+dlat;
+    double sin_dlon = max_lat < 90.0 ? std::sin(range_m/12742000.0)/std::cos(DEG_2_RAD(max_lat)) : 2.0;
+    double dlon = sin_dlon < 1.0 ? 2.0*std::asin(sin_dlon)*180.0/M_PI : 360.0;
+    // Small margin against the rounding errors of the bounds
+    dlat += 1e-9;
+    dlon += 1e-9;
+
+    double ncells = (std::floor((lat+dlat)/LDM_GRID_CELL_DEG)-std::floor((lat-dlat)/LDM_GRID_CELL_DEG)+1)*
+                    (std::floor((lon+dlon)/LDM_GRID_CELL_DEG)-std::floor((lon-dlon)/LDM_GRID_CELL_DEG)+1);
+
+    // Fall back to a full scan when the grid would not help (or the area crosses the antimeridian)
+    if(!std::isfinite(ncells) || ncells > (double) m_LDM.size() || lon-dlon < -180.0 || lon+dlon > 180.0) {
+        for (auto it = m_LDM.begin(); it != m_LDM.end(); ++it) {
+
+            if(haversineDist(lat,lon,it->second.vehData.lat,it->second.vehData.lon)<=range_m) {
+                    selectedVehicles.push_back(it->second);
+            }
+        }
+
+        return LDM_OK;
+    }
 
-        if(haversineDist(lat,lon,it->second.vehData.lat,it->second.vehData.lon)<=range_m) {
-                selectedVehicles.push_back(it->second);
+    for(int64_t cy = LDM_gridCoord(lat-dlat); cy <= LDM_gridCoord(lat+dlat); cy++) {
+        for(int64_t cx = LDM_gridCoord(lon-dlon); cx <= LDM_gridCoord(lon+dlon); cx++) {
+            auto cell_it = m_grid.find(LDM_gridCell(cy,cx));
+            if(cell_it == m_grid.end()) {
+                continue;
+            }
+
+            for(uint64_t stationID : cell_it->second) {
+                const returnedVehicleData_t &entry = m_LDM.at(stationID);
+                if(haversineDist(lat,lon,entry.vehData.lat,entry.vehData.lon)<=range_m) {
+                        selectedVehicles.push_back(entry);
+                }
+            }
         }
     }
 
@@ -172,12 +291,9 @@ namespace ns3 {
   {
     bool retval = false;
 
-    for (auto it = m_LDM.begin(); it != m_LDM.end(); ++it) {
-
-	if(it->second.vehData.detected) {
-		selectedVehicles.push_back(it->second);
-		retval = true;
-	}
+    for (uint64_t stationID : m_PO_IDs) {
+	selectedVehicles.push_back(m_LDM.at(stationID));
+	retval = true;
     }
 
     return retval;
@@ -202,12 +318,9 @@ namespace ns3 {
   {
     bool retval = false;
 
-    for (auto it = m_LDM.begin(); it != m_LDM.end(); ++it) {
-
-	if(!it->second.vehData.detected) {
-		selectedVehicles.push_back(it->second);
-		retval = true;
-	}
+    for (uint64_t stationID : m_CV_IDs) {
+	selectedVehicles.push_back(m_LDM.at(stationID));
+	retval = true;
     }
 
     return retval;
@@ -227,46 +340,89 @@ namespace ns3 {
     return rangeSelect(range_m,retData.vehData.lat,retData.vehData.lon,selectedVehicles);
   }
 
+  bool
+  LDM::isExpired(uint64_t timestamp_us, uint64_t now_us)
+  {
+    // Entries with a last update in the future are deleted as well, as the age computed with unsigned values wraps around
+    return ((double)(now_us-timestamp_us))/1000.0 > DB_DELETE_OLDER_THAN_SECONDS*1000;
+  }
+
+  void
+  LDM::removePolygons(const std::vector<uint64_t> &expiredIDs)
+  {
+    if(!m_polygons || m_client==NULL)
+      return;
+
+    std::vector<std::string> polygonList = m_client->TraCIAPI::polygon.getIDList ();
+    if(polygonList.empty ())
+      return;
+    std::unordered_set<std::string> polygons(polygonList.begin (), polygonList.end ());
+
+    std::vector<std::string> toRemove;
+    for(uint64_t stationID : m_CV_IDs) {
+        std::string id = std::to_string(stationID);
+        if(polygons.erase(id) > 0)
+          toRemove.push_back(id);
+    }
+    for(uint64_t stationID : expiredIDs) {
+        std::string id = std::to_string(stationID);
+        if(polygons.erase(id) > 0)
+          toRemove.push_back(id);
+    }
+
+    for(const std::string &id : toRemove) {
+        m_client->TraCIAPI::polygon.remove(id,5);
+    }
+  }
+
   void
   LDM::deleteOlderThan()
   {
     uint64_t now = Simulator::Now ().GetMicroSeconds ();
     double curr_dwell = 0.0;
+    std::vector<uint64_t> expired;
+
+    // Entries inserted with a future last update: they are expired as well, unless the simulation time has caught up with them
+    for(uint64_t stationID : m_expiry_future) {
+        auto it = m_LDM.find(stationID);
+        if(it != m_LDM.end() && !isExpired(it->second.vehData.timestamp_us,now))
+          m_expiry_queue.emplace(it->second.vehData.timestamp_us,stationID);
+        else if(it != m_LDM.end())
+          expired.push_back(stationID);
+    }
+    m_expiry_future.clear();
 
-    for (auto it = m_LDM.cbegin(); it != m_LDM.cend();) {
-        std::string id = std::to_string(it->second.vehData.stationID);
-        if(m_polygons && m_client!=NULL)
+    // Only the queue items older than DB_DELETE_OLDER_THAN_SECONDS are visited. Items of removed or updated entries are just dropped:
+    // an updated entry has a newer item in the queue.
+    while(!m_expiry_queue.empty() && isExpired(m_expiry_queue.top().first,now)) {
+        expiryItem_t item = m_expiry_queue.top();
+        m_expiry_queue.pop();
+
+        auto it = m_LDM.find(item.second);
+        if(it != m_LDM.end() && it->second.vehData.timestamp_us == item.first)
+          expired.push_back(item.second);
+    }
+
+    for(uint64_t stationID : expired) {
+        // The same entry may have been queued more than once with the same last update
+        auto it = m_LDM.find(stationID);
+        if(it == m_LDM.end())
+          continue;
+
+        if(it->second.vehData.detected)
           {
-            std::vector<std::string> polygonList = m_client->TraCIAPI::polygon.getIDList ();
-            if(std::find(polygonList.begin(), polygonList.end (), id) != polygonList.end () &&
-               !it->second.vehData.detected)
-              {
-                m_client->TraCIAPI::polygon.remove(id,5);
-              }
+            long age = it->second.vehData.age_us;
+            curr_dwell = now - age; //Dwelling time on database
+            m_dwell_count ++;
+            m_avg_dwell += (curr_dwell-m_avg_dwell)/m_dwell_count;
           }
-        if(((double)(now-it->second.vehData.timestamp_us))/1000.0 > DB_DELETE_OLDER_THAN_SECONDS*1000) {
-            if(it->second.vehData.detected)
-              {
-                long age = it->second.vehData.age_us;
-                curr_dwell = now - age; //Dwelling time on database
-                m_dwell_count ++;
-                m_avg_dwell += (curr_dwell-m_avg_dwell)/m_dwell_count;
+        indexRemove(stationID);
+        m_LDM.erase(it);
+        m_card--;
+    }
 
-                if(m_client!=NULL)
-                  {
-                    std::vector<std::string> polygonList = m_client->TraCIAPI::polygon.getIDList ();
-                    if(std::find(polygonList.begin(), polygonList.end (), id) != polygonList.end () &&
-                     m_polygons)
-                      m_client->TraCIAPI::polygon.remove(id,5);
-                  }
-              }
+    removePolygons(expired);
 
-              it = m_LDM.erase(it);
-              m_card--;
-            } else {
-              ++it;
-            }
-    }
     m_count++;
     //writeAllContents();
     m_event_deleteOlderThan = Simulator::Schedule(Seconds(DB_CLEANER_INTERVAL_SECONDS),&LDM::deleteOlderThan,this);
@@ -278,47 +434,40 @@ namespace ns3 {
   {
     uint64_t now = get_timestamp_us();
     double curr_dwell = 0.0;
+    std::vector<uint64_t> expired;
 
     for (auto it = m_LDM.cbegin(); it != m_LDM.cend();) {
-        std::string id = std::to_string(it->second.vehData.stationID);
-        if(m_polygons && m_client!=NULL)
-          {
-            std::vector<std::string> polygonList = m_client->TraCIAPI::polygon.getIDList ();
-            if(std::find(polygonList.begin(), polygonList.end (), id) != polygonList.end () &&
-               !it->second.vehData.detected)
-              {
-                m_client->TraCIAPI::polygon.remove(id,5);
-              }
-          }
-        if(((double)(now-it->second.vehData.timestamp_us))/1000.0 > DB_DELETE_OLDER_THAN_SECONDS*1000) {
+        if(isExpired(it->second.vehData.timestamp_us,now)) {
             if(it->second.vehData.detected)
               {
                 long age = it->second.vehData.age_us;
                 curr_dwell = now - age; //Dwelling time on database
                 m_dwell_count ++;
                 m_avg_dwell += (curr_dwell-m_avg_dwell)/m_dwell_count;
-
-                if(m_client!=NULL)
-                  {
-                    std::vector<std::string> polygonList = m_client->TraCIAPI::polygon.getIDList ();
-                    if(std::find(polygonList.begin(), polygonList.end (), id) != polygonList.end () &&
-                     m_polygons)
-                      m_client->TraCIAPI::polygon.remove(id,5);
-                  }
               }
+              expired.push_back(it->first);
               oper_fcn(it->second.vehData.stationID,additional_args);
+              indexRemove(it->first);
               it = m_LDM.erase(it);
               m_card--;
             } else {
               ++it;
             }
     }
+
+    removePolygons(expired);
   }
 
   void
   LDM::clear() {
 
     m_LDM.clear();
+    m_grid.clear();
+    m_grid_cell.clear();
+    m_PO_IDs.clear();
+    m_CV_IDs.clear();
+    m_expiry_queue = decltype(m_expiry_queue) ();
+    m_expiry_future.clear();
     // Set the cardinality of the map to 0 again
     m_card = 0;
   }
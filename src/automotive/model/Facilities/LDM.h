@@ -7,7 +7,9 @@
 #include "ns3/traci-client.h"
 #include "ns3/vdpTraci.h"
 #include <unordered_map>
+#include <unordered_set>
 #include <vector>
+#include <queue>
 #include <random>
 #include <shared_mutex>
 #include <boost/geometry.hpp>
@@ -17,6 +19,8 @@
 #define DB_CLEANER_INTERVAL_SECONDS 0.5
 #define DB_DELETE_OLDER_THAN_SECONDS 1
 #define LOG_FREQ 100
+// Size (in meters of latitude) of the cells of the grid used to index the LDM entries by position
+#define LDM_GRID_CELL_M 50.0
 
 namespace ns3 {
 
@@ -94,6 +98,8 @@ public:
      *
      * This function returns a vector of vehicles, including their Path History points, located within a certain radius
      * centered on a given latitude and longitude
+     * Only the entries in the grid cells overlapping the search area are checked; if the area covers more cells than
+     * there are entries in the database (e.g. with a very large radius), the whole database is scanned instead
      * For the time being, this function should always return LDMMAP_OK (i.e. to understand if no vehicles are returned,
      * you should check the size of the selectedVehicles vector)
      *
@@ -158,9 +164,9 @@ public:
     /**
      * @brief This function deletes from the database all the entries older than time_milliseconds ms
      *
-     * The entries are deleted if their age is > time_milliseconds ms if greater_equal == false,
-     * or >= time_milliseconds ms if greater_equal == true
-     * This function performs a full database read operation
+     * The entries are deleted if their last update is older than DB_DELETE_OLDER_THAN_SECONDS
+     * Only the entries which may have expired are visited, in order of last update (see m_expiry_queue)
+     * If polygons are enabled, the SUMO polygon list is read once and all the stale polygons are removed in one pass
      */
     void deleteOlderThan();
 
@@ -232,9 +238,35 @@ public:
     libsumo::TraCIPosition boost2TraciPos(point_type point_type);
 
 private:
+	/**
+	 * @brief Add an entry to the position grid and to the PO/CV ID sets, or move it if it is already indexed
+	 */
+	void indexInsert(const vehicleData_t &data);
+	/**
+	 * @brief Remove an entry from the position grid and from the PO/CV ID sets
+	 */
+	void indexRemove(uint64_t stationID);
+	/**
+	 * @brief Remove the SUMO polygons of the CVs (which are never drawn) and of the given expired entries, reading the polygon list only once
+	 */
+	void removePolygons(const std::vector<uint64_t> &expiredIDs);
+	/**
+	 * @brief Check if an entry updated at timestamp_us has to be deleted by the cleaner at time now_us
+	 */
+	static bool isExpired(uint64_t timestamp_us, uint64_t now_us);
 
 	// Main database structure
 	std::unordered_map<uint64_t,returnedVehicleData_t> m_LDM;
+	// Secondary indexes: grid cell -> station IDs, station ID -> grid cell, and the IDs of the POs and of the CVs
+	std::unordered_map<int64_t,std::vector<uint64_t>> m_grid;
+	std::unordered_map<uint64_t,int64_t> m_grid_cell;
+	std::unordered_set<uint64_t> m_PO_IDs;
+	std::unordered_set<uint64_t> m_CV_IDs;
+	// Expiry queue: (last update [us], station ID) of each insert, oldest first; an item is stale if the entry was updated again
+	typedef std::pair<uint64_t,uint64_t> expiryItem_t;
+	std::priority_queue<expiryItem_t,std::vector<expiryItem_t>,std::greater<expiryItem_t>> m_expiry_queue;
+	// Entries inserted with a last update in the future, checked at the next cleaner run
+	std::vector<uint64_t> m_expiry_future;
 	// Database cardinality (number of entries stored in the database)
 	uint64_t m_card;
 	long m_count;
@@ -505,7 +505,7 @@ namespace ns3 {
 
       int messagetype = get_messageID_from_BTP_port (dataRequest._messagePort);
 
-      m_metric_supervisor_ptr->signalSentPacket (MetricSupervisor::bufToString (buffer,dataRequest.data->GetSize ()),m_egoPV.POS_EPV.lat,m_egoPV.POS_EPV.lon,m_station_id, static_cast<MetricSupervisor::messageType_e>(messagetype));
+      m_metric_supervisor_ptr->signalSentPacket (MetricSupervisor::bufToKey (buffer,dataRequest.data->GetSize ()),m_egoPV.POS_EPV.lat,m_egoPV.POS_EPV.lon,m_station_id, static_cast<MetricSupervisor::messageType_e>(messagetype));
 
       delete[] buffer;
     }
@@ -578,7 +578,7 @@ namespace ns3 {
 
       int messagetype = get_messageID_from_BTP_port (dataRequest._messagePort);
 
-      m_metric_supervisor_ptr->signalSentPacket (MetricSupervisor::bufToString (buffer,dataRequest.data->GetSize ()),m_egoPV.POS_EPV.lat,m_egoPV.POS_EPV.lon,m_station_id, static_cast<MetricSupervisor::messageType_e>(messagetype));
+      m_metric_supervisor_ptr->signalSentPacket (MetricSupervisor::bufToKey (buffer,dataRequest.data->GetSize ()),m_egoPV.POS_EPV.lat,m_egoPV.POS_EPV.lon,m_station_id, static_cast<MetricSupervisor::messageType_e>(messagetype));
 
       delete[] buffer;
     }
@@ -628,7 +628,7 @@ namespace ns3 {
 
       dataRequest.data->CopyData (buffer,dataRequest.data->GetSize ());
 
-      m_metric_supervisor_ptr->signalSentPacket (MetricSupervisor::bufToString (buffer,dataRequest.data->GetSize ()),m_egoPV.POS_EPV.lat,m_egoPV.POS_EPV.lon,m_station_id, MetricSupervisor::messageType_GNbeacon);
+      m_metric_supervisor_ptr->signalSentPacket (MetricSupervisor::bufToKey (buffer,dataRequest.data->GetSize ()),m_egoPV.POS_EPV.lat,m_egoPV.POS_EPV.lon,m_station_id, MetricSupervisor::messageType_GNbeacon);
       delete[] buffer;
     }
 
@@ -957,7 +957,7 @@ namespace ns3 {
         if(dataIndication.GNType!=BEACON || m_PRRsupervisor_beacons==true)
         {
           m_metric_supervisor_ptr->updateBytesReceived(dataSize);
-            m_metric_supervisor_ptr->signalReceivedPacket(MetricSupervisor::bufToString (buffer,dataSize),m_station_id);
+            m_metric_supervisor_ptr->signalReceivedPacket(MetricSupervisor::bufToKey (buffer,dataSize),m_station_id);
         }
 
         delete[] buffer;
@@ -1,95 +1,206 @@
 #include "los_nlos.h"
+#include "ns3/simulator.h"
+#include <cmath>
+#include <limits>
+
+// Margin added to the boxes inserted in the grid, so that a point lying on a cell border is found from both sides
+#define LOS_NLOS_GRID_MARGIN 0.01
 
 namespace ns3
 {
-ChannelCondition::LosConditionValue
-LOS_NLOS::GetLosNlos(std::tuple<float, float> xy1,
-                      std::tuple<float, float> xy2,
-                      std::vector<std::tuple<float, float>> other_vehicles)
+namespace
 {
-  float x1 = std::get<0>(xy1);
-  float y1 = std::get<1>(xy1);
-  float x2 = std::get<0>(xy2);
-  float y2 = std::get<1>(xy2);
-
-  float m_v1_v2 = 0, q_v1_v2;
-  bool vertical_v1_v2 = (x1 == x2);
-  if (!vertical_v1_v2)
+  int64_t LOS_NLOS_gridCell(int64_t cx, int64_t cy)
+  {
+    return static_cast<int64_t>((static_cast<uint64_t>(cx) << 32) ^ (static_cast<uint64_t>(cy) & 0xFFFFFFFFULL));
+  }
+
+  bool LOS_NLOS_segmentsIntersect(double x1, double y1, double x2, double y2, double x3, double y3, double x4, double y4)
+  {
+    double rx = x2 - x1, ry = y2 - y1;
+    double sx = x4 - x3, sy = y4 - y3;
+    double denom = rx * sy - ry * sx;
+
+    // Parallel segments are never considered as crossing
+    if (denom == 0)
+      return false;
+
+    double t = ((x3 - x1) * sy - (y3 - y1) * sx) / denom;
+    double u = ((x3 - x1) * ry - (y3 - y1) * rx) / denom;
+    return t >= 0 && t <= 1 && u >= 0 && u <= 1;
+  }
+}
+
+void
+LOS_NLOS::InsertBox(std::unordered_map<int64_t, std::vector<uint32_t>> &grid, uint32_t index, double xmin, double ymin, double xmax, double ymax)
+{
+  int64_t cx_min = static_cast<int64_t>(std::floor((xmin - LOS_NLOS_GRID_MARGIN) / m_cell_m));
+  int64_t cx_max = static_cast<int64_t>(std::floor((xmax + LOS_NLOS_GRID_MARGIN) / m_cell_m));
+  int64_t cy_min = static_cast<int64_t>(std::floor((ymin - LOS_NLOS_GRID_MARGIN) / m_cell_m));
+  int64_t cy_max = static_cast<int64_t>(std::floor((ymax + LOS_NLOS_GRID_MARGIN) / m_cell_m));
+
+  for (int64_t cx = cx_min; cx <= cx_max; cx++)
     {
-      m_v1_v2 = (y1 - y2) / (x1 - x2);
-      q_v1_v2 = y1 - m_v1_v2 * x1;
+      for (int64_t cy = cy_min; cy <= cy_max; cy++)
+        {
+          grid[LOS_NLOS_gridCell(cx, cy)].push_back(index);
+        }
     }
+}
+
+void
+LOS_NLOS::BuildIndex()
+{
+  m_edges.clear();
+  m_edge_grid.clear();
 
   for (auto& building : m_buildings)
     {
       auto& corners = building.second;
-      uint8_t n = corners.size();
-      for (uint8_t i = 0; i < n - 1; i++)
+      for (size_t i = 0; i + 1 < corners.size(); i++)
         {
-          float x_b1 = std::get<0>(corners[i]);
-          float y_b1 = std::get<1>(corners[i]);
-          float x_b2 = std::get<0>(corners[i + 1]);
-          float y_b2 = std::get<1>(corners[i + 1]);
-
-          float m_b1_b2 = 0, q_b1_b2;
-          bool vertical_b1_b2 = (x_b1 == x_b2);
-          if (!vertical_b1_b2)
-            {
-              m_b1_b2 = (y_b1 - y_b2) / (x_b1 - x_b2);
-              q_b1_b2 = y_b1 - m_b1_b2 * x_b1;
-            }
+          edge_t edge = {std::get<0>(corners[i]), std::get<1>(corners[i]), std::get<0>(corners[i + 1]), std::get<1>(corners[i + 1])};
+          InsertBox(m_edge_grid, m_edges.size(), std::min(edge.x1, edge.x2), std::min(edge.y1, edge.y2), std::max(edge.x1, edge.x2), std::max(edge.y1, edge.y2));
+          m_edges.push_back(edge);
+        }
+    }
+  m_edge_stamp.assign(m_edges.size(), 0);
 
-          float inter_x, inter_y;
-          if (!vertical_v1_v2 && !vertical_b1_b2)
-            {
-              if (m_v1_v2 == m_b1_b2)
-                continue; // Parallel lines
-              inter_x = (q_b1_b2 - q_v1_v2) / (m_v1_v2 - m_b1_b2);
-              inter_y = m_v1_v2 * inter_x + q_v1_v2;
-            }
-          else if (vertical_v1_v2 && !vertical_b1_b2)
-            {
-              inter_x = x1;
-              inter_y = m_b1_b2 * inter_x + q_b1_b2;
-            }
-          else if (!vertical_v1_v2 && vertical_b1_b2)
-            {
-              inter_x = x_b1;
-              inter_y = m_v1_v2 * inter_x + q_v1_v2;
-            }
-          else
-            {
-              // both vertical
-              continue;
-            }
+  m_los_cache.clear();
+  m_index_valid = true;
+}
 
-          // Check if intersection is within both segments
-          if (inter_x >= std::min(x1, x2) && inter_x <= std::max(x1, x2) &&
-              inter_x >= std::min(x_b1, x_b2) && inter_x <= std::max(x_b1, x_b2) &&
-              inter_y >= std::min(y1, y2) && inter_y <= std::max(y1, y2) &&
-              inter_y >= std::min(y_b1, y_b2) && inter_y <= std::max(y_b1, y_b2))
-            {
-              return ChannelCondition::LosConditionValue::NLOS;
-            }
+bool
+LOS_NLOS::TraverseCells(double x1, double y1, double x2, double y2, const std::function<bool(int64_t)> &visit)
+{
+  // Grid traversal of the segment (Amanatides-Woo): the cells are visited in order, from (x1,y1) to (x2,y2)
+  int64_t cx = static_cast<int64_t>(std::floor(x1 / m_cell_m));
+  int64_t cy = static_cast<int64_t>(std::floor(y1 / m_cell_m));
+  int64_t ex = static_cast<int64_t>(std::floor(x2 / m_cell_m));
+  int64_t ey = static_cast<int64_t>(std::floor(y2 / m_cell_m));
+
+  double dx = x2 - x1;
+  double dy = y2 - y1;
+  int64_t step_x = dx > 0 ? 1 : -1;
+  int64_t step_y = dy > 0 ? 1 : -1;
+  double inf = std::numeric_limits<double>::infinity();
+  double t_max_x = dx != 0 ? ((cx + (step_x > 0 ? 1 : 0)) * (double) m_cell_m - x1) / dx : inf;
+  double t_max_y = dy != 0 ? ((cy + (step_y > 0 ? 1 : 0)) * (double) m_cell_m - y1) / dy : inf;
+  double t_delta_x = dx != 0 ? m_cell_m / std::fabs(dx) : inf;
+  double t_delta_y = dy != 0 ? m_cell_m / std::fabs(dy) : inf;
+
+  while (true)
+    {
+      if (visit(LOS_NLOS_gridCell(cx, cy)))
+        return true;
+      if (cx == ex && cy == ey)
+        return false;
+
+      // Never step past the last cell on one axis, whatever the rounding errors on t_max
+      if (cy == ey || (cx != ex && t_max_x < t_max_y))
+        {
+          cx += step_x;
+          t_max_x += t_delta_x;
+        }
+      else
+        {
+          cy += step_y;
+          t_max_y += t_delta_y;
         }
     }
+}
+
+bool
+LOS_NLOS::IsVehicleBlocking(double x1, double y1, double x2, double y2, double xv, double yv)
+{
+  // Distance between the vehicle and the closest point of the link
+  double dx = x2 - x1;
+  double dy = y2 - y1;
+  double len2 = dx * dx + dy * dy;
+  double t = len2 > 0 ? ((xv - x1) * dx + (yv - y1) * dy) / len2 : 0.0;
+  t = std::min(std::max(t, 0.0), 1.0);
+  double px = x1 + t * dx - xv;
+  double py = y1 + t * dy - yv;
+  return px * px + py * py < m_threshold_nlosv * m_threshold_nlosv;
+}
+
+ChannelCondition::LosConditionValue
+LOS_NLOS::GetLosNlos(std::tuple<float, float> xy1,
+                      std::tuple<float, float> xy2,
+                      std::vector<std::tuple<float, float>> other_vehicles)
+{
+  // The LoS condition is symmetric: cache each link once, whatever its direction
+  if (xy2 < xy1)
+    std::swap(xy1, xy2);
 
-  for (auto veh : other_vehicles)
+  double x1 = std::get<0>(xy1);
+  double y1 = std::get<1>(xy1);
+  double x2 = std::get<0>(xy2);
+  double y2 = std::get<1>(xy2);
+
+  if (!m_index_valid)
+    BuildIndex();
+
+  std::tuple<float, float, float, float> key(std::get<0>(xy1), std::get<1>(xy1), std::get<0>(xy2), std::get<1>(xy2));
+  bool use_cache = other_vehicles.empty();
+  if (use_cache)
+    {
+      if (m_cache_time != Simulator::Now())
+        {
+          m_los_cache.clear();
+          m_cache_time = Simulator::Now();
+        }
+      auto cached = m_los_cache.find(key);
+      if (cached != m_los_cache.end())
+        return cached->second;
+    }
+
+  ChannelCondition::LosConditionValue condition = ChannelCondition::LosConditionValue::LOS;
+
+  m_query++;
+  if (m_query == 0)
     {
-      if (!vertical_v1_v2)
+      // Stamp counter wrapped around: reset the stamps
+      std::fill(m_edge_stamp.begin(), m_edge_stamp.end(), 0);
+      m_query = 1;
+    }
+
+  bool nlos = TraverseCells(x1, y1, x2, y2, [&](int64_t cell) {
+    auto edges = m_edge_grid.find(cell);
+    if (edges == m_edge_grid.end())
+      return false;
+    for (uint32_t idx : edges->second)
+      {
+        if (m_edge_stamp[idx] == m_query)
+          continue;
+        m_edge_stamp[idx] = m_query;
+        const edge_t &edge = m_edges[idx];
+        if (LOS_NLOS_segmentsIntersect(x1, y1, x2, y2, edge.x1, edge.y1, edge.x2, edge.y2))
+          return true;
+      }
+    return false;
+  });
+
+  if (nlos)
+    {
+      condition = ChannelCondition::LosConditionValue::NLOS;
+    }
+  else
+    {
+      for (auto veh : other_vehicles)
         {
-          float x3 = std::get<0>(veh);
-          float y3 = std::get<1>(veh);
-          float y_test = m_v1_v2 * x3 + q_v1_v2;
-          if (y_test - y3 < m_threshold_nlosv)
+          if (IsVehicleBlocking(x1, y1, x2, y2, std::get<0>(veh), std::get<1>(veh)))
             {
-              return ChannelCondition::LosConditionValue::NLOSv;
+              condition = ChannelCondition::LosConditionValue::NLOSv;
+              break;
             }
         }
     }
 
-  return ChannelCondition::LosConditionValue::LOS;
-}
+  if (use_cache)
+    m_los_cache[key] = condition;
 
+  return condition;
 }
 
+}
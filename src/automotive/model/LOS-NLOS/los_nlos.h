@@ -2,6 +2,10 @@
 #define NS3_LOS_NLOS_H
 
 #include "ns3/channel-condition-model.h"
+#include "ns3/nstime.h"
+#include <functional>
+#include <map>
+#include <unordered_map>
 
 namespace ns3
 {
@@ -15,9 +19,10 @@ namespace ns3
       return instance;
     }
 
-    void AddBuilding(uint8_t id, std::vector<std::tuple<float, float>> shape)
+    void AddBuilding(uint32_t id, std::vector<std::tuple<float, float>> shape)
     {
       m_buildings[id] = shape;
+      m_index_valid = false;
     }
 
     bool CheckBuildings()
@@ -25,11 +30,67 @@ namespace ns3
       return m_buildings.empty();
     }
 
+    /**
+     * @brief Set the size of the cells of the grid used to index the building edges (default: 20 m).
+     */
+    void SetGridCellSize(float cell_m)
+    {
+      if (cell_m <= 0)
+        {
+          NS_FATAL_ERROR("The LOS_NLOS grid cell size must be greater than 0.");
+        }
+      m_cell_m = cell_m;
+      m_index_valid = false;
+    }
+
+    /**
+     * @brief Get the LoS condition of the link between xy1 and xy2.
+     *
+     * The link is NLOS if it crosses a building edge, NLOSv if it passes within 0.5 m of one of "other_vehicles",
+     * LOS otherwise. Only the building edges in the grid cells crossed by the link are tested. Without vehicles, the
+     * result is cached for the same pair of positions until the simulation time advances or the buildings change.
+     *
+     * @param xy1 the position of the first end of the link
+     * @param xy2 the position of the second end of the link
+     * @param other_vehicles the positions of the vehicles to be checked as blockers
+     */
     ChannelCondition::LosConditionValue GetLosNlos(std::tuple<float, float> xy1, std::tuple<float, float> xy2, std::vector<std::tuple<float, float>> other_vehicles = std::vector<std::tuple<float, float>>());
 
   private:
-    std::unordered_map<uint8_t, std::vector<std::tuple<float, float>>> m_buildings;
+    typedef struct edge {
+      double x1;
+      double y1;
+      double x2;
+      double y2;
+    } edge_t;
+
+    /**
+     * @brief Rebuild the grid of the building edges.
+     */
+    void BuildIndex();
+    /**
+     * @brief Add the item "index" to every cell of "grid" overlapping the box [xmin,xmax]x[ymin,ymax].
+     */
+    void InsertBox(std::unordered_map<int64_t, std::vector<uint32_t>> &grid, uint32_t index, double xmin, double ymin, double xmax, double ymax);
+    /**
+     * @brief Call "visit" on every cell crossed by the segment (x1,y1)-(x2,y2), stopping as soon as it returns true.
+     * @return true if "visit" returned true for one of the cells
+     */
+    bool TraverseCells(double x1, double y1, double x2, double y2, const std::function<bool(int64_t)> &visit);
+    bool IsVehicleBlocking(double x1, double y1, double x2, double y2, double xv, double yv);
+
+    std::unordered_map<uint32_t, std::vector<std::tuple<float, float>>> m_buildings;
     float m_threshold_nlosv = 0.5;
+
+    float m_cell_m = 20.0;
+    bool m_index_valid = false;
+    std::vector<edge_t> m_edges; //!< all the building edges
+    std::unordered_map<int64_t, std::vector<uint32_t>> m_edge_grid; //!< key: grid cell, value: indices of the edges in m_edges
+    std::vector<uint32_t> m_edge_stamp; //!< last query in which each edge was tested, to test it only once per query
+    uint32_t m_query = 0;
+
+    std::map<std::tuple<float, float, float, float>, ChannelCondition::LosConditionValue> m_los_cache; //!< key: link end positions, value: LoS condition
+    Time m_cache_time = Time(-1.0);
   };
 }
 
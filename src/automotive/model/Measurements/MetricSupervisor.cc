@@ -23,14 +23,35 @@
 #include "MetricSupervisor.h"
 #include <sstream>
 #include <cfloat>
+#include <cmath>
+#include <algorithm>
+#include <fstream>
+#include <iomanip>
 
 #define DEG_2_RAD(val) ((val)*M_PI/180.0)
 
+// Relative margin applied to the baseline when querying the station grid in SUMO coordinates; it covers the difference
+// between the haversine distance used for the baseline and the distance in the projected map
+#define BASELINE_GRID_MARGIN 1.02
+
+// Layout of the streaming latency histograms: logarithmically spaced buckets between 1 us and 10^4 s, plus a first
+// bucket for the samples below 1 us (the last bucket is open-ended). It is the same layout as the LogHistogram of
+// analysis/mode2_loss/analyze_csv.py, so that the histograms written by the MetricSupervisor can be merged there.
+#define LATENCY_HIST_LOW_S 1e-6
+#define LATENCY_HIST_DECADES 10
+#define LATENCY_HIST_BUCKETS_PER_DECADE 200
+#define LATENCY_HIST_SIZE (LATENCY_HIST_DECADES*LATENCY_HIST_BUCKETS_PER_DECADE+2)
+
         namespace {
   double MetricSupervisor_haversineDist(double lat_a, double lon_a, double lat_b, double lon_b) {
     // 12742000 is the mean Earth radius (6371 km) * 2 * 1000 (to convert from km to m)
     return 12742000.0*asin(sqrt(sin(DEG_2_RAD(lat_b-lat_a)/2)*sin(DEG_2_RAD(lat_b-lat_a)/2)+cos(DEG_2_RAD(lat_a))*cos(DEG_2_RAD(lat_b))*sin(DEG_2_RAD(lon_b-lon_a)/2)*sin(DEG_2_RAD(lon_b-lon_a)/2)));
   }
+
+  // Key of the baseline grid cell (cx,cy)
+  int64_t MetricSupervisor_gridCell(int64_t cx, int64_t cy) {
+    return static_cast<int64_t>((static_cast<uint64_t>(cx) << 32) ^ (static_cast<uint64_t>(cy) & 0xFFFFFFFFULL));
+  }
 }
 
 namespace ns3 {
@@ -80,65 +101,177 @@ MetricSupervisor::bufToString(uint8_t *buf, uint32_t bufsize)
   return bufss.str();
 }
 
+uint64_t
+MetricSupervisor::bufToKey(uint8_t *buf, uint32_t bufsize)
+{
+  // 64-bit FNV-1a hash of the whole packet
+  uint64_t key = 0xcbf29ce484222325ULL;
+
+  for(size_t i=0;i<bufsize;++i)
+    {
+      key ^= buf[i];
+      key *= 0x100000001b3ULL;
+    }
+
+  return key;
+}
+
 void
-MetricSupervisor::signalSentPacket(std::string buf, double lat, double lon, uint64_t nodeID, messageType_e messagetype)
+MetricSupervisor::updateBaselineIndex()
 {
-  EventId computePRR_id;
+  const std::map<std::string, std::pair<StationType_t, Ptr<Node>>> &node_map = m_traci_ptr->get_NodeMap ();
 
-  if(m_traci_ptr != nullptr)
+  // Positions only change when SUMO performs a new step (RSUs may be added at any time)
+  if (!m_bsln_stations.empty () && m_bsln_snapshot_id == m_traci_ptr->GetStationSnapshotId () &&
+      m_bsln_nodemap_size == node_map.size ())
     {
+      return;
+    }
 
-      // If the packet is sent by an excluded vehicle due to a problem in the configuration of the simulation, ignore it
-      if (m_excluded_vehID_enabled == true &&
-          (m_excluded_vehID_list.find (nodeID) != m_excluded_vehID_list.end ()))
-        {
-          return;
-        }
+  const std::map<std::string, TraciClient::StationSnapshot_t> &snapshot = m_traci_ptr->GetStationSnapshot ();
+
+  m_bsln_snapshot_id = m_traci_ptr->GetStationSnapshotId ();
+  m_bsln_nodemap_size = node_map.size ();
+  m_bsln_cell_m = std::max (m_baseline_m * BASELINE_GRID_MARGIN + 1.0, 1.0);
+  m_bsln_stations.clear ();
+  m_bsln_grid.clear ();
+  m_bsln_station_types.clear ();
 
-      //std::vector<std::string> ids = m_traci_ptr->TraCIAPI::vehicle.getIDList ();
-      std::map<std::string, std::pair<StationType_t, Ptr<Node>>> node_map =
-          m_traci_ptr->get_NodeMap ();
+  for (auto it = node_map.begin (); it != node_map.end (); ++it)
+    {
+      baselineStation_t station;
+      station.sumoID = it->first;
+      station.stationType = it->second.first;
+      station.lonlat_valid = false;
 
-      for (std::map<std::string, std::pair<StationType_t, Ptr<Node>>>::iterator it =
-               node_map.begin ();
-           it != node_map.end (); ++it)
+      libsumo::TraCIPosition pos;
+      if (station.stationType == StationType_roadSideUnit)
         {
-          StationType_t station_type = it->second.first;
-          uint64_t stationID;
-          if (station_type == StationType_roadSideUnit)
-            {
-              uint64_t id = std::stoi (it->first.substr (it->first.find ("_") + 1));
-              stationID = m_stationId_baseline + id;
-            }
-          else
+          uint64_t id = std::stoi (it->first.substr (it->first.find ("_") + 1));
+          station.stationID = m_stationId_baseline + id;
+
+          auto rsu = m_rsu_xy_cache.find (it->first);
+          if (rsu == m_rsu_xy_cache.end ())
             {
-              stationID = std::stol (it->first.substr (3));
+              rsu = m_rsu_xy_cache.emplace (it->first, m_traci_ptr->TraCIAPI::poi.getPosition (it->first)).first;
             }
+          pos = rsu->second;
+        }
+      else
+        {
+          station.stationID = std::stol (it->first.substr (3));
 
-          libsumo::TraCIPosition pos;
-          if (station_type == StationType_pedestrian)
+          auto snap = snapshot.find (it->first);
+          if (snap != snapshot.end ())
             {
-              pos = m_traci_ptr->TraCIAPI::person.getPosition (it->first);
+              pos = snap->second.pos;
             }
-          else if (station_type == StationType_roadSideUnit)
+          else if (station.stationType == StationType_pedestrian)
             {
-              pos = m_traci_ptr->TraCIAPI::poi.getPosition (it->first);
+              pos = m_traci_ptr->TraCIAPI::person.getPosition (it->first);
             }
           else
             {
               pos = m_traci_ptr->TraCIAPI::vehicle.getPosition (it->first);
             }
-          pos = m_traci_ptr->TraCIAPI::simulation.convertXYtoLonLat (pos.x, pos.y);
+        }
+
+      station.x = pos.x;
+      station.y = pos.y;
+
+      // If more stations share the same ID, the last one in the node map determines the station type
+      m_bsln_station_types[station.stationID] = station.stationType;
+
+      int64_t cell = MetricSupervisor_gridCell (static_cast<int64_t> (std::floor (station.x / m_bsln_cell_m)),
+                                                static_cast<int64_t> (std::floor (station.y / m_bsln_cell_m)));
+      m_bsln_grid[cell].push_back (m_bsln_stations.size ());
+      m_bsln_stations.push_back (station);
+    }
+}
 
-          if (stationID == nodeID)
-            m_stationtype_map[buf] = station_type;
+void
+MetricSupervisor::getBaselineCandidates(double x, double y, double radius, std::vector<size_t> &candidates)
+{
+  int64_t cx_min = static_cast<int64_t> (std::floor ((x - radius) / m_bsln_cell_m));
+  int64_t cx_max = static_cast<int64_t> (std::floor ((x + radius) / m_bsln_cell_m));
+  int64_t cy_min = static_cast<int64_t> (std::floor ((y - radius) / m_bsln_cell_m));
+  int64_t cy_max = static_cast<int64_t> (std::floor ((y + radius) / m_bsln_cell_m));
+
+  for (int64_t cx = cx_min; cx <= cx_max; cx++)
+    {
+      for (int64_t cy = cy_min; cy <= cy_max; cy++)
+        {
+          auto cell = m_bsln_grid.find (MetricSupervisor_gridCell (cx, cy));
+          if (cell == m_bsln_grid.end ())
+            {
+              continue;
+            }
+
+          for (size_t idx : cell->second)
+            {
+              double dx = m_bsln_stations[idx].x - x;
+              double dy = m_bsln_stations[idx].y - y;
+              if (dx * dx + dy * dy <= radius * radius)
+                {
+                  candidates.push_back (idx);
+                }
+            }
+        }
+    }
+}
+
+void
+MetricSupervisor::signalSentPacket(uint64_t key, double lat, double lon, uint64_t nodeID, messageType_e messagetype)
+{
+  EventId computePRR_id;
+  std::vector<std::pair<uint64_t,uint16_t>> nodeList; // (station ID, distance bin) of the road users within the baseline
+  StationType_t station_type = StationType_unknown;
+  size_t max_bin = std::min (static_cast<size_t> (m_baseline_m / m_prr_distance_bin_m), static_cast<size_t> (UINT16_MAX));
+
+  if(m_traci_ptr != nullptr)
+    {
+
+      // If the packet is sent by an excluded vehicle due to a problem in the configuration of the simulation, ignore it
+      if (m_excluded_vehID_enabled == true &&
+          (m_excluded_vehID_list.find (nodeID) != m_excluded_vehID_list.end ()))
+        {
+          return;
+        }
+
+      updateBaselineIndex ();
+
+      auto sender = m_bsln_station_types.find (nodeID);
+      if (sender != m_bsln_station_types.end ())
+        station_type = sender->second;
+
+      // Only the stations in the grid cells around the sender are checked against the baseline. The grid works in SUMO
+      // (projected) coordinates and is queried with a small margin, as the baseline itself is a haversine distance.
+      libsumo::TraCIPosition tx_xy = m_traci_ptr->TraCIAPI::simulation.convertLonLattoXY (lon, lat);
+      std::vector<size_t> candidates;
+      getBaselineCandidates (tx_xy.x, tx_xy.y, m_baseline_m * BASELINE_GRID_MARGIN + 1.0, candidates);
+
+      // Keep the node list in the same order as the node map
+      std::sort (candidates.begin (), candidates.end ());
+
+      for (size_t idx : candidates)
+        {
+          baselineStation_t &station = m_bsln_stations[idx];
 
           if (m_excluded_vehID_enabled == false ||
-              (m_excluded_vehID_list.find (stationID) == m_excluded_vehID_list.end ()))
+              (m_excluded_vehID_list.find (station.stationID) == m_excluded_vehID_list.end ()))
             {
-              if (MetricSupervisor_haversineDist (lat, lon, pos.y, pos.x) <= m_baseline_m)
+              if (!station.lonlat_valid)
+                {
+                  libsumo::TraCIPosition pos = m_traci_ptr->TraCIAPI::simulation.convertXYtoLonLat (station.x, station.y);
+                  station.lon = pos.x;
+                  station.lat = pos.y;
+                  station.lonlat_valid = true;
+                }
+
+              double dist = MetricSupervisor_haversineDist (lat, lon, station.lat, station.lon);
+              if (dist <= m_baseline_m)
                 {
-                  m_packetbuff_map[buf].nodeList.push_back (stationID);
+                  nodeList.emplace_back (station.stationID, std::min (static_cast<size_t> (dist / m_prr_distance_bin_m), max_bin));
                 }
             }
         }
@@ -154,20 +287,34 @@ MetricSupervisor::signalSentPacket(std::string buf, double lat, double lon, uint
         }
 
 
+      // CARLA positions do not change within the same simulation time: query each actor only once per time instant
+      if (m_carla_cache_time != Simulator::Now ())
+        {
+          m_carla_latlon_cache.clear ();
+          m_carla_cache_time = Simulator::Now ();
+        }
+
       std::map<std::basic_string<char>, std::basic_string<char>> ids = m_carla_ptr->getManagedConnectedNodes();
       for (auto it = ids.begin(); it != ids.end(); ++it)
         {
           std::string stationID = it->first;
+          int actorID = std::stoi(stationID);
 
-          carla::Vehicle vehicle = m_carla_ptr->GetManagedActorById(std::stoi(stationID));
+          if (actorID == nodeID)
+            station_type = StationType_passengerCar;
 
-          if (std::stoi(stationID) == nodeID)
-            m_stationtype_map[buf] = StationType_passengerCar;
+          if(m_excluded_vehID_enabled==false || (m_excluded_vehID_list.find(actorID)==m_excluded_vehID_list.end())) {
+              auto cached = m_carla_latlon_cache.find (actorID);
+              if (cached == m_carla_latlon_cache.end ())
+                {
+                  carla::Vehicle vehicle = m_carla_ptr->GetManagedActorById(actorID);
+                  cached = m_carla_latlon_cache.emplace (actorID, std::make_pair (vehicle.latitude (), vehicle.longitude ())).first;
+                }
 
-          if(m_excluded_vehID_enabled==false || (m_excluded_vehID_list.find(std::stoi(stationID))==m_excluded_vehID_list.end())) {
-              if(MetricSupervisor_haversineDist(lat,lon,vehicle.latitude (),vehicle.longitude ())<=m_baseline_m)
+              double dist = MetricSupervisor_haversineDist(lat,lon,cached->second.first,cached->second.second);
+              if(dist<=m_baseline_m)
                 {
-                  m_packetbuff_map[buf].nodeList.push_back(std::stoi(stationID));
+                  nodeList.emplace_back(actorID, std::min (static_cast<size_t> (dist / m_prr_distance_bin_m), max_bin));
                 }
             }
         }
@@ -179,18 +326,43 @@ MetricSupervisor::signalSentPacket(std::string buf, double lat, double lon, uint
       NS_FATAL_ERROR("Fatal error: mobility client not set in PRR Supervisor.");
     }
 
-  computePRR_id = Simulator::Schedule(MilliSeconds (m_pprcomp_timeout*1000.0), &MetricSupervisor::computePRR, this, buf);
+  // The computePRR events expire (mostly) in the order they were scheduled: drop the expired ones at the front
+  while (!eventList.empty () && eventList.front ().IsExpired ())
+    {
+      eventList.pop_front ();
+    }
+
+  computePRR_id = Simulator::Schedule(MilliSeconds (m_pprcomp_timeout*1000.0), &MetricSupervisor::computePRR, this, key);
   eventList.push_back (computePRR_id);
 
-  m_latency_map[buf] = Simulator::Now ().GetNanoSeconds ();
+  packetRecord_t &record = m_packet_map[key];
 
-  m_id_map[buf] = nodeID;
+  // Sorted by station ID, to look up the receivers with a binary search
+  if (!record.nodeList.empty ())
+    {
+      // The same packet was already sent: merge the two node lists
+      for (size_t i = 0; i < record.nodeList.size (); i++)
+        {
+          nodeList.emplace_back (record.nodeList[i], record.nodeBins[i]);
+        }
+    }
+  std::sort (nodeList.begin (), nodeList.end ());
+  record.nodeList.resize (nodeList.size ());
+  record.nodeBins.resize (nodeList.size ());
+  for (size_t i = 0; i < nodeList.size (); i++)
+    {
+      record.nodeList[i] = nodeList[i].first;
+      record.nodeBins[i] = nodeList[i].second;
+    }
 
-  m_messagetype_map[buf] = messagetype;
+  record.tx_time_ns = Simulator::Now ().GetNanoSeconds ();
+  record.senderID = nodeID;
+  record.messagetype = messagetype;
+  record.stationtype = station_type;
 
-  if(m_stationtype_map[buf]==StationType_pedestrian) {
+  if(station_type==StationType_pedestrian) {
       m_ntx_per_ped[nodeID]++;
-  } else if(m_stationtype_map[buf]==StationType_roadSideUnit) {
+  } else if(station_type==StationType_roadSideUnit) {
       m_ntx_per_rsu[nodeID]++;
   } else {
       m_ntx_per_veh[nodeID]++;
@@ -201,9 +373,8 @@ MetricSupervisor::signalSentPacket(std::string buf, double lat, double lon, uint
 }
 
 void
-MetricSupervisor::signalReceivedPacket(std::string buf, uint64_t nodeID)
+MetricSupervisor::signalReceivedPacket(uint64_t key, uint64_t nodeID)
 {
-  baselineVehicleData_t currBaselineData;
   double curr_latency_ms = DBL_MAX;
 
   if(m_traci_ptr == nullptr && m_carla_ptr == nullptr)
@@ -220,29 +391,43 @@ MetricSupervisor::signalReceivedPacket(std::string buf, uint64_t nodeID)
     }
 
   // If the packet was sent by an excluded vehicle due to a problem in the configuration of the simulation, it will be automatically
-  // ignored as it will not be in the m_packetbuff_map and m_packetbuff_map.count(buf)==0
-  if(m_packetbuff_map.count(buf)>0)
-    {
-      currBaselineData = m_packetbuff_map[buf];
+  // ignored as it will not be in m_packet_map. The same holds for packets received after their PRR was computed.
+  auto record = m_packet_map.find(key);
 
-      if(std::find(currBaselineData.nodeList.begin(), currBaselineData.nodeList.end(), nodeID) != currBaselineData.nodeList.end())
+  if(record != m_packet_map.end())
+    {
+      std::vector<uint64_t> &nodeList = record->second.nodeList;
+      auto node = std::lower_bound(nodeList.begin(), nodeList.end(), nodeID);
+      if(node != nodeList.end() && *node == nodeID)
         {
-          (m_packetbuff_map[buf].x)++;
+          (record->second.x)++;
+          record->second.rxBins.push_back(record->second.nodeBins[node - nodeList.begin()]);
         }
     }
 
-  messageType_e messagetype = m_messagetype_map[buf];
-  StationType_t station_type = m_stationtype_map[buf];
-  uint64_t senderID = m_id_map[buf];
+  messageType_e messagetype = record != m_packet_map.end() ? record->second.messagetype : messageType_unsupported;
+  StationType_t station_type = record != m_packet_map.end() ? record->second.stationtype : StationType_unknown;
+  uint64_t senderID = record != m_packet_map.end() ? record->second.senderID : 0;
 
   // Compute latency in ms
-  if(m_latency_map.count(buf)>0)
+  if(record != m_packet_map.end())
     {
-      curr_latency_ms = static_cast<double>(Simulator::Now ().GetNanoSeconds () - m_latency_map[buf])/1000000.0;
+      curr_latency_ms = static_cast<double>(Simulator::Now ().GetNanoSeconds () - record->second.tx_time_ns)/1000000.0;
       m_count_latency++;
 
       m_avg_latency_ms += (curr_latency_ms-m_avg_latency_ms)/m_count_latency;
 
+      latencyHistogram_t &hist = m_latency_hist[std::make_pair(messagetype, station_type)];
+      double curr_latency_s = curr_latency_ms/1000.0;
+      if(hist.counts.empty()) {
+          hist.counts.assign(LATENCY_HIST_SIZE, 0);
+        }
+      hist.counts[latencyBucket(curr_latency_s)]++;
+      hist.n++;
+      hist.total_s += curr_latency_s;
+      hist.min_s = std::min(hist.min_s, curr_latency_s);
+      hist.max_s = std::max(hist.max_s, curr_latency_s);
+
       if(station_type == StationType_pedestrian){
 
           if(m_count_latency_per_ped.count(senderID)<=0) {
@@ -305,11 +490,11 @@ MetricSupervisor::signalReceivedPacket(std::string buf, uint64_t nodeID)
     }
 
   m_total_rx++;
-  m_nrx_per_messagetype[m_messagetype_map[buf]]++;
+  m_nrx_per_messagetype[messagetype]++;
 
-  if(m_stationtype_map[buf]==StationType_pedestrian) {
+  if(station_type==StationType_pedestrian) {
     m_nrx_per_ped[nodeID]++;
-  } else if(m_stationtype_map[buf]==StationType_roadSideUnit) {
+  } else if(station_type==StationType_roadSideUnit) {
     m_nrx_per_rsu[nodeID]++;
   } else {
     m_nrx_per_veh[nodeID]++;
@@ -317,18 +502,26 @@ MetricSupervisor::signalReceivedPacket(std::string buf, uint64_t nodeID)
 }
 
 void
-MetricSupervisor::computePRR(std::string buf)
+MetricSupervisor::computePRR(uint64_t key)
 {
   double PRR = 0.0;
 
-  if(m_packetbuff_map[buf].nodeList.size()>1)
+  auto it = m_packet_map.find(key);
+  if(it == m_packet_map.end())
+    {
+      return;
+    }
+
+  const packetRecord_t &record = it->second;
+
+  if(record.nodeList.size()>1)
     {
-      uint64_t senderID = m_id_map[buf];
-      messageType_e messagetype = m_messagetype_map[buf];
-      StationType_t station_type = m_stationtype_map[buf];
+      uint64_t senderID = record.senderID;
+      messageType_e messagetype = record.messagetype;
+      StationType_t station_type = record.stationtype;
 
       // Number of vehicles/other road users in the baseline ("Y" in the PRR formula)
-      double nvehbsln = (double) (m_packetbuff_map[buf].nodeList.size())-1.0;
+      double nvehbsln = (double) (record.nodeList.size())-1.0;
 
       if (station_type == StationType_pedestrian){
         if(m_count_nvehbsln_per_ped.count(senderID)<=0) {
@@ -364,10 +557,10 @@ MetricSupervisor::computePRR(std::string buf)
       m_count_nvehbsln_per_messagetype[messagetype]++;
       m_avg_nvehbsln_per_messagetype[messagetype] += (nvehbsln-m_avg_nvehbsln_per_messagetype[messagetype]) / static_cast<double>(m_count_nvehbsln_per_messagetype[messagetype]);
 
-      PRR = (double) m_packetbuff_map[buf].x/nvehbsln;
+      PRR = (double) record.x/nvehbsln;
 
       if(PRR>1) {
-          std::cerr << "Value of X: " << (double) m_packetbuff_map[buf].x << " - value of Y: " << (double) (m_packetbuff_map[buf].nodeList.size()-1.0) << std::endl;
+          std::cerr << "Value of X: " << (double) record.x << " - value of Y: " << (double) (record.nodeList.size()-1.0) << std::endl;
           NS_FATAL_ERROR ("Error. Computed a PRR greater than 1. This is not possible. Please check how you configured your simulation and the MetricSupervisor.");
         }
 
@@ -431,13 +624,248 @@ MetricSupervisor::computePRR(std::string buf)
       m_count_per_messagetype[messagetype]++;
       m_avg_PRR_per_messagetype[messagetype] += (PRR-m_avg_PRR_per_messagetype[messagetype])/m_count_per_messagetype[messagetype];
 
-      m_packetbuff_map.erase(buf);
-      m_id_map.erase(buf);
-      m_messagetype_map.erase(buf);
+      // PRR vs distance: the sender itself (at distance 0) is not one of the expected receivers
+      std::vector<distanceBin_t> &bins = m_prr_distance[messagetype];
+      bool sender_skipped = false;
+      for(size_t i = 0; i < record.nodeList.size(); i++)
+        {
+          if(!sender_skipped && record.nodeList[i] == senderID)
+            {
+              sender_skipped = true;
+              continue;
+            }
+          if(bins.size() <= record.nodeBins[i])
+            {
+              bins.resize(record.nodeBins[i] + 1);
+            }
+          bins[record.nodeBins[i]].expected++;
+        }
+      for(uint16_t bin : record.rxBins)
+        {
+          if(bins.size() <= bin)
+            {
+              bins.resize(bin + 1);
+            }
+          bins[bin].received++;
+        }
+    }
+
+  // Some time has passed -> free the packet record
+  m_packet_map.erase(it);
+}
+
+size_t
+MetricSupervisor::latencyBucket(double latency_s)
+{
+  if(!(latency_s >= LATENCY_HIST_LOW_S))
+    {
+      return 0;
+    }
+
+  double pos = std::log10(latency_s/LATENCY_HIST_LOW_S)*LATENCY_HIST_BUCKETS_PER_DECADE;
+  size_t bucket = pos >= LATENCY_HIST_SIZE-1 ? LATENCY_HIST_SIZE-1 : static_cast<size_t>(pos)+1;
+
+  // Correct the rounding errors of log10() close to the bucket edges
+  while(bucket > 1 && latency_s < latencyBucketLow(bucket))
+    {
+      bucket--;
+    }
+  while(bucket < LATENCY_HIST_SIZE-1 && latency_s >= latencyBucketLow(bucket+1))
+    {
+      bucket++;
+    }
+
+  return bucket;
+}
+
+double
+MetricSupervisor::latencyBucketLow(size_t bucket)
+{
+  if(bucket == 0)
+    {
+      return 0.0;
+    }
+
+  return LATENCY_HIST_LOW_S*std::pow(10.0, static_cast<double>(bucket-1)/LATENCY_HIST_BUCKETS_PER_DECADE);
+}
+
+double
+MetricSupervisor::latencyQuantile(const latencyHistogram_t &hist, double pct)
+{
+  if(hist.n == 0)
+    {
+      return NAN;
+    }
+
+  // Linear interpolation inside the bucket holding the requested rank, as np.percentile() does on the raw samples
+  double rank = pct/100.0*static_cast<double>(hist.n-1);
+  uint64_t cum = 0;
+  size_t bucket = 0;
+  for(bucket = 0; bucket < hist.counts.size()-1; bucket++)
+    {
+      if(static_cast<double>(cum+hist.counts[bucket]) > rank)
+        {
+          break;
+        }
+      cum += hist.counts[bucket];
+    }
+
+  if(hist.counts[bucket] == 0)
+    {
+      return hist.max_s;
+    }
+
+  double lo = std::max(latencyBucketLow(bucket), hist.min_s);
+  double hi = bucket+1 < hist.counts.size() ? std::min(latencyBucketLow(bucket+1), hist.max_s) : hist.max_s;
+  double frac = (rank-static_cast<double>(cum)+0.5)/static_cast<double>(hist.counts[bucket]);
+
+  return lo + std::min(std::max(frac, 0.0), 1.0)*std::max(hi-lo, 0.0);
+}
+
+std::string
+MetricSupervisor::messageTypeName(messageType_e messagetype)
+{
+  switch(messagetype)
+    {
+      case messageType_denm: return "DENM";
+      case messageType_cam: return "CAM";
+      case messageType_poi: return "POI";
+      case messageType_spatem: return "SPATEM";
+      case messageType_mapem: return "MAPEM";
+      case messageType_ivim: return "IVIM";
+      case messageType_ev_rsr: return "EV-RSR";
+      case messageType_tistpgtransaction: return "TISTPGTRANSACTION";
+      case messageType_srem: return "SREM";
+      case messageType_ssem: return "SSEM";
+      case messageType_evcsn: return "EVCSN";
+      case messageType_saem: return "SAEM";
+      case messageType_rtcmem: return "RTCMEM";
+      case messageType_cpm: return "CPM";
+      case messageType_imzm: return "IMZM";
+      case messageType_vam: return "VAM";
+      case messageType_dsm: return "DSM";
+      case messageType_pcim: return "PCIM";
+      case messageType_pcvm: return "PCVM";
+      case messageType_mcm: return "MCM";
+      case messageType_pam: return "PAM";
+      case messageType_cem: return "CEM";
+      case messageType_GNbeacon: return "GNbeacon";
+      default: return "unsupported";
     }
+}
+
+std::string
+MetricSupervisor::stationTypeName(StationType_t stationtype)
+{
+  switch(stationtype)
+    {
+      case StationType_pedestrian: return "pedestrian";
+      case StationType_cyclist: return "cyclist";
+      case StationType_moped: return "moped";
+      case StationType_motorcycle: return "motorcycle";
+      case StationType_passengerCar: return "passengerCar";
+      case StationType_bus: return "bus";
+      case StationType_lightTruck: return "lightTruck";
+      case StationType_heavyTruck: return "heavyTruck";
+      case StationType_trailer: return "trailer";
+      case StationType_specialVehicle: return "specialVehicle";
+      case StationType_tram: return "tram";
+      case StationType_lightVruVehicle: return "lightVruVehicle";
+      case StationType_animal: return "animal";
+      case StationType_roadSideUnit: return "roadSideUnit";
+      default: return "unknown";
+    }
+}
+
+double
+MetricSupervisor::getLatencyPercentile_messagetype(messageType_e messagetype, double pct)
+{
+  // Merge the histograms of all the sender station types
+  latencyHistogram_t merged;
+  merged.counts.assign(LATENCY_HIST_SIZE, 0);
+
+  for(const auto &entry : m_latency_hist)
+    {
+      if(entry.first.first != messagetype)
+        {
+          continue;
+        }
+      for(size_t i = 0; i < merged.counts.size(); i++)
+        {
+          merged.counts[i] += entry.second.counts[i];
+        }
+      merged.n += entry.second.n;
+      merged.total_s += entry.second.total_s;
+      merged.min_s = std::min(merged.min_s, entry.second.min_s);
+      merged.max_s = std::max(merged.max_s, entry.second.max_s);
+    }
+
+  return latencyQuantile(merged, pct)*1000.0;
+}
 
-  // Some time has passed -> remove the packet from the latency map too
-  m_latency_map.erase(buf);
+void
+MetricSupervisor::writeStreamingMetrics(std::string prefix)
+{
+  NS_LOG_FUNCTION(this);
+
+  std::ofstream hist_file(prefix + "-metsup-latency.csv");
+  std::ofstream summary_file(prefix + "-metsup-latency-summary.csv");
+  std::ofstream prr_file(prefix + "-metsup-prr-distance.csv");
+
+  if(!hist_file.is_open() || !summary_file.is_open() || !prr_file.is_open())
+    {
+      NS_LOG_ERROR("Cannot write the MetricSupervisor streaming metrics with prefix " << prefix);
+      return;
+    }
+
+  hist_file << "msg_type,station_type,bucket,bucket_low_s,bucket_high_s,count" << std::endl;
+  summary_file << "msg_type,station_type,samples,sum_s,mean_s,min_s,max_s,p50_s,p90_s,p95_s,p99_s" << std::endl;
+  hist_file << std::setprecision(10);
+  summary_file << std::setprecision(10);
+
+  for(const auto &entry : m_latency_hist)
+    {
+      const latencyHistogram_t &hist = entry.second;
+      std::string msg_type = messageTypeName(entry.first.first);
+      std::string station_type = stationTypeName(entry.first.second);
+
+      for(size_t bucket = 0; bucket < hist.counts.size(); bucket++)
+        {
+          if(hist.counts[bucket] == 0)
+            {
+              continue;
+            }
+
+          // The last bucket is open-ended: its upper edge is the largest sample
+          double high = bucket+1 < hist.counts.size() ? latencyBucketLow(bucket+1) : hist.max_s;
+          hist_file << msg_type << "," << station_type << "," << bucket << "," << latencyBucketLow(bucket) << "," << high << "," << hist.counts[bucket] << "\n";
+        }
+
+      summary_file << msg_type << "," << station_type << "," << hist.n << "," << hist.total_s << "," << hist.total_s/static_cast<double>(hist.n) << ","
+                   << hist.min_s << "," << hist.max_s << "," << latencyQuantile(hist, 50) << "," << latencyQuantile(hist, 90) << ","
+                   << latencyQuantile(hist, 95) << "," << latencyQuantile(hist, 99) << "\n";
+    }
+
+  prr_file << "msg_type,distance_low_m,distance_high_m,expected,received,prr" << std::endl;
+
+  for(const auto &entry : m_prr_distance)
+    {
+      std::string msg_type = messageTypeName(entry.first);
+
+      for(size_t bin = 0; bin < entry.second.size(); bin++)
+        {
+          const distanceBin_t &counters = entry.second[bin];
+          if(counters.expected == 0)
+            {
+              continue;
+            }
+
+          double low = bin*m_prr_distance_bin_m;
+          double high = std::min((bin+1)*m_prr_distance_bin_m, m_baseline_m);
+          prr_file << msg_type << "," << low << "," << std::max(high, low) << "," << counters.expected << "," << counters.received << ","
+                   << static_cast<double>(counters.received)/static_cast<double>(counters.expected) << "\n";
+        }
+    }
 }
 
 bool IsChannelBusy(WifiPhyState state) {
@@ -520,7 +948,7 @@ MetricSupervisor::checkCBR ()
   std::unordered_map<std::string, Time> nextTimeToAddNr;
   if(m_traci_ptr != nullptr)
     {
-      std::map<std::basic_string<char>, std::pair<StationType_t, Ptr<Node>>> nodes = m_traci_ptr->get_NodeMap ();
+      const std::map<std::basic_string<char>, std::pair<StationType_t, Ptr<Node>>> &nodes = m_traci_ptr->get_NodeMap ();
 
       for (auto it = nodes.begin (); it != nodes.end (); ++it)
         {
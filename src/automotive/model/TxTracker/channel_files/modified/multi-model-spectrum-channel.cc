@@ -244,6 +244,10 @@ MultiModelSpectrumChannel::StartTx (Ptr<SpectrumSignalParameters> txParams)
   NS_LOG_LOGIC ("converter map size: " << txInfoIteratorerator->second.m_spectrumConverterMap.size ());
   NS_LOG_LOGIC ("converter map first element: " << txInfoIteratorerator->second.m_spectrumConverterMap.begin ()->first);
 
+  // The cross-technology interference is added once per transmission, not once per receiver
+  auto& tracker = TxTracker::GetInstance();
+  tracker.AddInterferenceFromCV2X(txParams->txPhy->GetDevice(), txParams->psd, m_propagationLoss, txParams->duration);
+
   for (RxSpectrumModelInfoMap_t::const_iterator rxInfoIterator = m_rxSpectrumModelInfoMap.begin ();
        rxInfoIterator != m_rxSpectrumModelInfoMap.end ();
        ++rxInfoIterator)
@@ -358,11 +362,6 @@ MultiModelSpectrumChannel::StartTx (Ptr<SpectrumSignalParameters> txParams)
                     }
                 }
 
-              
-              Ptr<SpectrumValue> wifiSignal = Create<SpectrumValue>((this->m_txSpectrumModelInfoMap.begin())->second.m_txSpectrumModel);
-              auto& tracker = TxTracker::GetInstance();
-              tracker.AddInterferenceFromCV2X(txParams->txPhy->GetDevice(), txParams->psd, m_propagationLoss, txParams->duration);
-
               if (rxNetDevice)
                 {
                   // the receiver has a NetDevice, so we expect that it is attached to a Node
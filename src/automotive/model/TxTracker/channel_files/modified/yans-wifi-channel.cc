@@ -89,6 +89,11 @@ YansWifiChannel::Send (Ptr<YansWifiPhy> sender, Ptr<const WifiPpdu> ppdu, double
   NS_LOG_FUNCTION (this << sender << ppdu << txPowerDbm);
   Ptr<MobilityModel> senderMobility = sender->GetMobility ();
   NS_ASSERT (senderMobility != 0);
+
+  // The cross-technology interference is added once per transmission, not once per receiver
+  auto& tracker = TxTracker::GetInstance();
+  tracker.AddInterferenceFrom11p (sender, m_loss, m_delay, ppdu->GetTxDuration ());
+
   for (PhyList::const_iterator i = m_phyList.begin (); i != m_phyList.end (); i++)
     {
       if (sender != (*i))
@@ -116,8 +121,6 @@ YansWifiChannel::Send (Ptr<YansWifiPhy> sender, Ptr<const WifiPpdu> ppdu, double
               dstNode = dstNetDevice->GetNode ()->GetId ();
             }
 
-          auto& tracker = TxTracker::GetInstance();
-          tracker.AddInterferenceFrom11p (sender, receiverMobility, m_loss, m_delay, copy->GetTxDuration());
           Simulator::ScheduleWithContext (dstNode,
                                           delay, &YansWifiChannel::Receive,
                                           (*i), copy, rxPowerDbm);
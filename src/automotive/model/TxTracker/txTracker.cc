@@ -25,6 +25,14 @@ namespace ns3 {
 // Define the logging component for this module
 NS_LOG_COMPONENT_DEFINE ("TxTracker");
 
+namespace {
+  // Helper function to get the key of the grid cell (cx,cy)
+  int64_t TxTracker_gridCell (int64_t cx, int64_t cy)
+  {
+    return static_cast<int64_t> ((static_cast<uint64_t> (cx) << 32) ^ (static_cast<uint64_t> (cy) & 0xFFFFFFFFULL));
+  }
+}
+
 // Helper function to convert dBm to Watts
 double DbmToW (double dbm)
 {
@@ -67,8 +75,10 @@ TxTracker::Insert11pNodes (std::vector<std::tuple<std::string, uint8_t, Ptr<Wifi
           nodeID,
           netDevice,
           std::pow(10, (wifiPhy->GetTxPowerStart() - 30) / 10), // Convert transmission power from dBm to Watts
+          nullptr,
       };
     }
+  m_index11p.builtAt = Seconds (-1);
 }
 
 // Insert NR (New Radio) nodes into the tracker
@@ -93,9 +103,11 @@ TxTracker::InsertNrNodes (std::vector<std::tuple<std::string, uint8_t, Ptr<NrUeN
       m_txMapNr[vehID] = txParametersNR {
           nodeID,
           netDevice,
-          rbBand
+          rbBand,
+          nullptr
       };
     }
+  m_indexNr.builtAt = Seconds (-1);
 }
 
 // Insert LTE nodes into the tracker
@@ -125,98 +137,164 @@ TxTracker::InsertLteNodes (std::vector<std::tuple<std::string, uint8_t, Ptr<cv2x
     }
 } */
 
-// Add interference from CV2X signals
+// Read the positions of the nodes of a technology
+template <typename T>
 void
-TxTracker::AddInterferenceFromCV2X (Ptr<NetDevice> netDevice, Ptr<SpectrumValue> signal, Ptr<PropagationLossModel> propagationLoss, Time duration)
+TxTracker::UpdateIndex (interferenceIndex &index, std::unordered_map<std::string, T> &txMap)
+{
+  // The positions are read at the first transmission of each time instant, and reused by the other ones
+  if (index.builtAt == Simulator::Now () && index.vehIDs.size () == txMap.size ())
+    {
+      return;
+    }
+
+  index.vehIDs.clear ();
+  index.mobilities.clear ();
+  index.positions.clear ();
+  index.grid.clear ();
+  for (auto it = txMap.begin (); it != txMap.end (); ++it)
+    {
+      if (it->second.mobility == nullptr)
+        {
+          it->second.mobility = it->second.netDevice->GetNode ()->GetObject<ConstantPositionMobilityModel> ();
+        }
+      Vector position = it->second.mobility->GetPosition ();
+
+      if (m_interferenceRange > 0)
+        {
+          int64_t cx = static_cast<int64_t> (std::floor (position.x / m_interferenceRange));
+          int64_t cy = static_cast<int64_t> (std::floor (position.y / m_interferenceRange));
+          index.grid[TxTracker_gridCell (cx, cy)].push_back (index.vehIDs.size ());
+        }
+      index.vehIDs.push_back (it->first);
+      index.mobilities.push_back (it->second.mobility);
+      index.positions.push_back (position);
+    }
+  index.builtAt = Simulator::Now ();
+}
+
+// Get the nodes within the interference range of a position
+void
+TxTracker::QueryIndex (const interferenceIndex &index, const Vector &position, std::vector<uint32_t> &candidates)
 {
-  // We need to determine the technology type of the transmitting node
-  bool found = false;
-  std::string technologyType;
-  for (auto it = m_txMapNr.begin(); it != m_txMapNr.end(); ++it)
+  candidates.clear ();
+  if (m_interferenceRange <= 0)
     {
-      if (it->second.netDevice == DynamicCast<NrUeNetDevice>(netDevice))
+      for (uint32_t i = 0; i < index.vehIDs.size (); i++)
         {
-          found = true;
-          technologyType = "Nr";
-          break;
+          candidates.push_back (i);
         }
+      return;
     }
-  /* if (!found)
+
+  // The cells are as large as the interference range: only the cell of the position and its neighbours can be within range
+  int64_t cx = static_cast<int64_t> (std::floor (position.x / m_interferenceRange));
+  int64_t cy = static_cast<int64_t> (std::floor (position.y / m_interferenceRange));
+  for (int64_t x = cx - 1; x <= cx + 1; x++)
     {
-      for (auto it = m_txMapLte.begin(); it != m_txMapLte.end(); ++it)
+      for (int64_t y = cy - 1; y <= cy + 1; y++)
         {
-          if (it->second.netDevice == DynamicCast<cv2x_LteUeNetDevice>(netDevice))
+          auto cell = index.grid.find (TxTracker_gridCell (x, y));
+          if (cell == index.grid.end ())
             {
-              found = true;
-              technologyType = "Lte";
-              break;
+              continue;
+            }
+          for (uint32_t i : cell->second)
+            {
+              if (CalculateDistance (index.positions[i], position) <= m_interferenceRange)
+                {
+                  candidates.push_back (i);
+                }
             }
         }
-    } */
+    }
+}
 
-  // NS_ASSERT_MSG (found, "NetDevice not found in TxTracker.");
+// Check whether the 11p and NR bands overlap
+bool
+TxTracker::BandsOverlap11pNr ()
+{
+  double wifiLowerFreq = m_centralFrequency11p - m_bandWidth11p / 2;
+  double wifiUpperFreq = m_centralFrequency11p + m_bandWidth11p / 2;
+  double nrLowerFreq = m_centralFrequencyNr - m_bandWidthNr / 2;
+  double nrUpperFreq = m_centralFrequencyNr + m_bandWidthNr / 2;
+  return std::max(wifiLowerFreq, nrLowerFreq) <= std::min(wifiUpperFreq, nrUpperFreq);
+}
 
-  if (!m_txMap11p.empty())
+// Get the bins of a NR spectrum falling in the 11p band, computed once for each number of bins
+const std::vector<uint32_t> &
+TxTracker::GetOverlappingNrBins (size_t numBins)
+{
+  auto cached = m_overlappingNrBins.find (numBins);
+  if (cached != m_overlappingNrBins.end ())
     {
-      double wifiCentralFreq = m_centralFrequency11p;
-      double wifiBandwidth = m_bandWidth11p;
-      // double cCentralFrequency = technologyType == "Nr" ? m_centralFrequencyNr : m_centralFrequencyLte;
-      double cCentralFrequency = m_centralFrequencyNr;
-      // double cBandwidth = technologyType == "Nr" ? m_bandWidthNr : m_bandWidthLte;
-      double cBandwidth = m_bandWidthNr;
-
-      double cLowerFreq = cCentralFrequency - cBandwidth / 2;
-      double cUpperFreq = cCentralFrequency + cBandwidth / 2;
-      double wifiLowerFreq = wifiCentralFreq - wifiBandwidth / 2;
-      double wifiUpperFreq = wifiCentralFreq + wifiBandwidth / 2;
-      bool overlap = std::max(cLowerFreq, wifiLowerFreq) <= std::min(cUpperFreq, wifiUpperFreq);
+      return cached->second;
+    }
 
-      if (overlap)
+  double wifiLowerFreq = m_centralFrequency11p - m_bandWidth11p / 2;
+  double wifiUpperFreq = m_centralFrequency11p + m_bandWidth11p / 2;
+  double nrLowerFreq = m_centralFrequencyNr - m_bandWidthNr / 2;
+  double freqPerRb = m_bandWidthNr / numBins;
+
+  std::vector<uint32_t> &bins = m_overlappingNrBins[numBins];
+  for (size_t i = 0; i < numBins; i++)
+    {
+      double subBandFreq = nrLowerFreq + (i + 1) * freqPerRb;
+      if (subBandFreq >= wifiLowerFreq && subBandFreq <= wifiUpperFreq)
         {
-          // double freqPerRb = technologyType == "Nr" ? m_bandWidthNr / signal->GetValuesN() : m_bandWidthLte / signal->GetValuesN();
-          double freqPerRb = m_bandWidthNr / signal->GetValuesN();
-          Ptr<MobilityModel> cMobility = netDevice->GetNode()->GetObject<ConstantPositionMobilityModel>();
+          bins.push_back (i);
+        }
+    }
+  return bins;
+}
 
-          for (auto it = m_txMap11p.begin(); it != m_txMap11p.end(); ++it)
+// Add interference from CV2X signals
+void
+TxTracker::AddInterferenceFromCV2X (Ptr<NetDevice> netDevice, Ptr<SpectrumValue> signal, Ptr<PropagationLossModel> propagationLoss, Time duration)
+{
+  // Only NR transmitters are tracked while the LTE support is disabled, so the technology of netDevice is not looked up
+
+  // The power falling in the 11p band depends only on the transmitted signal: compute it once for all the 11p nodes
+  double powerW = 0.0;
+  if (!m_txMap11p.empty() && BandsOverlap11pNr ())
+    {
+      double freqPerRb = m_bandWidthNr / signal->GetValuesN();
+      for (uint32_t i : GetOverlappingNrBins (signal->GetValuesN()))
+        {
+          if ((*signal)[i] > 0)
             {
-              Ptr<YansWifiPhy> wifiPhy = DynamicCast<YansWifiPhy>(it->second.netDevice->GetPhy());
-              Ptr<MobilityModel> wifiMobility = it->second.netDevice->GetNode()->GetObject<ConstantPositionMobilityModel>();
-              uint8_t j = 1;
-              std::vector<uint8_t> indexesRB;
-              double powerW = 0.0;
-              for (auto it2 = signal->ValuesBegin(); it2 != signal->ValuesEnd(); ++it2)
-                {
-                  if ((*it2) > 0)
-                    {
-                      double subBandFreq = cLowerFreq + j * freqPerRb;
-                      if (subBandFreq >= wifiLowerFreq && subBandFreq <= wifiUpperFreq)
-                        {
-                          powerW += (*it2) * freqPerRb;
-                        }
-                    }
-                }
+              powerW += (*signal)[i] * freqPerRb;
+            }
+        }
+    }
 
-              // Calculate interference delay and received power
-              if (powerW == 0.0)
-                {
-                  continue;
-                }
+  if (powerW > 0.0)
+    {
+      double powerDbm = WToDbm(powerW);
+      Ptr<MobilityModel> cMobility = netDevice->GetNode()->GetObject<ConstantPositionMobilityModel>();
+      UpdateIndex (m_index11p, m_txMap11p);
+      std::vector<uint32_t> candidates;
+      QueryIndex (m_index11p, cMobility->GetPosition (), candidates);
 
-              double powerDbm = WToDbm(powerW);
-              double pathLoss = propagationLoss->CalcRxPower(0, wifiMobility, cMobility);
-              double finalInterferencePowerDbm = powerDbm - std::abs(pathLoss);
-              double finalInterferencePowerW = DbmToW(finalInterferencePowerDbm);
+      for (uint32_t c : candidates)
+        {
+          Ptr<YansWifiPhy> wifiPhy = DynamicCast<YansWifiPhy>(m_txMap11p[m_index11p.vehIDs[c]].netDevice->GetPhy());
+          Ptr<MobilityModel> wifiMobility = m_index11p.mobilities[c];
 
-              if ((finalInterferencePowerDbm + wifiPhy->GetRxGain ()) < wifiPhy->GetRxSensitivity ())
-                {
-                  continue;
-                }
-              else
-                {
-                  RxPowerWattPerChannelBand rxInterference = RxPowerWattPerChannelBand ();
-                  rxInterference.insert ({std::make_pair (0, 0), finalInterferencePowerW});
-                  wifiPhy->GetInterferenceHelper()->AddForeignSignal(duration, rxInterference);
-                }
+          // Calculate the received interference power
+          double pathLoss = propagationLoss->CalcRxPower(0, wifiMobility, cMobility);
+          double finalInterferencePowerDbm = powerDbm - std::abs(pathLoss);
+          double finalInterferencePowerW = DbmToW(finalInterferencePowerDbm);
+
+          if ((finalInterferencePowerDbm + wifiPhy->GetRxGain ()) < wifiPhy->GetRxSensitivity ())
+            {
+              continue;
+            }
+          else
+            {
+              RxPowerWattPerChannelBand rxInterference = RxPowerWattPerChannelBand ();
+              rxInterference.insert ({std::make_pair (0, 0), finalInterferencePowerW});
+              wifiPhy->GetInterferenceHelper()->AddForeignSignal(duration, rxInterference);
             }
         }
     }
@@ -330,59 +408,46 @@ TxTracker::AddInterferenceFromCV2X (Ptr<NetDevice> netDevice, Ptr<SpectrumValue>
 
 // Add interference from NR signals to 80211p signals
 void
-TxTracker::AddInterferenceFrom11p (Ptr<YansWifiPhy> sender, Ptr<MobilityModel> receiverMobility, Ptr<PropagationLossModel> propagationLoss, Ptr<PropagationDelayModel> propagationDelay, Time duration)
+TxTracker::AddInterferenceFrom11p (Ptr<YansWifiPhy> sender, Ptr<PropagationLossModel> propagationLoss, Ptr<PropagationDelayModel> propagationDelay, Time duration)
 {
-  if(!m_txMapNr.empty())
+  if(!m_txMapNr.empty() && BandsOverlap11pNr ())
     {
-      double wifiLowerFreq = m_centralFrequency11p - m_bandWidth11p / 2;
-      double wifiUpperFreq = m_centralFrequency11p + m_bandWidth11p / 2;
-      double nrLowerFreq = m_centralFrequencyNr - m_bandWidthNr / 2;
-      double nrUpperFreq = m_centralFrequencyNr + m_bandWidthNr / 2;
-      bool overlap = std::max(wifiLowerFreq, nrLowerFreq) <= std::min(wifiUpperFreq, nrUpperFreq);
+      Ptr<MobilityModel> wifiMobility = sender->GetMobility();
+      UpdateIndex (m_indexNr, m_txMapNr);
+      std::vector<uint32_t> candidates;
+      QueryIndex (m_indexNr, wifiMobility->GetPosition (), candidates);
 
-      if (overlap)
+      for (uint32_t c : candidates)
         {
-          Ptr<MobilityModel> wifiMobility = sender->GetMobility();
-          for (auto it = m_txMapNr.begin (); it != m_txMapNr.end (); ++it)
-            {
-              double interferencePower = 0.0;
-              Ptr<NrSpectrumPhy> nrPhy = it->second.netDevice->GetPhy (0)->GetSpectrumPhy ();
+          // Calculate interference for overlapping frequency bands
+          Ptr<MobilityModel> c1Mobility = m_indexNr.mobilities[c];
+          double pathLoss = propagationLoss->CalcRxPower (0, c1Mobility, wifiMobility);
 
-              // Create an interference signal compatible with the Nr Phy
-              Ptr<SpectrumValue> interferenceSignal = Create<SpectrumValue> (nrPhy->GetRxSpectrumModel());
+          if (std::abs(pathLoss) > m_noisePowerThreshold)
+            {
+              continue;
+            }
 
-              // Calculate interference for overlapping frequency bands
-              Ptr<MobilityModel> c1Mobility = it->second.netDevice->GetNode()->GetObject<ConstantPositionMobilityModel>();
-              double pathLoss = propagationLoss->CalcRxPower (0, c1Mobility, wifiMobility);
+          Ptr<NrSpectrumPhy> nrPhy = m_txMapNr[m_indexNr.vehIDs[c]].netDevice->GetPhy (0)->GetSpectrumPhy ();
 
-              if (std::abs(pathLoss) > m_noisePowerThreshold)
-                {
-                  continue;
-                }
+          // Create an interference signal compatible with the Nr Phy
+          Ptr<SpectrumValue> interferenceSignal = Create<SpectrumValue> (nrPhy->GetRxSpectrumModel());
 
-              Time interfDuration = duration + propagationDelay->GetDelay (c1Mobility, wifiMobility);
-
-              uint8_t j = 0;
-              double noisePowerDbm = sender->GetTxPowerStart() - std::abs(pathLoss);
-              double noisePowerW = DbmToW (noisePowerDbm);
-              double noisePowerPerHz = noisePowerW / m_bandWidthNr;
-              double freqPerRb = m_bandWidthNr / interferenceSignal->GetValuesN();
-              for (uint8_t i = 0; i < interferenceSignal->GetValuesN(); ++i)
-                {
-                  double subBandFreq = nrLowerFreq + (i+1) * freqPerRb;
-                  if (subBandFreq >= wifiLowerFreq && subBandFreq <= wifiUpperFreq)
-                    {
-                      (*interferenceSignal)[j] = noisePowerPerHz * freqPerRb;
-                    }
-                  j += 1;
-                }
-
-              // nrPhy->GetNrInterference()->AddSignal (interferenceSignal, interfDuration);
-              nrPhy->GetDataInterferencePointer()->AddSignal (interferenceSignal, interfDuration);
-              nrPhy->GetSlInterferencePointer()->AddSignal (interferenceSignal, interfDuration);
-              nrPhy->GetCtrlInterferencePointer()->AddSignal (interferenceSignal, interfDuration);
+          Time interfDuration = duration + propagationDelay->GetDelay (c1Mobility, wifiMobility);
 
+          double noisePowerDbm = sender->GetTxPowerStart() - std::abs(pathLoss);
+          double noisePowerW = DbmToW (noisePowerDbm);
+          double noisePowerPerHz = noisePowerW / m_bandWidthNr;
+          double freqPerRb = m_bandWidthNr / interferenceSignal->GetValuesN();
+          for (uint32_t i : GetOverlappingNrBins (interferenceSignal->GetValuesN()))
+            {
+              (*interferenceSignal)[i] = noisePowerPerHz * freqPerRb;
             }
+
+          // nrPhy->GetNrInterference()->AddSignal (interferenceSignal, interfDuration);
+          nrPhy->GetDataInterferencePointer()->AddSignal (interferenceSignal, interfDuration);
+          nrPhy->GetSlInterferencePointer()->AddSignal (interferenceSignal, interfDuration);
+          nrPhy->GetCtrlInterferencePointer()->AddSignal (interferenceSignal, interfDuration);
         }
     }
 
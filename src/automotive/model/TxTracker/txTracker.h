@@ -55,6 +55,7 @@ namespace ns3 {
       uint8_t nodeID; // Node ID
       Ptr<WifiNetDevice> netDevice; // Pointer to the WifiNetDevice
       double txPower_W; // Transmission power in watts
+      Ptr<MobilityModel> mobility; // Mobility model of the node, looked up on first use
     } txParameters11p;
 
     // Structure to hold NR transmission parameters
@@ -63,6 +64,7 @@ namespace ns3 {
       uint8_t nodeID; // Node ID
       Ptr<NrUeNetDevice> netDevice; // Pointer to the NrUeNetDevice
       double rbBandwidth; // Resource block bandwidth
+      Ptr<MobilityModel> mobility; // Mobility model of the node, looked up on first use
     } txParametersNR;
 
     // Structure to hold LTE transmission parameters
@@ -89,6 +91,7 @@ namespace ns3 {
       m_centralFrequency11p = frequency11p_Hz;
       m_centralFrequencyNr = frequencyNr_Hz;
       // m_centralFrequencyLte = frequencyLte_Hz;
+      m_overlappingNrBins.clear ();
     };
   
     // Method to set the bandwidths for 11p, NR, and LTE
@@ -98,15 +101,26 @@ namespace ns3 {
       m_bandWidth11p = band11p_Hz;
       m_bandWidthNr = bandNr_Hz;
       // m_bandWidthLte = bandLte_Hz;
+      m_overlappingNrBins.clear ();
+    };
+
+    // Method to set the distance beyond which the nodes of the other technology are not considered as interfered
+    // (0 or less, the default, evaluates all of them)
+    void
+    SetInterferenceRange (double range_m)
+    {
+      m_interferenceRange = range_m;
+      m_index11p.builtAt = Seconds (-1);
+      m_indexNr.builtAt = Seconds (-1);
     };
   
-    // Method to add interference for NR signals
+    // Method to add interference for NR signals (to be called once per transmission)
     void
     AddInterferenceFromCV2X (Ptr<NetDevice> netDevice, Ptr<SpectrumValue> signal, Ptr<PropagationLossModel> propagationLoss, Time duration);
   
-    // Method to add interference for 11p signals
+    // Method to add interference for 11p signals (to be called once per transmission)
     void
-    AddInterferenceFrom11p (Ptr<YansWifiPhy> sender, Ptr<MobilityModel> receiverMobility,
+    AddInterferenceFrom11p (Ptr<YansWifiPhy> sender,
                         Ptr<PropagationLossModel> propagationLoss,
                         Ptr<PropagationDelayModel> propagationDelay,
                         Time duration);
@@ -124,6 +138,29 @@ namespace ns3 {
     // Delete assignment operator
     TxTracker& operator = (const TxTracker&) = delete;
 
+    // Structure to hold the positions of the nodes of one technology, indexed on a grid of cells as large as the interference range
+    typedef struct interferenceIndex
+    {
+      Time builtAt = Seconds (-1); // Simulation time at which the positions were read
+      std::vector<std::string> vehIDs; // Vehicle ID of each node
+      std::vector<Ptr<MobilityModel>> mobilities; // Mobility model of each node
+      std::vector<Vector> positions; // Position of each node
+      std::unordered_map<int64_t, std::vector<uint32_t>> grid; // Key: grid cell, value: indices of the nodes in the cell
+    } interferenceIndex;
+
+    // Method to read the positions of the nodes of "txMap" into "index", once per simulation time instant
+    template <typename T>
+    void UpdateIndex (interferenceIndex &index, std::unordered_map<std::string, T> &txMap);
+
+    // Method to get the indices of the nodes of "index" within the interference range of "position"
+    void QueryIndex (const interferenceIndex &index, const Vector &position, std::vector<uint32_t> &candidates);
+
+    // Method to check whether the 11p and NR bands overlap
+    bool BandsOverlap11pNr ();
+
+    // Method to get the indices of the bins of a NR spectrum with "numBins" bins falling in the 11p band
+    const std::vector<uint32_t> &GetOverlappingNrBins (size_t numBins);
+
     // Map to store 11p transmission parameters
     std::unordered_map<std::string, txParameters11p> m_txMap11p;
   
@@ -152,6 +189,16 @@ namespace ns3 {
     // double m_bandWidthLte;
 
     double m_noisePowerThreshold = 120;
+
+    // Distance beyond which no interference is added (0 or less: no limit)
+    double m_interferenceRange = 0.0;
+
+    // Positions of the 11p and NR nodes
+    interferenceIndex m_index11p;
+    interferenceIndex m_indexNr;
+
+    // Key: number of bins of a NR spectrum, value: indices of the bins falling in the 11p band
+    std::unordered_map<size_t, std::vector<uint32_t>> m_overlappingNrBins;
   };
 }
 
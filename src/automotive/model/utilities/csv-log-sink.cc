@@ -0,0 +1,416 @@
+/* -*- Mode:C++; c-file-style:"gnu"; indent-tabs-mode:nil; -*- */
+/*
+ * This program is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License version 2 as
+ * published by the Free Software Foundation;
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program; if not, write to the Free Software
+ * Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+ */
+
+#include "csv-log-sink.h"
+#include "ns3/log.h"
+#include <algorithm>
+#include <cstdlib>
+
+namespace ns3 {
+
+NS_LOG_COMPONENT_DEFINE ("CSVLogSink");
+
+namespace {
+  // Append the bytes of a number, in the byte order of the host
+  template <typename T>
+  void CSVLogSinkAppend (std::string &out, T value)
+  {
+    out.append (reinterpret_cast<const char *> (&value), sizeof (value));
+  }
+}
+
+CSVLogSink::~CSVLogSink ()
+{
+  for (uint32_t log = 0; log < m_logs.size (); log++)
+    {
+      Close (log);
+    }
+}
+
+uint32_t
+CSVLogSink::Open (const std::string &path, const std::string &header, const std::string &types)
+{
+  if (!m_terminate_set)
+    {
+      m_previous_terminate = std::set_terminate (&CSVLogSink::Terminate);
+      m_terminate_set = true;
+    }
+
+  uint32_t log;
+  if (!m_free_logs.empty ())
+    {
+      log = m_free_logs.back ();
+      m_free_logs.pop_back ();
+    }
+  else
+    {
+      log = m_logs.size ();
+      m_logs.emplace_back ();
+    }
+
+  csvLog_t &csv_log = m_logs[log];
+  csv_log.path = path;
+  csv_log.file = std::fopen (path.c_str (), "w");
+  if (csv_log.file == nullptr)
+    {
+      NS_LOG_ERROR ("Cannot create the CSV log file " << path << ": its rows are lost.");
+    }
+  else
+    {
+      // The rows are buffered by the sink and written with a single call at each flush
+      std::setvbuf (csv_log.file, nullptr, _IONBF, 0);
+    }
+  csv_log.accounted_size = 0;
+  csv_log.open = true;
+  csv_log.rows = 0;
+  csv_log.columns_size = 0;
+  csv_log.field = 0;
+  csv_log.field_kind = 0;
+  csv_log.field_text.clear ();
+  csv_log.columns.clear ();
+
+  // The header is written at the first flush, together with the rows added in the meantime
+  if (types.empty ())
+    {
+      csv_log.buffer = header + "\n";
+    }
+  else
+    {
+      csv_log.buffer.assign ("CSVCOLS1");
+      CSVLogSinkAppend (csv_log.buffer, static_cast<uint32_t> (types.size ()));
+      size_t name_start = 0;
+      for (char type : types)
+        {
+          NS_ASSERT_MSG (type == 'i' || type == 'u' || type == 'd' || type == 's', "Unknown CSV column type " << type);
+          NS_ASSERT_MSG (name_start <= header.size (), "More column types than columns in " << header);
+          size_t name_end = std::min (header.find (',', name_start), header.size ());
+          csv_log.buffer.push_back (type);
+          CSVLogSinkAppend (csv_log.buffer, static_cast<uint32_t> (name_end - name_start));
+          csv_log.buffer.append (header, name_start, name_end - name_start);
+          name_start = name_end + 1;
+
+          csv_log.columns.emplace_back ();
+          csv_log.columns.back ().type = type;
+        }
+      NS_ASSERT_MSG (name_start > header.size (), "Fewer column types than columns in " << header);
+    }
+  RowAdded (log);
+
+  return log;
+}
+
+void
+CSVLogSink::Close (uint32_t log)
+{
+  if (log >= m_logs.size () || !m_logs[log].open)
+    {
+      return;
+    }
+
+  csvLog_t &csv_log = m_logs[log];
+  Flush (csv_log);
+  if (csv_log.file != nullptr)
+    {
+      std::fclose (csv_log.file);
+      csv_log.file = nullptr;
+    }
+  csv_log.open = false;
+  std::string ().swap (csv_log.buffer);
+  std::vector<csvColumn_t> ().swap (csv_log.columns);
+  m_free_logs.push_back (log);
+}
+
+void
+CSVLogSink::FlushAll ()
+{
+  for (auto &log : m_logs)
+    {
+      if (log.open)
+        {
+          Flush (log);
+        }
+    }
+}
+
+void
+CSVLogSink::RowAdded (uint32_t log)
+{
+  csvLog_t &csv_log = m_logs[log];
+  size_t size = csv_log.buffer.size () + csv_log.columns_size;
+  m_buffered += size - csv_log.accounted_size;
+  csv_log.accounted_size = size;
+
+  if (m_buffered > m_buffer_size)
+    {
+      FlushAll ();
+    }
+}
+
+void
+CSVLogSink::AddValue (uint32_t log, int64_t value)
+{
+  csvLog_t &csv_log = m_logs[log];
+  if (StartNumber (csv_log))
+    {
+      csv_log.field_kind = 'i';
+      csv_log.field_int = value;
+    }
+  else
+    {
+      char str[24];
+      auto res = std::to_chars (str, str + sizeof (str), value);
+      csv_log.field_text.append (str, res.ptr - str);
+    }
+}
+
+void
+CSVLogSink::AddValue (uint32_t log, uint64_t value)
+{
+  csvLog_t &csv_log = m_logs[log];
+  if (StartNumber (csv_log))
+    {
+      csv_log.field_kind = 'u';
+      csv_log.field_uint = value;
+    }
+  else
+    {
+      char str[24];
+      auto res = std::to_chars (str, str + sizeof (str), value);
+      csv_log.field_text.append (str, res.ptr - str);
+    }
+}
+
+void
+CSVLogSink::AddValue (uint32_t log, double value)
+{
+  csvLog_t &csv_log = m_logs[log];
+  if (StartNumber (csv_log))
+    {
+      csv_log.field_kind = 'd';
+      csv_log.field_double = value;
+    }
+  else
+    {
+      char str[32];
+      csv_log.field_text.append (str, FormatDouble (str, value));
+    }
+}
+
+void
+CSVLogSink::AddText (uint32_t log, const char *text, size_t len)
+{
+  csvLog_t &csv_log = m_logs[log];
+  const char *end = text + len;
+  while (text < end)
+    {
+      const char *comma = static_cast<const char *> (std::memchr (text, ',', end - text));
+      const char *field_end = comma != nullptr ? comma : end;
+      if (field_end > text)
+        {
+          FieldToText (csv_log);
+          csv_log.field_text.append (text, field_end - text);
+        }
+      if (comma == nullptr)
+        {
+          break;
+        }
+      EndField (csv_log);
+      text = comma + 1;
+    }
+}
+
+void
+CSVLogSink::EndRow (uint32_t log)
+{
+  csvLog_t &csv_log = m_logs[log];
+  EndField (csv_log);
+  while (csv_log.field < csv_log.columns.size ())
+    {
+      EndField (csv_log);
+    }
+  csv_log.field = 0;
+  csv_log.rows++;
+}
+
+bool
+CSVLogSink::StartNumber (csvLog_t &log)
+{
+  // A number is kept as such only if it is the whole content of a numeric field
+  if (log.field_kind == 0 && log.field_text.empty () && log.field < log.columns.size ()
+      && log.columns[log.field].type != 's')
+    {
+      return true;
+    }
+  FieldToText (log);
+  return false;
+}
+
+void
+CSVLogSink::FieldToText (csvLog_t &log)
+{
+  char str[32];
+  switch (log.field_kind)
+    {
+    case 'i':
+      log.field_text.append (str, std::to_chars (str, str + sizeof (str), log.field_int).ptr - str);
+      break;
+    case 'u':
+      log.field_text.append (str, std::to_chars (str, str + sizeof (str), log.field_uint).ptr - str);
+      break;
+    case 'd':
+      log.field_text.append (str, FormatDouble (str, log.field_double));
+      break;
+    default:
+      break;
+    }
+  log.field_kind = 0;
+}
+
+void
+CSVLogSink::EndField (csvLog_t &log)
+{
+  // The fields beyond the last column are dropped
+  if (log.field < log.columns.size ())
+    {
+      csvColumn_t &column = log.columns[log.field];
+      size_t size_before = column.valid.size () + column.values.size () + column.offsets.size ();
+      bool valid;
+
+      if (column.type == 's')
+        {
+          valid = !log.field_text.empty ();
+          column.values.append (log.field_text);
+          CSVLogSinkAppend (column.offsets, static_cast<uint32_t> (column.values.size ()));
+        }
+      else
+        {
+          if (log.field_kind == 0 && !log.field_text.empty ())
+            {
+              // Text streamed into a numeric column: stored only if it is a number
+              const char *str = log.field_text.c_str ();
+              char *str_end = nullptr;
+              log.field_kind = column.type;
+              if (column.type == 'i')
+                {
+                  log.field_int = std::strtoll (str, &str_end, 10);
+                }
+              else if (column.type == 'u')
+                {
+                  log.field_uint = std::strtoull (str, &str_end, 10);
+                }
+              else
+                {
+                  log.field_double = std::strtod (str, &str_end);
+                }
+              if (str_end != str + log.field_text.size ())
+                {
+                  log.field_kind = 0;
+                }
+            }
+
+          double as_double = log.field_kind == 'i' ? static_cast<double> (log.field_int)
+                             : log.field_kind == 'u' ? static_cast<double> (log.field_uint)
+                             : log.field_kind == 'd' ? log.field_double : 0.0;
+          valid = log.field_kind != 0;
+          if (column.type == 'd')
+            {
+              CSVLogSinkAppend (column.values, valid ? as_double : 0.0);
+            }
+          else
+            {
+              uint64_t bits = 0;
+              if (log.field_kind == 'i')
+                {
+                  bits = static_cast<uint64_t> (log.field_int);
+                }
+              else if (log.field_kind == 'u')
+                {
+                  bits = log.field_uint;
+                }
+              else if (valid)
+                {
+                  // A double stored in an integer column is truncated, if it fits
+                  bool fits = column.type == 'i' ? (as_double >= -9.2e18 && as_double <= 9.2e18)
+                                                 : (as_double >= 0.0 && as_double <= 1.8e19);
+                  valid = fits;
+                  if (fits)
+                    {
+                      bits = column.type == 'i' ? static_cast<uint64_t> (static_cast<int64_t> (as_double))
+                                                : static_cast<uint64_t> (as_double);
+                    }
+                }
+              CSVLogSinkAppend (column.values, bits);
+            }
+        }
+
+      column.valid.push_back (valid ? 1 : 0);
+      log.columns_size += column.valid.size () + column.values.size () + column.offsets.size () - size_before;
+    }
+
+  log.field++;
+  log.field_kind = 0;
+  log.field_text.clear ();
+}
+
+void
+CSVLogSink::Terminate ()
+{
+  CSVLogSink &sink = GetInstance ();
+  sink.FlushAll ();
+
+  if (sink.m_previous_terminate != nullptr)
+    {
+      sink.m_previous_terminate ();
+    }
+  std::abort ();
+}
+
+void
+CSVLogSink::Flush (csvLog_t &log)
+{
+  m_buffered -= log.accounted_size;
+  log.accounted_size = 0;
+
+  if (log.rows > 0)
+    {
+      // One block with the buffered rows of all the columns
+      CSVLogSinkAppend (log.buffer, log.rows);
+      for (auto &column : log.columns)
+        {
+          log.buffer.append (column.valid);
+          log.buffer.append (column.offsets);
+          log.buffer.append (column.values);
+          column.valid.clear ();
+          column.offsets.clear ();
+          column.values.clear ();
+        }
+      log.rows = 0;
+      log.columns_size = 0;
+    }
+
+  if (log.buffer.empty ())
+    {
+      return;
+    }
+
+  if (log.file != nullptr && std::fwrite (log.buffer.data (), 1, log.buffer.size (), log.file) != log.buffer.size ())
+    {
+      NS_LOG_ERROR ("Cannot write the CSV log file " << log.path << ": " << log.buffer.size () << " bytes are lost.");
+    }
+  log.buffer.clear ();
+}
+
+}
@@ -0,0 +1,317 @@
+#ifndef CSVLOGSINK_H
+#define CSVLOGSINK_H
+
+#include <string>
+#include <vector>
+#include <cstdint>
+#include <cstdio>
+#include <cstring>
+#include <charconv>
+#include <exception>
+#include <type_traits>
+#include "ns3/assert.h"
+
+namespace ns3 {
+
+  /**
+   * \ingroup automotive
+   * \brief This class implements a buffered sink shared by all the CSV logs of a simulation.
+   *
+   * The rows of every log are formatted directly into an in-memory buffer. Each log keeps its file open, unbuffered,
+   * from Open() to Close(); the buffers are appended to their files, with one write each, only when the memory used
+   * by all of them exceeds a given size (see SetBufferSize()) or when a log is closed. No write is performed for
+   * every row.
+   *
+   * A log opened with the types of its columns is written as a typed column file instead of text, with the same
+   * columns. The file starts with the 8 bytes "CSVCOLS1", the number of columns (uint32) and, for each column, its
+   * type ('i' int64, 'u' uint64, 'd' double or 's' text, one byte), the length of its name (uint32) and the name. It
+   * then holds one block for each flush: the number of rows (uint32) followed, column by column, by one byte per row
+   * (1 if the field is not empty) and by the values: 8 bytes per row for the numeric columns, or the end offset
+   * (uint32) of each row followed by the characters of all the rows for the text columns. All the numbers are in
+   * the byte order of the host (little endian on the supported platforms).
+   * analysis/scenario_runs/run_artifacts.py reads both formats.
+   *
+   * The buffered rows are also written when the simulation is aborted through std::terminate(), as NS_FATAL_ERROR
+   * and the failed NS_ASSERTs do, so that the logs of a failed run are complete up to the error.
+   */
+  class CSVLogSink
+  {
+  public:
+    static CSVLogSink &
+    GetInstance ()
+    {
+      static CSVLogSink instance;
+      return instance;
+    }
+
+    /**
+     * @brief Set the memory used by all the buffered rows after which they are written to their files (default: 1 MiB).
+     */
+    void SetBufferSize (size_t bytes) {m_buffer_size = bytes;}
+
+    /**
+     * @brief Create (or truncate) a log file, starting it with the given header.
+     *
+     * If "types" is not empty, the log is written as a typed column file: "types" holds the type of each column of
+     * the header, one character each ('i', 'u', 'd' or 's').
+     * @return the identifier of the log, to be used with the other methods
+     */
+    uint32_t Open (const std::string &path, const std::string &header, const std::string &types = "");
+    /**
+     * @brief Write the buffered rows of a log to its file, and release the log.
+     */
+    void Close (uint32_t log);
+    /**
+     * @brief Write the buffered rows of all the logs to their files.
+     */
+    void FlushAll ();
+
+    /**
+     * @brief Get the buffer in which the rows of a log are formatted.
+     */
+    std::string &GetBuffer (uint32_t log) {return m_logs[log].buffer;}
+    /**
+     * @brief Return true if a log is written as a typed column file: its rows are then added with AddValue() and
+     * AddText() instead of being formatted into GetBuffer().
+     */
+    bool IsColumnar (uint32_t log) const {return !m_logs[log].columns.empty ();}
+    /**
+     * @brief Add a value to the current field of a row of a typed column file.
+     *
+     * The value is converted to the type of the column. The text is split into fields at the commas, like in a CSV
+     * row; a field that is left empty is stored as missing.
+     */
+    void AddValue (uint32_t log, int64_t value);
+    void AddValue (uint32_t log, uint64_t value);
+    void AddValue (uint32_t log, double value);
+    void AddText (uint32_t log, const char *text, size_t len);
+    /**
+     * @brief Terminate the current row of a typed column file (the missing fields are stored as empty).
+     */
+    void EndRow (uint32_t log);
+    /**
+     * @brief Account for a row just added to the buffer of a log, flushing the buffers if they grew too much.
+     */
+    void RowAdded (uint32_t log);
+
+    /**
+     * @brief Format a floating point value like "%g" into "str", which must hold at least 32 characters.
+     * @return the number of characters written (without terminator)
+     */
+    static size_t
+    FormatDouble (char *str, double value)
+    {
+#if defined(__cpp_lib_to_chars) && __cpp_lib_to_chars >= 201611L
+      // Same output as "%g" (C locale), without the printf format parsing
+      return std::to_chars (str, str + 32, value, std::chars_format::general, 6).ptr - str;
+#else
+      return std::snprintf (str, 32, "%g", value);
+#endif
+    }
+
+  private:
+    CSVLogSink() = default;
+    ~CSVLogSink();
+    CSVLogSink(const CSVLogSink&) = delete;
+    CSVLogSink& operator = (const CSVLogSink&) = delete;
+
+    /**
+     * @brief Terminate handler installed by the first Open(): write the buffered rows, then call the previous handler.
+     */
+    static void Terminate ();
+
+    typedef struct csvColumn {
+      char type; //!< 'i', 'u', 'd' or 's'
+      std::string valid; //!< one byte per buffered row: 1 if the field is not empty
+      std::string values; //!< 8 bytes per buffered row, or the characters of all the rows for the 's' columns
+      std::string offsets; //!< 's' columns only: end offset in "values" of each buffered row (uint32)
+    } csvColumn_t;
+
+    typedef struct csvLog {
+      std::string path;
+      std::FILE *file; //!< open from Open() to Close(), NULL if it could not be created
+      std::string buffer; //!< rows not written yet (CSV), or bytes preceding the next block (typed column file)
+      size_t accounted_size; //!< size of the buffered rows already counted in m_buffered
+      bool open;
+      // Typed column files only
+      std::vector<csvColumn_t> columns;
+      uint32_t rows; //!< rows buffered in "columns"
+      size_t columns_size; //!< memory used by the buffered rows in "columns"
+      size_t field; //!< field of the current row
+      char field_kind; //!< type of the number held by the current field ('i', 'u' or 'd'), 0 if none
+      int64_t field_int;
+      uint64_t field_uint;
+      double field_double;
+      std::string field_text; //!< text of the current field, when it is not a single number
+    } csvLog_t;
+
+    void Flush (csvLog_t &log);
+    /**
+     * @brief Return true if a number added to the current field can be kept as such, otherwise turn the field into text.
+     */
+    bool StartNumber (csvLog_t &log);
+    void FieldToText (csvLog_t &log);
+    /**
+     * @brief Store the current field in its column, and move to the next field.
+     */
+    void EndField (csvLog_t &log);
+
+    std::vector<csvLog_t> m_logs;
+    std::vector<uint32_t> m_free_logs; //!< identifiers of closed logs, reused by Open()
+    size_t m_buffered = 0; //!< memory used by the rows of all the logs
+    size_t m_buffer_size = 1024 * 1024;
+    bool m_terminate_set = false; //!< true once Terminate() has been installed
+    std::terminate_handler m_previous_terminate = nullptr;
+  };
+
+  /**
+   * \ingroup automotive
+   * \brief One row of a CSVLog, formatted in place into the log buffer.
+   *
+   * The values are appended as they are streamed, in the same format as std::ostream (the floating point values
+   * are printed like "%g"), and the row is terminated when the CSVRow is destroyed, i.e. at the end of the statement
+   * writing it. The buffer is looked up again for every value, as opening another log in the meantime may move it.
+   * For a typed column file, the same stream of values and commas is stored field by field, without formatting.
+   */
+  class CSVRow
+  {
+  public:
+    CSVRow (uint32_t log) : m_log (log), m_columnar (CSVLogSink::GetInstance ().IsColumnar (log)) {}
+    ~CSVRow ()
+    {
+      if (m_columnar)
+        {
+          CSVLogSink::GetInstance ().EndRow (m_log);
+        }
+      else
+        {
+          Buffer ().push_back ('\n');
+        }
+      CSVLogSink::GetInstance ().RowAdded (m_log);
+    }
+    CSVRow (const CSVRow&) = delete;
+    CSVRow& operator = (const CSVRow&) = delete;
+
+    CSVRow &
+    operator<< (const std::string &value)
+    {
+      Append (value.data (), value.size ());
+      return *this;
+    }
+
+    CSVRow &
+    operator<< (const char *value)
+    {
+      Append (value, std::strlen (value));
+      return *this;
+    }
+
+    CSVRow &
+    operator<< (char value)
+    {
+      Append (&value, 1);
+      return *this;
+    }
+
+    CSVRow &
+    operator<< (double value)
+    {
+      if (m_columnar)
+        {
+          CSVLogSink::GetInstance ().AddValue (m_log, value);
+          return *this;
+        }
+      char str[32];
+      size_t len = CSVLogSink::FormatDouble (str, value);
+      Buffer ().append (str, len);
+      return *this;
+    }
+
+    template <typename T, typename std::enable_if<std::is_integral<T>::value && !std::is_same<T, char>::value && !std::is_same<T, bool>::value, int>::type = 0>
+    CSVRow &
+    operator<< (T value)
+    {
+      if (m_columnar)
+        {
+          typedef typename std::conditional<std::is_signed<T>::value, int64_t, uint64_t>::type value_t;
+          CSVLogSink::GetInstance ().AddValue (m_log, static_cast<value_t> (value));
+          return *this;
+        }
+      char str[24];
+      auto res = std::to_chars (str, str + sizeof (str), value);
+      Buffer ().append (str, res.ptr - str);
+      return *this;
+    }
+
+  private:
+    std::string &Buffer () {return CSVLogSink::GetInstance ().GetBuffer (m_log);}
+
+    void
+    Append (const char *text, size_t len)
+    {
+      if (m_columnar)
+        {
+          CSVLogSink::GetInstance ().AddText (m_log, text, len);
+        }
+      else
+        {
+          Buffer ().append (text, len);
+        }
+    }
+
+    uint32_t m_log;
+    bool m_columnar; //!< true if the log is a typed column file
+  };
+
+  /**
+   * \ingroup automotive
+   * \brief A CSV log file written through the shared CSVLogSink.
+   */
+  class CSVLog
+  {
+  public:
+    CSVLog () = default;
+    ~CSVLog () {Close ();}
+    CSVLog (const CSVLog&) = delete;
+    CSVLog& operator = (const CSVLog&) = delete;
+
+    /**
+     * @brief Open the log; with "types" (see CSVLogSink::Open()) it is written as a typed column file.
+     */
+    void
+    Open (const std::string &path, const std::string &header, const std::string &types = "")
+    {
+      Close ();
+      m_log = CSVLogSink::GetInstance ().Open (path, header, types);
+      m_open = true;
+    }
+
+    void
+    Close ()
+    {
+      if (m_open)
+        {
+          CSVLogSink::GetInstance ().Close (m_log);
+          m_open = false;
+        }
+    }
+
+    bool IsOpen () const {return m_open;}
+
+    /**
+     * @brief Start a new row: the values are added with "<<", without the trailing new line.
+     */
+    CSVRow
+    Row ()
+    {
+      NS_ASSERT_MSG (m_open, "Writing to a closed CSV log");
+      return CSVRow (m_log);
+    }
+
+  private:
+    uint32_t m_log = 0;
+    bool m_open = false;
+  };
+}
+
+#endif // CSVLOGSINK_H
@@ -0,0 +1,201 @@
+/* -*- Mode:C++; c-file-style:"gnu"; indent-tabs-mode:nil; -*- */
+
+#include "ns3/los_nlos.h"
+#include "ns3/random-variable-stream.h"
+#include "ns3/test.h"
+
+using namespace ns3;
+
+namespace
+{
+  typedef std::vector<std::tuple<float, float>> shape_t;
+
+  // Same crossing test as LOS_NLOS, applied to every building edge
+  bool
+  BruteForceCrosses (double x1, double y1, double x2, double y2, double x3, double y3, double x4, double y4)
+  {
+    double rx = x2 - x1, ry = y2 - y1;
+    double sx = x4 - x3, sy = y4 - y3;
+    double denom = rx * sy - ry * sx;
+    if (denom == 0)
+      return false;
+    double t = ((x3 - x1) * sy - (y3 - y1) * sx) / denom;
+    double u = ((x3 - x1) * ry - (y3 - y1) * rx) / denom;
+    return t >= 0 && t <= 1 && u >= 0 && u <= 1;
+  }
+
+  ChannelCondition::LosConditionValue
+  BruteForceLosNlos (const std::vector<shape_t> &buildings, std::tuple<float, float> xy1, std::tuple<float, float> xy2)
+  {
+    // GetLosNlos() orders the two ends of the link before testing it
+    if (xy2 < xy1)
+      std::swap (xy1, xy2);
+    for (auto &corners : buildings)
+      {
+        for (size_t i = 0; i + 1 < corners.size (); i++)
+          {
+            if (BruteForceCrosses (std::get<0> (xy1), std::get<1> (xy1), std::get<0> (xy2), std::get<1> (xy2),
+                                   std::get<0> (corners[i]), std::get<1> (corners[i]),
+                                   std::get<0> (corners[i + 1]), std::get<1> (corners[i + 1])))
+              return ChannelCondition::LosConditionValue::NLOS;
+          }
+      }
+    return ChannelCondition::LosConditionValue::LOS;
+  }
+}
+
+/**
+ * \ingroup automotive
+ * \brief Check that the grid of the building edges used by LOS_NLOS::GetLosNlos() gives the same LoS condition as
+ * testing every edge, for random buildings and links and for links lying on the grid lines.
+ */
+class LosNlosGridTestCase : public TestCase
+{
+public:
+  LosNlosGridTestCase (float cell_m);
+  virtual ~LosNlosGridTestCase ();
+
+private:
+  virtual void DoRun (void);
+
+  float m_cell_m;
+};
+
+LosNlosGridTestCase::LosNlosGridTestCase (float cell_m)
+  : TestCase ("LOS_NLOS edge grid against brute force, cell size " + std::to_string (cell_m) + " m"),
+    m_cell_m (cell_m)
+{
+}
+
+LosNlosGridTestCase::~LosNlosGridTestCase ()
+{
+}
+
+void
+LosNlosGridTestCase::DoRun (void)
+{
+  Ptr<UniformRandomVariable> rng = CreateObject<UniformRandomVariable> ();
+  rng->SetStream (1);
+
+  Ptr<LOS_NLOS> los_nlos = CreateObject<LOS_NLOS> ();
+  los_nlos->SetGridCellSize (m_cell_m);
+
+  // Closed polygons of 3 to 6 corners, some of them much larger than a grid cell
+  std::vector<shape_t> buildings;
+  for (uint32_t id = 0; id < 200; id++)
+    {
+      double cx = rng->GetValue (-500, 500);
+      double cy = rng->GetValue (-500, 500);
+      double radius = rng->GetValue (2, 60);
+      uint32_t corners = rng->GetInteger (3, 6);
+      shape_t shape;
+      for (uint32_t c = 0; c < corners; c++)
+        {
+          double angle = 2 * M_PI * (c + rng->GetValue (0, 0.5)) / corners;
+          shape.emplace_back (cx + radius * std::cos (angle), cy + radius * std::sin (angle));
+        }
+      shape.push_back (shape.front ());
+      buildings.push_back (shape);
+      los_nlos->AddBuilding (id, shape);
+    }
+
+  std::vector<std::pair<std::tuple<float, float>, std::tuple<float, float>>> links;
+  for (uint32_t i = 0; i < 5000; i++)
+    {
+      links.emplace_back (std::make_tuple (rng->GetValue (-550, 550), rng->GetValue (-550, 550)),
+                          std::make_tuple (rng->GetValue (-550, 550), rng->GetValue (-550, 550)));
+    }
+  // Short links, inside one or two cells
+  for (uint32_t i = 0; i < 2000; i++)
+    {
+      float x = rng->GetValue (-500, 500);
+      float y = rng->GetValue (-500, 500);
+      links.emplace_back (std::make_tuple (x, y), std::make_tuple (x + rng->GetValue (-5, 5), y + rng->GetValue (-5, 5)));
+    }
+  // Horizontal, vertical and diagonal links, with their ends on the grid lines
+  for (int32_t k = -20; k <= 20; k++)
+    {
+      float line = k * m_cell_m;
+      links.emplace_back (std::make_tuple (-550.0f, line), std::make_tuple (550.0f, line));
+      links.emplace_back (std::make_tuple (line, -550.0f), std::make_tuple (line, 550.0f));
+      links.emplace_back (std::make_tuple (line, line), std::make_tuple (-line, 20 * m_cell_m));
+      links.emplace_back (std::make_tuple (line, -line), std::make_tuple (line + 3 * m_cell_m, -line + 3 * m_cell_m));
+    }
+
+  for (auto &link : links)
+    {
+      ChannelCondition::LosConditionValue expected = BruteForceLosNlos (buildings, link.first, link.second);
+      NS_TEST_ASSERT_MSG_EQ (los_nlos->GetLosNlos (link.first, link.second), expected,
+                             "Wrong LoS condition from (" << std::get<0> (link.first) << "," << std::get<1> (link.first)
+                             << ") to (" << std::get<0> (link.second) << "," << std::get<1> (link.second) << ")");
+      // The same link in the opposite direction, answered from the cache
+      NS_TEST_ASSERT_MSG_EQ (los_nlos->GetLosNlos (link.second, link.first), expected,
+                             "Wrong cached LoS condition from (" << std::get<0> (link.second) << "," << std::get<1> (link.second)
+                             << ") to (" << std::get<0> (link.first) << "," << std::get<1> (link.first) << ")");
+    }
+}
+
+/**
+ * \ingroup automotive
+ * \brief Check the NLOSv condition given by LOS_NLOS::GetLosNlos() for the vehicles close to the link.
+ */
+class LosNlosVehicleTestCase : public TestCase
+{
+public:
+  LosNlosVehicleTestCase ();
+  virtual ~LosNlosVehicleTestCase ();
+
+private:
+  virtual void DoRun (void);
+};
+
+LosNlosVehicleTestCase::LosNlosVehicleTestCase ()
+  : TestCase ("LOS_NLOS vehicles blocking a link")
+{
+}
+
+LosNlosVehicleTestCase::~LosNlosVehicleTestCase ()
+{
+}
+
+void
+LosNlosVehicleTestCase::DoRun (void)
+{
+  Ptr<LOS_NLOS> los_nlos = CreateObject<LOS_NLOS> ();
+  los_nlos->AddBuilding (0, {std::make_tuple (50.0f, 50.0f), std::make_tuple (60.0f, 50.0f), std::make_tuple (60.0f, 60.0f),
+                             std::make_tuple (50.0f, 60.0f), std::make_tuple (50.0f, 50.0f)});
+
+  std::tuple<float, float> a (0.0f, 0.0f);
+  std::tuple<float, float> b (100.0f, 0.0f);
+
+  NS_TEST_ASSERT_MSG_EQ (los_nlos->GetLosNlos (a, b), ChannelCondition::LosConditionValue::LOS, "Free link not in LoS");
+  NS_TEST_ASSERT_MSG_EQ (los_nlos->GetLosNlos (a, b, {std::make_tuple (50.0f, 0.3f)}), ChannelCondition::LosConditionValue::NLOSv,
+                         "Vehicle on the link not blocking it");
+  NS_TEST_ASSERT_MSG_EQ (los_nlos->GetLosNlos (a, b, {std::make_tuple (50.0f, 1.0f)}), ChannelCondition::LosConditionValue::LOS,
+                         "Vehicle 1 m away from the link blocking it");
+  // Beyond the ends of the link, only the distance from the closest end counts
+  NS_TEST_ASSERT_MSG_EQ (los_nlos->GetLosNlos (a, b, {std::make_tuple (101.0f, 0.0f)}), ChannelCondition::LosConditionValue::LOS,
+                         "Vehicle behind the receiver blocking the link");
+  NS_TEST_ASSERT_MSG_EQ (los_nlos->GetLosNlos (a, b, {std::make_tuple (100.2f, 0.2f)}), ChannelCondition::LosConditionValue::NLOSv,
+                         "Vehicle next to the receiver not blocking the link");
+  // A building wins over a vehicle
+  NS_TEST_ASSERT_MSG_EQ (los_nlos->GetLosNlos (std::make_tuple (55.0f, 0.0f), std::make_tuple (55.0f, 100.0f), {std::make_tuple (55.0f, 20.0f)}),
+                         ChannelCondition::LosConditionValue::NLOS, "Link across a building not in NLOS");
+}
+
+class LosNlosTestSuite : public TestSuite
+{
+public:
+  LosNlosTestSuite ();
+};
+
+LosNlosTestSuite::LosNlosTestSuite ()
+  : TestSuite ("automotive-los-nlos", UNIT)
+{
+  AddTestCase (new LosNlosGridTestCase (20.0), TestCase::QUICK);
+  AddTestCase (new LosNlosGridTestCase (3.0), TestCase::QUICK);
+  AddTestCase (new LosNlosGridTestCase (250.0), TestCase::QUICK);
+  AddTestCase (new LosNlosVehicleTestCase, TestCase::QUICK);
+}
+
+static LosNlosTestSuite losNlosTestSuite;
@@ -26,16 +26,36 @@
 #include <iostream>
 #include <fstream>
 #include <regex>
+#include <cmath>
 #include <string>
 #include <sys/socket.h>
 #include <netinet/in.h>
 
 #include "traci-client.h"
 
+// side of the cells of the grid used to convert the vehicle positions to (lon,lat) for the vehicle visualizer [m]
+#define VIS_GEO_GRID_CELL_M 100.0
+
 namespace ns3
 {
   NS_LOG_COMPONENT_DEFINE("TraciClient");
 
+  // variables retrieved for every vehicle/pedestrian in each step
+  static const std::vector<int> g_stationVars = {VAR_POSITION, VAR_ANGLE, VAR_SPEED};
+
+  // copy a string list variable out of subscription results; false if SUMO did not deliver it
+  static bool
+  GetSubscribedStringList (const libsumo::TraCIResults& results, int var, std::vector<std::string>& out)
+  {
+    auto it = results.find (var);
+    if (it == results.end ())
+      {
+        return false;
+      }
+    out = std::static_pointer_cast<libsumo::TraCIStringList> (it->second)->value;
+    return true;
+  }
+
   TypeId
   TraciClient::GetTypeId(void)
   {
@@ -114,7 +134,13 @@ namespace ns3
                   "Name of the network namespace to be used to launch SUMO",
                    StringValue (""),
                    MakeStringAccessor (&TraciClient::m_netns_name),
-                   MakeStringChecker ());
+                   MakeStringChecker ())
+    .AddAttribute ("UseSubscriptions",
+                  "Retrieve positions, angles, speeds and departed/arrived vehicles through TraCI variable subscriptions "
+                  "(delivered with each simulation step) instead of one TraCI request per vehicle and variable.",
+                   BooleanValue (true),
+                   MakeBooleanAccessor (&TraciClient::m_useSubscriptions),
+                   MakeBooleanChecker ());
   ;
     return tid;
   }
@@ -133,6 +159,7 @@ namespace ns3
     m_sumoWaitForSocket = ns3::Seconds(1.0);
     m_vehicle_visualizer = nullptr;
     m_netns_name = "";
+    m_useSubscriptions = true;
   }
 
   TraciClient::~TraciClient(void)
@@ -287,6 +314,13 @@ namespace ns3
         NS_FATAL_ERROR("Can not connect to sumo via traci: " << e.what());
       }
 
+    if (m_useSubscriptions)
+      {
+        // departed/arrived vehicles are then delivered together with every simulation step
+        this->TraCIAPI::simulation.subscribe ("", {VAR_DEPARTED_VEHICLES_IDS, VAR_ARRIVED_VEHICLES_IDS},
+                                              INVALID_DOUBLE_VALUE, INVALID_DOUBLE_VALUE);
+      }
+
     if (m_vehicle_visualizer!=nullptr && m_vehicle_visualizer->isConnected())
     {
         /* Compute central position of the map to be sent to the web visualizer */
@@ -351,6 +385,81 @@ namespace ns3
       }
   }
 
+  void
+  TraciClient::SubscribeStation(const std::string& id, StationType_t type)
+  {
+    NS_LOG_FUNCTION(this);
+
+    if (!m_useSubscriptions)
+      {
+        return;
+      }
+
+    // SUMO drops the subscription by itself when the vehicle/pedestrian leaves the simulation
+    if (type == StationType_pedestrian)
+      this->TraCIAPI::person.subscribe (id, g_stationVars, INVALID_DOUBLE_VALUE, INVALID_DOUBLE_VALUE);
+    else
+      this->TraCIAPI::vehicle.subscribe (id, g_stationVars, INVALID_DOUBLE_VALUE, INVALID_DOUBLE_VALUE);
+  }
+
+  void
+  TraciClient::UpdateSnapshot()
+  {
+    NS_LOG_FUNCTION(this);
+
+    m_snapshot.clear ();
+    m_snapshotId++;
+
+    libsumo::SubscriptionResults& vehicleVars = this->TraCIAPI::vehicle.getModifiableSubscriptionResults ();
+    libsumo::SubscriptionResults& personVars = this->TraCIAPI::person.getModifiableSubscriptionResults ();
+    bool pollHeading = m_sionna || (m_vehicle_visualizer!=nullptr && m_vehicle_visualizer->isConnected());
+
+    for (auto it = m_NodeMap.begin (); it != m_NodeMap.end (); ++it)
+      {
+        const std::string& node_ID = it->first;
+        bool pedestrian = it->second.first == StationType_pedestrian;
+
+        if (it->second.first == StationType_roadSideUnit)
+          continue;
+
+        StationSnapshot_t station;
+        bool found = false;
+
+        if (m_useSubscriptions)
+          {
+            libsumo::SubscriptionResults& results = pedestrian ? personVars : vehicleVars;
+            auto res = results.find (node_ID);
+            if (res != results.end () && res->second.size () == g_stationVars.size ())
+              {
+                station.pos = *std::static_pointer_cast<libsumo::TraCIPosition> (res->second[VAR_POSITION]);
+                station.angle = std::static_pointer_cast<libsumo::TraCIDouble> (res->second[VAR_ANGLE])->value;
+                station.speed = std::static_pointer_cast<libsumo::TraCIDouble> (res->second[VAR_SPEED])->value;
+                found = true;
+              }
+          }
+
+        if (!found)
+          {
+            // polling mode, or a station whose subscription has not delivered values yet;
+            // angle and speed are only requested when Sionna or the visualizer needs them
+            if (pedestrian)
+              {
+                station.pos = this->TraCIAPI::person.getPosition (node_ID);
+                station.angle = pollHeading ? this->TraCIAPI::person.getAngle (node_ID) : std::nan ("");
+                station.speed = pollHeading ? this->TraCIAPI::person.getSpeed (node_ID) : std::nan ("");
+              }
+            else
+              {
+                station.pos = this->TraCIAPI::vehicle.getPosition (node_ID);
+                station.angle = pollHeading ? this->TraCIAPI::vehicle.getAngle (node_ID) : std::nan ("");
+                station.speed = pollHeading ? this->TraCIAPI::vehicle.getSpeed (node_ID) : std::nan ("");
+              }
+          }
+
+        m_snapshot.emplace (node_ID, station);
+      }
+  }
+
   void
   TraciClient::UpdatePositions()
   {
@@ -358,44 +467,34 @@ namespace ns3
 
     try
       {
-        // iterate over all nodes in the map
-        for (std::map<std::string, std::pair< StationType_t, Ptr<Node> > >::iterator it = m_NodeMap.begin(); it != m_NodeMap.end(); ++it)
+        // retrieve the state of all vehicles/pedestrians of this step at once
+        UpdateSnapshot ();
+
+        // iterate over all vehicles/pedestrians in the snapshot
+        for (auto it = m_snapshot.begin(); it != m_snapshot.end(); ++it)
           {
-            // get current vehicle/pedestrian from the map
-            std::string node_ID(it->first);
-
-            // get vehicle/pedestrian position from sumo
-            libsumo::TraCIPosition pos;
-            if(it->second.first == StationType_pedestrian)
-               pos = this->TraCIAPI::person.getPosition(node_ID);
-            else if (it->second.first == StationType_roadSideUnit)
-              continue;
-            else
-               pos = this->TraCIAPI::vehicle.getPosition(node_ID);
+            const std::string& node_ID = it->first;
+            const libsumo::TraCIPosition& pos = it->second.pos;
+            std::pair< StationType_t, Ptr<Node> >& station = m_NodeMap.at(node_ID);
 
             // get corresponding ns3 node from map
-            Ptr<MobilityModel> mob = m_NodeMap.at(node_ID).second->GetObject<MobilityModel>();
+            Ptr<MobilityModel> mob = station.second->GetObject<MobilityModel>();
             // set ns3 node position with user defined altitude
             mob->SetPosition(Vector(pos.x, pos.y, m_altitude));
 
             if (m_sionna == true)
             {
               Vector pos_for_sionna = Vector(pos.x, pos.y, m_altitude);
-              double angle_for_sionna = this->TraCIAPI::vehicle.getAngle(node_ID);
-              double speed = this->TraCIAPI::vehicle.getSpeed(node_ID);
+              double angle_for_sionna = it->second.angle;
+              double speed = it->second.speed;
               Vector vel_for_sionna = Vector(speed * cos(angle_for_sionna), speed * sin(angle_for_sionna), 0.0);
               updateLocationInSionna(node_ID, pos_for_sionna, angle_for_sionna, vel_for_sionna);
             }
-            
-            if (m_vehicle_visualizer!=nullptr && m_vehicle_visualizer->isConnected() && it->second.first != StationType_pedestrian)
-            {
-                libsumo::TraCIPosition lonlat = this->TraCIAPI::simulation.convertXYtoLonLat (pos.x,pos.y);
-                int rval = m_vehicle_visualizer->sendObjectUpdate (node_ID,lonlat.y,lonlat.x,this->TraCIAPI::vehicle.getAngle (node_ID));
-                if (rval<0)
-                {
-                    NS_FATAL_ERROR("Error: cannot send the object update to the vehicle visualizer for vehicle: "<<node_ID);
-                }
-            }
+          }
+
+        if (m_vehicle_visualizer!=nullptr && m_vehicle_visualizer->isConnected())
+          {
+            SendVisualizerFrame ();
           }
       }
     catch (std::exception& e)
@@ -405,6 +504,64 @@ namespace ns3
       }
   }
 
+  libsumo::TraCIPosition
+  TraciClient::ConvertXYtoLonLatCached (double x, double y)
+  {
+    double gx = x / VIS_GEO_GRID_CELL_M;
+    double gy = y / VIS_GEO_GRID_CELL_M;
+    int64_t cx = static_cast<int64_t> (std::floor (gx));
+    int64_t cy = static_cast<int64_t> (std::floor (gy));
+    double tx = gx - cx;
+    double ty = gy - cy;
+
+    libsumo::TraCIPosition corners[2][2];
+    for (int i = 0; i < 2; i++)
+      {
+        for (int j = 0; j < 2; j++)
+          {
+            int64_t key = static_cast<int64_t> ((static_cast<uint64_t> (cx + i) << 32) ^ (static_cast<uint64_t> (cy + j) & 0xFFFFFFFFULL));
+            auto corner = m_geo_grid.find (key);
+            if (corner == m_geo_grid.end ())
+              {
+                libsumo::TraCIPosition lonlat = this->TraCIAPI::simulation.convertXYtoLonLat ((cx + i) * VIS_GEO_GRID_CELL_M, (cy + j) * VIS_GEO_GRID_CELL_M);
+                corner = m_geo_grid.emplace (key, lonlat).first;
+              }
+            corners[i][j] = corner->second;
+          }
+      }
+
+    // Bilinear interpolation: within a cell, the error w.r.t. the sumo projection is well below the precision of the visualizer
+    libsumo::TraCIPosition lonlat;
+    lonlat.x = (1 - tx) * ((1 - ty) * corners[0][0].x + ty * corners[0][1].x) + tx * ((1 - ty) * corners[1][0].x + ty * corners[1][1].x);
+    lonlat.y = (1 - tx) * ((1 - ty) * corners[0][0].y + ty * corners[0][1].y) + tx * ((1 - ty) * corners[1][0].y + ty * corners[1][1].y);
+    return lonlat;
+  }
+
+  void
+  TraciClient::SendVisualizerFrame()
+  {
+    NS_LOG_FUNCTION(this);
+
+    // the frame rate of the visualizer does not depend on the sumo step: skip the conversions when no frame is due
+    if (!m_vehicle_visualizer->frameDue ())
+      return;
+
+    for (auto it = m_snapshot.begin(); it != m_snapshot.end(); ++it)
+      {
+        if (m_NodeMap.at(it->first).first == StationType_pedestrian)
+          continue;
+
+        // Long = x, Lat = y
+        libsumo::TraCIPosition lonlat = ConvertXYtoLonLatCached (it->second.pos.x, it->second.pos.y);
+        m_vehicle_visualizer->addFrameObject (it->first, lonlat.y, lonlat.x, it->second.angle);
+      }
+
+    if (m_vehicle_visualizer->sendFrame () < 0)
+      {
+        NS_FATAL_ERROR("Error: cannot send the vehicle positions to the vehicle visualizer.");
+      }
+  }
+
   void
   TraciClient::GetSumoVehicles(std::vector<std::string>& sumoVehicles)
   {
@@ -418,11 +575,23 @@ namespace ns3
 
     try
       {
-        // ask sumo for all (new) departed vehicles SINCE last simulation step (=one synch interval)
-        std::vector<std::string> departedVehicles = this->TraCIAPI::simulation.getDepartedIDList();
+        std::vector<std::string> departedVehicles;
+        std::vector<std::string> arrivedVehicles;
+
+        // departed/arrived vehicles SINCE last simulation step (=one synch interval), as delivered with the step
+        libsumo::TraCIResults simVars;
+        if (m_useSubscriptions)
+          {
+            simVars = this->TraCIAPI::simulation.getSubscriptionResults("");
+          }
+
+        // otherwise ask sumo for all (new) departed vehicles SINCE last simulation step
+        if (!GetSubscribedStringList(simVars, VAR_DEPARTED_VEHICLES_IDS, departedVehicles))
+          departedVehicles = this->TraCIAPI::simulation.getDepartedIDList();
 
-        // ask sumo for all (new) arrived vehicles SINCE last simulation step (=one synch interval)
-        std::vector<std::string> arrivedVehicles = this->TraCIAPI::simulation.getArrivedIDList();
+        // otherwise ask sumo for all (new) arrived vehicles SINCE last simulation step
+        if (!GetSubscribedStringList(simVars, VAR_ARRIVED_VEHICLES_IDS, arrivedVehicles))
+          arrivedVehicles = this->TraCIAPI::simulation.getArrivedIDList();
 
         // iterate over departed vehicles
         for (std::vector<std::string>::iterator it = departedVehicles.begin(); it != departedVehicles.end(); ++it)
@@ -512,6 +681,8 @@ namespace ns3
 
                 // register in the map (link vehicle to node!)
                 m_NodeMap.insert(std::pair<std::string, std::pair<StationType_t, Ptr<ns3::Node>>>(veh, inNode));
+
+                SubscribeStation(veh, StationType_passengerCar);
               }
           }
 
@@ -539,6 +710,8 @@ namespace ns3
 
                     // Register the new node in the map
                     m_NodeMap.insert(std::pair<std::string, std::pair<StationType_t, Ptr<ns3::Node>>>(ped, inNode_ped));
+
+                    SubscribeStation(ped, StationType_pedestrian);
                   }
               }
 
@@ -27,6 +27,7 @@
 #include <vector>
 #include <string>
 #include <functional>
+#include <unordered_map>
 
 #include <signal.h>
 #include <stdlib.h>
@@ -60,6 +61,13 @@ public:
     StationTypeTraci_unspecified
   } StationTypeTraCI_t;
 
+  // state of a SUMO vehicle/pedestrian as retrieved in the last simulation step
+  typedef struct {
+    libsumo::TraCIPosition pos;
+    double angle;
+    double speed;
+  } StationSnapshot_t;
+
   // register this type with the TypeId system.
   static TypeId GetTypeId (void);
 
@@ -79,7 +87,7 @@ public:
 
   std::vector<std::string> getVehicleNodeMapIds(); // get all vehicle node ids
 
-  std::map< std::string, std::pair< StationType_t, Ptr<Node> > > get_NodeMap() {return m_NodeMap;};
+  const std::map< std::string, std::pair< StationType_t, Ptr<Node> > >& get_NodeMap() {return m_NodeMap;};
 
   void AddStation(std::string id, float x, float y, float z, Ptr<Node> node);
 
@@ -87,6 +95,13 @@ public:
 
   void SetSionnaUp() {m_sionna = true;};
 
+  // positions, angles and speeds of all tracked vehicles/pedestrians in the current step (RSUs are not included);
+  // with UseSubscriptions=false, angle and speed are NaN unless Sionna or the vehicle visualizer is enabled
+  const std::map<std::string, StationSnapshot_t>& GetStationSnapshot() {return m_snapshot;};
+
+  // incremented every time the snapshot is refreshed, so that users can tell when cached data derived from it is stale
+  uint64_t GetStationSnapshotId() {return m_snapshotId;};
+
 
 private:
   // perform sumo simulation for a certain time step
@@ -95,6 +110,12 @@ private:
   // get current positions from sumo vehicles and update corresponding ns3 nodes positions
   void UpdatePositions(void);
 
+  // fill m_snapshot from the subscription results of the last step (or by polling, if subscriptions are disabled)
+  void UpdateSnapshot(void);
+
+  // subscribe to the variables of a newly included vehicle/pedestrian
+  void SubscribeStation(const std::string& id, StationType_t type);
+
   // get new (departed) and removed (arrived) vehicles from sumo
   void GetSumoVehicles(std::vector<std::string>& sumoVehicles);
 
@@ -143,8 +164,20 @@ private:
   std::string m_netns_name;
   void terminateVehicleVisualizer (void);
 
+  // send the positions of all the vehicles of the current step to the vehicle visualizer, in a single frame
+  void SendVisualizerFrame (void);
+
+  // convert (x,y) to (lon,lat) by interpolating the conversions of the corners of a grid, each requested to sumo only once
+  libsumo::TraCIPosition ConvertXYtoLonLatCached (double x, double y);
+  std::unordered_map<int64_t, libsumo::TraCIPosition> m_geo_grid;
+
   bool m_sionna = false;
 
+  // use TraCI variable subscriptions instead of one request per vehicle and variable
+  bool m_useSubscriptions;
+  std::map<std::string, StationSnapshot_t> m_snapshot;
+  uint64_t m_snapshotId = 0;
+
 };
 
 } // end namespace ns3
@@ -55,6 +55,11 @@ socket.on('message', (msg) => {
 	} else {
 		let msg_fields = msg.split(",");
 
+		// The fields of a "frame" message are separated by ";"
+		if (msg.split(/[,;]/, 1)[0] === "frame") {
+			msg_fields = ["frame"];
+		}
+
 		switch (msg_fields[0]) {
 			// "map draw" message: "map,<lat>,<lon>,<mapbox token>"
 			case 'map':
@@ -86,6 +91,22 @@ socket.on('message', (msg) => {
 					update_marker(leafletmap,msg_fields[1],parseFloat(msg_fields[2]),parseFloat(msg_fields[3]),parseFloat(msg_fields[4]));
 				}
 				break;
+			// "frame" message, with the updates of many objects: "frame;<unique object ID>,<lat>,<lon>,<heading>;..."
+			// An entry with the <unique object ID> only removes that object from the map
+			case 'frame': {
+				let frame_objects = msg.split(";");
+				for (let i = 1; i < frame_objects.length; i++) {
+					let object_fields = frame_objects[i].split(",");
+					if(object_fields.length === 1) {
+						remove_marker(leafletmap,object_fields[0]);
+					} else if(object_fields.length !== 4) {
+						console.error("VehicleVisualizer: Error: received a corrupted object in a frame message from the server.");
+					} else {
+						update_marker(leafletmap,object_fields[0],parseFloat(object_fields[1]),parseFloat(object_fields[2]),parseFloat(object_fields[3]));
+					}
+				}
+				break;
+			}
 			// This 'case' is added just for additional safety. As the server is shut down every time a "terminate" message
 			// is received from ms-van3t and no "terminate" message is forwarded via socket.io, this point should never be
 			// reached
@@ -160,6 +181,16 @@ function update_marker(mapref,id,lat,lon,heading)
 	}
 }
 
+// This function is used to remove a marker/moving object from the map (e.g., when the vehicle leaves the simulation)
+function remove_marker(mapref,id)
+{
+	if(mapref != null && id in markers) {
+		mapref.removeLayer(markers[id]);
+		delete markers[id];
+		delete markersicons[id];
+	}
+}
+
 // This function is used to draw the whole map at the beginning, on which vehicles will be placed
 // It expects as arguments the lat and lon value where the map should be centered
 function draw_map(lat,lon,mapbox_token) {
@@ -69,12 +69,18 @@ udpSocket.on('listening', () => {
 // This message should indeed be received by the client before attempting to render any other moving object
 var mapmsg = null;
 
+// Latest update of every object ("<object ID>,<lat>,<lon>,<heading>"), sent in a single "frame" message to the clients
+// connecting after the objects were last updated (ms-van3t only sends the objects which moved)
+var objects = new Map();
+
 // This callback is the most important one, as it is called every time a new UDP packet is received from ms-van3t
 // As a new packet is received, its content is forwarded to the client (i.e. the browser) via socket.io
 udpSocket.on('message', (msg,rinfo) => {
     // console.log('I have received from %s:%s the message: %s',rinfo.address,rinfo.port,msg);
 
-    let msg_fields = msg.toString().split(",");
+    // Remove the string terminator possibly sent by ms-van3t
+    let msg_string = msg.toString().replace(/\0+$/, "");
+    let msg_fields = msg_string.split(",");
 
     // If a "map" initial message is received, and the content appears to be correct, save it inside "mapmsg"
     if(msg_fields[0] === "map") {
@@ -86,16 +92,33 @@ udpSocket.on('message', (msg,rinfo) => {
             process.exit(1);
         } else {
             console.log("VehicleVisualizer: Map draw message received from ms-van3t.");
-            mapmsg = msg.toString() + "," + mapbox_token;
+            mapmsg = msg_string + "," + mapbox_token;
         }
     // If a "terminate" message is received from ms-van3t, just close the server
     } else if(msg_fields[0] === "terminate") {
         // This message is sent to terminate the Node.js server
         console.log("VehicleVisualizer: The server received a terminate message. The execution will be terminated.");
         process.exit(0);
+    // A "frame" message contains the updates of many objects: "frame;<object ID>,<lat>,<lon>,<heading>;..."
+    // An entry with the <object ID> only means that the object left the map
+    // It is forwarded to the client as it is, in a single socket.io message
+    } else if(msg_string.split(/[,;]/, 1)[0] === "frame") {
+        let frame_objects = msg_string.split(";");
+        for(let i = 1; i < frame_objects.length; i++) {
+            let object_fields = frame_objects[i].split(",");
+            if(object_fields.length === 1) {
+                objects.delete(object_fields[0]);
+            } else {
+                objects.set(object_fields[0], frame_objects[i]);
+            }
+        }
+        io.sockets.send(msg_string);
     } else {
     // Otherwise, forward all the other messages to the client via socket.io
-        io.sockets.send(msg.toString());
+        if(msg_fields[0] === "object" && msg_fields.length === 5) {
+            objects.set(msg_fields[1], msg_fields.slice(1).join(","));
+        }
+        io.sockets.send(msg_string);
     }
 });
 
@@ -109,6 +132,11 @@ io.on('connection', (socket) => {
     // As soon as a client connects, send the "map" message, in order to make it correctly render the base map
     io.sockets.send(mapmsg);
 
+    // Then, send the current position of all the objects, as they are only updated when they move
+    if(mapmsg != null && objects.size > 0) {
+        socket.send("frame;" + Array.from(objects.values()).join(";"));
+    }
+
     // socket.io message callback (called every time a client sends something to the server - it should
     // never be called in this web application)
     socket.on('message', (msg) => {
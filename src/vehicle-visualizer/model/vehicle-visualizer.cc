@@ -5,6 +5,7 @@
 #include <netinet/udp.h>
 #include <arpa/inet.h>
 #include <unistd.h>
+#include <cstdio>
 #include "vehicle-visualizer.h"
 
 namespace ns3 {
@@ -154,6 +155,97 @@ namespace ns3 {
       return sendObjectUpdate (objID,lat,lon,VIS_HEADING_INVALID);
   }
 
+  bool
+  vehicleVisualizer::frameDue()
+  {
+      if(m_max_frame_rate<=0 || m_frame_sent==false)
+      {
+          return true;
+      }
+
+      std::chrono::duration<double> elapsed = std::chrono::steady_clock::now() - m_last_frame_time;
+      return elapsed.count() >= 1.0/m_max_frame_rate;
+  }
+
+  void
+  vehicleVisualizer::addFrameObject(std::string objID, double lat, double lon, double heading)
+  {
+      // Same format (and precision) as the fields of sendObjectUpdate()
+      char fields[64];
+      snprintf(fields,sizeof(fields),",%.7g,%.7g,%.3g",lat,lon,heading);
+
+      sentObject &last_sent = m_last_sent_objects[objID];
+      last_sent.frame = m_frame_count;
+      std::string object = objID + fields;
+
+      // Skip the objects which would not move on the map
+      if(object==last_sent.update)
+      {
+          return;
+      }
+
+      last_sent.update = object;
+      m_frame_objects.push_back(std::move(object));
+  }
+
+  int
+  vehicleVisualizer::sendFrame()
+  {
+      if(m_is_connected==false)
+      {
+          NS_FATAL_ERROR("Error: attempted to use a non-connected vehicle visualizer client.");
+      }
+
+      if(m_is_map_sent==false)
+      {
+          NS_FATAL_ERROR("Error in vehicle visualizer client: attempted to send a frame before sending the map draw message.");
+      }
+
+      m_frame_sent=true;
+      m_last_frame_time=std::chrono::steady_clock::now();
+
+      // The objects which were not added to this frame are gone: remove them from the map, and forget them
+      for(auto it=m_last_sent_objects.begin();it!=m_last_sent_objects.end();)
+      {
+          if(it->second.frame!=m_frame_count)
+          {
+              m_frame_objects.push_back(it->first);
+              it=m_last_sent_objects.erase(it);
+          }
+          else
+          {
+              ++it;
+          }
+      }
+      m_frame_count++;
+
+      // Frame format: "frame;<object ID>,<lat>,<lon>,<heading>;<object ID>,<lat>,<lon>,<heading>;...", where the
+      // entries made of the <object ID> only remove that object
+      int sent=0;
+      std::string msg_string="frame";
+      for(size_t i=0;i<m_frame_objects.size();i++)
+      {
+          msg_string+=";"+m_frame_objects[i];
+
+          bool last=(i+1==m_frame_objects.size());
+          if(last || msg_string.length()+1+m_frame_objects[i+1].length()>VIS_MAX_FRAME_BYTES)
+          {
+              int send_rval=send(m_sockfd,msg_string.c_str(),msg_string.length(),0);
+              if(send_rval<0)
+              {
+                  m_frame_objects.clear();
+                  return send_rval;
+              }
+              sent+=send_rval;
+              msg_string="frame";
+          }
+      }
+
+      m_frame_objects.clear();
+
+      return sent;
+  }
+
   int
   vehicleVisualizer::startServer()
   {
@@ -3,7 +3,11 @@
 #define VEHICLE_VISUALIZER_H
 
 #include "ns3/core-module.h"
+#include <chrono>
+#include <unordered_map>
 #define VIS_HEADING_INVALID 361
+// Maximum size of a "frame" datagram: larger frames are split in more datagrams
+#define VIS_MAX_FRAME_BYTES 60000
 #define DEFAULT_NODEJS_SERVER_PATH "./src/vehicle-visualizer/js/server.js"
 
 namespace ns3 {
@@ -51,6 +55,20 @@ namespace ns3 {
       int sendObjectUpdate(std::string objID, double lat, double lon);
       int sendObjectUpdate(std::string objID, double lat, double lon, double heading);
 
+      // These functions send the updates of many objects (e.g., all the vehicles of a simulation step) in a single "frame" message
+      // frameDue() tells whether a new frame can be sent, according to the maximum frame rate: if it returns false, the
+      // updates of this step should be skipped altogether
+      // Then, addFrameObject() should be called for every object and sendFrame() once, at the end
+      // Only the objects whose position or heading changed since they were last sent are included in the frame
+      // The objects added to a previous frame but not to this one (e.g., vehicles which left the simulation) are removed
+      // from the map: the frame carries a removal entry, made of the object ID only, for each of them
+      bool frameDue();
+      void addFrameObject(std::string objID, double lat, double lon, double heading);
+      int sendFrame();
+
+      // Setter to set the maximum number of frames sent per (wall clock) second (default: 20; 0 means no limit)
+      void setMaxFrameRate(double fps) {m_max_frame_rate=fps;}
+
       // This function should be called to terminate the execution of the Node.js server
       // Normally, the user should not call it, as it is automatically called by the destructor of the vehicleVisualizer object
       int terminateServer();
@@ -71,6 +89,17 @@ namespace ns3 {
       bool m_is_server_active;
       std::string m_serverpath;
 
+      double m_max_frame_rate = 20.0;
+      bool m_frame_sent = false;
+      std::chrono::steady_clock::time_point m_last_frame_time;
+      std::vector<std::string> m_frame_objects; // Objects added to the current frame, already formatted
+      struct sentObject {
+        std::string update; // Last formatted update sent for the object
+        uint64_t frame; // Last frame to which the object was added
+      };
+      std::unordered_map<std::string,sentObject> m_last_sent_objects; // Objects currently on the map
+      uint64_t m_frame_count = 0; // Frames built so far
+
       // Internal (private) function to open the UDP socket for the communication with the Node.js server
       int socketOpen(void);
   };